@@ -0,0 +1,139 @@
+"""
+Measure event-loop responsiveness (SSE heartbeat lag) under heavy site edit traffic.
+
+Usage (from apps/agent):
+    python -m benchmarks.bench_event_loop_lag [--editors 16] [--edits 40] [--size-kb 512]
+        [--max-lag-ms 50] [--json out.json]
+
+A heartbeat task stands in for the SSE stream: it wakes every --interval-ms
+and records how late it ran. Meanwhile --editors concurrent editors each
+read, modify and flush their own large site file. The store's memory budget
+is kept small so reads keep missing the cache and hitting the disk. The same
+workload runs twice:
+
+- blocking:  synchronous store calls, i.e. file I/O on the event loop (the old behaviour)
+- offloaded: async store calls, i.e. file I/O on the site I/O thread pool
+
+A well-behaved server keeps heartbeat lag close to zero in the offloaded run.
+Exits with status 1 if the offloaded p99 lag exceeds --max-lag-ms or the
+blocking run's p99 lag, i.e. if heartbeats would not stay on time.
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+from tools.site_documents import SiteDocumentStore
+
+
+async def _heartbeat(interval: float, lags: List[float], stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        expected = time.perf_counter() + interval
+        await asyncio.sleep(interval)
+        lags.append(max(0.0, time.perf_counter() - expected))
+
+
+async def _editor(store: SiteDocumentStore, site_id: str, edits: int, offloaded: bool) -> None:
+    for edit in range(edits):
+        if offloaded:
+            content = await store.aread(site_id, "index.html")
+            await store.awrite(site_id, "index.html", content.replace("<!--", f"<!-- {edit}", 1), flush=True)
+        else:
+            content = store.read(site_id, "index.html")
+            store.write(site_id, "index.html", content.replace("<!--", f"<!-- {edit}", 1), flush=True)
+        # Yield like a real request handler between tool calls
+        await asyncio.sleep(0)
+
+
+async def _run_mode(args: argparse.Namespace, sites_dir: Path, offloaded: bool) -> Dict[str, Any]:
+    # Budget for roughly two documents so most reads go to disk
+    store = SiteDocumentStore(
+        sites_dir, max_bytes=2 * args.size_kb * 1024, flush_delay=60.0, io_threads=args.io_threads
+    )
+    lags: List[float] = []
+    stop = asyncio.Event()
+    heartbeat = asyncio.create_task(_heartbeat(args.interval_ms / 1000, lags, stop))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        _editor(store, f"site_{index}", args.edits, offloaded) for index in range(args.editors)
+    ))
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await heartbeat
+    store._executor.shutdown(wait=True)
+
+    ordered = sorted(lags) or [0.0]
+    return {
+        "mode": "offloaded" if offloaded else "blocking",
+        "elapsed_seconds": elapsed,
+        "edits_per_second": args.editors * args.edits / elapsed if elapsed else None,
+        "heartbeats": len(lags),
+        "lag_mean_ms": statistics.mean(ordered) * 1000,
+        "lag_p50_ms": ordered[len(ordered) // 2] * 1000,
+        "lag_p99_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1000,
+        "lag_max_ms": ordered[-1] * 1000,
+        "disk_reads": store.disk_reads,
+        "disk_writes": store.disk_writes,
+    }
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        sites_dir = Path(tmp)
+        body = "<!-- marker -->\n" + ("<div class=\"p-4 text-gray-700\">lorem ipsum dolor sit amet</div>\n" * (args.size_kb * 16))
+        for index in range(args.editors):
+            site_dir = sites_dir / f"site_{index}"
+            site_dir.mkdir()
+            (site_dir / "index.html").write_text(body[: args.size_kb * 1024], encoding="utf-8")
+
+        for offloaded in (False, True):
+            results["offloaded" if offloaded else "blocking"] = await _run_mode(args, sites_dir, offloaded)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--editors", type=int, default=16, help="Concurrent editing sessions")
+    parser.add_argument("--edits", type=int, default=40, help="Edits per session")
+    parser.add_argument("--size-kb", type=int, default=512, help="Size of each site file")
+    parser.add_argument("--interval-ms", type=float, default=20.0, help="Heartbeat interval")
+    parser.add_argument("--io-threads", type=int, default=4, help="Site I/O thread pool size")
+    parser.add_argument("--max-lag-ms", type=float, default=50.0, help="Allowed offloaded p99 heartbeat lag")
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+
+    print(f"{'':10} {'edits/s':>9} {'lag p50':>9} {'lag p99':>9} {'lag max':>9} {'beats':>6}")
+    for name in ("blocking", "offloaded"):
+        r = results[name]
+        print(
+            f"{name:10} {r['edits_per_second']:9.1f} {r['lag_p50_ms']:7.2f}ms "
+            f"{r['lag_p99_ms']:7.2f}ms {r['lag_max_ms']:7.2f}ms {r['heartbeats']:6d}"
+        )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    offloaded, blocking = results["offloaded"]["lag_p99_ms"], results["blocking"]["lag_p99_ms"]
+    if offloaded > args.max_lag_ms:
+        print(f"FAIL offloaded p99 lag {offloaded:.2f}ms exceeds {args.max_lag_ms:.2f}ms")
+        sys.exit(1)
+    if offloaded > blocking:
+        print(f"FAIL offloaded p99 lag {offloaded:.2f}ms exceeds blocking p99 lag {blocking:.2f}ms")
+        sys.exit(1)
+    print("heartbeats stay on time")
+
+
+if __name__ == "__main__":
+    main()
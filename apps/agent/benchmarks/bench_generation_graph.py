@@ -0,0 +1,237 @@
+"""
+Cost of our own orchestration around the model: full generations with a stub LLM.
+
+Usage (from apps/agent):
+    python -m benchmarks.bench_generation_graph [--scenarios small,medium,huge,...] [--runs 3]
+        [--llm-latency-ms 0] [--candidates 1] [--storage filesystem] [--json out.json]
+
+ChatBot is replaced by benchmarks.stub_llm.ScriptedChatBot, which replays the
+tool calls of a scripted generation, so no provider or API key is needed.
+Each run goes through GenerateSiteTool.execute end to end: the warm generation
+pool, the compiled SiteGenerationGraph, the content agent calling
+ManageSiteFilesTool, the document store, verification and publishing.
+Sites are written to a temporary directory, or kept by the --storage
+backend (filesystem, sqlite or memory; see tools/site_storage.py).
+
+Per scenario (small, medium and huge sites, generated in one pass or as
+parallel sections; see stub_llm.SCENARIOS) it reports:
+
+- wall time per run (mean/p50/max)
+- per-node time and overhead (node time minus the time spent inside the stub LLM;
+  approximate for the concurrent section nodes, which share the stub)
+- manage_site_files calls and bytes written per run
+- allocations of one extra run under tracemalloc (peak traced bytes, allocated blocks)
+- peak RSS of the process after the scenario (a high-water mark, so run small first)
+
+--json writes the results together with the git commit, so they can be
+compared across commits.
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from benchmarks.stub_llm import SCENARIOS, Scenario, ScriptedChatBot
+from tools.generate_site import GenerateSiteTool, generation_pool
+from tools.metrics import instrument_llm
+from tools.progress import progress_listener
+from tools.site_documents import site_documents
+from tools.site_publisher import site_publisher
+from tools.site_storage import STORAGE_BACKENDS, open_storage
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _peak_rss_bytes() -> int:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+async def _generate(
+    tool: GenerateSiteTool, bot: ScriptedChatBot, scenario: Scenario, run: int, candidates: int
+) -> Dict[str, Any]:
+    """One generation; returns its wall time, per-node timings and file operations"""
+    events: List[Dict[str, Any]] = []
+    # node -> (perf_counter, stub LLM busy seconds) when it started
+    node_started: Dict[str, Tuple[float, float]] = {}
+    node_time: Dict[str, float] = defaultdict(float)
+    node_llm_time: Dict[str, float] = defaultdict(float)
+
+    def on_event(event: Dict[str, Any]) -> None:
+        events.append(event)
+        if event["event"] == "node_started":
+            node_started[event["step"]] = (time.perf_counter(), bot.busy_seconds)
+        elif event["event"] == "node_finished" and event["step"] in node_started:
+            started_at, busy_at = node_started.pop(event["step"])
+            node_time[event["step"]] += time.perf_counter() - started_at
+            node_llm_time[event["step"]] += bot.busy_seconds - busy_at
+
+    started = time.perf_counter()
+    with progress_listener(on_event):
+        raw = await tool.execute(
+            requirements=f"Benchmark {scenario.name} site #{run}", bypass_cache=True, candidates=candidates
+        )
+    await site_documents.aflush()
+    elapsed = time.perf_counter() - started
+
+    result = json.loads(raw)
+    file_operations: Dict[str, int] = defaultdict(int)
+    for event in events:
+        if event["event"] == "file_operation":
+            file_operations[event["operation"]] += 1
+    return {
+        "wall_seconds": elapsed,
+        "success": bool(result.get("success")),
+        "verification_passed": bool(result.get("verification_passed")),
+        "published": bool(result.get("published")),
+        "node_seconds": dict(node_time),
+        "node_llm_seconds": dict(node_llm_time),
+        "file_operations": dict(file_operations),
+        "bytes_written": events[-1]["total_bytes_written"] if events else 0,
+    }
+
+
+def _summarize(samples: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+    return {
+        "mean_ms": statistics.mean(samples) * 1000,
+        "p50_ms": ordered[len(ordered) // 2] * 1000,
+        "max_ms": ordered[-1] * 1000,
+    }
+
+
+async def run_scenario(scenario: Scenario, runs: int, latency: float, candidates: int) -> Dict[str, Any]:
+    bot = ScriptedChatBot(scenario, latency=latency)
+    generation_pool.llm_factory = lambda: instrument_llm(bot, "stub")
+    # Slots keep the ChatBot they were created with: start each scenario from an empty pool
+    generation_pool._idle.clear()
+    generation_pool._created = 0
+    tool = GenerateSiteTool()
+
+    # Warm-up: creates and compiles the pooled graph
+    await _generate(tool, bot, scenario, run=0, candidates=candidates)
+
+    samples = []
+    for run in range(1, runs + 1):
+        samples.append(await _generate(tool, bot, scenario, run, candidates))
+
+    tracemalloc.start()
+    await _generate(tool, bot, scenario, run=runs + 1, candidates=candidates)
+    snapshot = tracemalloc.take_snapshot()
+    _, traced_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    nodes = sorted({node for sample in samples for node in sample["node_seconds"]})
+    per_node = {}
+    for node in nodes:
+        node_seconds = [sample["node_seconds"].get(node, 0.0) for sample in samples]
+        llm_seconds = [sample["node_llm_seconds"].get(node, 0.0) for sample in samples]
+        per_node[node] = {
+            "mean_ms": statistics.mean(node_seconds) * 1000,
+            "overhead_mean_ms": statistics.mean(n - l for n, l in zip(node_seconds, llm_seconds)) * 1000,
+        }
+    operations = sorted({op for sample in samples for op in sample["file_operations"]})
+    return {
+        "scenario": scenario.__dict__,
+        "runs": runs,
+        "all_verified": all(sample["verification_passed"] for sample in samples),
+        "all_published": all(sample["published"] for sample in samples),
+        "wall": _summarize([sample["wall_seconds"] for sample in samples]),
+        "overhead": _summarize([
+            sample["wall_seconds"] - sum(sample["node_llm_seconds"].values()) for sample in samples
+        ]),
+        "nodes": per_node,
+        "file_operations_per_run": {
+            op: statistics.mean(sample["file_operations"].get(op, 0) for sample in samples) for op in operations
+        },
+        "bytes_written_per_run": statistics.mean(sample["bytes_written"] for sample in samples),
+        "tracemalloc_peak_bytes": traced_peak,
+        "tracemalloc_blocks": sum(stat.count for stat in snapshot.statistics("filename")),
+        "peak_rss_bytes": _peak_rss_bytes(),
+    }
+
+
+async def run(
+    scenario_names: List[str], runs: int, latency: float, candidates: int, storage: str = "filesystem"
+) -> Dict[str, Any]:
+    results: Dict[str, Any] = {
+        "benchmark": "generation_graph",
+        "commit": _git_commit(),
+        "timestamp": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "llm_latency_ms": latency * 1000,
+        "candidates": candidates,
+        "storage": storage,
+        "scenarios": {},
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        original_sites_dir, original_storage = site_documents.sites_dir, site_documents.storage
+        original_css_dir = site_publisher.stylesheets.directory
+        site_documents.sites_dir = Path(tmp)
+        site_documents.storage = open_storage(storage, Path(tmp))
+        site_publisher.stylesheets.directory = Path(tmp) / "_css"
+        try:
+            for name in scenario_names:
+                results["scenarios"][name] = await run_scenario(SCENARIOS[name], runs, latency, candidates)
+        finally:
+            site_documents.storage.close()
+            site_documents.sites_dir, site_documents.storage = original_sites_dir, original_storage
+            site_publisher.stylesheets.directory = original_css_dir
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="Comma-separated: " + ", ".join(SCENARIOS))
+    parser.add_argument("--runs", type=int, default=3, help="Timed runs per scenario")
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0, help="Simulated model latency per call")
+    parser.add_argument("--candidates", type=int, default=1, help="Speculative candidates per generation")
+    parser.add_argument("--storage", default="filesystem", choices=STORAGE_BACKENDS, help="Site storage backend")
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(unknown)}")
+
+    results = asyncio.run(run(names, args.runs, args.llm_latency_ms / 1000, args.candidates, args.storage))
+
+    print(f"{'scenario':10} {'wall ms':>10} {'overhead':>10} {'file ops':>9} {'KB written':>11} {'peak MB':>9} {'verified':>9}")
+    for name, r in results["scenarios"].items():
+        file_ops = sum(r["file_operations_per_run"].values())
+        print(
+            f"{name:10} {r['wall']['mean_ms']:10.1f} {r['overhead']['mean_ms']:10.1f} {file_ops:9.1f} "
+            f"{r['bytes_written_per_run'] / 1024:11.1f} {r['tracemalloc_peak_bytes'] / 2**20:9.1f} {str(r['all_verified']):>9}"
+        )
+        for node, timing in r["nodes"].items():
+            print(f"  {node:28} {timing['mean_ms']:10.2f} ms  (overhead {timing['overhead_mean_ms']:.2f} ms)")
+    print(f"peak RSS {max(r['peak_rss_bytes'] for r in results['scenarios'].values()) / 2**20:.1f} MB, commit {results['commit']}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
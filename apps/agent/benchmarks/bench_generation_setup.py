@@ -0,0 +1,104 @@
+"""
+Benchmark per-request setup cost of site generation: cold (what every
+generate_site call used to do) vs warm (borrowing a slot from the pool).
+
+Usage (from apps/agent):
+    python -m benchmarks.bench_generation_setup [--iterations 50] [--json out.json]
+
+Only setup is measured; no LLM requests are made. Creating a ChatBot needs
+the usual provider environment (e.g. OPENROUTER_API_KEY in .env).
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from typing import Any, Callable, Dict, List
+
+from dotenv import load_dotenv
+
+from tools.generate_site import create_generation_llm
+from tools.generation_pool import GenerationPool, SYSTEM_PROMPT_PATH
+from tools.graph_workflow import SiteGenerationGraph
+
+
+def _cold_setup() -> None:
+    """Replicates the old per-request setup in GenerateSiteTool.execute"""
+    llm = create_generation_llm()
+    with open(SYSTEM_PROMPT_PATH, "r") as f:
+        system_prompt = f.read()
+    graph = SiteGenerationGraph(llm, system_prompt).build()
+    graph.compile()
+
+
+def _summarize(samples: List[float]) -> Dict[str, Any]:
+    ordered = sorted(samples)
+    return {
+        "iterations": len(samples),
+        "mean_ms": statistics.mean(samples) * 1000,
+        "p50_ms": ordered[len(ordered) // 2] * 1000,
+        "p95_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000,
+        "max_ms": ordered[-1] * 1000,
+    }
+
+
+async def _measure_async(fn: Callable[[], Any], iterations: int) -> List[float]:
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        await fn()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+async def run(iterations: int) -> Dict[str, Any]:
+    cold = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        _cold_setup()
+        cold.append(time.perf_counter() - started)
+
+    pool = GenerationPool(create_generation_llm, size=1)
+    first_started = time.perf_counter()
+    await pool.warm_up(1)
+    first_slot = time.perf_counter() - first_started
+
+    async def borrow() -> None:
+        async with pool.acquire() as slot:
+            slot.graph._content_agent()
+
+    warm = await _measure_async(borrow, iterations)
+
+    cold_summary = _summarize(cold)
+    warm_summary = _summarize(warm)
+    return {
+        "cold": cold_summary,
+        "warm": warm_summary,
+        "first_slot_ms": first_slot * 1000,
+        "speedup": cold_summary["mean_ms"] / warm_summary["mean_ms"] if warm_summary["mean_ms"] else None,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    load_dotenv(override=True)
+    results = asyncio.run(run(args.iterations))
+
+    print(f"{'':8} {'mean ms':>10} {'p50 ms':>10} {'p95 ms':>10} {'max ms':>10}")
+    for name in ("cold", "warm"):
+        r = results[name]
+        print(f"{name:8} {r['mean_ms']:10.3f} {r['p50_ms']:10.3f} {r['p95_ms']:10.3f} {r['max_ms']:10.3f}")
+    print(f"first warm slot created in {results['first_slot_ms']:.3f} ms, speedup x{results['speedup']:.1f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Throughput of /sites/{site_id}: the old handler vs the cached, compressed one.
+
+Usage (from apps/agent):
+    python -m benchmarks.bench_site_serving [--requests 2000] [--concurrency 32] [--size-kb 256] [--json out.json]
+
+Requests go through httpx's in-process ASGI transport, so the numbers measure
+the handler (disk reads, encoding, compression) rather than the network.
+Three scenarios are reported:
+
+- before:      read index.html from disk and return it uncompressed (the old handler)
+- after:       cached gzip/brotli body negotiated from Accept-Encoding
+- after (304): revalidation with If-None-Match, as browsers do on reload
+"""
+
+import argparse
+import asyncio
+import json
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict
+
+import httpx
+from starlette.applications import Starlette
+from starlette.responses import HTMLResponse, Response
+from starlette.routing import Route
+
+from main import serve_generated_site
+from tools.site_documents import site_documents
+from tools.site_storage import FilesystemSiteStorage
+
+SITE_ID = "bench_site"
+
+
+async def legacy_serve_generated_site(request):
+    """The handler before HTTP caching: a disk read and an uncompressed body per hit"""
+    site_id = request.path_params['site_id']
+    index_file = site_documents.sites_dir / site_id / "index.html"
+    if not index_file.exists():
+        return Response(f"Site '{site_id}' not found", status_code=404)
+    return HTMLResponse(index_file.read_text())
+
+
+async def _hammer(
+    client: httpx.AsyncClient,
+    url: str,
+    requests: int,
+    concurrency: int,
+    headers: Dict[str, str],
+) -> Dict[str, Any]:
+    remaining = requests
+    statuses: Dict[int, int] = {}
+    transferred = 0
+
+    async def worker() -> None:
+        nonlocal remaining, transferred
+        while remaining > 0:
+            remaining -= 1
+            response = await client.get(url, headers=headers)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+            # Bytes on the wire (before httpx decompresses)
+            transferred += int(response.headers.get("content-length", len(response.content)))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        "requests": requests,
+        "elapsed_seconds": elapsed,
+        "requests_per_second": requests / elapsed if elapsed else None,
+        "bytes_per_response": transferred / requests if requests else 0,
+        "statuses": statuses,
+    }
+
+
+async def run(requests: int, concurrency: int, size_kb: int) -> Dict[str, Any]:
+    app = Starlette(routes=[
+        Route("/before/{site_id}", legacy_serve_generated_site),
+        Route("/sites/{site_id}", serve_generated_site),
+    ])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        original_sites_dir, original_storage = site_documents.sites_dir, site_documents.storage
+        site_documents.sites_dir = Path(tmp)
+        site_documents.storage = FilesystemSiteStorage(Path(tmp))
+        try:
+            site_dir = Path(tmp) / SITE_ID
+            site_dir.mkdir()
+            row = '<div class="rounded-lg bg-white p-6 shadow"><h2 class="text-xl font-bold">Card</h2></div>\n'
+            (site_dir / "index.html").write_text(
+                "<!DOCTYPE html><html><body>\n" + row * (size_kb * 1024 // len(row)) + "</body></html>\n",
+                encoding="utf-8",
+            )
+
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+                accept = {"Accept-Encoding": "br, gzip"}
+                before = await _hammer(client, f"/before/{SITE_ID}", requests, concurrency, accept)
+                after = await _hammer(client, f"/sites/{SITE_ID}", requests, concurrency, accept)
+                etag = (await client.get(f"/sites/{SITE_ID}", headers=accept)).headers["etag"]
+                revalidate = await _hammer(
+                    client, f"/sites/{SITE_ID}", requests, concurrency, {**accept, "If-None-Match": etag}
+                )
+        finally:
+            site_documents.sites_dir, site_documents.storage = original_sites_dir, original_storage
+
+    return {
+        "size_kb": size_kb,
+        "concurrency": concurrency,
+        "before": before,
+        "after": after,
+        "after_304": revalidate,
+        "speedup": after["requests_per_second"] / before["requests_per_second"],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--size-kb", type=int, default=256, help="Size of the generated index.html")
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.requests, args.concurrency, args.size_kb))
+
+    print(f"{'':12} {'req/s':>10} {'bytes/resp':>12} statuses")
+    for name in ("before", "after", "after_304"):
+        r = results[name]
+        print(f"{name:12} {r['requests_per_second']:10.1f} {r['bytes_per_response']:12.0f} {r['statuses']}")
+    print(f"speedup x{results['speedup']:.1f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Stress test: hundreds of concurrent generations, each in its own site.
+
+Usage (from apps/agent):
+    python -m benchmarks.stress_concurrent_generation [--generations 300] [--pool-size 16]
+        [--scenario small] [--llm-latency-ms 5] [--storage filesystem] [--json out.json]
+
+Fires all the GenerateSiteTool.execute calls at once (bypassing the generation
+cache) with benchmarks.stub_llm.ScriptedChatBot in place of the model, so
+every call allocates its site id and creates its site in the same instant,
+then checks that every site is isolated:
+
+- every call succeeded, with verification passed, and returned its own site_id
+- the storage holds exactly the returned sites, each with metadata.json naming
+  that site and the requirements of the call that created it
+- every index.html has the title of its own call (create_skeleton puts the
+  requirements there) and, apart from the title, equals the page the scripted
+  generation produces (edits leaking between sites would leave a site with
+  missing or doubled content)
+
+Exits with status 1 and lists the problems if any check fails.
+"""
+
+import argparse
+import asyncio
+import json
+import re
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List
+
+from benchmarks.stub_llm import SCENARIOS, ScriptedChatBot
+from tools.generate_site import GenerateSiteTool, generation_pool
+from tools.metrics import instrument_llm
+from tools.site_documents import site_documents
+from tools.site_publisher import site_publisher
+from tools.site_storage import STORAGE_BACKENDS, open_storage
+
+
+_TITLE = re.compile(r"<title>(.*?)</title>", re.S)
+
+
+def _requirements(index: int) -> str:
+    return f"Stress test site #{index}"
+
+
+async def _check_sites(results: List[Dict[str, Any]]) -> List[str]:
+    """Problems found in the generated sites (empty if every site is isolated)"""
+    problems = []
+    storage = site_documents.storage
+
+    for index, result in enumerate(results):
+        if not result.get("success") or not result.get("verification_passed"):
+            problems.append(f"generation #{index} failed: {result.get('error')}")
+
+    site_ids = [result["site_id"] for result in results if result.get("site_id")]
+    duplicates = [site_id for site_id, count in Counter(site_ids).items() if count > 1]
+    if duplicates:
+        problems.append(f"site ids returned more than once: {', '.join(sorted(duplicates))}")
+
+    stored = set(await site_documents.run_io(storage.list_sites))
+    if stored != set(site_ids):
+        problems.append(
+            f"stored sites differ from returned ones: {len(stored - set(site_ids))} unexpected, "
+            f"{len(set(site_ids) - stored)} missing"
+        )
+
+    reference = None
+    for index, result in enumerate(results):
+        site_id = result.get("site_id")
+        if not site_id:
+            continue
+        metadata = json.loads(await site_documents.aread(site_id, "metadata.json") or "{}")
+        if metadata.get("site_id") != site_id or metadata.get("requirements") != _requirements(index):
+            problems.append(f"site {site_id}: metadata.json belongs to another generation")
+        html = await site_documents.aread(site_id, "index.html") or ""
+        title = _TITLE.search(html)
+        if title is None or title.group(1).strip() != _requirements(index):
+            problems.append(f"site {site_id}: index.html does not have the title of its own generation")
+            continue
+        page = html[:title.start(1)] + html[title.end(1):]
+        reference = reference or page
+        if page != reference:
+            problems.append(f"site {site_id}: index.html differs from the scripted generation")
+    return problems
+
+
+async def run(generations: int, pool_size: int, scenario: str, latency: float, storage: str) -> Dict[str, Any]:
+    bot = ScriptedChatBot(SCENARIOS[scenario], latency=latency)
+    generation_pool.llm_factory = lambda: instrument_llm(bot, "stub")
+    generation_pool.size = pool_size
+    tool = GenerateSiteTool()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        original_sites_dir, original_storage = site_documents.sites_dir, site_documents.storage
+        original_css_dir = site_publisher.stylesheets.directory
+        site_documents.sites_dir = Path(tmp)
+        site_documents.storage = open_storage(storage, Path(tmp))
+        site_publisher.stylesheets.directory = Path(tmp) / "_css"
+        try:
+            started = time.perf_counter()
+            raw = await asyncio.gather(*(
+                tool.execute(requirements=_requirements(index), bypass_cache=True)
+                for index in range(generations)
+            ))
+            await site_documents.aflush()
+            elapsed = time.perf_counter() - started
+            problems = await _check_sites([json.loads(result) for result in raw])
+        finally:
+            site_documents.storage.close()
+            site_documents.sites_dir, site_documents.storage = original_sites_dir, original_storage
+            site_publisher.stylesheets.directory = original_css_dir
+
+    return {
+        "benchmark": "concurrent_generation",
+        "generations": generations,
+        "pool_size": pool_size,
+        "scenario": scenario,
+        "llm_latency_ms": latency * 1000,
+        "storage": storage,
+        "wall_seconds": elapsed,
+        "problems": problems,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--generations", type=int, default=300, help="Concurrent GenerateSiteTool.execute calls")
+    parser.add_argument("--pool-size", type=int, default=16, help="Pooled generation graphs (concurrent runs)")
+    parser.add_argument("--scenario", default="small", choices=list(SCENARIOS), help="Scripted generation")
+    parser.add_argument("--llm-latency-ms", type=float, default=5.0, help="Simulated model latency per call")
+    parser.add_argument("--storage", default="filesystem", choices=STORAGE_BACKENDS, help="Site storage backend")
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    results = asyncio.run(
+        run(args.generations, args.pool_size, args.scenario, args.llm_latency_ms / 1000, args.storage)
+    )
+
+    print(
+        f"{results['generations']} generations ({args.scenario}, pool {args.pool_size}, {args.storage}) "
+        f"in {results['wall_seconds']:.1f} s"
+    )
+    for problem in results["problems"][:50]:
+        print(f"  FAIL {problem}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    if results["problems"]:
+        print(f"{len(results['problems'])} problem(s)")
+        sys.exit(1)
+    print("every site is isolated")
+
+
+if __name__ == "__main__":
+    main()
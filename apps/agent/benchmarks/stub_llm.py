@@ -0,0 +1,269 @@
+"""
+Deterministic stand-in for the generation ChatBot, used by benchmarks.
+
+ScriptedChatBot replays a fixed sequence of manage_site_files tool calls
+instead of calling a model, so a benchmark measures only our orchestration:
+the graph engine, the content agent, the file tool, the document store,
+verification and publishing. The script is a pure function of the site_id,
+the generation attempt (both read from the prompt) and the number of
+assistant turns already in the agent's memory, so one bot can serve any
+number of concurrent or consecutive runs.
+
+Each run of a scenario:
+
+1. asks for the site outline, as the prompt tells the agent to
+2. replaces the APP_CONTENT_HERE placeholder with generated components, in
+   one edit per chunk (keeping the placeholder until the last chunk)
+3. on attempt ``retries + 1``: removes the SampleApp template component and
+   renders App (earlier attempts stop before this, so check_content_ready
+   sends the run around the retry loop)
+4. reads a line range back, then ends its turn
+
+Scenarios with ``sections`` answer the section planner with that many parts;
+each section agent then writes its part (a slice of the components) to its
+fragment file in one create_file call and the graph assembles the page.
+"""
+
+import asyncio
+import json
+import re
+import textwrap
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from spoon_ai.chat import ChatBot
+from spoon_ai.schema import Function, LLMResponse, ToolCall
+
+PLACEHOLDER = "// ========[APP_CONTENT_HERE]========"
+SAMPLE_APP = """      const SampleApp = () => {
+        return <div className="min-h-screen bg-gray-50">This is template content.</div>;
+      };
+"""
+
+_SITE_ID = re.compile(r'site_id: "([^"]+)"')
+_ATTEMPT = re.compile(r"This is attempt (\d+)")
+_FRAGMENT = re.compile(r'file_path: "(sections/(\w+)\.jsx)"')
+_COMPONENT_RANGE = re.compile(r"components (\d+)-(\d+)")
+
+
+@dataclass(frozen=True)
+class Scenario:
+    """Size and shape of a scripted generation"""
+
+    name: str
+    components: int  # Generated React components
+    chunk: int  # Components written per edit_file call
+    retries: int  # Attempts that stop early, before the SampleApp is replaced
+    sections: int = 0  # Parts in the section plan (below 2: the page is generated in one pass)
+
+
+SCENARIOS = {
+    "small": Scenario("small", components=4, chunk=4, retries=0),
+    "medium": Scenario("medium", components=24, chunk=8, retries=1),
+    "huge": Scenario("huge", components=160, chunk=20, retries=1),
+    "medium_parallel": Scenario("medium_parallel", components=24, chunk=8, retries=0, sections=4),
+    "huge_parallel": Scenario("huge_parallel", components=160, chunk=20, retries=0, sections=4),
+}
+
+
+def component_source(index: int) -> str:
+    """One generated section component (about 30 lines of JSX)"""
+    return f"""      const Section{index} = ({{ onSelect }}) => {{
+        const [open, setOpen] = useState(false);
+        const [count, setCount] = useState({index});
+        useEffect(() => {{
+          document.title = `Section {index}: ${{count}}`;
+        }}, [count]);
+        const items = ["Alpha", "Beta", "Gamma", "Delta"].map((label, i) => ({{ id: i, label: `${{label}} {index}` }}));
+        return (
+          <section id="section-{index}" className="mx-auto max-w-6xl px-4 py-16 sm:px-6 lg:px-8">
+            <div className="flex items-center justify-between gap-4">
+              <h2 className="text-3xl font-bold tracking-tight text-gray-900">Section {index}</h2>
+              <button
+                type="button"
+                className="rounded-lg bg-indigo-600 px-4 py-2 text-sm font-semibold text-white hover:bg-indigo-500"
+                onClick={{() => setOpen(!open)}}
+              >
+                {{open ? "Hide details" : "Show details"}}
+              </button>
+            </div>
+            {{open && (
+              <ul className="mt-8 grid grid-cols-1 gap-6 md:grid-cols-2">
+                {{items.map((item) => (
+                  <li key={{item.id}} className="rounded-xl border border-gray-200 bg-white p-6 shadow-sm">
+                    <p className="text-lg font-medium text-gray-800">{{item.label}}</p>
+                    <button className="mt-4 text-indigo-600 hover:underline" onClick={{() => {{ setCount(count + 1); onSelect(item); }}}}>
+                      Select ({{count}})
+                    </button>
+                  </li>
+                ))}}
+              </ul>
+            )}}
+          </section>
+        );
+      }};
+"""
+
+
+def app_source(components: int) -> str:
+    """The App component rendering every generated section"""
+    sections = "\n".join(f"            <Section{i} onSelect={{setSelected}} />" for i in range(components))
+    return f"""      const App = () => {{
+        const [selected, setSelected] = useState(null);
+        return (
+          <main className="min-h-screen bg-gray-50">
+            <header className="bg-white shadow">
+              <h1 className="px-4 py-6 text-4xl font-extrabold">Benchmark site</h1>
+              {{selected && <p className="px-4 pb-4 text-gray-600">Selected: {{selected.label}}</p>}}
+            </header>
+{sections}
+          </main>
+        );
+      }};
+"""
+
+
+def section_plan(scenario: Scenario) -> List[Dict[str, Any]]:
+    """The planner's answer: contiguous slices of the components, one per part"""
+    if scenario.sections < 2:
+        return []
+    size = -(-scenario.components // scenario.sections)
+    return [
+        {
+            "component": f"Part{part}",
+            "name": f"Part {part}",
+            "description": f"components {start}-{min(start + size, scenario.components) - 1}",
+        }
+        for part, start in enumerate(range(0, scenario.components, size))
+    ]
+
+
+def fragment_source(component: str, first: int, last: int) -> str:
+    """A section fragment: its slice of the components and a wrapper rendering them"""
+    sections = "\n".join(f"            <Section{i} onSelect={{setSelected}} />" for i in range(first, last + 1))
+    wrapper = f"""      const {component} = () => {{
+        const [selected, setSelected] = useState(null);
+        return (
+          <div data-selected={{selected ? selected.label : ""}}>
+{sections}
+          </div>
+        );
+      }};
+"""
+    return textwrap.dedent("\n".join(component_source(i) for i in range(first, last + 1)) + "\n" + wrapper)
+
+
+def script_for(scenario: Scenario, site_id: str, attempt: int) -> List[Dict[str, Any]]:
+    """The manage_site_files calls of one generation attempt"""
+    calls: List[Dict[str, Any]] = [{"operation": "site_outline"}]
+    if attempt == 1:
+        starts = list(range(0, scenario.components, scenario.chunk))
+        for position, start in enumerate(starts):
+            chunk = "\n".join(component_source(i) for i in range(start, min(start + scenario.chunk, scenario.components)))
+            last = position == len(starts) - 1
+            calls.append({
+                "operation": "edit_file",
+                "old_string": PLACEHOLDER,
+                # The placeholder is indented in the template; so is the first line written over it
+                "new_string": (chunk + "\n" + (app_source(scenario.components) if last else "      " + PLACEHOLDER)).lstrip(),
+            })
+    if attempt == scenario.retries + 1:
+        calls.append({
+            "operation": "apply_edits",
+            "edits": [
+                {"old_string": SAMPLE_APP, "new_string": ""},
+                {"old_string": "<SampleApp />", "new_string": "<App />"},
+            ],
+        })
+    calls.append({"operation": "read_file", "start_line": 1, "end_line": 40})
+    for call in calls:
+        call.update(site_id=site_id, file_path="index.html")
+    return calls
+
+
+def _text(message: Any) -> str:
+    content = getattr(message, "content", None)
+    if content is None and isinstance(message, dict):
+        content = message.get("content")
+    return content if isinstance(content, str) else ""
+
+
+def _role(message: Any) -> str:
+    role = getattr(message, "role", None)
+    if role is None and isinstance(message, dict):
+        role = message.get("role")
+    return getattr(role, "value", role) or ""
+
+
+class ScriptedChatBot(ChatBot):
+    """ChatBot replacement replaying a scenario's tool calls (see module docstring)"""
+
+    def __init__(self, scenario: Scenario, latency: float = 0.0):
+        """
+        Args:
+            scenario: Script to replay
+            latency: Simulated model latency per call, in seconds
+        """
+        # ChatBot.__init__ resolves providers and API keys; the stub needs none of that
+        self.scenario = scenario
+        self.latency = latency
+        self.model_name = "stub"
+        self.calls = 0
+        self.busy_seconds = 0.0
+
+    async def ask_tool(
+        self,
+        messages: List[Any],
+        system_msg: Optional[str] = None,
+        tools: Optional[List[dict]] = None,
+        tool_choice: Optional[str] = None,
+        output_queue: Optional[asyncio.Queue] = None,
+        **kwargs: Any,
+    ) -> LLMResponse:
+        started = time.perf_counter()
+        try:
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            prompt = next((_text(m) for m in messages if _role(m) == "user"), "")
+            site_id = _SITE_ID.search(prompt)
+            attempt = _ATTEMPT.search(prompt)
+            fragment = _FRAGMENT.search(prompt)
+            components = _COMPONENT_RANGE.search(prompt)
+            step = sum(1 for m in messages if _role(m) == "assistant")
+            if fragment and components:
+                script = [{
+                    "operation": "create_file",
+                    "site_id": site_id.group(1) if site_id else "",
+                    "file_path": fragment.group(1),
+                    "content": fragment_source(fragment.group(2), int(components.group(1)), int(components.group(2))),
+                }]
+            else:
+                script = script_for(self.scenario, site_id.group(1) if site_id else "", int(attempt.group(1)) if attempt else 1)
+            self.calls += 1
+
+            if step >= len(script):
+                return LLMResponse(content="The site is complete.", finish_reason="stop", native_finish_reason="stop")
+            call = ToolCall(
+                id=f"call_{self.calls}",
+                function=Function(name="manage_site_files", arguments=json.dumps(script[step])),
+            )
+            return LLMResponse(content="", tool_calls=[call], finish_reason="tool_calls", native_finish_reason="tool_calls")
+        finally:
+            self.busy_seconds += time.perf_counter() - started
+
+    async def ask(
+        self,
+        messages: List[Any],
+        system_msg: Optional[str] = None,
+        output_queue: Optional[asyncio.Queue] = None,
+    ) -> str:
+        """Answer the section planner"""
+        started = time.perf_counter()
+        try:
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            self.calls += 1
+            return json.dumps(section_plan(self.scenario))
+        finally:
+            self.busy_seconds += time.perf_counter() - started
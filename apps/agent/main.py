@@ -3,35 +3,132 @@
 from dotenv import load_dotenv
 import warnings
 import logging
-from pathlib import Path
+import os
+import stat
+from contextlib import asynccontextmanager
+from pathlib import Path, PurePosixPath
 from starlette.applications import Starlette
-from starlette.responses import HTMLResponse, Response
+from starlette.responses import FileResponse, HTMLResponse, PlainTextResponse, Response, StreamingResponse
 from starlette.routing import Route, Mount
 from starlette.middleware.cors import CORSMiddleware
-from mcp_server import mcp, GENERATED_SITES_DIR
+from mcp_server import mcp, generation_jobs
+from tools.generation_cache import generation_cache
+from tools.generation_checkpoints import generation_checkpoints
+from tools.metrics import event_loop_monitor, generation_queue_depth, registry, sse_sessions
+from tools.generate_site import generation_pool, speculative_generator
+from tools.site_documents import site_documents
+from tools.site_http_cache import (
+    choose_encoding,
+    file_etag,
+    http_date,
+    is_not_modified,
+    is_text_asset,
+    media_type_for,
+    resolves_inside,
+    safe_site_path,
+    site_responses,
+    stored_file_etag,
+)
+from tools.site_catalog import site_catalog
+from tools.site_outline import site_outlines
+from tools.site_retention import site_retention
+from tools.site_snapshots import site_snapshots
+from tools.site_publisher import site_publisher
+from tools.vendor_mirror import vendor_mirror
 
 load_dotenv(override=True)
 warnings.filterwarnings("ignore", category=DeprecationWarning, module="websockets")
 logging.basicConfig(level=logging.INFO)
 
 
+# Readiness fails while the event loop is this late (seconds)
+MAX_EVENT_LOOP_LAG = float(os.getenv("HEALTH_MAX_EVENT_LOOP_LAG", "0.5"))
+
+# Set once startup (pool warm-up) has finished
+_started = False
+
+
+def readiness() -> dict:
+    """Whether the server can take work: started, queue not full, event loop responsive"""
+    jobs = generation_jobs.stats()
+    checks = {
+        "started": _started,
+        "queue_accepting": jobs["queued"] < jobs["max_queue_size"],
+        "event_loop_responsive": event_loop_monitor.lag <= MAX_EVENT_LOOP_LAG,
+    }
+    return {
+        "ready": all(checks.values()),
+        "checks": checks,
+        "queue_depth": jobs["queued"],
+        "running_generations": jobs["running"],
+        "event_loop": event_loop_monitor.stats(),
+        "max_event_loop_lag_seconds": MAX_EVENT_LOOP_LAG,
+    }
+
+
 # Health check endpoint
 async def health(request):
-    """Health check endpoint."""
+    """Health check endpoint: 200 when ready to take work, 503 otherwise."""
     import json
 
+    ready = readiness()
     return Response(
         json.dumps(
             {
                 "name": "Neo0Agent Server (MCP Streamable HTTP)",
                 "version": "1.0.0",
-                "status": "running",
+                "status": "ready" if ready["ready"] else "not_ready",
+                "readiness": ready,
+                "generation_cache": generation_cache.stats(),
+                "generation_jobs": generation_jobs.stats(),
+                "generation_pool": generation_pool.stats(),
+                "speculative_generation": speculative_generator.stats(),
+                "generation_checkpoints": generation_checkpoints.stats(),
+                "site_documents": site_documents.stats(),
+                "site_responses": site_responses.stats(),
+                "site_outlines": site_outlines.stats(),
+                "site_snapshots": site_snapshots.stats(),
+                "site_catalog": site_catalog.stats(),
+                "site_retention": site_retention.stats(),
+                "site_publisher": site_publisher.stats(),
+                "vendor_mirror": vendor_mirror.stats(),
             }
         ),
         media_type="application/json",
+        status_code=200 if ready["ready"] else 503,
     )
 
 
+async def metrics(request):
+    """Prometheus metrics (text exposition format 0.0.4)."""
+    generation_queue_depth.set(generation_jobs.queued_count)
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+class SSESessionMetrics:
+    """ASGI middleware counting open Server-Sent Events streams in the neo0_sse_sessions gauge"""
+
+    def __init__(self, app):
+        self.app = app
+
+    @staticmethod
+    def _stream(scope) -> str:
+        path = scope.get("path", "")
+        if path == "/sse":
+            return "mcp"
+        if path.startswith("/jobs/") and path.endswith("/events"):
+            return "job_events"
+        return ""
+
+    async def __call__(self, scope, receive, send):
+        stream = self._stream(scope) if scope["type"] == "http" else ""
+        if not stream:
+            await self.app(scope, receive, send)
+            return
+        with sse_sessions.track_inprogress(stream=stream):
+            await self.app(scope, receive, send)
+
+
 # Serve test page
 async def serve_test_page(request):
     """Serve the test HTML page."""
@@ -43,33 +140,224 @@ async def serve_test_page(request):
 
 # Serve generated site
 async def serve_generated_site(request):
-    """Serve a generated site's index.html file."""
+    """
+    Serve a generated site's index.html or another file from its directory.
+
+    Text files come from the site document store with strong ETags, 304
+    handling and cached gzip/brotli bodies; binary assets are streamed from
+    disk with FileResponse (or read from the SQLite/in-memory storage
+    backend). index.html is served from the published build
+    (dist/index.html, precompiled, no in-browser Babel) while that build is
+    fresh for the current source; ?source=1 always returns the source.
+    """
     site_id = request.path_params['site_id']
-    site_dir = GENERATED_SITES_DIR / site_id
-    index_file = site_dir / "index.html"
+    file_path = request.path_params.get('file_path') or "index.html"
+
+    if safe_site_path(site_documents.sites_dir, site_id, file_path) is None:
+        return Response("Not found", status_code=404)
+    # Records the access for retention, restoring the site first if it was archived
+    await site_retention.touch(site_id)
+
+    if is_text_asset(file_path):
+        document = await site_documents.aget(site_id, file_path)
+        if document is None:
+            if file_path == "index.html":
+                return Response(f"Site '{site_id}' not found", status_code=404)
+            return Response(f"File '{file_path}' not found", status_code=404)
+        if file_path == "index.html" and "source" not in request.query_params:
+            document = await site_publisher.fresh_output(site_id, document) or document
+        asset = site_responses.lookup(document)
+        if asset is None:
+            asset = await site_documents.run_io(site_responses.build, document)
+        return _cached_asset_response(request, asset)
+
+    return await _site_file_response(request, site_id, file_path)
+
+
+def _cached_asset_response(request, asset) -> Response:
+    """Build a 200/304 response for a cached text asset, negotiating Content-Encoding"""
+    encoding = choose_encoding(request.headers.get("accept-encoding"), asset.encodings)
+    headers = {
+        "ETag": asset.etag(encoding),
+        "Last-Modified": http_date(asset.modified_at),
+        # Sites are editable: always revalidate, which is a cheap 304 when unchanged
+        "Cache-Control": "no-cache",
+        "Vary": "Accept-Encoding",
+    }
+    if is_not_modified(
+        request.headers.get("if-none-match"),
+        request.headers.get("if-modified-since"),
+        asset.etags,
+        asset.modified_at,
+    ):
+        return Response(status_code=304, headers=headers)
+
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return Response(asset.bodies[encoding], media_type=asset.media_type, headers=headers)
+
+
+async def _site_file_response(request, site_id: str, file_path: str) -> Response:
+    """Serve a binary site asset from disk (sendfile-style), with validators and 304 handling"""
+    path = site_documents.storage.local_path(site_id, file_path)
+    if path is None:
+        return await _stored_file_response(request, site_id, file_path)
+    site_dir = site_documents.storage.local_path(site_id, "")
 
-    if not index_file.exists():
-        return Response(f"Site '{site_id}' not found", status_code=404)
+    def stat_if_servable():
+        if not resolves_inside(path, site_dir):
+            return None
+        try:
+            stat_result = path.stat()
+        except OSError:
+            return None
+        return stat_result if stat.S_ISREG(stat_result.st_mode) else None
 
-    return HTMLResponse(index_file.read_text())
+    stat_result = await site_documents.run_io(stat_if_servable)
+    if stat_result is None:
+        return Response(f"File '{path.name}' not found", status_code=404)
+
+    headers = {
+        "ETag": file_etag(stat_result),
+        "Last-Modified": http_date(stat_result.st_mtime),
+        "Cache-Control": "no-cache",
+    }
+    if is_not_modified(
+        request.headers.get("if-none-match"),
+        request.headers.get("if-modified-since"),
+        [headers["ETag"]],
+        stat_result.st_mtime,
+    ):
+        return Response(status_code=304, headers=headers)
+
+    return FileResponse(path, stat_result=stat_result, headers=headers)
+
+
+async def _stored_file_response(request, site_id: str, file_path: str) -> Response:
+    """Serve a binary site asset from a storage backend without files on disk (SQLite, memory)"""
+    found = await site_documents.run_io(site_documents.storage.read, site_id, file_path)
+    if found is None:
+        return Response(f"File '{PurePosixPath(file_path).name}' not found", status_code=404)
+    data, modified_at = found
+
+    headers = {
+        "ETag": stored_file_etag(len(data), modified_at),
+        "Last-Modified": http_date(modified_at),
+        "Cache-Control": "no-cache",
+    }
+    if is_not_modified(
+        request.headers.get("if-none-match"),
+        request.headers.get("if-modified-since"),
+        [headers["ETag"]],
+        modified_at,
+    ):
+        return Response(status_code=304, headers=headers)
+
+    return Response(data, media_type=media_type_for(file_path), headers=headers)
+
+
+async def serve_vendor_file(request):
+    """
+    Serve a file from the local ESM mirror (/vendor/<name>@<version>/<path>).
+
+    A name@version directory never changes once extracted, so responses are
+    cacheable forever.
+    """
+    path = await site_documents.run_io(vendor_mirror.resolve_file, request.path_params['path'])
+    if path is None:
+        return Response("Not found", status_code=404)
+
+    return FileResponse(
+        path,
+        media_type=media_type_for(path.name),
+        headers={"Cache-Control": "public, max-age=31536000, immutable"},
+    )
+
+
+# Stream a generation job's progress events
+async def stream_job_events(request):
+    """Stream a generation job's progress events as Server-Sent Events."""
+    import json
+
+    job_id = request.path_params['job_id']
+    job = generation_jobs.get(job_id)
+    if job is None:
+        return Response(f"Job '{job_id}' not found", status_code=404)
+
+    # Resume after the last event the client saw (EventSource reconnects send Last-Event-ID)
+    since = request.headers.get("last-event-id") or request.query_params.get("since") or "0"
+    since = int(since) if since.isdigit() else 0
+
+    async def event_stream():
+        async for event in generation_jobs.stream_events(job_id, since=since):
+            yield f"id: {event['seq']}\nevent: progress\ndata: {json.dumps(event)}\n\n"
+        yield f"event: done\ndata: {json.dumps(generation_jobs.describe(job))}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 # Create the MCP app using SSE transport
 # This creates routes at /sse and /messages
 mcp_app = mcp.sse_app()
 
+@asynccontextmanager
+async def lifespan(app):
+    """Warm one generation slot and start the event-loop monitor and site retention at startup; flush buffered site edits at shutdown."""
+    global _started
+    event_loop_monitor.start()
+    try:
+        await generation_pool.warm_up(1)
+    except Exception:
+        logging.exception("Could not warm up the generation pool; slots will be created on demand")
+    try:
+        logging.info("Site version history gc: %s", await site_documents.run_io(site_snapshots.gc))
+    except OSError:
+        logging.exception("Site version history gc failed")
+    try:
+        rebuilt = await site_documents.run_io(site_catalog.ensure_built)
+        if rebuilt is not None:
+            logging.info("Site catalog was empty, indexed %d sites from disk", rebuilt)
+    except Exception:
+        logging.exception("Could not open the site catalog; run python -m tools.site_catalog rebuild")
+    unfinished = await generation_checkpoints.alist()
+    if unfinished:
+        logging.info(
+            "%d interrupted generation(s) can be finished with resume_generation: %s",
+            len(unfinished),
+            ", ".join(checkpoint.site_id for checkpoint in unfinished),
+        )
+    site_retention.start()
+    _started = True
+    yield
+    _started = False
+    await site_retention.stop()
+    await event_loop_monitor.stop()
+    await site_documents.aflush()
+
+
 # Create main Starlette app with routes
 app = Starlette(
     debug=True,
+    lifespan=lifespan,
     routes=[
         Route("/", serve_test_page),
         Route("/health", health),
+        Route("/metrics", metrics),
         Route("/sites/{site_id}", serve_generated_site),
+        Route("/sites/{site_id}/{file_path:path}", serve_generated_site),
+        Route("/vendor/{path:path}", serve_vendor_file),
+        Route("/jobs/{job_id}/events", stream_job_events),
         # Mount MCP app at root so /sse and /messages endpoints are available
         Mount("/", mcp_app),
     ],
 )
 
+app.add_middleware(SSESessionMetrics)
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -88,7 +376,10 @@ def main():
     logging.info("- MCP SSE endpoint: http://localhost:8000/sse")
     logging.info("- MCP messages endpoint: http://localhost:8000/messages")
     logging.info("- Test page: http://localhost:8000")
-    logging.info("- Generated sites: http://localhost:8000/sites/{site_id}")
+    logging.info("- Generated sites: http://localhost:8000/sites/{site_id} (assets: /sites/{site_id}/{path})")
+    logging.info("- Vendored ES modules: http://localhost:8000/vendor/{name}@{version}/{path}")
+    logging.info("- Job progress (SSE): http://localhost:8000/jobs/{job_id}/events")
+    logging.info("- Health / metrics: http://localhost:8000/health, http://localhost:8000/metrics")
     logging.info("- stdio server: python run_mcp_server.py")
 
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -1,11 +1,21 @@
 """MCP server implementation using the official Python SDK."""
+import functools
 import json
 import logging
-from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 
-from mcp.server.fastmcp import FastMCP
+from mcp.server.fastmcp import FastMCP, Context
 from tools import GenerateSiteTool, ManageSiteFilesTool
+from tools.generation_checkpoints import generation_checkpoints
+from tools.generation_jobs import GenerationJobManager, QueueFullError
+from tools.manage_site_files import WRITE_OPERATIONS
+from tools.site_catalog import SORT_COLUMNS, site_catalog
+from tools.site_documents import site_documents, SITES_DIR
+from tools.site_outline import site_outlines
+from tools.site_retention import site_retention
+from tools.site_snapshots import site_snapshots
+from tools.site_publisher import PublishError, site_publisher
+from tools.vendor_mirror import vendor_mirror
 
 # Create FastMCP server instance
 mcp = FastMCP("Neo0Agent")
@@ -14,8 +24,33 @@ mcp = FastMCP("Neo0Agent")
 _generate_tool = GenerateSiteTool()
 _manage_tool = ManageSiteFilesTool()
 
+# Background generation jobs (bounded worker pool + FIFO queue)
+generation_jobs = GenerationJobManager.from_env(_generate_tool.execute)
+
 # Directory for generated sites
-GENERATED_SITES_DIR = Path(__file__).parent / "generated_sites"
+GENERATED_SITES_DIR = SITES_DIR
+
+
+def _describe_event(event: Dict[str, Any]) -> str:
+    """One-line human readable summary of a generation progress event"""
+    if event.get("event") == "file_operation":
+        summary = f"{event.get('operation')} {event.get('file_path')}"
+    else:
+        summary = f"{event.get('event', 'progress')}: {event.get('step')}"
+    return (
+        f"{summary} (attempt {event.get('attempt', 0)}, "
+        f"{event.get('elapsed_seconds', 0):.1f}s, {event.get('total_bytes_written', 0)} bytes written)"
+    )
+
+
+async def _notify_progress(ctx: Context, event: Dict[str, Any]) -> None:
+    """Forward a generation progress event to the MCP client"""
+    try:
+        await ctx.report_progress(progress=event.get("seq", 0), message=_describe_event(event))
+        await ctx.debug(json.dumps(event))
+    except Exception:
+        # The client may have gone away; generation keeps running as a job
+        logging.debug("Could not deliver progress notification", exc_info=True)
 
 
 # Tools
@@ -24,29 +59,153 @@ async def generate_site(
     requirements: str,
     site_type: str = "",
     style_preferences: str = "",
+    bypass_cache: bool = False,
+    candidates: int = 0,
+    token_budget: int = 0,
+    wait: bool = False,
+    ctx: Context = None,
 ) -> str:
     """
-    Generate a complete, production-ready single-page website.
+    Start generating a complete, production-ready single-page website.
+
+    Generation runs in the background and can take several minutes. This tool
+    returns a job_id immediately; poll get_generation_job with it until status
+    is "succeeded" or "failed" to get the site_id and URL. With wait=true the
+    call blocks instead and streams each step as MCP progress notifications.
 
     Args:
         requirements: Detailed requirements and specifications for the website
         site_type: Optional type of site (e.g., 'landing page', 'portfolio', 'game')
         style_preferences: Optional styling preferences like color scheme, animations, etc.
+        bypass_cache: Force a fresh generation instead of cloning an identical cached one
+        candidates: Generate this many candidates concurrently and keep the first verified one
+            (0 = server default); lowers tail latency at a higher token cost
+        token_budget: Total LLM tokens for all candidates together (0 = server default)
+        wait: Block until the job finishes and return the site information directly
 
     Returns:
-        JSON string with site information including site_id, url, and metadata
+        JSON string with the job status (job_id, status, queue_position), or the
+        site information (site_id, url, metadata) when wait is true
     """
-    result = await _generate_tool.execute(
-        requirements=requirements,
-        site_type=site_type,
-        style_preferences=style_preferences,
+    try:
+        job = await generation_jobs.submit(
+            requirements=requirements,
+            site_type=site_type,
+            style_preferences=style_preferences,
+            bypass_cache=bypass_cache,
+            candidates=candidates,
+            token_budget=token_budget,
+        )
+    except QueueFullError as e:
+        return json.dumps({"success": False, "job_id": None, "status": "rejected", "error": str(e)}, indent=2)
+
+    if wait:
+        async for event in generation_jobs.stream_events(job.job_id):
+            if ctx is not None:
+                await _notify_progress(ctx, event)
+        if job.result is not None:
+            return json.dumps(job.result, indent=2)
+
+    data = generation_jobs.describe(job)
+    data["message"] = (
+        f"Site generation job '{job.job_id}' is {job.status}. "
+        f"Call get_generation_job with this job_id to check progress and get the site_id when it finishes."
     )
+    return json.dumps(data, indent=2)
 
-    # Ensure result is a string (MCP tools return strings)
-    if isinstance(result, dict):
-        return json.dumps(result)
 
-    return result
+@mcp.tool()
+async def resume_generation(site_id: str = "", wait: bool = False, ctx: Context = None) -> str:
+    """
+    Finish a site generation that was interrupted (e.g. by a server restart).
+
+    Generation is checkpointed before every step, including each tool call of
+    the content agent, so a resumed run only redoes the work after the last
+    checkpoint. Like generate_site, this returns a job_id to poll with
+    get_generation_job, or blocks until the job finishes with wait=true.
+
+    Args:
+        site_id: Site of the interrupted generation (YYYYMMDD_HHMMSS_ffffff_xxxxxx,
+            e.g. 20261016_142501_048213_9f3a1c); leave empty to list the generations that can be resumed
+        wait: Block until the job finishes and return the site information directly
+
+    Returns:
+        JSON string with the job status, the site information when wait is true,
+        or the resumable generations when site_id is empty
+    """
+    if not site_id:
+        checkpoints = await generation_checkpoints.alist()
+        resumable = [
+            checkpoint.describe() for checkpoint in checkpoints if not generation_checkpoints.running(checkpoint.site_id)
+        ]
+        return json.dumps({"success": True, "resumable": resumable, "count": len(resumable)}, indent=2)
+
+    if generation_checkpoints.running(site_id):
+        return json.dumps({"success": False, "site_id": site_id, "error": f"Site '{site_id}' is still being generated"}, indent=2)
+    if not await generation_checkpoints.aexists(site_id):
+        return json.dumps({"success": False, "site_id": site_id, "error": f"No unfinished generation to resume for site '{site_id}'"}, indent=2)
+
+    try:
+        job = await generation_jobs.submit(runner=_generate_tool.resume, site_id=site_id)
+    except QueueFullError as e:
+        return json.dumps({"success": False, "job_id": None, "status": "rejected", "error": str(e)}, indent=2)
+
+    if wait:
+        async for event in generation_jobs.stream_events(job.job_id):
+            if ctx is not None:
+                await _notify_progress(ctx, event)
+        if job.result is not None:
+            return json.dumps(job.result, indent=2)
+
+    data = generation_jobs.describe(job)
+    data["message"] = (
+        f"Resume job '{job.job_id}' for site '{site_id}' is {job.status}. "
+        f"Call get_generation_job with this job_id to check progress."
+    )
+    return json.dumps(data, indent=2)
+
+
+@mcp.tool()
+async def get_generation_job(job_id: str, since: int = -1) -> str:
+    """
+    Get the status of a site generation job started by generate_site.
+
+    Args:
+        job_id: Job identifier returned by generate_site
+        since: Optional event cursor; when >= 0, also return the progress events
+            with seq greater than this value (use the last seq you received)
+
+    Returns:
+        JSON string with status (queued, running, succeeded, failed, cancelled),
+        current step, latest progress event, queue position, and the site
+        information once finished
+    """
+    job = generation_jobs.get(job_id)
+    if job is None:
+        return json.dumps({"success": False, "job_id": job_id, "error": f"Job '{job_id}' not found"}, indent=2)
+
+    data = generation_jobs.describe(job)
+    if since >= 0:
+        data["events"] = [event for event in job.events if event.get("seq", 0) > since]
+    return json.dumps(data, indent=2)
+
+
+@mcp.tool()
+async def cancel_generation_job(job_id: str) -> str:
+    """
+    Cancel a queued or running site generation job.
+
+    Args:
+        job_id: Job identifier returned by generate_site
+
+    Returns:
+        JSON string with the job's resulting status
+    """
+    job = generation_jobs.cancel(job_id)
+    if job is None:
+        return json.dumps({"success": False, "job_id": job_id, "error": f"Job '{job_id}' not found"}, indent=2)
+
+    return json.dumps(generation_jobs.describe(job), indent=2)
 
 
 @mcp.tool()
@@ -57,17 +216,42 @@ async def manage_site_files(
     content: str = "",
     old_string: str = "",
     new_string: str = "",
+    edits: Optional[List[Dict[str, Any]]] = None,
+    diff: str = "",
+    start_line: Optional[int] = None,
+    end_line: Optional[int] = None,
+    byte_offset: Optional[int] = None,
+    byte_length: Optional[int] = None,
+    pattern: str = "",
+    regex: bool = False,
+    ignore_case: bool = False,
+    context_lines: int = 2,
+    max_matches: int = 20,
+    expected_version: Optional[str] = None,
 ) -> str:
     """
     Manage files in generated sites - create, edit, read, or delete files.
 
     Args:
-        operation: File operation (create_file, edit_file, read_file, delete_file)
-        site_id: Unique site identifier (timestamp format: YYYYMMDD_HHMMSS)
+        operation: File operation (create_file, edit_file, apply_edits, read_file, search_file, site_outline, delete_file)
+        site_id: Unique site identifier (YYYYMMDD_HHMMSS_ffffff_xxxxxx, e.g. 20261016_142501_048213_9f3a1c)
         file_path: Relative path to file within site directory
         content: File content for create_file operation
         old_string: String to find and replace in edit_file operation
         new_string: Replacement string for edit_file operation
+        edits: Ordered {old_string, new_string, replace_all} replacements for apply_edits
+        diff: Unified diff for apply_edits (applied before edits)
+        start_line: First line (1-based) to return from read_file
+        end_line: Last line (1-based, inclusive) to return from read_file
+        byte_offset: First byte to return from read_file
+        byte_length: Number of bytes to return from read_file
+        pattern: Text (or regex) to look for in search_file operation
+        regex: Treat pattern as a regular expression
+        ignore_case: Case-insensitive search_file matching
+        context_lines: Lines of context around each search_file match
+        max_matches: Maximum number of matching lines search_file returns
+        expected_version: Version (content hash) from a previous response; a write fails
+            with a version conflict if the file has changed since ("" = must not exist)
 
     Returns:
         JSON string with operation result
@@ -84,6 +268,23 @@ async def manage_site_files(
     elif operation == "edit_file":
         kwargs["old_string"] = old_string
         kwargs["new_string"] = new_string
+    elif operation == "apply_edits":
+        kwargs["edits"] = edits
+        kwargs["diff"] = diff
+    elif operation == "read_file":
+        kwargs["start_line"] = start_line
+        kwargs["end_line"] = end_line
+        kwargs["byte_offset"] = byte_offset
+        kwargs["byte_length"] = byte_length
+    elif operation == "search_file":
+        kwargs["pattern"] = pattern
+        kwargs["regex"] = regex
+        kwargs["ignore_case"] = ignore_case
+        kwargs["context_lines"] = context_lines
+        kwargs["max_matches"] = max_matches
+
+    if operation in WRITE_OPERATIONS:
+        kwargs["expected_version"] = expected_version
 
     result = await _manage_tool.execute(**kwargs)
 
@@ -94,46 +295,279 @@ async def manage_site_files(
     return result
 
 
+@mcp.tool()
+async def publish_site(site_id: str) -> str:
+    """
+    Rebuild a site's production version (dist/index.html) from its current index.html.
+
+    Generation publishes automatically; call this after editing a site with
+    manage_site_files. Until then the edited source is served as-is.
+
+    Args:
+        site_id: Unique site identifier (YYYYMMDD_HHMMSS_ffffff_xxxxxx, e.g. 20261016_142501_048213_9f3a1c)
+
+    Returns:
+        JSON string with the publish manifest (source/output versions, sizes, step reports)
+    """
+    await site_retention.touch(site_id)
+    try:
+        manifest = await site_publisher.publish(site_id)
+    except PublishError as e:
+        return json.dumps({"success": False, "site_id": site_id, "error": str(e)}, indent=2)
+
+    await site_catalog.arefresh(site_id)
+    return json.dumps({"success": True, "site_id": site_id, **manifest}, indent=2)
+
+
+@mcp.tool()
+async def list_sites(
+    limit: int = 50,
+    cursor: str = "",
+    site_type: str = "",
+    verified: Optional[bool] = None,
+    published: Optional[bool] = None,
+    search: str = "",
+    created_after: str = "",
+    created_before: str = "",
+    order_by: str = "created_at",
+    descending: bool = True,
+    archived: Optional[bool] = None,
+) -> str:
+    """
+    List generated sites from the site catalog, one page at a time.
+
+    Args:
+        limit: Sites per page (1-500)
+        cursor: next_cursor from the previous page (empty for the first page)
+        site_type: Only sites of this type (e.g. 'landing page'; case-insensitive)
+        verified: Only sites that passed (true) or failed (false) verification
+        published: Only sites with (true) or without (false) a production build
+        search: Only sites whose requirements contain this text
+        created_after: Only sites created at or after this ISO timestamp (e.g. 2025-01-31T00:00:00)
+        created_before: Only sites created before this ISO timestamp
+        order_by: created_at, last_edit, size or site_id
+        descending: Newest (or largest) first
+        archived: Only sites retention archived (true) or sites on disk (false);
+            archived sites are restored automatically when used
+
+    Returns:
+        JSON string with the page of sites (site_id, url, created_at, site_type,
+        requirements, verification_passed, published, final_step, size,
+        file_count, last_edit, last_access, archived), the total number of matching sites and
+        next_cursor (null on the last page)
+    """
+    if order_by not in SORT_COLUMNS:
+        return json.dumps({"success": False, "error": f"order_by must be one of {', '.join(SORT_COLUMNS)}"}, indent=2)
+    try:
+        page = await site_documents.run_io(
+            functools.partial(
+                site_catalog.list_sites,
+                limit=limit,
+                cursor=cursor,
+                site_type=site_type,
+                verified=verified,
+                published=published,
+                search=search,
+                created_after=created_after,
+                created_before=created_before,
+                order_by=order_by,
+                descending=descending,
+                archived=archived,
+            )
+        )
+    except (ValueError, TypeError) as e:
+        return json.dumps({"success": False, "error": f"Invalid cursor: {e}"}, indent=2)
+    return json.dumps({"success": True, **page}, indent=2)
+
+
+@mcp.tool()
+async def site_history(site_id: str, file_path: str = "", limit: int = 20) -> str:
+    """
+    List the recorded versions of a site (every manage_site_files write is one).
+
+    Args:
+        site_id: Unique site identifier (YYYYMMDD_HHMMSS_ffffff_xxxxxx, e.g. 20261016_142501_048213_9f3a1c)
+        file_path: Only list versions of this file
+        limit: Maximum number of versions to return, newest first (0 = all)
+
+    Returns:
+        JSON string with the site's current version and its snapshots
+        (version, file_path, operation, blob hash, size, created_at)
+    """
+    snapshots = await site_documents.run_io(site_snapshots.versions, site_id, file_path or None, limit)
+    return json.dumps({
+        "success": True,
+        "site_id": site_id,
+        "version": await site_documents.run_io(site_snapshots.latest_version, site_id),
+        "snapshots": [snapshot.to_dict() for snapshot in snapshots],
+    }, indent=2)
+
+
+@mcp.tool()
+async def diff_site_versions(site_id: str, from_version: int, to_version: int = 0, file_path: str = "") -> str:
+    """
+    Show what changed in a site between two versions from site_history.
+
+    Args:
+        site_id: Unique site identifier (YYYYMMDD_HHMMSS_ffffff_xxxxxx, e.g. 20261016_142501_048213_9f3a1c)
+        from_version: Older version
+        to_version: Newer version (0 = current)
+        file_path: Only diff this file
+
+    Returns:
+        JSON string with a unified diff per changed file
+    """
+    if not to_version:
+        to_version = await site_documents.run_io(site_snapshots.latest_version, site_id)
+    try:
+        changes = await site_documents.run_io(site_snapshots.diff, site_id, from_version, to_version, file_path or None)
+    except OSError as e:
+        return json.dumps({"success": False, "site_id": site_id, "error": f"Version history unavailable: {e}"}, indent=2)
+    return json.dumps({
+        "success": True,
+        "site_id": site_id,
+        "from_version": from_version,
+        "to_version": to_version,
+        "files": changes,
+    }, indent=2)
+
+
+@mcp.tool()
+async def rollback_site(site_id: str, version: int, file_path: str = "") -> str:
+    """
+    Restore a site (or one of its files) to an earlier version from site_history.
+
+    The rollback is recorded as a new version, so it can be undone the same way.
+    Call publish_site afterwards to rebuild the production version.
+
+    Args:
+        site_id: Unique site identifier (YYYYMMDD_HHMMSS_ffffff_xxxxxx, e.g. 20261016_142501_048213_9f3a1c)
+        version: Version to restore
+        file_path: Only restore this file
+
+    Returns:
+        JSON string with the files written and deleted and the new current version
+    """
+    if version < 1 or version > await site_documents.run_io(site_snapshots.latest_version, site_id):
+        return json.dumps({"success": False, "site_id": site_id, "error": f"Site '{site_id}' has no version {version}"}, indent=2)
+    await site_retention.touch(site_id)
+    try:
+        restored = await site_snapshots.arollback(site_id, version, file_path or None)
+    except OSError as e:
+        return json.dumps({"success": False, "site_id": site_id, "error": f"Version history unavailable: {e}"}, indent=2)
+    await site_documents.aflush(site_id)
+    await site_catalog.arefresh(site_id)
+    return json.dumps({"success": True, "site_id": site_id, **restored}, indent=2)
+
+
+@mcp.tool()
+async def snapshot_report() -> str:
+    """
+    Report the disk usage of the site version history.
+
+    Returns:
+        JSON string with versions, distinct blobs, blobs shared between sites,
+        logical bytes (every version stored separately), bytes actually stored,
+        the bytes deduplication saves, and per-site version counts
+    """
+    report = await site_documents.run_io(site_snapshots.usage_report)
+    return json.dumps(report, indent=2)
+
+
+@mcp.tool()
+async def vendor_report() -> str:
+    """
+    Report which sites pin which versions of their import-map packages.
+
+    Returns:
+        JSON string with, per package: versions pinned by site sources (and the
+        sites pinning each), versions their published builds load from the local
+        /vendor mirror, versions available in the tarball store, and the version
+        each pin resolves to under the de-duplication policy
+    """
+    report = await site_documents.run_io(vendor_mirror.usage_report, site_documents.storage)
+    return json.dumps(report, indent=2)
+
+
 # Resources - Expose generated sites
+@mcp.resource("site://index")
+async def get_site_index() -> str:
+    """
+    Get the catalog of generated sites: totals and the 100 newest sites.
+
+    Use the list_sites tool to filter and page through all of them.
+
+    Returns:
+        JSON string with catalog totals (sites, verified, published, bytes,
+        site types) and the newest sites
+    """
+    summary = await site_documents.run_io(site_catalog.summary)
+    page = await site_documents.run_io(functools.partial(site_catalog.list_sites, limit=100))
+    return json.dumps({**summary, "newest": page["sites"], "next_cursor": page["next_cursor"]}, indent=2)
+
+
 @mcp.resource("site://{site_id}/index.html")
-def get_site_html(site_id: str) -> str:
+async def get_site_html(site_id: str) -> str:
     """
     Get the generated HTML file for a specific site.
 
     Args:
-        site_id: Unique site identifier (timestamp format: YYYYMMDD_HHMMSS)
+        site_id: Unique site identifier (YYYYMMDD_HHMMSS_ffffff_xxxxxx, e.g. 20261016_142501_048213_9f3a1c)
 
     Returns:
         HTML content of the generated site
     """
-    site_dir = GENERATED_SITES_DIR / site_id
-    html_file = site_dir / "index.html"
+    await site_retention.touch(site_id)
+    content = await site_documents.aread(site_id, "index.html")
 
-    if not html_file.exists():
+    if content is None:
         raise FileNotFoundError(f"Site '{site_id}' not found")
 
-    return html_file.read_text()
+    return content
 
 
 @mcp.resource("site://{site_id}/metadata.json")
-def get_site_metadata(site_id: str) -> str:
+async def get_site_metadata(site_id: str) -> str:
     """
     Get the metadata JSON file for a specific site.
 
     Args:
-        site_id: Unique site identifier (timestamp format: YYYYMMDD_HHMMSS)
+        site_id: Unique site identifier (YYYYMMDD_HHMMSS_ffffff_xxxxxx, e.g. 20261016_142501_048213_9f3a1c)
 
     Returns:
         JSON string with site metadata
     """
-    site_dir = GENERATED_SITES_DIR / site_id
-    metadata_file = site_dir / "metadata.json"
+    await site_retention.touch(site_id)
+    metadata = await site_documents.aread(site_id, "metadata.json")
 
-    if not metadata_file.exists():
+    if metadata is None:
         return json.dumps({"error": "Metadata not found"})
 
-    return metadata_file.read_text()
+    return metadata
+
+
+@mcp.resource("site://{site_id}/outline")
+async def get_site_outline(site_id: str) -> str:
+    """
+    Get a compact symbol index of a site's index.html.
+
+    Args:
+        site_id: Unique site identifier (YYYYMMDD_HHMMSS_ffffff_xxxxxx, e.g. 20261016_142501_048213_9f3a1c)
+
+    Returns:
+        JSON string with the page's imports, import map entries, React components
+        (hooks, rendered components, sections), custom hooks, functions, constants
+        and the root render call, each with line spans
+    """
+    await site_retention.touch(site_id)
+    document = await site_documents.aget(site_id, "index.html")
+
+    if document is None:
+        raise FileNotFoundError(f"Site '{site_id}' not found")
+
+    outline = await site_documents.run_io(site_outlines.outline, document)
+    return json.dumps(outline, indent=2)
 
 
 # Export the mcp instance for use in main.py and SSE integration
-__all__ = ["mcp", "GENERATED_SITES_DIR"]
+__all__ = ["mcp", "GENERATED_SITES_DIR", "generation_jobs"]
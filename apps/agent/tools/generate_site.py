@@ -7,7 +7,44 @@ from spoon_ai.tools.base import BaseTool
 from spoon_ai.tools import ToolManager
 from spoon_ai.agents import ToolCallAgent
 from .manage_site_files import ManageSiteFilesTool
-from .graph_workflow import SiteGenerationGraph, SiteGenerationState
+from .graph_workflow import SECTION_WORKERS, SiteGenerationState
+from .generation_pool import GenerationPool
+from .generation_cache import generation_cache, fingerprint_sources
+from .generation_checkpoints import generation_checkpoints
+from .metrics import generation_attempts, generations_in_flight, instrument_llm
+from .progress import report_progress
+from .site_catalog import site_catalog
+from .site_documents import site_documents
+from .site_ids import new_site_id
+from .site_publisher import site_publisher
+from .site_snapshots import record_site_write
+from .speculative_generation import SpeculativeGenerator
+
+# Model used for site generation (part of the generation cache version)
+GENERATION_MODEL = "anthropic/claude-sonnet-4.5"
+
+# Site ids drawn before a collision with an existing site is reported as an error
+SITE_ID_ATTEMPTS = 5
+
+
+def create_generation_llm() -> ChatBot:
+    """Create the ChatBot used by pooled site-generation graphs"""
+    llm = ChatBot(
+        llm_provider="openrouter",
+        model_name=GENERATION_MODEL,
+        max_tokens=64000,  # Need larger output for complete HTML files
+    )
+    return instrument_llm(llm, GENERATION_MODEL)
+
+
+# Process-wide warm pool of compiled generation graphs and their ChatBots
+generation_pool = GenerationPool.from_env(create_generation_llm)
+
+# Races several candidates on pooled graphs when speculation is enabled
+speculative_generator = SpeculativeGenerator.from_env(generation_pool)
+
+# Edits to a site drop any cache entries that would clone its old content
+site_documents.add_write_listener(generation_cache.on_site_write)
 
 
 class GenerateSiteTool(BaseTool):
@@ -35,6 +72,18 @@ class GenerateSiteTool(BaseTool):
                 "type": "string",
                 "description": "Optional styling preferences like color scheme, modern/minimal design, animations, etc.",
             },
+            "bypass_cache": {
+                "type": "boolean",
+                "description": "Optional: Set to true to force a fresh generation even if an identical request was generated recently.",
+            },
+            "candidates": {
+                "type": "integer",
+                "description": "Optional: Number of candidate sites generated concurrently; the first one that passes verification is kept and the others are cancelled. Lowers tail latency at a higher token cost (default: server setting, usually 1).",
+            },
+            "token_budget": {
+                "type": "integer",
+                "description": "Optional: Total LLM tokens all candidates may use together; once spent, only one candidate keeps running (default: server setting).",
+            },
         },
         "required": ["requirements"],
     }
@@ -63,57 +112,201 @@ class GenerateSiteTool(BaseTool):
 
         return html_content.strip()
 
-    def _load_system_prompt(self) -> str:
-        """Load the system prompt from generate_site_system_prompt.md"""
-        prompt_path = Path(__file__).parent / "generate_site_system_prompt.md"
-        with open(prompt_path, "r") as f:
-            return f.read()
+    async def _generation_version(self) -> str:
+        """Fingerprint of everything besides the request that shapes the generated site"""
+        tools_dir = Path(__file__).parent
+        # Reads and hashes the template and prompts: on the site I/O pool, off the event loop
+        return await site_documents.run_io(
+            fingerprint_sources,
+            [
+                tools_dir / "template.html",
+                tools_dir / "generate_site_system_prompt.md",
+                tools_dir / "generate_section_system_prompt.md",
+            ],
+            GENERATION_MODEL,
+            f"section_workers={SECTION_WORKERS}",
+        )
+
+    async def _complete(self, final_state: Dict[str, Any], cache_key: str) -> str:
+        """
+        Finish a generation whose graph has run: write metadata.json, cache a
+        verified site, drop the run's checkpoint and build the tool result.
+
+        Args:
+            final_state: Final graph state of the run
+            cache_key: Generation cache key of the request
+        """
+        site_id = final_state["site_id"]
+        requirements = final_state.get("requirements", "")
+        site_type = final_state.get("site_type", "")
+        style_preferences = final_state.get("style_preferences", "")
+
+        # Persist everything the run buffered in memory
+        await site_documents.aflush(site_id)
+        # The graph has finished, so there is nothing left to resume
+        await generation_checkpoints.clear(site_id)
+
+        # Verify that index.html was created
+        if not await site_documents.aexists(site_id, "index.html"):
+            await site_catalog.arefresh(site_id)
+            error_msg = final_state.get("error", "Unknown error")
+            current_step = final_state.get("current_step", "unknown")
+            return json.dumps({
+                "success": False,
+                "site_id": site_id,
+                "url": None,
+                "requirements": requirements,
+                "site_type": site_type,
+                "style_preferences": style_preferences,
+                "created_at": datetime.now().isoformat(),
+                "verification_passed": False,
+                "error": f"{error_msg} (step: {current_step})",
+                "message": f"Site generation failed at step: {current_step}",
+            }, indent=2)
+
+        # Check if verification passed
+        verification_passed = final_state.get("verification_passed", False)
+        generation_attempts.observe(
+            final_state.get("generation_attempts", 0),
+            verified="true" if verification_passed else "false",
+        )
+        if not verification_passed:
+            # Site was created but verification failed - still return URL but log warning
+            pass  # We'll still return the structured data as the file exists
+
+        # Save metadata
+        metadata = {
+            "site_id": site_id,
+            "created_at": datetime.now().isoformat(),
+            "requirements": requirements,
+            "site_type": site_type,
+            "style_preferences": style_preferences,
+            "generation_method": "graph_system",
+            # Components generated in parallel, in page order (empty for a single pass)
+            "sections": [section["component"] for section in final_state.get("sections") or []],
+            "final_step": final_state.get("current_step", "unknown"),
+            "verification_passed": verification_passed,
+            # What the structural verifier found missing, if anything
+            "verification_error": None if verification_passed else final_state.get("error"),
+            "published": final_state.get("published", False),
+            "publish_error": final_state.get("publish_error"),
+            # Candidates, outcomes and tokens of a speculative run
+            "speculation": final_state.get("speculation"),
+        }
+        await site_documents.awrite(site_id, "metadata.json", json.dumps(metadata, indent=2), flush=True)
+        await site_catalog.arefresh(site_id, metadata)
+
+        # Only verified generations are worth replaying for identical requests
+        if verification_passed:
+            await site_documents.run_io(generation_cache.store, cache_key, site_id, site_documents.storage)
+
+        # Return structured JSON response
+        return json.dumps({
+            "success": True,
+            "site_id": site_id,
+            "url": f"http://localhost:8000/sites/{site_id}",
+            "requirements": requirements,
+            "site_type": site_type,
+            "style_preferences": style_preferences,
+            "created_at": datetime.now().isoformat(),
+            "verification_passed": verification_passed,
+            "published": metadata["published"],
+            "cached": False,
+            "error": None,
+            "message": f"Site generated successfully. Use site_id '{site_id}' with manage_site_files tool to update this site.",
+        }, indent=2)
 
     async def execute(
-        self, requirements: str, site_type: str = "", style_preferences: str = ""
+        self,
+        requirements: str,
+        site_type: str = "",
+        style_preferences: str = "",
+        bypass_cache: bool = False,
+        candidates: int = 0,
+        token_budget: int = 0,
     ) -> str:
         """
         Generate a complete HTML website based on the requirements.
         Saves the site to disk and returns structured JSON with site information.
 
+        Identical requests (same normalized inputs and template/prompt version)
+        are served from the generation cache by cloning the previously generated
+        site into a new site_id, unless bypass_cache is set.
+
+        With more than one candidate (the candidates argument, or
+        GENERATION_CANDIDATES when it is 0), the graph runs speculatively: the
+        candidates generate concurrently into scratch copies and the first
+        verified one becomes the site (see speculative_generation).
+
         Returns:
             JSON string with structured site information including:
             - success: bool
-            - site_id: str (timestamp format, can be used with manage_site_files)
+            - site_id: str (unique, sortable by creation time, can be used with manage_site_files)
             - url: str (viewing URL)
             - requirements: str (original requirements)
             - site_type: str
             - style_preferences: str
             - created_at: str (ISO timestamp)
             - verification_passed: bool
+            - published: bool (True if a production build was written to dist/index.html)
+            - cached: bool (True if cloned from a cached generation)
+            - resumable: bool (on failure: True if resume_generation can finish the run)
             - error: str (if any)
         """
-        # Generate unique site_id with timestamp
-        site_id = datetime.now().strftime("%Y%m%d_%H%M%S")
-
-        # Create site directory
-        sites_dir = Path(__file__).parent.parent / "generated_sites"
-        sites_dir.mkdir(parents=True, exist_ok=True)
-        site_dir = sites_dir / site_id
-        site_dir.mkdir(parents=True, exist_ok=True)
-
-        # Create a ChatBot instance for site generation
-        llm = ChatBot(
-            llm_provider="openrouter",
-            model_name="anthropic/claude-sonnet-4.5",
-            max_tokens=64000,  # Need larger output for complete HTML files
+        # Allocate a unique site_id and create its site (on the site I/O pool, off the event loop)
+        site_id = await self._create_site()
+        site_dir = site_documents.sites_dir / site_id
+
+        # Serve identical requests from the generation cache
+        cache_key = generation_cache.make_key(
+            requirements, site_type, style_preferences, await self._generation_version()
         )
+        cache_entry = None
+        if not bypass_cache:
+            cache_entry = await site_documents.run_io(generation_cache.lookup, cache_key, site_documents.storage)
+        if cache_entry is not None:
+            report_progress("cache_hit", site_id=site_id, cached_from=cache_entry.site_id)
+            async with site_documents.site_lock(site_id):
+                await site_documents.run_io(generation_cache.clone_into, cache_entry, site_documents.storage, site_id)
+                # Start the clone's version history (the dist/ build output is not versioned)
+                for file_path in cache_entry.file_hashes:
+                    if not file_path.startswith("dist/"):
+                        await record_site_write(site_id, file_path, "clone")
+            # The clone carries dist/ along; its manifest still matches the identical source
+            published = await site_publisher.manifest(site_id) is not None
+            metadata = {
+                "site_id": site_id,
+                "created_at": datetime.now().isoformat(),
+                "requirements": requirements,
+                "site_type": site_type,
+                "style_preferences": style_preferences,
+                "generation_method": "cache",
+                "cached_from": cache_entry.site_id,
+                "final_step": "published" if published else "verified",
+                "verification_passed": True,
+                "published": published,
+            }
+            await site_documents.awrite(site_id, "metadata.json", json.dumps(metadata, indent=2), flush=True)
+            await site_catalog.arefresh(site_id, metadata)
+
+            return json.dumps({
+                "success": True,
+                "site_id": site_id,
+                "url": f"http://localhost:8000/sites/{site_id}",
+                "requirements": requirements,
+                "site_type": site_type,
+                "style_preferences": style_preferences,
+                "created_at": metadata["created_at"],
+                "verification_passed": True,
+                "published": published,
+                "cached": True,
+                "cached_from": cache_entry.site_id,
+                "error": None,
+                "message": f"Site generated successfully (from cache). Use site_id '{site_id}' with manage_site_files tool to update this site.",
+            }, indent=2)
 
         # Generate the site using Graph System for structured workflow
         try:
-            # Load the system prompt
-            system_prompt = self._load_system_prompt()
-
-            # Build graph workflow
-            graph_builder = SiteGenerationGraph(llm, system_prompt)
-            graph = graph_builder.build()
-            compiled = graph.compile()
-
             # Initial state
             initial_state: SiteGenerationState = {
                 "site_id": site_id,
@@ -127,76 +320,119 @@ class GenerateSiteTool(BaseTool):
                 "content_ready": False,
                 "generation_attempts": 0,
                 "verification_passed": False,
+                "published": False,
+                "publish_error": None,
                 "error": None,
                 "result": None,
+                "sections": [],
+                "section_fragments": {},
                 "memory": None,
             }
 
-            # Execute graph workflow
-            final_state = await compiled.invoke(initial_state)
+            # Execute graph workflow on a warm, pre-compiled graph (or race several)
+            speculation = speculative_generator.resolve(candidates, token_budget)
+            async with generation_checkpoints.track(site_id):
+                with generations_in_flight.track_inprogress():
+                    if speculation["candidates"] > 1:
+                        final_state = await speculative_generator.run(initial_state, **speculation)
+                    else:
+                        async with generation_pool.acquire() as slot:
+                            final_state = await slot.invoke(initial_state)
 
-            # Verify that index.html was created
-            html_file = site_dir / "index.html"
-            if not html_file.exists():
-                error_msg = final_state.get("error", "Unknown error")
-                current_step = final_state.get("current_step", "unknown")
-                return json.dumps({
-                    "success": False,
-                    "site_id": site_id,
-                    "url": None,
-                    "requirements": requirements,
-                    "site_type": site_type,
-                    "style_preferences": style_preferences,
-                    "created_at": datetime.now().isoformat(),
-                    "verification_passed": False,
-                    "error": f"{error_msg} (step: {current_step})",
-                    "message": f"Site generation failed at step: {current_step}",
-                }, indent=2)
-
-            # Check if verification passed
-            verification_passed = final_state.get("verification_passed", False)
-            if not verification_passed:
-                # Site was created but verification failed - still return URL but log warning
-                pass  # We'll still return the structured data as the file exists
-
-            # Save metadata
-            metadata = {
-                "site_id": site_id,
-                "created_at": datetime.now().isoformat(),
-                "requirements": requirements,
-                "site_type": site_type,
-                "style_preferences": style_preferences,
-                "generation_method": "graph_system",
-                "final_step": final_state.get("current_step", "unknown"),
-                "verification_passed": verification_passed,
-            }
-            metadata_file = site_dir / "metadata.json"
-            metadata_file.write_text(json.dumps(metadata, indent=2), encoding="utf-8")
-
-            # Return structured JSON response
-            return json.dumps({
-                "success": True,
-                "site_id": site_id,
-                "url": f"http://localhost:8000/sites/{site_id}",
-                "requirements": requirements,
-                "site_type": site_type,
-                "style_preferences": style_preferences,
-                "created_at": datetime.now().isoformat(),
-                "verification_passed": verification_passed,
-                "error": None,
-                "message": f"Site generated successfully. Use site_id '{site_id}' with manage_site_files tool to update this site.",
-            }, indent=2)
+                return await self._complete(final_state, cache_key)
 
         except Exception as e:
+            # A run interrupted after its first checkpoint can be finished with resume_generation
+            resumable = not generation_checkpoints.running(site_id) and await generation_checkpoints.aexists(site_id)
             return json.dumps({
                 "success": False,
-                "site_id": None,
+                "site_id": site_id if resumable else None,
                 "url": None,
                 "requirements": requirements,
                 "site_type": site_type,
                 "style_preferences": style_preferences,
                 "created_at": datetime.now().isoformat(),
                 "verification_passed": False,
+                "resumable": resumable,
                 "error": str(e),
                 "message": f"Error generating site: {str(e)}",
             }, indent=2)
+
+    @staticmethod
+    async def _create_site() -> str:
+        """
+        Create a new, empty site under a fresh site id.
+
+        The site is created exclusively, so concurrent generations can never
+        share a site; on the (unlikely) collision with an existing id, a new id
+        is drawn.
+
+        Returns:
+            The new site's id
+        """
+        for _ in range(SITE_ID_ATTEMPTS - 1):
+            site_id = new_site_id()
+            try:
+                await site_documents.acreate_site(site_id, exclusive=True)
+                return site_id
+            except FileExistsError:
+                continue
+        site_id = new_site_id()
+        await site_documents.acreate_site(site_id, exclusive=True)
+        return site_id
+
+    async def resume(self, site_id: str) -> str:
+        """
+        Finish an interrupted generation from its checkpoint.
+
+        The graph continues at the node the run was about to start, with the
+        state saved before it, and an interrupted content agent continues its
+        conversation (see generation_checkpoints). Completed nodes and tool
+        calls are not run again.
+
+        Args:
+            site_id: Site of the unfinished generation
+
+        Returns:
+            JSON string shaped like execute's result, plus resumed_from (the node
+            the run continued at)
+        """
+        try:
+            async with generation_checkpoints.track(site_id):
+                checkpoint = await generation_checkpoints.load(site_id)
+                if checkpoint is None:
+                    return json.dumps({
+                        "success": False,
+                        "site_id": site_id,
+                        "error": f"No unfinished generation to resume for site '{site_id}'",
+                    }, indent=2)
+
+                state = {
+                    **checkpoint.state,
+                    "site_id": site_id,
+                    "site_dir": str(site_documents.sites_dir / site_id),
+                }
+                cache_key = generation_cache.make_key(
+                    state.get("requirements", ""),
+                    state.get("site_type", ""),
+                    state.get("style_preferences", ""),
+                    await self._generation_version(),
+                )
+                generation_checkpoints.resumes += 1
+                report_progress("resume", site_id=site_id, resumed_from=checkpoint.node)
+                with generations_in_flight.track_inprogress():
+                    async with generation_pool.acquire() as slot:
+                        final_state = await slot.resume(state, checkpoint.node)
+
+                result = json.loads(await self._complete(final_state, cache_key))
+                result["resumed_from"] = checkpoint.node
+                return json.dumps(result, indent=2)
+
+        except Exception as e:
+            return json.dumps({
+                "success": False,
+                "site_id": site_id,
+                "resumable": await generation_checkpoints.aexists(site_id),
+                "error": str(e),
+                "message": f"Error resuming site generation: {str(e)}",
+            }, indent=2)
@@ -0,0 +1,205 @@
+"""
+Content-addressed cache of completed site generations.
+
+Cache keys are a hash of the normalized generation inputs (requirements,
+site_type, style_preferences) plus a fingerprint of everything that shapes
+the output (template, system prompt, model). A hit clones the stored site
+into a new site (through the site storage backend) instead of running the
+whole generation graph.
+"""
+
+import hashlib
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Any, Iterable, Optional
+
+from .site_storage import SiteStorage
+
+
+# Files that belong to a particular site instance and must not be cloned
+_NON_CLONABLE_FILES = {"metadata.json"}
+
+
+def _normalize_text(value: Optional[str]) -> str:
+    """Collapse whitespace so cosmetic differences do not change the key"""
+    return re.sub(r"\s+", " ", (value or "").strip())
+
+
+def fingerprint_sources(paths: Iterable[Path], *extra: str) -> str:
+    """
+    Build a version fingerprint from the content of the given files.
+
+    Args:
+        paths: Files whose content influences generation (template, prompts)
+        extra: Additional strings to mix in (e.g. model name)
+
+    Returns:
+        Hex digest that changes whenever any of the inputs change
+    """
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(path.name.encode("utf-8"))
+        digest.update(path.read_bytes() if path.exists() else b"<missing>")
+    for value in extra:
+        digest.update(value.encode("utf-8"))
+    return digest.hexdigest()
+
+
+@dataclass
+class CacheEntry:
+    """A completed generation that can be cloned into new sites"""
+
+    key: str
+    site_id: str
+    file_hashes: Dict[str, str]
+    stored_at: float = field(default_factory=time.monotonic)
+
+
+class GenerationCache:
+    """Size-bounded LRU cache with TTL for completed site generations"""
+
+    def __init__(self, max_entries: int = 128, ttl_seconds: float = 3600.0):
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @classmethod
+    def from_env(cls) -> "GenerationCache":
+        """Create a cache configured from GENERATION_CACHE_* environment variables"""
+        return cls(
+            max_entries=int(os.getenv("GENERATION_CACHE_MAX_ENTRIES", "128")),
+            ttl_seconds=float(os.getenv("GENERATION_CACHE_TTL_SECONDS", "3600")),
+        )
+
+    @staticmethod
+    def make_key(requirements: str, site_type: str, style_preferences: str, version: str) -> str:
+        """
+        Compute the cache key for a generation request.
+
+        Args:
+            requirements: Site requirements (whitespace-normalized)
+            site_type: Site type (whitespace- and case-normalized)
+            style_preferences: Style preferences (whitespace- and case-normalized)
+            version: Fingerprint of the template/system prompt/model
+
+        Returns:
+            Hex digest identifying the request
+        """
+        digest = hashlib.sha256()
+        for part in (
+            version,
+            _normalize_text(requirements),
+            _normalize_text(site_type).casefold(),
+            _normalize_text(style_preferences).casefold(),
+        ):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\x00")
+        return digest.hexdigest()
+
+    def _is_expired(self, entry: CacheEntry) -> bool:
+        return self.ttl_seconds > 0 and time.monotonic() - entry.stored_at > self.ttl_seconds
+
+    def _is_intact(self, entry: CacheEntry, storage: SiteStorage) -> bool:
+        """Check the source site still holds exactly the content that was cached"""
+        for name, expected in entry.file_hashes.items():
+            found = storage.read(entry.site_id, name)
+            if found is None or hashlib.sha256(found[0]).hexdigest() != expected:
+                return False
+        return bool(entry.file_hashes)
+
+    def lookup(self, key: str, storage: SiteStorage) -> Optional[CacheEntry]:
+        """Return a valid entry for key (refreshing its LRU position), or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+
+        # Hash the source files outside the lock; they can be large
+        valid = entry is not None and not self._is_expired(entry) and self._is_intact(entry, storage)
+
+        with self._lock:
+            if entry is not None and not valid:
+                # Expired, or the source site was edited/deleted since it was cached
+                if self._entries.get(key) is entry:
+                    del self._entries[key]
+                    self.evictions += 1
+                entry = None
+
+            if entry is None or self._entries.get(key) is not entry:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def store(self, key: str, site_id: str, storage: SiteStorage) -> None:
+        """Record a completed generation under key, evicting the LRU entries if full"""
+        file_hashes = {}
+        for name in storage.list_files(site_id):
+            found = storage.read(site_id, name) if name not in _NON_CLONABLE_FILES else None
+            if found is not None:
+                file_hashes[name] = hashlib.sha256(found[0]).hexdigest()
+        if not file_hashes:
+            return
+
+        with self._lock:
+            self._entries[key] = CacheEntry(key=key, site_id=site_id, file_hashes=file_hashes)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clone_into(self, entry: CacheEntry, storage: SiteStorage, site_id: str) -> None:
+        """Copy the cached site's files into the site site_id"""
+        for name in entry.file_hashes:
+            found = storage.read(entry.site_id, name)
+            if found is not None:
+                storage.write(site_id, name, found[0])
+
+    def invalidate(self, key: str) -> None:
+        """Drop a single entry"""
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self.evictions += 1
+
+    def invalidate_site(self, site_id: str) -> None:
+        """Drop every entry whose cached content comes from site_id"""
+        with self._lock:
+            keys = [key for key, entry in self._entries.items() if entry.site_id == site_id]
+        for key in keys:
+            self.invalidate(key)
+
+    def on_site_write(self, site_id: str, file_path: str, content: Optional[str]) -> None:
+        """Site document write listener: edits to a cached site invalidate its entries"""
+        if file_path not in _NON_CLONABLE_FILES:
+            self.invalidate_site(site_id)
+
+    def clear(self) -> None:
+        """Drop all entries (counters are kept)"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and current occupancy"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": (self.hits / lookups) if lookups else 0.0,
+        }
+
+
+# Process-wide cache shared by every GenerateSiteTool instance
+generation_cache = GenerationCache.from_env()
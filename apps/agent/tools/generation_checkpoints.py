@@ -0,0 +1,224 @@
+"""
+Checkpoints of running site generations, for resuming after a restart.
+
+Before each node of the generation graph starts, the graph state it receives
+(everything the nodes completed so far) is written to the site's checkpoint
+file, .checkpoint.json in the site (kept by the site storage backend);
+dotfiles are not listed, served or cloned, and the file goes away with the
+site. While the content agent works, its transcript (the prompt, every model
+reply and every completed tool call result) is added to the checkpoint after
+each step.
+
+Site files are flushed before every checkpoint write, so the files on disk are
+always at least as new as the checkpoint describes. resume_generation then
+rebuilds the graph with the checkpointed node as its entry point and the
+content agent continues from its transcript, so only the remaining LLM work is
+paid for again. The checkpoint is removed once the generation has finished.
+
+Speculative candidates are not checkpointed: they run in scratch sites that
+are deleted when the race ends.
+"""
+
+import json
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Dict, Any, AsyncIterator, List, Optional, Set
+
+from .site_documents import SiteDocumentStore, site_documents
+
+CHECKPOINT_FILE = ".checkpoint.json"
+
+
+class GenerationBusyError(Exception):
+    """Raised when a generation is started for a site this process is already generating"""
+
+
+@dataclass
+class GenerationCheckpoint:
+    """Where an unfinished generation stopped"""
+
+    site_id: str
+    node: str  # Graph node to run next
+    state: Dict[str, Any]  # Graph state that node receives
+    # Agent transcript of the node: {"node", "generation_attempts", "messages"}
+    agent: Optional[Dict[str, Any]] = None
+    updated_at: float = field(default_factory=time.time)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "GenerationCheckpoint":
+        return cls(
+            site_id=data["site_id"],
+            node=data["node"],
+            state=data["state"],
+            agent=data.get("agent"),
+            updated_at=data.get("updated_at", 0.0),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    def describe(self) -> Dict[str, Any]:
+        """Summary for status payloads (without the state and transcript)"""
+        return {
+            "site_id": self.site_id,
+            "node": self.node,
+            "generation_attempts": self.state.get("generation_attempts", 0),
+            "agent_messages": len(self.agent["messages"]) if self.agent else 0,
+            "updated_at": self.updated_at,
+        }
+
+
+class GenerationCheckpointStore:
+    """Per-site checkpoint files of running generations"""
+
+    def __init__(self, documents: SiteDocumentStore, enabled: bool = True):
+        """
+        Args:
+            documents: Document store of the sites (flushed before each checkpoint)
+            enabled: Write checkpoints at all (resuming still reads existing ones)
+        """
+        self.documents = documents
+        self.enabled = enabled
+        self._latest: Dict[str, GenerationCheckpoint] = {}
+        self._active: Set[str] = set()
+        self.saves = 0
+        self.resumes = 0
+
+    @classmethod
+    def from_env(cls, documents: SiteDocumentStore) -> "GenerationCheckpointStore":
+        """Create a store enabled by GENERATION_CHECKPOINTS (default on)"""
+        enabled = os.getenv("GENERATION_CHECKPOINTS", "1").strip().lower() not in ("0", "false", "no", "off")
+        return cls(documents, enabled=enabled)
+
+    def tracks(self, state: Dict[str, Any]) -> bool:
+        """Whether the run this graph state belongs to is checkpointed"""
+        return self.enabled and state.get("candidate") is None and bool(state.get("site_id"))
+
+    async def _write(self, checkpoint: GenerationCheckpoint) -> None:
+        # Files first: a checkpoint must never point past what is on disk
+        await self.documents.aflush(checkpoint.site_id)
+        checkpoint.updated_at = time.time()
+        content = json.dumps(checkpoint.to_dict(), default=str).encode("utf-8")
+        try:
+            await self.documents.run_io(self.documents.storage.write, checkpoint.site_id, CHECKPOINT_FILE, content)
+        except OSError as e:
+            # Checkpoints only speed up recovery; never fail the generation over one
+            logging.warning("Could not write generation checkpoint of %s: %s", checkpoint.site_id, e)
+            return
+        self._latest[checkpoint.site_id] = checkpoint
+        self.saves += 1
+
+    async def save_node(self, node: str, state: Dict[str, Any]) -> None:
+        """
+        Record that node is about to run with state.
+
+        The transcript of an agent node survives only when the same node is
+        entered again with the same attempt count, i.e. when a resumed run
+        re-enters the node whose agent was interrupted.
+        """
+        if not self.tracks(state):
+            return
+        site_id = state["site_id"]
+        previous = self._latest.get(site_id)
+        agent = previous.agent if previous is not None else None
+        if agent and (agent["node"] != node or agent["generation_attempts"] != state.get("generation_attempts", 0)):
+            agent = None
+        await self._write(GenerationCheckpoint(site_id=site_id, node=node, state=dict(state), agent=agent))
+
+    async def save_agent(self, node: str, state: Dict[str, Any], messages: List[Dict[str, Any]]) -> None:
+        """Record the transcript of the agent running in node after one of its steps"""
+        if not self.tracks(state):
+            return
+        checkpoint = self._latest.get(state["site_id"])
+        if checkpoint is None or checkpoint.node != node:
+            return
+        checkpoint.agent = {
+            "node": node,
+            "generation_attempts": state.get("generation_attempts", 0),
+            "messages": messages,
+        }
+        await self._write(checkpoint)
+
+    def agent_transcript(self, node: str, state: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+        """The saved transcript of node's agent for this attempt, if it was interrupted"""
+        if not self.tracks(state):
+            return None
+        checkpoint = self._latest.get(state["site_id"])
+        agent = checkpoint.agent if checkpoint is not None else None
+        if not agent or agent["node"] != node or agent["generation_attempts"] != state.get("generation_attempts", 0):
+            return None
+        return agent["messages"]
+
+    def _read(self, site_id: str) -> Optional[GenerationCheckpoint]:
+        try:
+            found = self.documents.storage.read(site_id, CHECKPOINT_FILE)
+            if found is None:
+                return None
+            return GenerationCheckpoint.from_dict(json.loads(found[0].decode("utf-8")))
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logging.warning("Ignoring unreadable generation checkpoint of %s: %s", site_id, e)
+            return None
+
+    async def load(self, site_id: str) -> Optional[GenerationCheckpoint]:
+        """Load a site's checkpoint from disk (making it the one resumed runs update)"""
+        checkpoint = await self.documents.run_io(self._read, site_id)
+        if checkpoint is not None:
+            self._latest[site_id] = checkpoint
+        return checkpoint
+
+    async def aexists(self, site_id: str) -> bool:
+        """Whether the site has an unfinished generation's checkpoint"""
+        return await self.documents.run_io(self.documents.storage.exists, site_id, CHECKPOINT_FILE)
+
+    async def clear(self, site_id: str) -> None:
+        """Forget a finished generation's checkpoint"""
+        self._latest.pop(site_id, None)
+        await self.documents.run_io(self.documents.storage.delete, site_id, CHECKPOINT_FILE)
+
+    def _list(self) -> List[GenerationCheckpoint]:
+        found = []
+        for site_id in self.documents.storage.list_sites():
+            checkpoint = self._read(site_id)
+            if checkpoint is not None:
+                found.append(checkpoint)
+        return found
+
+    async def alist(self) -> List[GenerationCheckpoint]:
+        """Checkpoints of all unfinished generations on disk"""
+        return await self.documents.run_io(self._list)
+
+    def running(self, site_id: str) -> bool:
+        """Whether this process is generating the site right now"""
+        return site_id in self._active
+
+    @asynccontextmanager
+    async def track(self, site_id: str) -> AsyncIterator[None]:
+        """
+        Mark a site as being generated by this process for the duration of the block.
+
+        Raises:
+            GenerationBusyError: If it already is (e.g. a second resume of the same site)
+        """
+        if site_id in self._active:
+            raise GenerationBusyError(f"Site '{site_id}' is already being generated")
+        self._active.add(site_id)
+        try:
+            yield
+        finally:
+            self._active.discard(site_id)
+            self._latest.pop(site_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "running": len(self._active),
+            "saves": self.saves,
+            "resumes": self.resumes,
+        }
+
+
+# Process-wide store, next to the site files it describes
+generation_checkpoints = GenerationCheckpointStore.from_env(site_documents)
@@ -0,0 +1,312 @@
+"""
+Background job queue for site generation.
+
+generate_site requests are submitted as jobs to a FIFO queue and executed by a
+bounded pool of asyncio workers, so MCP requests return immediately instead of
+holding a connection open for the whole generation. Jobs can be polled for
+status and current step, awaited, cancelled, or followed as a stream of
+progress events.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from .progress import progress_listener
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+
+FINISHED_STATUSES = {JOB_SUCCEEDED, JOB_FAILED, JOB_CANCELLED}
+
+# Progress events kept per job for late subscribers and polling
+MAX_JOB_EVENTS = 500
+
+
+class QueueFullError(Exception):
+    """Raised when a job is submitted while the queue is at capacity"""
+
+
+@dataclass
+class GenerationJob:
+    """A single queued or running site generation"""
+
+    job_id: str
+    params: Dict[str, Any]
+    seq: int
+    status: str = JOB_QUEUED
+    step: Optional[str] = None
+    created_at: str = field(default_factory=lambda: datetime.now().isoformat())
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    events: List[Dict[str, Any]] = field(default_factory=list, repr=False)
+    done: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+    task: Optional[asyncio.Task] = field(default=None, repr=False)
+    changed: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+    runner: Optional[Callable[..., Awaitable[Any]]] = field(default=None, repr=False)
+
+    @property
+    def last_event(self) -> Optional[Dict[str, Any]]:
+        return self.events[-1] if self.events else None
+
+    def add_event(self, event: Dict[str, Any]) -> None:
+        """Record a progress event and wake up everyone streaming this job"""
+        self.events.append(event)
+        del self.events[:-MAX_JOB_EVENTS]
+        self.notify()
+
+    def notify(self) -> None:
+        changed, self.changed = self.changed, asyncio.Event()
+        changed.set()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATUSES
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "step": self.step,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "progress": self.last_event,
+            "params": self.params,
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class GenerationJobManager:
+    """FIFO job queue drained by a bounded pool of worker tasks"""
+
+    def __init__(
+        self,
+        runner: Callable[..., Awaitable[Any]],
+        max_concurrency: int = 2,
+        max_queue_size: int = 100,
+        max_finished_jobs: int = 500,
+    ):
+        """
+        Args:
+            runner: Coroutine function executing one generation (e.g. GenerateSiteTool.execute)
+            max_concurrency: Number of generations allowed to run at once
+            max_queue_size: Maximum number of jobs waiting to start
+            max_finished_jobs: Finished jobs kept around for polling
+        """
+        self.runner = runner
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue_size = max(1, max_queue_size)
+        self.max_finished_jobs = max_finished_jobs
+        self._jobs: "OrderedDict[str, GenerationJob]" = OrderedDict()
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._seq = 0
+
+    @classmethod
+    def from_env(cls, runner: Callable[..., Awaitable[Any]]) -> "GenerationJobManager":
+        """Create a manager configured from GENERATION_* environment variables"""
+        return cls(
+            runner,
+            max_concurrency=int(os.getenv("GENERATION_MAX_CONCURRENCY", "2")),
+            max_queue_size=int(os.getenv("GENERATION_QUEUE_SIZE", "100")),
+        )
+
+    def _ensure_workers(self) -> None:
+        """Start the worker pool on the running event loop (lazily, on first submit)"""
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        self._workers = [worker for worker in self._workers if not worker.done()]
+        while len(self._workers) < self.max_concurrency:
+            self._workers.append(asyncio.create_task(self._worker(), name=f"generation-worker-{len(self._workers)}"))
+
+    @property
+    def queued_count(self) -> int:
+        return sum(1 for job in self._jobs.values() if job.status == JOB_QUEUED)
+
+    @property
+    def running_count(self) -> int:
+        return sum(1 for job in self._jobs.values() if job.status == JOB_RUNNING)
+
+    async def submit(self, runner: Optional[Callable[..., Awaitable[Any]]] = None, **params: Any) -> GenerationJob:
+        """
+        Queue a generation job.
+
+        Args:
+            runner: Coroutine function to run instead of the manager's runner
+                (e.g. GenerateSiteTool.resume)
+            params: Keyword arguments passed to the runner
+
+        Returns:
+            The queued job
+
+        Raises:
+            QueueFullError: If max_queue_size jobs are already waiting
+        """
+        if self.queued_count >= self.max_queue_size:
+            raise QueueFullError(
+                f"Generation queue is full ({self.max_queue_size} jobs waiting). Try again later."
+            )
+
+        self._ensure_workers()
+        self._seq += 1
+        job = GenerationJob(job_id=uuid.uuid4().hex, params=params, seq=self._seq, runner=runner)
+        self._jobs[job.job_id] = job
+        self._queue.put_nowait(job)
+        self._prune_finished()
+        return job
+
+    def get(self, job_id: str) -> Optional[GenerationJob]:
+        return self._jobs.get(job_id)
+
+    def queue_position(self, job: GenerationJob) -> Optional[int]:
+        """1-based position of a queued job in the FIFO queue"""
+        if job.status != JOB_QUEUED:
+            return None
+        return 1 + sum(
+            1 for other in self._jobs.values() if other.status == JOB_QUEUED and other.seq < job.seq
+        )
+
+    def describe(self, job: GenerationJob) -> Dict[str, Any]:
+        """Job status payload returned to MCP clients"""
+        data = job.to_dict()
+        data["queue_position"] = self.queue_position(job)
+        return data
+
+    def cancel(self, job_id: str) -> Optional[GenerationJob]:
+        """
+        Cancel a queued or running job.
+
+        Returns:
+            The job (whatever its final status), or None if it does not exist
+        """
+        job = self._jobs.get(job_id)
+        if job is None or job.finished:
+            return job
+
+        if job.status == JOB_QUEUED:
+            # The worker skips cancelled jobs when it dequeues them
+            self._finish(job, JOB_CANCELLED, error="Cancelled before start")
+        elif job.task is not None:
+            job.task.cancel()
+        return job
+
+    async def wait(self, job_id: str, timeout: Optional[float] = None) -> Optional[GenerationJob]:
+        """Wait for a job to finish (or timeout to expire) and return it"""
+        job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        try:
+            await asyncio.wait_for(job.done.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+        return job
+
+    async def stream_events(self, job_id: str, since: int = 0) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yield the job's progress events with seq greater than since, then new
+        ones as they arrive, until the job finishes.
+
+        Args:
+            job_id: Job to follow
+            since: Last event seq the caller has already seen
+        """
+        job = self._jobs.get(job_id)
+        if job is None:
+            return
+
+        while True:
+            changed = job.changed
+            for event in [event for event in job.events if event.get("seq", 0) > since]:
+                since = event["seq"]
+                yield event
+            if job.finished:
+                return
+            await changed.wait()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue_size": self.max_queue_size,
+            "queued": self.queued_count,
+            "running": self.running_count,
+        }
+
+    def _on_progress(self, job: GenerationJob, event: Dict[str, Any]) -> None:
+        # The job's step follows graph nodes; file operations are reported as events only
+        if event.get("event") != "file_operation":
+            job.step = event.get("step", job.step)
+        job.add_event(event)
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                if job.status != JOB_QUEUED:
+                    continue
+                job.status = JOB_RUNNING
+                job.started_at = datetime.now().isoformat()
+                job.task = asyncio.create_task(self._run(job))
+                try:
+                    await job.task
+                except asyncio.CancelledError:
+                    if not job.task.cancelled():
+                        # The worker itself is being cancelled (shutdown)
+                        job.task.cancel()
+                        self._finish(job, JOB_CANCELLED, error="Server shutting down")
+                        raise
+                    self._finish(job, JOB_CANCELLED, error="Cancelled while running")
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: GenerationJob) -> None:
+        try:
+            with progress_listener(lambda event: self._on_progress(job, event)):
+                raw = await (job.runner or self.runner)(**job.params)
+        except Exception as e:
+            logging.exception("Generation job %s failed", job.job_id)
+            self._finish(job, JOB_FAILED, error=str(e))
+            return
+
+        result = json.loads(raw) if isinstance(raw, str) else raw
+        success = bool(result.get("success")) if isinstance(result, dict) else True
+        self._finish(
+            job,
+            JOB_SUCCEEDED if success else JOB_FAILED,
+            result=result,
+            error=None if success else (result.get("error") if isinstance(result, dict) else None),
+        )
+
+    def _finish(
+        self,
+        job: GenerationJob,
+        status: str,
+        result: Optional[Dict[str, Any]] = None,
+        error: Optional[str] = None,
+    ) -> None:
+        if job.finished:
+            return
+        job.status = status
+        job.result = result
+        job.error = error
+        job.finished_at = datetime.now().isoformat()
+        job.done.set()
+        job.notify()
+
+    def _prune_finished(self) -> None:
+        """Forget the oldest finished jobs beyond max_finished_jobs"""
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[: max(0, len(finished) - self.max_finished_jobs)]:
+            del self._jobs[job_id]
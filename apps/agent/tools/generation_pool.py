@@ -0,0 +1,148 @@
+"""
+Warm pool of compiled site-generation graphs.
+
+Building a ChatBot, reading the system prompt, assembling the graph template
+and compiling it used to happen on every generate_site call. The pool keeps a
+bounded set of ready-to-run slots instead: each slot owns one ChatBot (and so
+reuses its provider connections), one SiteGenerationGraph with its content
+agent, and the compiled graph. A slot is used by one run at a time and reset
+cheaply between runs.
+"""
+
+import asyncio
+import logging
+import os
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Dict, List
+
+from spoon_ai.chat import ChatBot
+from spoon_ai.graph import InMemoryCheckpointer
+
+from .graph_workflow import SiteGenerationGraph
+from .text_cache import read_text_cached
+
+SYSTEM_PROMPT_PATH = Path(__file__).parent / "generate_site_system_prompt.md"
+
+
+class GenerationSlot:
+    """One warm, compiled site-generation graph bound to its own ChatBot"""
+
+    def __init__(self, llm: ChatBot, system_prompt: str):
+        self.llm = llm
+        self.system_prompt = system_prompt
+        self.graph = SiteGenerationGraph(llm, system_prompt)
+        self.compiled = self.graph.build().compile()
+        # Graphs entered at a later node, compiled on first resume from that node
+        self._resume_graphs: Dict[str, Any] = {}
+        self.runs = 0
+
+    async def invoke(self, initial_state: Dict[str, Any]) -> Dict[str, Any]:
+        """Run the compiled graph for one generation"""
+        self.runs += 1
+        return await self.compiled.invoke(initial_state)
+
+    async def resume(self, state: Dict[str, Any], node: str) -> Dict[str, Any]:
+        """
+        Continue a checkpointed generation.
+
+        Args:
+            state: Graph state saved before node started
+            node: Node to continue at
+        """
+        compiled = self._resume_graphs.get(node)
+        if compiled is None:
+            compiled = self._resume_graphs[node] = self.graph.build(entry_point=node).compile()
+        self.runs += 1
+        return await compiled.invoke(state)
+
+    def reset(self) -> None:
+        """Drop per-run state so the next run starts clean"""
+        for compiled in (self.compiled, *self._resume_graphs.values()):
+            # The engine checkpoints every step under a fresh thread id; without
+            # clearing, a long-lived compiled graph would accumulate them forever
+            checkpointer = compiled.graph.checkpointer
+            if isinstance(checkpointer, InMemoryCheckpointer):
+                checkpointer.checkpoints.clear()
+                checkpointer.last_access.clear()
+            compiled.execution_history.clear()
+
+
+class GenerationPool:
+    """Bounded pool of GenerationSlots, created lazily and reused across requests"""
+
+    def __init__(self, llm_factory: Callable[[], ChatBot], size: int = 2):
+        """
+        Args:
+            llm_factory: Creates the ChatBot for a new slot
+            size: Maximum number of slots (concurrent generations served warm)
+        """
+        self.llm_factory = llm_factory
+        self.size = max(1, size)
+        self._idle: List[GenerationSlot] = []
+        self._created = 0
+        self._available = asyncio.Condition()
+
+    @classmethod
+    def from_env(cls, llm_factory: Callable[[], ChatBot]) -> "GenerationPool":
+        """Create a pool sized by GENERATION_POOL_SIZE (defaults to GENERATION_MAX_CONCURRENCY)"""
+        size = os.getenv("GENERATION_POOL_SIZE") or os.getenv("GENERATION_MAX_CONCURRENCY", "2")
+        return cls(llm_factory, size=int(size))
+
+    def _create_slot(self) -> GenerationSlot:
+        return GenerationSlot(self.llm_factory(), read_text_cached(SYSTEM_PROMPT_PATH))
+
+    async def _checkout(self) -> GenerationSlot:
+        async with self._available:
+            while not self._idle and self._created >= self.size:
+                await self._available.wait()
+
+            system_prompt = read_text_cached(SYSTEM_PROMPT_PATH)
+            if self._idle:
+                slot = self._idle.pop()
+                if slot.system_prompt == system_prompt:
+                    return slot
+                # The prompt changed on disk; rebuild the graph but keep the warm ChatBot
+                logging.info("Generation system prompt changed, recompiling pooled graph")
+                return GenerationSlot(slot.llm, system_prompt)
+
+            self._created += 1
+
+        try:
+            return self._create_slot()
+        except Exception:
+            async with self._available:
+                self._created -= 1
+                self._available.notify()
+            raise
+
+    async def _checkin(self, slot: GenerationSlot) -> None:
+        slot.reset()
+        async with self._available:
+            self._idle.append(slot)
+            self._available.notify()
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[GenerationSlot]:
+        """Borrow a slot for one generation run, waiting if all slots are busy"""
+        slot = await self._checkout()
+        try:
+            yield slot
+        finally:
+            await self._checkin(slot)
+
+    async def warm_up(self, count: int = 1) -> None:
+        """Pre-create up to count slots so the first requests skip setup"""
+        async with self._available:
+            while self._created < min(count, self.size):
+                self._idle.append(self._create_slot())
+                self._created += 1
+            self._available.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": self.size,
+            "created": self._created,
+            "idle": len(self._idle),
+            "in_use": self._created - len(self._idle),
+        }
@@ -5,8 +5,14 @@ This module defines the graph-based workflow for multi-step site generation,
 providing better orchestration, error handling, and state management.
 """
 
+import asyncio
 import json
-from typing import TypedDict, Dict, Any, Optional, Annotated
+import logging
+import os
+import time
+from pathlib import Path
+from typing import TypedDict, Dict, Any, Awaitable, Callable, List, Optional, Annotated
+from pydantic import Field
 from spoon_ai.chat import ChatBot, Memory
 from spoon_ai.tools import ToolManager
 from spoon_ai.agents import ToolCallAgent
@@ -15,15 +21,38 @@ from spoon_ai.graph import (
     END,
     ConditionNode,
 )
-from spoon_ai.schema import AgentState
+from spoon_ai.schema import AgentState, Message
 from spoon_ai.graph.builder import (
     DeclarativeGraphBuilder,
     GraphTemplate,
     NodeSpec,
     EdgeSpec,
     GraphConfig,
+    ParallelGroupSpec,
 )
+from spoon_ai.graph.config import ParallelGroupConfig
+from .generation_checkpoints import generation_checkpoints
 from .manage_site_files import ManageSiteFilesTool
+from .metrics import graph_node_duration
+from .progress import report_progress, set_progress_attempt
+from .text_cache import read_text_cached
+from .site_documents import site_documents
+from .site_publisher import PublishError, site_publisher
+from .site_sections import SectionSpec, assemble_page, fragment_path, parse_section_plan
+from .site_snapshots import record_site_write
+from .site_verifier import site_verifier
+
+TEMPLATE_PATH = Path(__file__).parent / "template.html"
+SECTION_SYSTEM_PROMPT_PATH = Path(__file__).parent / "generate_section_system_prompt.md"
+
+# Section agents run concurrently, one per node of the "sections" parallel group;
+# this also caps how many sections a plan may have (0 or 1 disables planning)
+SECTION_WORKERS = int(os.getenv("GENERATION_SECTION_WORKERS", "4"))
+
+PLANNER_SYSTEM_PROMPT = (
+    "You plan single-page websites for a team of front-end developers working in parallel. "
+    "Reply with a JSON array only."
+)
 
 
 class SiteGenerationState(TypedDict):
@@ -40,18 +69,88 @@ class SiteGenerationState(TypedDict):
     content_ready: bool  # Flag to indicate if content generation is complete
     generation_attempts: int  # Counter for generation attempts
     verification_passed: bool
+    published: bool  # dist/index.html was built from the verified source
+    publish_error: Optional[str]
     error: Optional[str]
     result: Optional[str]
+    sections: List[Dict[str, Any]]  # Section plan (SectionSpec dicts); empty for single-pass generation
+    section_fragments: Dict[str, Dict[str, Any]]  # Component -> fragment path and generation error
+    candidate: Optional[int]  # Index of a speculative candidate (runs in a scratch site, never published)
     memory: Annotated[Optional[Dict[str, Any]], None]
 
 
+class CheckpointedToolCallAgent(ToolCallAgent):
+    """ToolCallAgent that hands its transcript to step_listener after every completed step"""
+
+    step_listener: Optional[Callable[[List[Message]], Awaitable[None]]] = Field(default=None, exclude=True)
+
+    async def act(self) -> str:
+        result = await super().act()
+        # Every tool call of the step has its result in memory now
+        if self.step_listener is not None:
+            await self.step_listener(self.memory.messages)
+        return result
+
+
 class SiteGenerationGraph:
     """Graph-based workflow for site generation"""
 
-    def __init__(self, llm: ChatBot, system_prompt: str):
+    def __init__(self, llm: ChatBot, system_prompt: str, section_workers: Optional[int] = None):
         self.llm = llm
         self.system_prompt = system_prompt
+        self.section_workers = SECTION_WORKERS if section_workers is None else section_workers
         self.file_tool = ManageSiteFilesTool()
+        self._agent: Optional[ToolCallAgent] = None
+        self._section_agents: Dict[int, ToolCallAgent] = {}
+
+    @staticmethod
+    def _reset_agent(agent: ToolCallAgent) -> ToolCallAgent:
+        """Replace an agent's per-run state so it can be reused for a fresh run"""
+        # Brand new Memory instance to avoid any state leakage between attempts
+        agent.memory = Memory()
+        agent.tool_calls = []
+        agent.current_step = 0
+        agent.state = AgentState.IDLE
+        agent.output_queue = asyncio.Queue()
+        agent.last_tool_error = None
+        if isinstance(agent, CheckpointedToolCallAgent):
+            agent.step_listener = None
+        return agent
+
+    def _content_agent(self) -> ToolCallAgent:
+        """
+        Return the content generation agent, reset for a fresh attempt.
+
+        The agent (and its tool manager) is created once per graph and reused;
+        only its per-run state is replaced, which is much cheaper than
+        constructing a new pydantic agent on every attempt.
+        """
+        if self._agent is None:
+            self._agent = CheckpointedToolCallAgent(
+                llm=self.llm,
+                name="content_generator",
+                system_prompt=self.system_prompt,
+                available_tools=ToolManager([self.file_tool]),
+                max_steps=15,  # More steps for content generation
+            )
+            self._agent._default_timeout = 600
+
+        return self._reset_agent(self._agent)
+
+    def _section_agent(self, worker: int) -> ToolCallAgent:
+        """Return the agent of one section worker, reset for a fresh section (see _content_agent)"""
+        agent = self._section_agents.get(worker)
+        if agent is None:
+            agent = ToolCallAgent(
+                llm=self.llm,
+                name=f"section_generator_{worker}",
+                system_prompt=read_text_cached(SECTION_SYSTEM_PROMPT_PATH),
+                available_tools=ToolManager([self.file_tool]),
+                max_steps=6,  # One create_file, with room to recover from a rejected call
+            )
+            agent._default_timeout = 600
+            self._section_agents[worker] = agent
+        return self._reset_agent(agent)
 
     def _create_skeleton_from_template_node(self) -> callable:
         """Create node function that loads template.html and initializes the site"""
@@ -60,19 +159,16 @@ class SiteGenerationGraph:
             state: SiteGenerationState, config: Optional[Dict[str, Any]] = None
         ) -> Dict[str, Any]:
             """Load template.html and replace placeholders with initial values"""
-            from pathlib import Path
-
             # Load the template
-            template_path = Path(__file__).parent / "template.html"
-            if not template_path.exists():
+            if not TEMPLATE_PATH.exists():
                 return {
                     "html_skeleton_created": False,
                     "current_step": "template_not_found",
                     "result": None,
-                    "error": f"Template file not found: {template_path}",
+                    "error": f"Template file not found: {TEMPLATE_PATH}",
                 }
 
-            template_content = template_path.read_text(encoding="utf-8")
+            template_content = read_text_cached(TEMPLATE_PATH)
 
             # Determine page title from site_type or requirements
             site_type = state.get("site_type", "").strip()
@@ -121,6 +217,150 @@ class SiteGenerationGraph:
 
         return create_skeleton_from_template
 
+    def _plan_sections_node(self) -> callable:
+        """Create node function that splits the page into independently generated sections"""
+
+        async def plan_sections(
+            state: SiteGenerationState, config: Optional[Dict[str, Any]] = None
+        ) -> Dict[str, Any]:
+            """Ask the model for a section plan; fewer than two sections means a single pass"""
+            set_progress_attempt(1)
+            if self.section_workers < 2 or not state.get("html_skeleton_created"):
+                return {"sections": [], "current_step": "single_pass"}
+
+            prompt = f"""Requirements: {state.get('requirements', '')}
+Site Type: {state.get('site_type', '')}
+Style Preferences: {state.get('style_preferences', '')}
+
+Split this single-page site into at most {self.section_workers} independent sections, in page order, \
+that different developers can build at the same time (e.g. navigation, hero, features, pricing, \
+footer; or a dashboard's sidebar, charts and tables). Each section is one self-contained React \
+component that takes no props and shares no state with the other sections.
+
+If the site is one tightly coupled app (a game, a calculator, a single interactive tool) that \
+cannot be split this way, reply with [].
+
+Otherwise reply with a JSON array of objects:
+[{{"component": "HeroSection", "name": "Hero", "description": "What this section contains and does"}}]
+- component: unique PascalCase React component name (not App)
+- description: enough detail to build the section without seeing the others (content, layout, interactions)"""
+
+            try:
+                reply = await self.llm.ask([{"role": "user", "content": prompt}], system_msg=PLANNER_SYSTEM_PROMPT)
+            except Exception as e:
+                # Planning is an optimization; the single-pass agent can always do the job
+                logging.warning("Section planning failed, generating in one pass: %s", e)
+                return {"sections": [], "current_step": "single_pass"}
+
+            sections = parse_section_plan(str(reply), self.section_workers)
+            if len(sections) < 2:
+                return {"sections": [], "current_step": "single_pass"}
+            return {
+                "sections": [section.to_dict() for section in sections],
+                "current_step": "sections_planned",
+            }
+
+        return plan_sections
+
+    def _generate_section_node(self, worker: int) -> callable:
+        """Create the node function of one section worker in the "sections" parallel group"""
+
+        async def generate_section(
+            state: SiteGenerationState, config: Optional[Dict[str, Any]] = None
+        ) -> Dict[str, Any]:
+            """Generate the plan's section number `worker` into its own fragment file"""
+            sections = state.get("sections") or []
+            if worker >= len(sections):
+                return {}
+
+            section = SectionSpec.from_dict(sections[worker])
+            path = fragment_path(section.component)
+            others = ", ".join(
+                f"{other['component']} ({other.get('name', '')})"
+                for index, other in enumerate(sections)
+                if index != worker
+            )
+            prompt = f"""Requirements of the whole site: {state.get('requirements', '')}
+Site Type: {state.get('site_type', '')}
+Style Preferences: {state.get('style_preferences', '')}
+
+Your section: {section.name}
+Component name: {section.component}
+What it contains: {section.description}
+Other sections of the page (written by others, do not write them): {others}
+
+Create the fragment with ONE manage_site_files call:
+- operation: "create_file"
+- site_id: "{state['site_id']}"
+- file_path: "{path}"
+- content: the complete source defining `const {section.component} = () => {{ ... }};`"""
+
+            checkpointed = generation_checkpoints.tracks(state)
+            if checkpointed and await site_documents.aexists(state["site_id"], path):
+                # Written before the run was interrupted; resuming does not pay for it again
+                report_progress(f"generate_section_{worker}", event="section_reused", component=section.component)
+                return {"section_fragments": {section.component: {"path": path, "error": None}}}
+
+            agent = self._section_agent(worker)
+            try:
+                await agent.run(prompt)
+                error = None
+            except Exception as e:
+                error = str(e)
+            if checkpointed:
+                # On disk now, so a resume of an interrupted group can reuse it
+                await site_documents.aflush(state["site_id"])
+            return {"section_fragments": {section.component: {"path": path, "error": error}}}
+
+        return generate_section
+
+    def _assemble_sections_node(self) -> callable:
+        """Create node function that merges the section fragments into index.html"""
+
+        async def assemble_sections(
+            state: SiteGenerationState, config: Optional[Dict[str, Any]] = None
+        ) -> Dict[str, Any]:
+            """Splice the fragments into the page, then delete them"""
+            site_id = state["site_id"]
+            sections = [SectionSpec.from_dict(data) for data in state.get("sections") or []]
+            # Read-splice-write under the site lock, like every manage_site_files write,
+            # so a concurrent edit of index.html is never overwritten
+            async with site_documents.site_lock(site_id):
+                fragments: Dict[str, str] = {}
+                for section in sections:
+                    source = await site_documents.aread(site_id, fragment_path(section.component))
+                    if source is not None:
+                        fragments[section.component] = source
+
+                document = await site_documents.aget(site_id, "index.html")
+                html = document.content if document is not None else ""
+                assembly = await site_documents.run_io(assemble_page, html, sections, fragments)
+                if assembly.html is not None:
+                    written = await site_documents.awrite(site_id, "index.html", assembly.html)
+                    await record_site_write(site_id, "index.html", "assemble_sections")
+                    report_progress(
+                        "assemble_sections",
+                        event="file_operation",
+                        operation="assemble_sections",
+                        file_path="index.html",
+                        bytes_written=written.size,
+                    )
+                for section in sections:
+                    if await site_documents.adelete(site_id, fragment_path(section.component)):
+                        await record_site_write(site_id, fragment_path(section.component), "delete_file")
+
+            # The parallel pass counts as the first generation attempt; check_content_ready
+            # sends incomplete pages to the single-pass agent to finish
+            return {
+                "content_generated": assembly.html is not None,
+                "generation_attempts": 1,
+                "current_step": "sections_assembled",
+                "result": json.dumps({"included": assembly.included, "problems": assembly.problems}),
+                "error": "; ".join(assembly.problems) or None,
+            }
+
+        return assemble_sections
+
     def _generate_content_node(self) -> callable:
         """Create node function for LLM-based content generation"""
 
@@ -131,28 +371,10 @@ class SiteGenerationGraph:
             # Increment generation attempts
             current_attempts = state.get("generation_attempts", 0) + 1
             max_attempts = 3  # Allow up to 3 attempts
+            set_progress_attempt(current_attempts)
 
-            # Create agent with file management tools
-            agent = ToolCallAgent(
-                llm=self.llm,
-                name="content_generator",
-                system_prompt=self.system_prompt,
-                available_tools=ToolManager([ManageSiteFilesTool()]),
-                max_steps=15,  # More steps for content generation
-            )
-            agent._default_timeout = 600
-            # Ensure memory is completely clean for fresh agent instance
-            # Create a brand new Memory instance to avoid any state leakage
-            agent.memory = Memory()
-            agent.memory.clear()  # Double-check it's empty
-            agent.tool_calls = []
-            agent.current_step = 0
-            agent.state = AgentState.IDLE
-
-            # Verify memory is actually empty (defensive check)
-            if agent.memory.get_messages():
-                # If memory has messages, something is wrong - clear it again
-                agent.memory.clear()
+            # Reuse this graph's content agent, reset to a clean slate
+            agent = self._content_agent()
 
             # Check if this is a retry attempt
             is_retry = current_attempts > 1
@@ -161,7 +383,13 @@ class SiteGenerationGraph:
                 retry_instruction = f"\n\nNOTE: This is attempt {current_attempts} of {max_attempts}. "
                 retry_instruction += "Please review the existing content and improve it. "
                 retry_instruction += "Check for any missing features, broken functionality, or incomplete sections. "
-                retry_instruction += "Read the current file first to see what's already there, then enhance it."
+                retry_instruction += (
+                    "Do NOT read the whole file: start with site_outline to see its components, hooks and "
+                    "sections with line numbers, then use search_file (e.g. for a component name or TODO) "
+                    "or read_file with start_line/end_line to inspect only the parts you need, then enhance them."
+                )
+                if state.get("error"):
+                    retry_instruction += f"\nThe previous attempt is not finished yet: {state['error']}."
 
             # Construct prompt for content generation
             prompt = f"""Requirements: {state.get('requirements', '')}
@@ -176,11 +404,15 @@ The HTML template has been created with ESM module support. Your task is to:
 5. Ensure the site is production-ready
 {retry_instruction}
 CRITICAL - When calling manage_site_files tool, you MUST include ALL required parameters:
-- operation: "create_file", "edit_file", "read_file", or "delete_file" (REQUIRED)
+- operation: "create_file", "edit_file", "apply_edits", "read_file", "search_file", "site_outline", or "delete_file" (REQUIRED)
 - site_id: "{state['site_id']}" (REQUIRED - use this exact value)
 - file_path: "index.html" or other file path (REQUIRED)
 - For edit_file: old_string (REQUIRED, keep under 500 chars) and new_string (REQUIRED)
+- For apply_edits: edits (list of {{"old_string", "new_string"}} objects, applied in order, all-or-nothing) and/or diff (unified diff)
 - For create_file: content (REQUIRED)
+- For read_file: optional start_line/end_line (1-based) to read only part of the file
+- For search_file: pattern (REQUIRED), optional context_lines; returns matching lines with line numbers
+- For site_outline: no extra parameters; returns components, hooks, sections, imports and import map entries with line spans
 
 Example tool call format:
 {{
@@ -195,19 +427,37 @@ IMPORTANT RULES:
 - Template uses ESM imports via import map with version pinning - use standard import/export syntax
 - ALWAYS include operation, site_id, and file_path in EVERY tool call
 - Keep old_string SHORT (under 500 chars) to avoid JSON truncation
+- Prefer ONE apply_edits call over several edit_file calls when changing multiple places in a file
 - Use // ========[APP_CONTENT_HERE]======== as the old_string for the first edit
 - Replace SampleApp with your actual App component
 - Update the render call to use your component name
 - If you need additional libraries, add them to import map using jsdelivr ESM format WITH VERSION: https://cdn.jsdelivr.net/npm/[package]@[version]/+esm
 - CRITICAL: Always include version numbers in import map URLs (e.g., @19.2.0, @3.12.5)
 - CRITICAL: Related packages must use matching versions (e.g., react@19.2.0 and react-dom@19.2.0 must match)
-- Build incrementally if needed (read file first, then edit in steps)
+- Build incrementally if needed (locate code with site_outline, search_file or a read_file line range, then edit in steps)
 - React 19.2.0 and TailwindCSS are already loaded via ESM and CDN with proper versioning
 
 Generate a complete, production-ready website using modern ESM syntax with version-pinned dependencies."""
 
+            if generation_checkpoints.tracks(state):
+                async def save_transcript(messages: List[Message]) -> None:
+                    await generation_checkpoints.save_agent(
+                        "generate_content", state, [message.model_dump(mode="json") for message in messages]
+                    )
+
+                agent.step_listener = save_transcript
+
             try:
-                result = await agent.run(prompt)
+                transcript = generation_checkpoints.agent_transcript("generate_content", state)
+                if transcript:
+                    # Interrupted mid-attempt: continue the conversation instead of starting over
+                    agent.memory.messages = [Message(**data) for data in transcript]
+                    steps_done = sum(1 for message in agent.memory.messages if message.role == "assistant")
+                    agent.current_step = min(steps_done, agent.max_steps - 1)
+                    report_progress("generate_content", event="agent_resumed", messages=len(transcript))
+                    result = await agent.run()
+                else:
+                    result = await agent.run(prompt)
                 # Mark content as generated, but not necessarily ready
                 # The check_content_ready node will determine if we need another pass
                 return {
@@ -242,29 +492,15 @@ Generate a complete, production-ready website using modern ESM syntax with versi
             generation_attempts = state.get("generation_attempts", 0)
             max_attempts = 3
 
-            # Read the current file to check if content placeholder is still there
-            result = await self.file_tool.execute(
-                operation="read_file", site_id=state["site_id"], file_path="index.html"
-            )
+            # One structural pass over the current file (memoized per content version,
+            # so verify_site reuses it when nothing changed in between)
+            document = await site_documents.aget(state["site_id"], "index.html")
+            report = await site_documents.run_io(site_verifier.verify, document)
 
-            result_data = json.loads(result) if isinstance(result, str) else result
-            content = result_data.get("content", "")
-
-            # Check if placeholder is still present (content not fully generated)
-            placeholder_present = "// ========[APP_CONTENT_HERE]========" in content
-            sample_app_present = "SampleApp" in content and "This is template content" in content
-            has_react = "import React" in content or "from \"react\"" in content or "from 'react'" in content
-            has_content = len(content) > 500  # Reasonable minimum size
-
-            # Content is ready if:
-            # 1. Placeholder is gone (replaced with actual content)
-            # 2. SampleApp placeholder is gone (replaced with actual app)
-            # 3. Has React ESM imports
-            # 4. Has sufficient content
-            # 5. OR we've reached max attempts
-            content_ready = (
-                not placeholder_present and not sample_app_present and has_react and has_content
-            ) or generation_attempts >= max_attempts
+            # Content is ready when the placeholder and SampleApp are gone, React is
+            # imported, the file is a reasonable size and the JSX parses - or when
+            # we've reached max attempts
+            content_ready = report.content_ready or generation_attempts >= max_attempts
 
             # Route decision: "continue_generation" or "proceed_to_verify"
             next_step = "proceed_to_verify" if content_ready else "continue_generation"
@@ -272,6 +508,8 @@ Generate a complete, production-ready website using modern ESM syntax with versi
             return {
                 "content_ready": content_ready,
                 "current_step": next_step,
+                # Fed back into the next generation attempt's prompt
+                "error": None if report.content_ready else "; ".join(report.problems()),
             }
 
         return check_content_ready
@@ -283,43 +521,82 @@ Generate a complete, production-ready website using modern ESM syntax with versi
             state: SiteGenerationState, config: Optional[Dict[str, Any]] = None
         ) -> Dict[str, Any]:
             """Verify the site was created correctly"""
-            result = await self.file_tool.execute(
-                operation="read_file", site_id=state["site_id"], file_path="index.html"
-            )
-
-            result_data = json.loads(result) if isinstance(result, str) else result
-            content = result_data.get("content", "")
-
-            # Check requirements for ESM-based template
-            has_react_imports = "import React" in content or "from \"react\"" in content or "from 'react'" in content
-            has_createroot = "createRoot" in content
-            has_tailwind = "tailwindcss" in content.lower() or "@tailwindcss" in content
-            has_root = '<div id="root">' in content or '<div id="root">' in content
-            has_importmap = "importmap" in content or "type=\"importmap\"" in content
-            has_content = len(content) > 500  # Reasonable minimum size
-            no_placeholder = "// ========[APP_CONTENT_HERE]========" not in content
-            no_sample_app = not ("SampleApp" in content and "This is template content" in content)
-
-            verification_passed = bool(
-                content and has_react_imports and has_createroot and has_tailwind
-                and has_root and has_importmap and has_content and no_placeholder and no_sample_app
-            )
+            document = await site_documents.aget(state["site_id"], "index.html")
+            report = await site_documents.run_io(site_verifier.verify, document)
+            verification_passed = report.passed
 
             return {
                 "verification_passed": verification_passed,
                 "current_step": (
                     "verified" if verification_passed else "verification_failed"
                 ),
-                "result": result,
+                "result": json.dumps({
+                    "site_id": state["site_id"],
+                    "file_path": "index.html",
+                    "version": document.version if document is not None else None,
+                    "size": report.size,
+                    "verification": report.to_dict(),
+                }),
                 "error": (
                     None
                     if verification_passed
-                    else "Site verification failed: missing required components"
+                    else "Site verification failed: " + "; ".join(report.problems())
                 ),
             }
 
         return verify_site
 
+    def _publish_site_node(self) -> callable:
+        """Create node function that builds the production dist/index.html"""
+
+        async def publish_site(
+            state: SiteGenerationState, config: Optional[Dict[str, Any]] = None
+        ) -> Dict[str, Any]:
+            """Publish the verified site; a failure keeps the source servable and is not fatal"""
+            try:
+                await site_publisher.publish(state["site_id"])
+            except PublishError as e:
+                return {
+                    "published": False,
+                    "publish_error": str(e),
+                    "current_step": "publish_failed",
+                }
+            return {
+                "published": True,
+                "publish_error": None,
+                "current_step": "published",
+            }
+
+        return publish_site
+
+    def _track_node(self, name: str, node: callable, checkpoint: bool = True) -> callable:
+        """
+        Wrap a node function so entering and leaving it are reported as progress
+        events, and its input state is checkpointed (unless checkpoint is False)
+        """
+
+        async def tracked_node(
+            state: SiteGenerationState, config: Optional[Dict[str, Any]] = None
+        ) -> Dict[str, Any]:
+            if checkpoint:
+                await generation_checkpoints.save_node(name, state)
+            report_progress(name, event="node_started", site_id=state.get("site_id"))
+            started = time.monotonic()
+            updates = await node(state, config)
+            duration = time.monotonic() - started
+            graph_node_duration.observe(duration, node=name)
+            report_progress(
+                name,
+                event="node_finished",
+                site_id=state.get("site_id"),
+                duration_seconds=round(duration, 3),
+                next_step=updates.get("current_step"),
+                error=updates.get("error"),
+            )
+            return updates
+
+        return tracked_node
+
     def _route_to_continue_generation(self) -> callable:
         """Create a condition function that returns True if we should continue generation"""
 
@@ -348,22 +625,85 @@ Generate a complete, production-ready website using modern ESM syntax with versi
 
         return should_verify
 
-    def build(self) -> StateGraph:
-        """Build and return the site generation graph"""
+    def _route_to_sections(self) -> callable:
+        """Create a condition function that returns True if the page was split into sections"""
+
+        def should_generate_sections(state: SiteGenerationState) -> bool:
+            return len(state.get("sections") or []) >= 2
+
+        return should_generate_sections
+
+    def _route_to_single_pass(self) -> callable:
+        """Create a condition function that returns True if the page is generated in one pass"""
+
+        def should_generate_single_pass(state: SiteGenerationState) -> bool:
+            return len(state.get("sections") or []) < 2
+
+        return should_generate_single_pass
+
+    def _route_to_publish(self) -> callable:
+        """Create a condition function that returns True if the verified site should be published"""
+
+        def should_publish(state: SiteGenerationState) -> bool:
+            # A speculative candidate is published only after it has been promoted
+            return bool(state.get("verification_passed", False)) and state.get("candidate") is None
+
+        return should_publish
+
+    def _route_to_end(self) -> callable:
+        """Create a condition function that returns True if there is nothing to publish"""
+        should_publish = self._route_to_publish()
+
+        def should_end(state: SiteGenerationState) -> bool:
+            return not should_publish(state)
+
+        return should_end
+
+    def build(self, entry_point: str = "create_skeleton_from_template") -> StateGraph:
+        """
+        Build and return the site generation graph.
+
+        Args:
+            entry_point: Node the run starts at; resuming a checkpointed run starts
+                at the node it was about to run (a section worker resumes the whole group)
+        """
         # Create node functions
         create_skeleton_from_template = self._create_skeleton_from_template_node()
+        plan_sections = self._plan_sections_node()
+        assemble_sections = self._assemble_sections_node()
         generate_content = self._generate_content_node()
         check_content_ready = self._check_content_ready_node()
         verify_site = self._verify_site_node()
+        publish_site = self._publish_site_node()
+        should_generate_sections = self._route_to_sections()
+        should_generate_single_pass = self._route_to_single_pass()
         should_continue = self._route_to_continue_generation()
         should_verify = self._route_to_verify()
+        should_publish = self._route_to_publish()
+        should_end = self._route_to_end()
+
+        # One worker node per concurrent section; the engine runs the whole group
+        # when the first one is reached and follows that node's edges afterwards
+        section_workers = [
+            (f"generate_section_{worker}", self._generate_section_node(worker))
+            for worker in range(max(self.section_workers, 1))
+        ]
+        grouped_workers = {name for name, _ in section_workers[1:]}
 
         # Define nodes
+        # The group is checkpointed (and resumed) as a whole, at its first worker
         nodes = [
-            NodeSpec("create_skeleton_from_template", create_skeleton_from_template),
-            NodeSpec("generate_content", generate_content),
-            NodeSpec("check_content_ready", check_content_ready),
-            NodeSpec("verify_site", verify_site),
+            NodeSpec(name, self._track_node(name, handler, checkpoint=name not in grouped_workers))
+            for name, handler in (
+                ("create_skeleton_from_template", create_skeleton_from_template),
+                ("plan_sections", plan_sections),
+                *section_workers,
+                ("assemble_sections", assemble_sections),
+                ("generate_content", generate_content),
+                ("check_content_ready", check_content_ready),
+                ("verify_site", verify_site),
+                ("publish_site", publish_site),
+            )
         ]
 
         # Define edges with conditional routing
@@ -384,13 +724,19 @@ Generate a complete, production-ready website using modern ESM syntax with versi
         # Try using a simple router pattern with both edges
         # The graph system should handle routing based on the condition functions
         edges = [
-            EdgeSpec("create_skeleton_from_template", "generate_content"),
+            EdgeSpec("create_skeleton_from_template", "plan_sections"),
+            EdgeSpec("plan_sections", "generate_section_0", condition=should_generate_sections),
+            EdgeSpec("plan_sections", "generate_content", condition=should_generate_single_pass),
+            EdgeSpec("generate_section_0", "assemble_sections"),
+            EdgeSpec("assemble_sections", "check_content_ready"),
             EdgeSpec("generate_content", "check_content_ready"),
             # Add both possible routes - the graph system or condition functions will handle routing
             # If EdgeSpec supports condition, use it; otherwise both edges will be evaluated
             EdgeSpec("check_content_ready", "generate_content", condition=should_continue),
             EdgeSpec("check_content_ready", "verify_site", condition=should_verify),
-            EdgeSpec("verify_site", END),
+            EdgeSpec("verify_site", "publish_site", condition=should_publish),
+            EdgeSpec("verify_site", END, condition=should_end),
+            EdgeSpec("publish_site", END),
         ]
 
         # Configure graph with more iterations to allow multiple content generation passes
@@ -398,10 +744,16 @@ Generate a complete, production-ready website using modern ESM syntax with versi
 
         # Create template
         template = GraphTemplate(
-            entry_point="create_skeleton_from_template",
+            entry_point=entry_point,
             nodes=nodes,
             edges=edges,
-            parallel_groups=[],
+            parallel_groups=[
+                ParallelGroupSpec(
+                    "sections",
+                    [name for name, _ in section_workers],
+                    ParallelGroupConfig(join_strategy="all", error_strategy="collect_errors"),
+                ),
+            ],
             config=config,
         )
 
@@ -0,0 +1,400 @@
+"""
+Pure-Python JSX transform (classic runtime).
+
+Rewrites JSX elements in a JavaScript module into React.createElement calls,
+the same output Babel's classic React preset produces, so published sites no
+longer need @babel/standalone in the browser. It is the fallback backend of
+the publish stage when esbuild is not installed and covers the JSX the
+generator emits: elements, fragments, member and namespaced tags, string,
+expression and spread attributes, expression containers, comments and JSX
+text whitespace rules. Plain JavaScript (strings, template literals, regular
+expressions, comments) is copied through unchanged.
+"""
+
+import html
+import json
+import re
+from typing import Callable, List, Optional
+
+# observer(kind, value, offset) with kind one of "word", "comment", "string", "tag", "text"
+TokenObserver = Callable[[str, str, int], None]
+
+_IDENTIFIER = re.compile(r"[A-Za-z_$][\w$]*")
+_WORD = re.compile(r"[\w$]+")
+_TAG_NAME = re.compile(r"[A-Za-z_$][\w$\-:.]*")
+_ATTR_NAME = re.compile(r"[A-Za-z_$][\w$\-:]*")
+_COMMENTS_ONLY = re.compile(r"\s*(?:/\*.*?\*/\s*|//[^\n]*(?:\n|$)\s*)*", re.S)
+
+# After these tokens an expression (and so JSX or a regex literal) may start
+_EXPRESSION_PUNCTUATION = set("([{,;:=!&|?+-*%~^<>")
+_EXPRESSION_KEYWORDS = {
+    "return", "yield", "await", "typeof", "case", "default", "else", "do",
+    "in", "of", "void", "delete", "new", "throw", "instanceof",
+}
+
+
+class JsxSyntaxError(ValueError):
+    """Raised when the source contains malformed JSX"""
+
+    def __init__(self, message: str, line: int):
+        super().__init__(f"{message} (line {line})")
+        self.message = message
+        self.line = line
+
+
+def transform_jsx(
+    source: str,
+    pragma: str = "React.createElement",
+    pragma_frag: str = "React.Fragment",
+    observer: Optional[TokenObserver] = None,
+) -> str:
+    """
+    Compile the JSX in source to plain JavaScript.
+
+    Args:
+        source: JavaScript module containing JSX
+        pragma: Function called for each element
+        pragma_frag: Component used for <>...</> fragments
+        observer: Optional callback receiving each identifier/keyword, comment,
+            string literal, JSX tag name and JSX text with its source offset,
+            so callers can analyze the module in the same pass
+
+    Returns:
+        The source with every JSX element replaced by a pragma call
+
+    Raises:
+        JsxSyntaxError: If a JSX element, string or comment is not terminated
+            or closing tags do not match
+    """
+    return _JsxTransformer(source, pragma, pragma_frag, observer).run()
+
+
+def _clean_jsx_text(text: str) -> str:
+    """Apply JSX whitespace rules to a text child (same as Babel's cleanJSXElementLiteralChild)"""
+    lines = text.replace("\r\n", "\n").split("\n")
+    last_non_empty = max((i for i, line in enumerate(lines) if line.strip()), default=-1)
+    result = []
+    for i, line in enumerate(lines):
+        trimmed = line.replace("\t", " ")
+        if i != 0:
+            trimmed = trimmed.lstrip(" ")
+        if i != len(lines) - 1:
+            trimmed = trimmed.rstrip(" ")
+        if trimmed:
+            if i != last_non_empty:
+                trimmed += " "
+            result.append(trimmed)
+    return "".join(result)
+
+
+def _prop_key(name: str) -> str:
+    return name if _IDENTIFIER.fullmatch(name) else json.dumps(name)
+
+
+class _JsxTransformer:
+    def __init__(self, source: str, pragma: str, pragma_frag: str, observer: Optional[TokenObserver]):
+        self.src = source
+        self.n = len(source)
+        self.pos = 0
+        self.pragma = pragma
+        self.pragma_frag = pragma_frag
+        self.observer = observer
+
+    def run(self) -> str:
+        code = self._js(closing=None)
+        if self.pos < self.n:
+            self._error("Unexpected '}'")
+        return code
+
+    # -- helpers --
+
+    def _error(self, message: str) -> None:
+        raise JsxSyntaxError(message, self.src.count("\n", 0, self.pos) + 1)
+
+    def _peek(self, offset: int = 0) -> str:
+        index = self.pos + offset
+        return self.src[index] if index < self.n else ""
+
+    def _expect(self, char: str) -> None:
+        if self._peek() != char:
+            self._error(f"Expected '{char}'")
+        self.pos += 1
+
+    def _skip_whitespace(self) -> None:
+        while self.pos < self.n and self.src[self.pos].isspace():
+            self.pos += 1
+
+    def _match(self, pattern: re.Pattern) -> Optional[str]:
+        match = pattern.match(self.src, self.pos)
+        if match is None:
+            return None
+        self.pos = match.end()
+        return match.group(0)
+
+    @staticmethod
+    def _expression_expected(last: str) -> bool:
+        return last == "" or last in _EXPRESSION_PUNCTUATION or last in _EXPRESSION_KEYWORDS
+
+    def _looks_like_jsx(self) -> bool:
+        following = self._peek(1)
+        return following == ">" or following.isalpha() or following in "_$"
+
+    # -- JavaScript --
+
+    def _js(self, closing: Optional[str]) -> str:
+        """Copy JavaScript up to an unmatched closing brace (or the end), transforming JSX"""
+        out: List[str] = []
+        src = self.src
+        depth = 0
+        # Last significant token: a punctuation char, a word, or ")" for any operand
+        last = ""
+        while self.pos < self.n:
+            char = src[self.pos]
+            if char.isspace():
+                out.append(char)
+                self.pos += 1
+            elif src.startswith("//", self.pos):
+                end = src.find("\n", self.pos)
+                end = self.n if end == -1 else end
+                if self.observer:
+                    self.observer("comment", src[self.pos:end], self.pos)
+                out.append(src[self.pos:end])
+                self.pos = end
+            elif src.startswith("/*", self.pos):
+                end = src.find("*/", self.pos + 2)
+                if end == -1:
+                    self._error("Unterminated comment")
+                if self.observer:
+                    self.observer("comment", src[self.pos:end + 2], self.pos)
+                out.append(src[self.pos:end + 2])
+                self.pos = end + 2
+            elif char in "'\"":
+                start = self.pos
+                literal = self._string(char)
+                if self.observer:
+                    self.observer("string", literal[1:-1], start)
+                out.append(literal)
+                last = ")"
+            elif char == "`":
+                out.append(self._template())
+                last = ")"
+            elif char == "/" and self._expression_expected(last):
+                out.append(self._regex())
+                last = ")"
+            elif char == "<" and self._expression_expected(last) and self._looks_like_jsx():
+                out.append(self._element())
+                last = ")"
+            elif char == "{":
+                depth += 1
+                out.append(char)
+                self.pos += 1
+                last = char
+            elif char == "}":
+                if depth == 0 and closing == "}":
+                    break
+                if depth == 0:
+                    self._error("Unexpected '}'")
+                depth -= 1
+                out.append(char)
+                self.pos += 1
+                last = ")"
+            elif char in ")]":
+                out.append(char)
+                self.pos += 1
+                last = ")"
+            elif char.isalnum() or char in "_$":
+                start = self.pos
+                word = self._match(_WORD)
+                if self.observer:
+                    self.observer("word", word, start)
+                out.append(word)
+                last = word if word in _EXPRESSION_KEYWORDS else ")"
+            else:
+                out.append(char)
+                self.pos += 1
+                last = char
+        return "".join(out)
+
+    def _string(self, quote: str) -> str:
+        start = self.pos
+        self.pos += 1
+        while self.pos < self.n:
+            char = self.src[self.pos]
+            if char == "\\":
+                self.pos += 2
+                continue
+            self.pos += 1
+            if char == quote:
+                return self.src[start:self.pos]
+            if char == "\n":
+                break
+        self.pos = start
+        self._error("Unterminated string")
+
+    def _template(self) -> str:
+        out = ["`"]
+        self.pos += 1
+        while self.pos < self.n:
+            char = self.src[self.pos]
+            if char == "\\":
+                out.append(self.src[self.pos:self.pos + 2])
+                self.pos += 2
+            elif char == "`":
+                out.append(char)
+                self.pos += 1
+                return "".join(out)
+            elif self.src.startswith("${", self.pos):
+                self.pos += 2
+                out.append("${" + self._js(closing="}") + "}")
+                self._expect("}")
+            else:
+                out.append(char)
+                self.pos += 1
+        self._error("Unterminated template literal")
+
+    def _regex(self) -> str:
+        start = self.pos
+        self.pos += 1
+        in_class = False
+        while self.pos < self.n:
+            char = self.src[self.pos]
+            if char == "\n":
+                break
+            if char == "\\":
+                self.pos += 2
+                continue
+            self.pos += 1
+            if char == "[":
+                in_class = True
+            elif char == "]":
+                in_class = False
+            elif char == "/" and not in_class:
+                self._match(_WORD)  # flags
+                return self.src[start:self.pos]
+        # Not a regex after all: emit the slash as an operator
+        self.pos = start + 1
+        return "/"
+
+    # -- JSX --
+
+    def _expression_container(self) -> str:
+        """Parse {expression} starting at '{' and return the transformed expression"""
+        self._expect("{")
+        expression = self._js(closing="}")
+        self._expect("}")
+        return expression
+
+    def _element(self) -> str:
+        self._expect("<")
+        self._skip_whitespace()
+
+        if self._peek() == ">":
+            self.pos += 1
+            children = self._children(None)
+            return self._create_call(self.pragma_frag, "null", children)
+
+        start = self.pos
+        name = self._match(_TAG_NAME)
+        if name is None:
+            self._error("Expected a JSX tag name")
+        if self.observer:
+            self.observer("tag", name, start)
+
+        props: List[str] = []
+        while True:
+            self._skip_whitespace()
+            char = self._peek()
+            if char == "":
+                self._error(f"Unterminated <{name}> tag")
+            if self.src.startswith("/>", self.pos):
+                self.pos += 2
+                children: List[str] = []
+                break
+            if char == ">":
+                self.pos += 1
+                children = self._children(name)
+                break
+            if char == "{":
+                self.pos += 1
+                self._skip_whitespace()
+                if not self.src.startswith("...", self.pos):
+                    self._error("Expected '...' in JSX spread attribute")
+                self.pos += 3
+                expression = self._js(closing="}")
+                self._expect("}")
+                props.append("..." + expression.strip())
+                continue
+
+            attribute = self._match(_ATTR_NAME)
+            if attribute is None:
+                self._error(f"Invalid attribute in <{name}>")
+            self._skip_whitespace()
+            if self._peek() != "=":
+                props.append(f"{_prop_key(attribute)}: true")
+                continue
+
+            self.pos += 1
+            self._skip_whitespace()
+            char = self._peek()
+            if char in ("'", '"'):
+                end = self.src.find(char, self.pos + 1)
+                if end == -1:
+                    self._error(f"Unterminated attribute value in <{name}>")
+                if self.observer:
+                    self.observer("string", self.src[self.pos + 1:end], self.pos)
+                value = json.dumps(html.unescape(self.src[self.pos + 1:end]), ensure_ascii=False)
+                self.pos = end + 1
+            elif char == "{":
+                value = self._expression_container().strip()
+                if not value:
+                    self._error(f"Empty expression for attribute '{attribute}'")
+            elif char == "<":
+                value = self._element()
+            else:
+                self._error(f"Invalid value for attribute '{attribute}'")
+            props.append(f"{_prop_key(attribute)}: {value}")
+
+        # Lowercase and dashed names are host elements; Foo and a.b are component references
+        if "." not in name and (name[0].islower() or "-" in name or ":" in name):
+            tag = json.dumps(name)
+        else:
+            tag = name
+        return self._create_call(tag, "{" + ", ".join(props) + "}" if props else "null", children)
+
+    def _children(self, name: Optional[str]) -> List[str]:
+        children: List[str] = []
+        while True:
+            if self.pos >= self.n:
+                self._error(f"Unterminated <{name or ''}> element")
+            if self.src.startswith("</", self.pos):
+                self.pos += 2
+                self._skip_whitespace()
+                closing = self._match(_TAG_NAME) or ""
+                self._skip_whitespace()
+                self._expect(">")
+                if closing != (name or ""):
+                    self._error(f"Expected </{name or ''}> but found </{closing}>")
+                return children
+
+            char = self.src[self.pos]
+            if char == "<":
+                children.append(self._element())
+            elif char == "{":
+                expression = self._expression_container()
+                # {/* comments */} and {} produce no child
+                if not _COMMENTS_ONLY.fullmatch(expression):
+                    children.append(expression.strip())
+            else:
+                end = self.pos
+                while end < self.n and self.src[end] not in "<{":
+                    end += 1
+                text = _clean_jsx_text(self.src[self.pos:end])
+                if text and self.observer:
+                    self.observer("text", text, self.pos)
+                self.pos = end
+                if text:
+                    children.append(json.dumps(html.unescape(text), ensure_ascii=False))
+
+    def _create_call(self, tag: str, props: str, children: List[str]) -> str:
+        arguments = [tag, props] + children
+        return f"{self.pragma}({', '.join(arguments)})"
@@ -1,7 +1,24 @@
 import json
+import re
+import time
 from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, List, Optional, Union
 from spoon_ai.tools.base import BaseTool
+from .metrics import file_operation_bytes, file_operation_duration
+from .progress import report_progress
+from .site_documents import site_documents
+from .site_outline import site_outlines
+from .site_retention import site_retention
+from .site_snapshots import record_site_write
+from .text_patch import PatchError, apply_replacements, apply_unified_diff
+from .text_search import search_text, slice_bytes, slice_lines
+
+# Operations that modify files; they run under the site's writer lock
+WRITE_OPERATIONS = {"create_file", "edit_file", "apply_edits", "delete_file"}
+KNOWN_OPERATIONS = WRITE_OPERATIONS | {"read_file", "search_file", "site_outline"}
+
+# Longest old_string accepted per replacement (longer strings tend to get truncated in tool-call JSON)
+MAX_OLD_STRING_LENGTH = 500
 
 
 class ManageSiteFilesTool(BaseTool):
@@ -10,9 +27,19 @@ class ManageSiteFilesTool(BaseTool):
     name: str = "manage_site_files"
     description: str = (
         "Manage files in generated sites. Create new files, edit existing files (replace strings), "
-        "read file content, or delete files. Use this to update or modify existing generated sites. "
+        "read file content (optionally only a line or byte range), search a file for matching lines with context, "
+        "or delete files. Prefer search_file or a read_file line range over reading a whole large file. "
+        "Use site_outline to get a compact index of a page (components, hooks, sections, imports, import map) "
+        "with line numbers before reading or editing parts of it. "
+        "Use apply_edits to make several replacements (or apply a unified diff) "
+        "to one file in a single call: either every edit applies or none do. "
+        "Every response includes the file's current version (a content hash); pass it back as expected_version "
+        "on a write to fail instead of overwriting a change made since. "
+        "Every successful write also returns a snapshot number in the site's version history "
+        "(see the site_history, diff_site_versions and rollback_site tools). "
+        "Use this to update or modify existing generated sites. "
         "CRITICAL: ALL tool calls MUST include these three required parameters: operation, site_id, and file_path. "
-        "Example: {\"operation\": \"edit_file\", \"site_id\": \"20251115_123456\", \"file_path\": \"index.html\", \"old_string\": \"<!-- PLACEHOLDER -->\", \"new_string\": \"<div>content</div>\"}. "
+        "Example: {\"operation\": \"edit_file\", \"site_id\": \"20251115_123456_048213_9f3a1c\", \"file_path\": \"index.html\", \"old_string\": \"<!-- PLACEHOLDER -->\", \"new_string\": \"<div>content</div>\"}. "
         "When creating files with large content, ensure the JSON arguments are properly formatted and complete. "
         "For very large files, consider creating a basic structure first, then using edit_file to add content incrementally."
     )
@@ -21,12 +48,12 @@ class ManageSiteFilesTool(BaseTool):
         "properties": {
             "operation": {
                 "type": "string",
-                "enum": ["create_file", "edit_file", "read_file", "delete_file"],
-                "description": "REQUIRED: File operation to perform: create_file, edit_file (replace strings), read_file, or delete_file. Must be included in every tool call.",
+                "enum": ["create_file", "edit_file", "apply_edits", "read_file", "search_file", "site_outline", "delete_file"],
+                "description": "REQUIRED: File operation to perform: create_file, edit_file (replace strings), apply_edits (several replacements and/or a unified diff, all-or-nothing), read_file (whole file, or a line/byte range), search_file (matching lines with context and line numbers), site_outline (components, hooks, sections, imports and import map with line spans), or delete_file. Must be included in every tool call.",
             },
             "site_id": {
                 "type": "string",
-                "description": "REQUIRED: Unique site identifier (timestamp format: YYYYMMDD_HHMMSS). Must be included in every tool call. Get this value from the context/prompt.",
+                "description": "REQUIRED: Unique site identifier (YYYYMMDD_HHMMSS_ffffff_xxxxxx, e.g. 20261016_142501_048213_9f3a1c). Must be included in every tool call. Get this value from the context/prompt.",
             },
             "file_path": {
                 "type": "string",
@@ -44,16 +71,67 @@ class ManageSiteFilesTool(BaseTool):
                 "type": "string",
                 "description": "Replacement string for edit_file operation. Required for edit_file. Can be longer than old_string, but if very long, consider breaking into multiple edits.",
             },
+            "edits": {
+                "type": "array",
+                "description": "Ordered replacements for apply_edits. Each edit sees the result of the previous ones. old_string must match exactly once unless replace_all is true, and must be under 500 characters.",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "old_string": {"type": "string"},
+                        "new_string": {"type": "string"},
+                        "replace_all": {"type": "boolean"},
+                    },
+                    "required": ["old_string", "new_string"],
+                },
+            },
+            "diff": {
+                "type": "string",
+                "description": "Optional unified diff (with @@ hunk headers) for apply_edits, written against the current file. Applied before edits.",
+            },
+            "expected_version": {
+                "type": "string",
+                "description": "Optional for create_file, edit_file, apply_edits and delete_file: the version returned by a previous call. The write fails with a version conflict if the file changed since (use an empty string to require that the file does not exist yet).",
+            },
+            "start_line": {
+                "type": "integer",
+                "description": "Optional for read_file: first line to return (1-based). Use with end_line to read only part of a file.",
+            },
+            "end_line": {
+                "type": "integer",
+                "description": "Optional for read_file: last line to return (1-based, inclusive).",
+            },
+            "byte_offset": {
+                "type": "integer",
+                "description": "Optional for read_file: first byte of the UTF-8 file to return.",
+            },
+            "byte_length": {
+                "type": "integer",
+                "description": "Optional for read_file: number of bytes to return from byte_offset.",
+            },
+            "pattern": {
+                "type": "string",
+                "description": "Text to look for in search_file operation (a literal substring unless regex is true). Required for search_file.",
+            },
+            "regex": {
+                "type": "boolean",
+                "description": "Optional for search_file: treat pattern as a regular expression.",
+            },
+            "ignore_case": {
+                "type": "boolean",
+                "description": "Optional for search_file: case-insensitive matching.",
+            },
+            "context_lines": {
+                "type": "integer",
+                "description": "Optional for search_file: lines of context around each match (default 2).",
+            },
+            "max_matches": {
+                "type": "integer",
+                "description": "Optional for search_file: maximum number of matching lines to return (default 20).",
+            },
         },
         "required": ["operation", "site_id", "file_path"],
     }
 
-    def _get_sites_dir(self) -> Path:
-        """Get the generated sites directory."""
-        sites_dir = Path(__file__).parent.parent / "generated_sites"
-        sites_dir.mkdir(parents=True, exist_ok=True)
-        return sites_dir
-
     async def execute(
         self,
         operation: Optional[str] = None,
@@ -62,6 +140,18 @@ class ManageSiteFilesTool(BaseTool):
         content: Optional[str] = None,
         old_string: Optional[str] = None,
         new_string: Optional[str] = None,
+        edits: Optional[Union[List[Dict[str, Any]], str]] = None,
+        diff: Optional[str] = None,
+        start_line: Optional[int] = None,
+        end_line: Optional[int] = None,
+        byte_offset: Optional[int] = None,
+        byte_length: Optional[int] = None,
+        pattern: Optional[str] = None,
+        regex: bool = False,
+        ignore_case: bool = False,
+        context_lines: Optional[int] = None,
+        max_matches: Optional[int] = None,
+        expected_version: Optional[str] = None,
         **kwargs
     ) -> str:
         """
@@ -70,6 +160,60 @@ class ManageSiteFilesTool(BaseTool):
         Returns JSON string with operation result including success status,
         file paths, URLs, and any relevant messages.
         """
+        if operation is None:
+            operation = kwargs.get("operation")
+        started = time.perf_counter()
+        result = await self._execute(
+            operation=operation,
+            site_id=site_id,
+            file_path=file_path,
+            content=content,
+            old_string=old_string,
+            new_string=new_string,
+            edits=edits,
+            diff=diff,
+            start_line=start_line,
+            end_line=end_line,
+            byte_offset=byte_offset,
+            byte_length=byte_length,
+            pattern=pattern,
+            regex=regex,
+            ignore_case=ignore_case,
+            context_lines=context_lines,
+            max_matches=max_matches,
+            expected_version=expected_version,
+            **kwargs,
+        )
+        file_operation_duration.observe(
+            time.perf_counter() - started,
+            operation=operation if operation in KNOWN_OPERATIONS else "invalid",
+            outcome="ok" if result.get("success") else "error",
+        )
+        return json.dumps(result, indent=2)
+
+    async def _execute(
+        self,
+        operation: Optional[str] = None,
+        site_id: Optional[str] = None,
+        file_path: Optional[str] = None,
+        content: Optional[str] = None,
+        old_string: Optional[str] = None,
+        new_string: Optional[str] = None,
+        edits: Optional[Union[List[Dict[str, Any]], str]] = None,
+        diff: Optional[str] = None,
+        start_line: Optional[int] = None,
+        end_line: Optional[int] = None,
+        byte_offset: Optional[int] = None,
+        byte_length: Optional[int] = None,
+        pattern: Optional[str] = None,
+        regex: bool = False,
+        ignore_case: bool = False,
+        context_lines: Optional[int] = None,
+        max_matches: Optional[int] = None,
+        expected_version: Optional[str] = None,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """Validate arguments and dispatch one operation (execute() adds metrics and serializes the result)."""
         # Handle arguments passed as kwargs (from JSON parsing)
         if operation is None:
             operation = kwargs.get("operation")
@@ -83,6 +227,10 @@ class ManageSiteFilesTool(BaseTool):
             old_string = kwargs.get("old_string")
         if new_string is None:
             new_string = kwargs.get("new_string")
+        if edits is None:
+            edits = kwargs.get("edits")
+        if diff is None:
+            diff = kwargs.get("diff")
 
         # Validate required arguments
         if not operation or not site_id or not file_path:
@@ -98,7 +246,7 @@ class ManageSiteFilesTool(BaseTool):
 
             example_call = {
                 "operation": "edit_file",
-                "site_id": "20251115_123456",
+                "site_id": "20251115_123456_048213_9f3a1c",
                 "file_path": "index.html",
                 "old_string": "<!-- CONTENT_PLACEHOLDER -->",
                 "new_string": "<div>Your content here</div>"
@@ -113,18 +261,18 @@ class ManageSiteFilesTool(BaseTool):
                 f"All tool calls MUST include: operation, site_id, and file_path as JSON object. "
                 f"Try creating files incrementally: first create a small skeleton, then use edit_file to add content."
             )
-            return json.dumps({
+            return {
                 "success": False,
                 "error": error_msg,
                 "received_args": received_args,
                 "received_kwargs": str(kwargs) if kwargs else "No kwargs received",
                 "example_format": example_call
-            }, indent=2)
+            }
 
         try:
-            sites_dir = self._get_sites_dir()
-            site_dir = sites_dir / site_id
-            absolute_file_path = site_dir / file_path
+            # Restores the site first if retention archived it
+            await site_retention.touch(site_id)
+            absolute_file_path = site_documents.path_for(site_id, file_path)
 
             result = {
                 "success": False,
@@ -133,81 +281,175 @@ class ManageSiteFilesTool(BaseTool):
                 "file_path": file_path,
                 "absolute_path": str(absolute_file_path),
                 "url": f"http://localhost:8000/sites/{site_id}",
+                "version": None,
                 "message": None,
                 "error": None,
             }
 
-            if operation == "create_file":
-                return await self._create_file(site_dir, absolute_file_path, content, result)
-
-            elif operation == "edit_file":
-                # Validate old_string length to prevent JSON truncation
-                if old_string and len(old_string) > 500:
-                    result["error"] = (
-                        f"old_string is too long ({len(old_string)} characters). "
-                        f"Keep it under 500 characters to prevent JSON truncation. "
-                        f"Use a shorter unique identifier like a comment or single line, "
-                        f"or break the edit into multiple smaller edits."
+            if operation in WRITE_OPERATIONS:
+                # Fail fast on a stale version without queueing behind other writers,
+                # then re-check under the site lock before writing
+                if expected_version is not None:
+                    conflict = await self._check_version(site_id, file_path, expected_version, result)
+                    if conflict is not None:
+                        return conflict
+                async with site_documents.site_lock(site_id):
+                    if expected_version is not None:
+                        conflict = await self._check_version(site_id, file_path, expected_version, result)
+                        if conflict is not None:
+                            return conflict
+                    response = await self._write_operation(
+                        operation, site_id, file_path, result,
+                        content=content,
+                        old_string=old_string,
+                        new_string=new_string,
+                        edits=edits,
+                        diff=diff,
                     )
-                    return json.dumps(result, indent=2)
-                return await self._edit_file(absolute_file_path, old_string, new_string, result)
+                    return await self._record_write(operation, site_id, file_path, response)
 
             elif operation == "read_file":
-                return await self._read_file(absolute_file_path, result)
-
-            elif operation == "delete_file":
-                return await self._delete_file(absolute_file_path, result)
+                return await self._read_file(
+                    site_id, file_path, result,
+                    start_line=start_line,
+                    end_line=end_line,
+                    byte_offset=byte_offset,
+                    byte_length=byte_length,
+                )
+
+            elif operation == "search_file":
+                return await self._search_file(
+                    site_id, file_path, pattern, result,
+                    regex=bool(regex),
+                    ignore_case=bool(ignore_case),
+                    context_lines=2 if context_lines is None else int(context_lines),
+                    max_matches=20 if max_matches is None else int(max_matches),
+                )
+
+            elif operation == "site_outline":
+                return await self._site_outline(site_id, file_path, result)
 
             else:
                 result["error"] = f"Unknown operation: {operation}"
-                return json.dumps(result, indent=2)
+                return result
 
         except Exception as e:
-            return json.dumps({
+            return {
                 "success": False,
                 "operation": operation,
                 "site_id": site_id,
                 "file_path": file_path,
                 "error": str(e),
-            }, indent=2)
+            }
 
-    async def _create_file(self, site_dir: Path, file_path: Path, content: Optional[str], result: dict) -> str:
+    async def _record_write(
+        self, operation: str, site_id: str, file_path: str, response: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        Index a successful write in the site catalog and the version history, and
+        add its snapshot number to the response (site lock held).
+        """
+        if not response.get("success"):
+            return response
+        snapshot = await record_site_write(site_id, file_path, operation)
+        if snapshot is None:
+            return response
+        response["snapshot"] = snapshot.version
+        return response
+
+    async def _check_version(
+        self, site_id: str, file_path: str, expected_version: str, result: dict
+    ) -> Optional[Dict[str, Any]]:
+        """Return a version-conflict response if the file's version is not expected_version."""
+        document = await site_documents.aget(site_id, file_path)
+        current_version = document.content_hash if document is not None else None
+        if (current_version or "") == expected_version:
+            return None
+
+        result["version"] = current_version
+        result["error"] = "version_conflict"
+        result["message"] = (
+            f"'{Path(file_path).name}' changed since version {expected_version or '(none)'}; "
+            f"it is now at version {current_version or '(deleted)'}. Re-read the file and retry."
+        )
+        return result
+
+    async def _write_operation(
+        self,
+        operation: str,
+        site_id: str,
+        file_path: str,
+        result: dict,
+        content: Optional[str] = None,
+        old_string: Optional[str] = None,
+        new_string: Optional[str] = None,
+        edits: Optional[Union[List[Dict[str, Any]], str]] = None,
+        diff: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Dispatch a file-modifying operation (caller holds the site lock)."""
+        if operation == "create_file":
+            return await self._create_file(site_id, file_path, content, result)
+
+        if operation == "edit_file":
+            # Validate old_string length to prevent JSON truncation
+            if old_string and len(old_string) > MAX_OLD_STRING_LENGTH:
+                result["error"] = (
+                    f"old_string is too long ({len(old_string)} characters). "
+                    f"Keep it under 500 characters to prevent JSON truncation. "
+                    f"Use a shorter unique identifier like a comment or single line, "
+                    f"or break the edit into multiple smaller edits."
+                )
+                return result
+            return await self._edit_file(site_id, file_path, old_string, new_string, result)
+
+        if operation == "apply_edits":
+            return await self._apply_edits(site_id, file_path, edits, diff, result)
+
+        return await self._delete_file(site_id, file_path, result)
+
+    async def _create_file(self, site_id: str, file_path: str, content: Optional[str], result: dict) -> Dict[str, Any]:
         """Create a new file with content."""
         if content is None:
             result["error"] = "content parameter is required for create_file operation"
-            return json.dumps(result, indent=2)
-
-        # Create site directory if it doesn't exist
-        site_dir.mkdir(parents=True, exist_ok=True)
-
-        # Create parent directories for the file if needed
-        file_path.parent.mkdir(parents=True, exist_ok=True)
+            return result
 
         # Check if file already exists
-        if file_path.exists():
-            result["error"] = f"File already exists: {file_path.name}"
+        existing = await site_documents.aget(site_id, file_path)
+        if existing is not None:
+            result["version"] = existing.content_hash
+            result["error"] = f"File already exists: {Path(file_path).name}"
             result["message"] = "Use edit_file operation to modify existing files"
-            return json.dumps(result, indent=2)
-
-        # Write content to file
-        file_path.write_text(content, encoding="utf-8")
+            return result
+
+        # Store content (written to disk by the document store)
+        document = await site_documents.awrite(site_id, file_path, content)
+        report_progress(
+            self.name,
+            event="file_operation",
+            operation="create_file",
+            file_path=file_path,
+            bytes_written=document.size,
+        )
+        file_operation_bytes.observe(document.size, operation="create_file", direction="written")
 
         result["success"] = True
-        result["message"] = f"File '{file_path.name}' created successfully"
-        return json.dumps(result, indent=2)
+        result["version"] = document.content_hash
+        result["message"] = f"File '{Path(file_path).name}' created successfully"
+        return result
 
-    async def _edit_file(self, file_path: Path, old_string: Optional[str], new_string: Optional[str], result: dict) -> str:
+    async def _edit_file(self, site_id: str, file_path: str, old_string: Optional[str], new_string: Optional[str], result: dict) -> Dict[str, Any]:
         """Edit a file by replacing old_string with new_string."""
         if old_string is None or new_string is None:
             result["error"] = "old_string and new_string parameters are required for edit_file operation"
-            return json.dumps(result, indent=2)
-
-        if not file_path.exists():
-            result["error"] = f"File not found: {file_path.name}"
-            return json.dumps(result, indent=2)
+            return result
 
         # Read current content
-        current_content = file_path.read_text(encoding="utf-8")
+        current = await site_documents.aget(site_id, file_path)
+        if current is None:
+            result["error"] = f"File not found: {Path(file_path).name}"
+            return result
+        current_content = current.content
+        result["version"] = current.content_hash
 
         # Count occurrences
         occurrence_count = current_content.count(old_string)
@@ -215,41 +457,249 @@ class ManageSiteFilesTool(BaseTool):
         if occurrence_count == 0:
             result["error"] = "old_string not found in file"
             result["message"] = "No replacements made"
-            return json.dumps(result, indent=2)
+            return result
 
         # Replace all occurrences
         new_content = current_content.replace(old_string, new_string)
 
-        # Write updated content
-        file_path.write_text(new_content, encoding="utf-8")
+        # Store updated content
+        document = await site_documents.awrite(site_id, file_path, new_content)
+        report_progress(
+            self.name,
+            event="file_operation",
+            operation="edit_file",
+            file_path=file_path,
+            bytes_written=document.size,
+            replacements=occurrence_count,
+        )
+        file_operation_bytes.observe(document.size, operation="edit_file", direction="written")
 
         result["success"] = True
-        result["message"] = f"Replaced {occurrence_count} occurrence(s) in '{file_path.name}'"
-        return json.dumps(result, indent=2)
+        result["version"] = document.content_hash
+        result["message"] = f"Replaced {occurrence_count} occurrence(s) in '{Path(file_path).name}'"
+        return result
 
-    async def _read_file(self, file_path: Path, result: dict) -> str:
-        """Read and return file content."""
-        if not file_path.exists():
-            result["error"] = f"File not found: {file_path.name}"
-            return json.dumps(result, indent=2)
+    async def _apply_edits(
+        self,
+        site_id: str,
+        file_path: str,
+        edits: Optional[Union[List[Dict[str, Any]], str]],
+        diff: Optional[str],
+        result: dict,
+    ) -> Dict[str, Any]:
+        """Apply a unified diff and/or ordered replacements to a file, all or nothing."""
+        # Some clients send the list as a JSON-encoded string
+        if isinstance(edits, str):
+            try:
+                edits = json.loads(edits) if edits.strip() else None
+            except json.JSONDecodeError as e:
+                result["error"] = f"edits is not valid JSON: {e}"
+                return result
+        if edits is not None and not isinstance(edits, list):
+            result["error"] = "edits must be a list of {old_string, new_string, replace_all} objects"
+            return result
+        if not edits and not diff:
+            result["error"] = "edits and/or diff parameters are required for apply_edits operation"
+            return result
+
+        current = await site_documents.aget(site_id, file_path)
+        if current is None:
+            result["error"] = f"File not found: {Path(file_path).name}"
+            return result
+        current_content = current.content
+        result["version"] = current.content_hash
+
+        # Apply everything to an in-memory copy; the file is only written if all of it applies
+        new_content = current_content
+        report = []
+        if diff:
+            try:
+                new_content, hunk_outcomes = apply_unified_diff(new_content, diff)
+            except PatchError as e:
+                result["error"] = f"Invalid diff: {e}"
+                result["message"] = "No changes made"
+                return result
+            report.extend(hunk_outcomes)
+        if edits:
+            new_content, edit_outcomes = apply_replacements(
+                new_content, edits, max_old_length=MAX_OLD_STRING_LENGTH
+            )
+            report.extend(edit_outcomes)
+
+        result["edits"] = [outcome.to_dict() for outcome in report]
+        failed = [outcome for outcome in report if not outcome.applied]
+        if failed:
+            result["error"] = f"{len(failed)} of {len(report)} edit(s) failed"
+            result["message"] = "No changes made; fix the failed edits and resend the whole batch"
+            return result
+
+        document = await site_documents.awrite(site_id, file_path, new_content)
+        replacements = sum(outcome.replacements for outcome in report)
+        report_progress(
+            self.name,
+            event="file_operation",
+            operation="apply_edits",
+            file_path=file_path,
+            bytes_written=document.size,
+            edits=len(report),
+            replacements=replacements,
+        )
+        file_operation_bytes.observe(document.size, operation="apply_edits", direction="written")
 
-        # Read content
-        content = file_path.read_text(encoding="utf-8")
+        result["success"] = True
+        result["version"] = document.content_hash
+        result["message"] = (
+            f"Applied {len(report)} edit(s) ({replacements} replacement(s)) to '{Path(file_path).name}'"
+        )
+        return result
+
+    async def _read_file(
+        self,
+        site_id: str,
+        file_path: str,
+        result: dict,
+        start_line: Optional[int] = None,
+        end_line: Optional[int] = None,
+        byte_offset: Optional[int] = None,
+        byte_length: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """Read and return file content, or only the requested line or byte range."""
+        document = await site_documents.aget(site_id, file_path)
+        if document is None:
+            result["error"] = f"File not found: {Path(file_path).name}"
+            return result
+
+        content = document.content
+        result["version"] = document.content_hash
+        if start_line is not None or end_line is not None:
+            if byte_offset is not None or byte_length is not None:
+                result["error"] = "Use either a line range (start_line/end_line) or a byte range (byte_offset/byte_length), not both"
+                return result
+            window = slice_lines(
+                content,
+                int(start_line) if start_line is not None else None,
+                int(end_line) if end_line is not None else None,
+            )
+            result.update(window)
+            result["message"] = (
+                f"Read lines {window['start_line']}-{window['end_line']} of {window['total_lines']} "
+                f"from '{Path(file_path).name}'"
+            )
+        elif byte_offset is not None or byte_length is not None:
+            window = slice_bytes(
+                content,
+                int(byte_offset) if byte_offset is not None else None,
+                int(byte_length) if byte_length is not None else None,
+            )
+            result.update(window)
+            result["message"] = (
+                f"Read {window['byte_length']} of {window['total_bytes']} bytes "
+                f"from '{Path(file_path).name}'"
+            )
+        else:
+            result["content"] = content
+            result["message"] = f"Read {len(content)} characters from '{Path(file_path).name}'"
+
+        bytes_read = len(result["content"].encode("utf-8"))
+        report_progress(
+            self.name,
+            event="file_operation",
+            operation="read_file",
+            file_path=file_path,
+            bytes_read=bytes_read,
+        )
+        file_operation_bytes.observe(bytes_read, operation="read_file", direction="read")
 
         result["success"] = True
-        result["content"] = content
-        result["message"] = f"Read {len(content)} characters from '{file_path.name}'"
-        return json.dumps(result, indent=2)
+        return result
 
-    async def _delete_file(self, file_path: Path, result: dict) -> str:
+    async def _search_file(
+        self,
+        site_id: str,
+        file_path: str,
+        pattern: Optional[str],
+        result: dict,
+        regex: bool = False,
+        ignore_case: bool = False,
+        context_lines: int = 2,
+        max_matches: int = 20,
+    ) -> Dict[str, Any]:
+        """Return the lines matching pattern with context and line numbers."""
+        if not pattern:
+            result["error"] = "pattern parameter is required for search_file operation"
+            return result
+
+        document = await site_documents.aget(site_id, file_path)
+        if document is None:
+            result["error"] = f"File not found: {Path(file_path).name}"
+            return result
+
+        result["version"] = document.content_hash
+        try:
+            matches = search_text(
+                document.content,
+                pattern,
+                regex=regex,
+                ignore_case=ignore_case,
+                context_lines=context_lines,
+                max_matches=max_matches,
+            )
+        except re.error as e:
+            result["error"] = f"Invalid regular expression: {e}"
+            return result
+
+        report_progress(
+            self.name,
+            event="file_operation",
+            operation="search_file",
+            file_path=file_path,
+            matches=matches["match_count"],
+        )
+
+        result.update(matches)
+        result["success"] = True
+        result["message"] = (
+            f"Found {matches['match_count']}{'+' if matches['truncated'] else ''} matching line(s) "
+            f"in '{Path(file_path).name}'"
+        )
+        return result
+
+    async def _site_outline(self, site_id: str, file_path: str, result: dict) -> Dict[str, Any]:
+        """Return the file's symbol index (components, hooks, sections, imports) with line spans."""
+        if not site_outlines.supports(file_path):
+            result["error"] = "site_outline supports .html and .js/.jsx/.mjs files"
+            return result
+
+        document = await site_documents.aget(site_id, file_path)
+        if document is None:
+            result["error"] = f"File not found: {Path(file_path).name}"
+            return result
+
+        outline = await site_documents.run_io(site_outlines.outline, document)
+
+        report_progress(
+            self.name, event="file_operation", operation="site_outline", file_path=file_path
+        )
+
+        result.update(outline)
+        result["success"] = True
+        result["message"] = (
+            f"Outline of '{Path(file_path).name}': {len(outline.get('components', []))} component(s) "
+            f"in {outline['total_lines']} lines"
+        )
+        return result
+
+    async def _delete_file(self, site_id: str, file_path: str, result: dict) -> Dict[str, Any]:
         """Delete a file."""
-        if not file_path.exists():
-            result["error"] = f"File not found: {file_path.name}"
-            return json.dumps(result, indent=2)
+        if not await site_documents.adelete(site_id, file_path):
+            result["error"] = f"File not found: {Path(file_path).name}"
+            return result
 
-        # Delete the file
-        file_path.unlink()
+        report_progress(
+            self.name, event="file_operation", operation="delete_file", file_path=file_path
+        )
 
         result["success"] = True
-        result["message"] = f"File '{file_path.name}' deleted successfully"
-        return json.dumps(result, indent=2)
+        result["version"] = None
+        result["message"] = f"File '{Path(file_path).name}' deleted successfully"
+        return result
@@ -0,0 +1,392 @@
+"""
+Prometheus-style metrics for the agent server.
+
+A small, dependency-free registry of counters, gauges and histograms rendered
+in the Prometheus text exposition format (version 0.0.4) by GET /metrics.
+The hot paths record into the module-level metrics below: graph node latency,
+LLM call latency and token counts, manage_site_files latency and bytes,
+generation attempts, in-flight generations and open SSE sessions.
+
+EventLoopMonitor measures event-loop lag (how late a periodic timer fires),
+which /health uses for readiness. token_listener() lets a caller count the
+tokens of the LLM calls made inside a block (e.g. to enforce a token budget).
+"""
+
+import asyncio
+import contextvars
+import functools
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+LabelValues = Tuple[str, ...]
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+LLM_LATENCY_BUCKETS = (0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+TOKEN_BUCKETS = (100, 250, 500, 1000, 2500, 5000, 10000, 25000, 50000, 100000)
+BYTE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+ATTEMPT_BUCKETS = (1, 2, 3, 4, 5)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra is not None:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {_escape(self.documentation)}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """Monotonically increasing total"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def _samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in sorted(self._values.items())
+        ]
+
+
+class Gauge(_Metric):
+    """Value that goes up and down"""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        if not self.labelnames:
+            self._values[()] = 0.0
+
+    def set(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: Any) -> None:
+        self.inc(-amount, **labels)
+
+    def value(self, **labels: Any) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    @contextmanager
+    def track_inprogress(self, **labels: Any) -> Iterator[None]:
+        """Increment the gauge for the duration of the block"""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+    def _samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in sorted(self._values.items())
+        ]
+
+
+class Histogram(_Metric):
+    """Distribution of observations in cumulative buckets"""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # Per label set: per-bucket (non-cumulative) counts, sum, count
+        self._series: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        index = next(i for i, bound in enumerate(self.buckets) if value <= bound)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = ([0] * len(self.buckets), [0.0, 0.0])
+                self._series[key] = series
+            series[0][index] += 1
+            series[1][0] += value
+            series[1][1] += 1
+
+    @contextmanager
+    def time(self, **labels: Any) -> Iterator[None]:
+        """Observe the duration of the block in seconds"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def snapshot(self, **labels: Any) -> Dict[str, float]:
+        """Count and sum of one label set (for tests and /health)"""
+        series = self._series.get(self._key(labels))
+        return {"count": series[1][1], "sum": series[1][0]} if series else {"count": 0, "sum": 0.0}
+
+    def _samples(self) -> List[str]:
+        lines = []
+        for key, (counts, (total, count)) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, ("le", _format_value(bound)))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {_format_value(count)}")
+        return lines
+
+
+class MetricsRegistry:
+    """Set of metrics rendered together"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+
+class EventLoopMonitor:
+    """Measures event-loop lag: how late a timer that should fire every interval actually fires"""
+
+    def __init__(self, interval: float = 0.5, window: int = 120):
+        """
+        Args:
+            interval: Seconds between probes
+            window: Probes kept for the recent maximum
+        """
+        self.interval = interval
+        self.window = window
+        self.lag = 0.0
+        self._recent: List[float] = []
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self) -> None:
+        while True:
+            started = time.monotonic()
+            await asyncio.sleep(self.interval)
+            self.lag = max(0.0, time.monotonic() - started - self.interval)
+            self._recent.append(self.lag)
+            del self._recent[:-self.window]
+            event_loop_lag.set(self.lag)
+
+    def start(self) -> None:
+        """Start probing on the running loop"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="event-loop-monitor")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "lag_seconds": round(self.lag, 4),
+            "max_recent_lag_seconds": round(max(self._recent, default=0.0), 4),
+        }
+
+
+def _token_usage(response: Any) -> Dict[str, int]:
+    """Prompt/completion token counts of an LLM response, if the provider reported them"""
+    usage = getattr(response, "usage", None)
+    if usage is None and isinstance(response, dict):
+        usage = response.get("usage")
+    if usage is None:
+        return {}
+
+    def read(*names: str) -> Optional[int]:
+        for name in names:
+            value = usage.get(name) if isinstance(usage, dict) else getattr(usage, name, None)
+            if isinstance(value, (int, float)):
+                return int(value)
+        return None
+
+    counts = {}
+    prompt = read("prompt_tokens", "input_tokens")
+    completion = read("completion_tokens", "output_tokens")
+    if prompt is not None:
+        counts["prompt"] = prompt
+    if completion is not None:
+        counts["completion"] = completion
+    return counts
+
+
+_token_listener: contextvars.ContextVar[Optional[Callable[[int], None]]] = contextvars.ContextVar(
+    "llm_token_listener", default=None
+)
+
+
+@contextmanager
+def token_listener(callback: Callable[[int], None]) -> Iterator[None]:
+    """Call callback with the total tokens of every instrumented LLM call made inside the block"""
+    token = _token_listener.set(callback)
+    try:
+        yield
+    finally:
+        _token_listener.reset(token)
+
+
+def instrument_llm(llm: Any, model: str) -> Any:
+    """
+    Record latency and token counts of every ask_tool call made through llm.
+
+    The ChatBot instance's ask_tool is replaced by a timing wrapper, so agents
+    holding the instance are measured without changes.
+
+    Args:
+        llm: ChatBot (or any object with an async ask_tool method)
+        model: Model name used as the metric label
+
+    Returns:
+        The same llm instance
+    """
+    ask_tool = llm.ask_tool
+    if getattr(ask_tool, "_instrumented", False):
+        return llm
+
+    @functools.wraps(ask_tool)
+    async def timed_ask_tool(*args: Any, **kwargs: Any) -> Any:
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            response = await ask_tool(*args, **kwargs)
+            outcome = "ok"
+        finally:
+            llm_request_duration.observe(time.perf_counter() - started, model=model, outcome=outcome)
+        usage = _token_usage(response)
+        for kind, count in usage.items():
+            llm_tokens.observe(count, model=model, kind=kind)
+        listener = _token_listener.get()
+        if listener is not None and usage:
+            listener(sum(usage.values()))
+        return response
+
+    timed_ask_tool._instrumented = True
+    # ChatBot is a plain class; bypass any custom __setattr__ on subclasses
+    object.__setattr__(llm, "ask_tool", timed_ask_tool)
+    return llm
+
+
+# Process-wide registry rendered by GET /metrics
+registry = MetricsRegistry()
+
+graph_node_duration = registry.histogram(
+    "neo0_graph_node_duration_seconds", "Time spent in each SiteGenerationGraph node", ["node"]
+)
+llm_request_duration = registry.histogram(
+    "neo0_llm_request_duration_seconds", "Latency of LLM ask_tool calls", ["model", "outcome"], LLM_LATENCY_BUCKETS
+)
+llm_tokens = registry.histogram(
+    "neo0_llm_tokens", "Tokens per LLM call (kind: prompt or completion)", ["model", "kind"], TOKEN_BUCKETS
+)
+file_operation_duration = registry.histogram(
+    "neo0_file_operation_duration_seconds", "Latency of manage_site_files operations", ["operation", "outcome"]
+)
+file_operation_bytes = registry.histogram(
+    "neo0_file_operation_bytes", "Bytes read or written by manage_site_files operations",
+    ["operation", "direction"], BYTE_BUCKETS,
+)
+generation_attempts = registry.histogram(
+    "neo0_generation_attempts", "Content generation attempts per generated site", ["verified"], ATTEMPT_BUCKETS
+)
+speculative_candidates = registry.counter(
+    "neo0_speculative_candidates_total",
+    "Speculative generation candidates by outcome (promoted, cancelled, lost, failed)",
+    ["outcome"],
+)
+site_retention_operations = registry.counter(
+    "neo0_site_retention_operations_total",
+    "Site retention operations (archive, rehydrate, evict)",
+    ["operation"],
+)
+generations_in_flight = registry.gauge("neo0_generations_in_flight", "Site generation graphs currently running")
+generation_queue_depth = registry.gauge("neo0_generation_queue_depth", "Generation jobs waiting for a worker")
+sse_sessions = registry.gauge("neo0_sse_sessions", "Open Server-Sent Events streams", ["stream"])
+event_loop_lag = registry.gauge("neo0_event_loop_lag_seconds", "Most recent event-loop lag measurement")
+
+# Probes the server's event loop while it runs (started by main.py's lifespan)
+event_loop_monitor = EventLoopMonitor()
@@ -0,0 +1,113 @@
+"""
+Progress reporting for site generation runs.
+
+Graph nodes (and anything they call) report progress through report_progress();
+whoever started the run registers a listener with progress_listener(). The
+listener is carried in a context variable, so it follows the run into the
+graph engine and inner agents without threading callbacks through every
+signature, and concurrent runs never see each other's events.
+
+Every event carries the step name, the current generation attempt, the time
+elapsed since the run started and the bytes written so far. Concurrent parts
+of one run (speculative candidates) report through a progress_scope(), which
+tags their events and keeps a separate attempt counter.
+"""
+
+import contextvars
+import logging
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+
+ProgressCallback = Callable[[Dict[str, Any]], None]
+
+
+class _ProgressRun:
+    """Per-run progress bookkeeping shared by every event of the run"""
+
+    def __init__(self, callback: ProgressCallback, parent: Optional["_ProgressRun"] = None, **fields: Any):
+        self.callback = callback
+        self.started = time.monotonic()
+        self.seq = 0
+        self.attempt = 0
+        self.total_bytes_written = 0
+        # Scopes share the sequence, clock and byte total of the run they belong to
+        self.root = parent.root if parent is not None else self
+        self.fields = {**(parent.fields if parent is not None else {}), **fields}
+
+
+_current_run: contextvars.ContextVar[Optional[_ProgressRun]] = contextvars.ContextVar(
+    "site_generation_progress_run", default=None
+)
+
+
+@contextmanager
+def progress_listener(callback: ProgressCallback) -> Iterator[None]:
+    """Route progress events reported inside the block to callback"""
+    token = _current_run.set(_ProgressRun(callback))
+    try:
+        yield
+    finally:
+        _current_run.reset(token)
+
+
+@contextmanager
+def progress_scope(**fields: Any) -> Iterator[None]:
+    """
+    Tag events reported inside the block with fields (e.g. candidate=2).
+
+    The scope has its own generation attempt, so concurrent scopes of one run
+    do not overwrite each other's; events still go to the run's listener.
+    """
+    run = _current_run.get()
+    if run is None:
+        yield
+        return
+    token = _current_run.set(_ProgressRun(run.callback, parent=run, **fields))
+    try:
+        yield
+    finally:
+        _current_run.reset(token)
+
+
+def set_progress_attempt(attempt: int) -> None:
+    """Tag subsequent events of the current run with the given generation attempt"""
+    run = _current_run.get()
+    if run is not None:
+        run.attempt = attempt
+
+
+def report_progress(step: str, event: str = "progress", bytes_written: int = 0, **details: Any) -> None:
+    """
+    Report a progress event to the current listener, if any.
+
+    Args:
+        step: Name of the step (e.g. a graph node name or "manage_site_files")
+        event: Event type (e.g. node_started, node_finished, file_operation)
+        bytes_written: Bytes written to disk by this step, added to the run total
+        details: Additional event fields
+    """
+    run = _current_run.get()
+    if run is None:
+        return
+
+    root = run.root
+    root.seq += 1
+    root.total_bytes_written += max(0, bytes_written)
+    payload = {
+        "seq": root.seq,
+        "event": event,
+        "step": step,
+        "attempt": run.attempt,
+        "elapsed_seconds": round(time.monotonic() - root.started, 3),
+        "bytes_written": bytes_written,
+        "total_bytes_written": root.total_bytes_written,
+        **run.fields,
+        **details,
+    }
+
+    try:
+        run.callback(payload)
+    except Exception:
+        # Progress reporting must never break generation
+        logging.exception("Progress listener failed for step %s", step)
@@ -0,0 +1,525 @@
+"""
+Indexed catalog of generated sites.
+
+Listing sites used to mean scanning generated_sites/ and opening every
+metadata.json, which gets slow with tens of thousands of site directories.
+The catalog is an embedded SQLite database (generated_sites/_catalog.sqlite3
+by default) with one row per site and one per site file, so listing,
+filtering and paging are indexed queries:
+
+    sites       site_id, created_at, site_type, requirements, generation_method,
+                final_step, verification_passed, published, size, file_count, last_edit,
+                last_access, archived
+    site_files  site_id, file_path, size
+
+GenerateSiteTool upserts a site's row from its metadata and a scan of its
+files when a generation finishes. ManageSiteFilesTool updates the file row,
+the site's size, file count and last_edit after every write. The retention
+manager (tools.site_retention) writes batched last_access times and the
+archived flag, and picks the sites to archive from the catalog. Each change
+is one transaction, so a reader sees either all of it or none of it. The
+database is derived data: `python -m tools.site_catalog rebuild` recreates it
+from disk (site directories and site archives), and an empty catalog is
+rebuilt at startup.
+
+All calls block on SQLite; async callers run them on the site I/O pool.
+"""
+
+import argparse
+import base64
+import json
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+from .site_documents import SiteDocumentStore, site_documents
+from .site_ids import created_at_from_id
+
+CATALOG_FILE = "_catalog.sqlite3"
+
+# Columns list_sites can order by
+SORT_COLUMNS = ("created_at", "last_edit", "size", "site_id")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sites (
+    site_id TEXT PRIMARY KEY,
+    created_at TEXT NOT NULL DEFAULT '',
+    site_type TEXT NOT NULL DEFAULT '',
+    requirements TEXT NOT NULL DEFAULT '',
+    generation_method TEXT NOT NULL DEFAULT '',
+    final_step TEXT NOT NULL DEFAULT '',
+    verification_passed INTEGER NOT NULL DEFAULT 0,
+    published INTEGER NOT NULL DEFAULT 0,
+    size INTEGER NOT NULL DEFAULT 0,
+    file_count INTEGER NOT NULL DEFAULT 0,
+    last_edit TEXT NOT NULL DEFAULT '',
+    last_access TEXT NOT NULL DEFAULT '',
+    archived INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS sites_created_at ON sites (created_at, site_id);
+CREATE INDEX IF NOT EXISTS sites_last_edit ON sites (last_edit, site_id);
+CREATE INDEX IF NOT EXISTS sites_size ON sites (size, site_id);
+CREATE INDEX IF NOT EXISTS sites_site_type ON sites (site_type, created_at);
+CREATE INDEX IF NOT EXISTS sites_verified ON sites (verification_passed, created_at);
+CREATE TABLE IF NOT EXISTS site_files (
+    site_id TEXT NOT NULL,
+    file_path TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    PRIMARY KEY (site_id, file_path)
+) WITHOUT ROWID;
+"""
+
+# Columns added after the first release, with their definitions (for catalogs created before them)
+_ADDED_COLUMNS = {
+    "last_access": "TEXT NOT NULL DEFAULT ''",
+    "archived": "INTEGER NOT NULL DEFAULT 0",
+}
+
+# When a site was last used: read or served, else edited, else created
+_LAST_USED = "COALESCE(NULLIF(last_access, ''), NULLIF(last_edit, ''), created_at)"
+
+
+def _encode_cursor(values: Tuple[Any, str]) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values).encode("utf-8")).decode("ascii")
+
+
+def _decode_cursor(cursor: str) -> Tuple[Any, str]:
+    value, site_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    return value, site_id
+
+
+class SiteCatalog:
+    """SQLite index of site metadata, kept current by the generation and file tools"""
+
+    def __init__(self, documents: SiteDocumentStore, path: Optional[Path] = None):
+        """
+        Args:
+            documents: Document store whose sites are cataloged
+            path: Database file (default: _catalog.sqlite3 in the sites directory)
+        """
+        self.documents = documents
+        self._path = Path(path) if path is not None else None
+        self._connection: Optional[sqlite3.Connection] = None
+        self._connection_path: Optional[Path] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, documents: SiteDocumentStore) -> "SiteCatalog":
+        """Create a catalog stored at SITE_CATALOG_PATH (default: inside the sites directory)"""
+        path = os.getenv("SITE_CATALOG_PATH")
+        return cls(documents, Path(path) if path else None)
+
+    @property
+    def path(self) -> Path:
+        return self._path if self._path is not None else self.documents.sites_dir / CATALOG_FILE
+
+    def _db(self) -> sqlite3.Connection:
+        """The shared connection, opened and migrated on first use (call with the lock held)"""
+        path = self.path
+        if self._connection is not None and self._connection_path != path:
+            # The sites directory moved (benchmarks point it at a temporary directory)
+            self._connection.close()
+            self._connection = None
+        if self._connection is None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+            connection.row_factory = sqlite3.Row
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(_SCHEMA)
+            columns = {row["name"] for row in connection.execute("PRAGMA table_info(sites)")}
+            for column, definition in _ADDED_COLUMNS.items():
+                if column not in columns:
+                    connection.execute(f"ALTER TABLE sites ADD COLUMN {column} {definition}")
+            connection.execute("CREATE INDEX IF NOT EXISTS sites_archived ON sites (archived, last_access)")
+            self._connection = connection
+            self._connection_path = path
+        return self._connection
+
+    def _transaction(self, work) -> Any:
+        """Run work(connection) in one IMMEDIATE transaction"""
+        with self._lock:
+            db = self._db()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                result = work(db)
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            db.execute("COMMIT")
+            return result
+
+    def close(self) -> None:
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    # -- Scanning a site in storage --
+
+    def _scan_files(self, site_id: str) -> Tuple[List[Tuple[str, int]], str]:
+        """A site's files with their sizes, and its last modification time (ISO)"""
+        scanned = self.documents.storage.scan(site_id)
+        files = [(file_path, stored.size) for file_path, stored in sorted(scanned.items())]
+        latest = max((stored.modified_at for stored in scanned.values()), default=0.0)
+        return files, datetime.fromtimestamp(latest).isoformat() if latest else ""
+
+    def _read_metadata(self, site_id: str) -> Dict[str, Any]:
+        try:
+            found = self.documents.storage.read(site_id, "metadata.json")
+            data = json.loads(found[0].decode("utf-8")) if found is not None else {}
+        except (OSError, ValueError):
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    @staticmethod
+    def _replace_site(
+        db: sqlite3.Connection,
+        site_id: str,
+        metadata: Dict[str, Any],
+        files: List[Tuple[str, int]],
+        last_edit: str,
+        archived: bool = False,
+    ) -> None:
+        paths = {file_path for file_path, _ in files}
+        db.execute("DELETE FROM site_files WHERE site_id = ?", (site_id,))
+        db.executemany(
+            "INSERT INTO site_files (site_id, file_path, size) VALUES (?, ?, ?)",
+            [(site_id, file_path, size) for file_path, size in files],
+        )
+        # An upsert rather than INSERT OR REPLACE: last_access survives re-indexing
+        db.execute(
+            """INSERT INTO sites (site_id, created_at, site_type, requirements, generation_method,
+                   final_step, verification_passed, published, size, file_count, last_edit, archived)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+               ON CONFLICT (site_id) DO UPDATE SET
+                   created_at = excluded.created_at, site_type = excluded.site_type,
+                   requirements = excluded.requirements, generation_method = excluded.generation_method,
+                   final_step = excluded.final_step, verification_passed = excluded.verification_passed,
+                   published = excluded.published, size = excluded.size, file_count = excluded.file_count,
+                   last_edit = excluded.last_edit, archived = excluded.archived""",
+            (
+                site_id,
+                str(metadata.get("created_at") or created_at_from_id(site_id)),
+                str(metadata.get("site_type") or ""),
+                str(metadata.get("requirements") or ""),
+                str(metadata.get("generation_method") or ""),
+                str(metadata.get("final_step") or ""),
+                int(bool(metadata.get("verification_passed"))),
+                int("dist/index.html" in paths),
+                sum(size for _, size in files),
+                len(files),
+                last_edit,
+                int(archived),
+            ),
+        )
+
+    # -- Updates --
+
+    def refresh(self, site_id: str, metadata: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Re-index one site from disk: its metadata (or the given dict) and all its files.
+
+        Called when a generation finishes, after a publish or a rollback.
+        """
+        if metadata is None:
+            metadata = self._read_metadata(site_id)
+        files, last_edit = self._scan_files(site_id)
+        if not files and not metadata:
+            self.remove(site_id)
+            return
+        self._transaction(lambda db: self._replace_site(db, site_id, metadata, files, last_edit))
+
+    def record_write(self, site_id: str, file_path: str, size: Optional[int]) -> None:
+        """
+        Index one file write (size) or deletion (size None) and bump the site's last_edit.
+
+        A site the catalog has not seen yet gets a row with just its id-derived creation time.
+        """
+        now = datetime.now().isoformat()
+
+        def work(db: sqlite3.Connection) -> None:
+            db.execute(
+                "INSERT OR IGNORE INTO sites (site_id, created_at) VALUES (?, ?)",
+                (site_id, created_at_from_id(site_id) or now),
+            )
+            if size is None:
+                db.execute("DELETE FROM site_files WHERE site_id = ? AND file_path = ?", (site_id, file_path))
+            else:
+                db.execute(
+                    "INSERT OR REPLACE INTO site_files (site_id, file_path, size) VALUES (?, ?, ?)",
+                    (site_id, file_path, size),
+                )
+            db.execute(
+                """UPDATE sites SET
+                       size = (SELECT COALESCE(SUM(size), 0) FROM site_files WHERE site_id = :site_id),
+                       file_count = (SELECT COUNT(*) FROM site_files WHERE site_id = :site_id),
+                       last_edit = :now
+                   WHERE site_id = :site_id""",
+                {"site_id": site_id, "now": now},
+            )
+
+        self._transaction(work)
+
+    def remove(self, site_id: str) -> None:
+        """Drop a deleted site from the catalog"""
+
+        def work(db: sqlite3.Connection) -> None:
+            db.execute("DELETE FROM site_files WHERE site_id = ?", (site_id,))
+            db.execute("DELETE FROM sites WHERE site_id = ?", (site_id,))
+
+        self._transaction(work)
+
+    def record_access(self, accesses: Dict[str, str]) -> None:
+        """Store a batch of {site_id: ISO time of its latest read}; unknown sites are ignored"""
+        if not accesses:
+            return
+        self._transaction(
+            lambda db: db.executemany(
+                "UPDATE sites SET last_access = :accessed_at WHERE site_id = :site_id AND last_access < :accessed_at",
+                [{"site_id": site_id, "accessed_at": accessed_at} for site_id, accessed_at in accesses.items()],
+            )
+        )
+
+    def set_archived(self, site_id: str, archived: bool) -> None:
+        """Flag a site as packed into its archive (True) or back on disk (False)"""
+        self._transaction(
+            lambda db: db.execute("UPDATE sites SET archived = ? WHERE site_id = ?", (int(archived), site_id))
+        )
+
+    def rebuild(self) -> int:
+        """
+        Recreate the catalog from the sites in storage and the site archives.
+
+        Returns:
+            Number of sites indexed
+        """
+        # Imported here: the retention manager itself depends on the catalog
+        from .site_retention import scan_archives
+
+        scanned = [
+            (site_id, self._read_metadata(site_id), *self._scan_files(site_id), False)
+            for site_id in self.documents.storage.list_sites()
+        ]
+        on_disk = {entry[0] for entry in scanned}
+        scanned += [
+            (site_id, metadata, files, last_edit, True)
+            for site_id, metadata, files, last_edit in scan_archives(self.documents.sites_dir)
+            if site_id not in on_disk
+        ]
+
+        def work(db: sqlite3.Connection) -> None:
+            db.execute("DELETE FROM site_files")
+            db.execute("DELETE FROM sites")
+            for site_id, metadata, files, last_edit, archived in scanned:
+                self._replace_site(db, site_id, metadata, files, last_edit, archived)
+
+        self._transaction(work)
+        return len(scanned)
+
+    def ensure_built(self) -> Optional[int]:
+        """Rebuild an empty catalog when sites exist (first start, or a deleted database)"""
+        with self._lock:
+            empty = self._db().execute("SELECT 1 FROM sites LIMIT 1").fetchone() is None
+        if empty and self.documents.storage.list_sites():
+            return self.rebuild()
+        return None
+
+    # -- Queries --
+
+    def list_sites(
+        self,
+        limit: int = 50,
+        cursor: str = "",
+        site_type: str = "",
+        verified: Optional[bool] = None,
+        published: Optional[bool] = None,
+        search: str = "",
+        created_after: str = "",
+        created_before: str = "",
+        order_by: str = "created_at",
+        descending: bool = True,
+        archived: Optional[bool] = None,
+    ) -> Dict[str, Any]:
+        """
+        One page of sites matching the filters.
+
+        Pages use keyset pagination: pass the returned next_cursor to get the
+        following page; deep pages cost the same as the first.
+
+        Args:
+            limit: Sites per page (1-500)
+            cursor: next_cursor of the previous page
+            site_type: Exact site type (case-insensitive)
+            verified: Only sites whose verification passed (True) or failed (False)
+            published: Only sites with (True) or without (False) a production build
+            search: Substring of the requirements
+            created_after: ISO timestamp (inclusive)
+            created_before: ISO timestamp (exclusive)
+            order_by: created_at, last_edit, size or site_id
+            descending: Newest/largest first
+            archived: Only archived (True) or unarchived (False) sites
+
+        Returns:
+            {"sites": [...], "total": matching sites, "next_cursor": str or None}
+        """
+        if order_by not in SORT_COLUMNS:
+            raise ValueError(f"order_by must be one of {', '.join(SORT_COLUMNS)}")
+        limit = min(max(1, limit), 500)
+
+        where: List[str] = []
+        params: List[Any] = []
+        if site_type:
+            where.append("site_type = ? COLLATE NOCASE")
+            params.append(site_type)
+        if verified is not None:
+            where.append("verification_passed = ?")
+            params.append(int(verified))
+        if published is not None:
+            where.append("published = ?")
+            params.append(int(published))
+        if archived is not None:
+            where.append("archived = ?")
+            params.append(int(archived))
+        if search:
+            where.append("requirements LIKE ? ESCAPE '\\'")
+            params.append("%" + search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%")
+        if created_after:
+            where.append("created_at >= ?")
+            params.append(created_after)
+        if created_before:
+            where.append("created_at < ?")
+            params.append(created_before)
+        filters = " AND ".join(where) or "1"
+
+        page_where, page_params = filters, list(params)
+        if cursor:
+            value, last_site_id = _decode_cursor(cursor)
+            direction = "<" if descending else ">"
+            if order_by == "site_id":
+                page_where += f" AND site_id {direction} ?"
+                page_params.append(last_site_id)
+            else:
+                page_where += f" AND ({order_by}, site_id) {direction} (?, ?)"
+                page_params += [value, last_site_id]
+        order = "DESC" if descending else "ASC"
+
+        with self._lock:
+            db = self._db()
+            total = db.execute(f"SELECT COUNT(*) FROM sites WHERE {filters}", params).fetchone()[0]
+            rows = db.execute(
+                f"SELECT * FROM sites WHERE {page_where} ORDER BY {order_by} {order}, site_id {order} LIMIT ?",
+                page_params + [limit + 1],
+            ).fetchall()
+
+        sites = [self._row(row) for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            last = sites[-1]
+            next_cursor = _encode_cursor((last[order_by], last["site_id"]))
+        return {"sites": sites, "total": total, "next_cursor": next_cursor}
+
+    @staticmethod
+    def _row(row: sqlite3.Row) -> Dict[str, Any]:
+        site = dict(row)
+        site["verification_passed"] = bool(site["verification_passed"])
+        site["published"] = bool(site["published"])
+        site["archived"] = bool(site["archived"])
+        site["url"] = f"http://localhost:8000/sites/{site['site_id']}"
+        return site
+
+    def summary(self) -> Dict[str, Any]:
+        """Totals over the whole catalog"""
+        with self._lock:
+            row = self._db().execute(
+                """SELECT COUNT(*) AS sites, COALESCE(SUM(verification_passed), 0) AS verified,
+                          COALESCE(SUM(published), 0) AS published, COALESCE(SUM(archived), 0) AS archived,
+                          COALESCE(SUM(size), 0) AS size,
+                          MIN(created_at) AS oldest, MAX(created_at) AS newest
+                   FROM sites"""
+            ).fetchone()
+            types = self._db().execute(
+                "SELECT site_type, COUNT(*) AS sites FROM sites GROUP BY site_type ORDER BY sites DESC LIMIT 20"
+            ).fetchall()
+        return {**dict(row), "site_types": {entry["site_type"] or "(none)": entry["sites"] for entry in types}}
+
+    def least_recently_used(self, archived: bool = False) -> List[Dict[str, Any]]:
+        """
+        Unarchived (or archived) sites, least recently used first.
+
+        Returns:
+            [{"site_id", "size", "last_used"}]; last_used is the ISO time of the
+            last access, else the last edit, else the creation
+        """
+        with self._lock:
+            rows = self._db().execute(
+                f"""SELECT site_id, size, {_LAST_USED} AS last_used FROM sites
+                    WHERE archived = ? ORDER BY last_used, site_id""",
+                (int(archived),),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    # -- Async API --
+
+    @staticmethod
+    def tracks(site_id: str) -> bool:
+        """Whether the site is cataloged (not a scratch or internal directory)"""
+        return not site_id.startswith(("_", "."))
+
+    async def arefresh(self, site_id: str, metadata: Optional[Dict[str, Any]] = None) -> None:
+        """refresh() on the I/O pool; the catalog is derived data, so failures are only logged"""
+        if not self.tracks(site_id):
+            return
+        try:
+            await self.documents.run_io(self.refresh, site_id, metadata)
+        except (OSError, sqlite3.Error):
+            logging.exception("Could not update the site catalog for %s", site_id)
+
+    async def arecord_write(self, site_id: str, file_path: str, size: Optional[int]) -> None:
+        """record_write() on the I/O pool (failures are only logged)"""
+        if not self.tracks(site_id):
+            return
+        try:
+            await self.documents.run_io(self.record_write, site_id, file_path, size)
+        except (OSError, sqlite3.Error):
+            logging.exception("Could not update the site catalog for %s/%s", site_id, file_path)
+
+    async def aremove(self, site_id: str) -> None:
+        """remove() on the I/O pool (failures are only logged)"""
+        try:
+            await self.documents.run_io(self.remove, site_id)
+        except sqlite3.Error:
+            logging.exception("Could not remove %s from the site catalog", site_id)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"path": str(self.path), "open": self._connection is not None}
+
+
+# Process-wide catalog of the generated sites
+site_catalog = SiteCatalog.from_env(site_documents)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Manage the SQLite catalog of generated sites")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("rebuild", help="Recreate the catalog from the site storage and archives")
+    commands.add_parser("summary", help="Totals over the catalog")
+    listing = commands.add_parser("list", help="List sites, newest first")
+    listing.add_argument("--limit", type=int, default=20)
+    listing.add_argument("--site-type", default="")
+    args = parser.parse_args()
+
+    if args.command == "rebuild":
+        print(f"Indexed {site_catalog.rebuild()} sites into {site_catalog.path}")
+    elif args.command == "summary":
+        print(json.dumps(site_catalog.summary(), indent=2))
+    else:
+        print(json.dumps(site_catalog.list_sites(limit=args.limit, site_type=args.site_type), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,576 @@
+"""
+In-memory document store for generated site files.
+
+All site file access (manage_site_files, the generation graph, the /sites
+route and the site:// resources) goes through this store instead of reading
+and writing files directly. Documents are cached per (site_id, file_path),
+with the path normalized (document_key), and carry a version counter; writes
+only update memory and schedule a debounced flush to disk, so an edit loop of
+many small changes costs one disk write instead of a full read and write per
+edit. Memory is bounded by evicting least-recently-used clean documents.
+
+Files are kept by a pluggable SiteStorage backend (tools.site_storage:
+filesystem, SQLite or in-memory, chosen by SITE_STORAGE); "disk" below means
+that backend. Disk I/O never runs on the event loop: the async methods (aread,
+aget, aexists, awrite, adelete, aflush, alist_files, acreate_site,
+adelete_site) and debounced flushes run it on a small bounded thread pool, and
+backends replace files atomically so readers never observe a partially written
+file. The synchronous methods remain for scripts, shutdown hooks and other
+callers without a running loop.
+
+Every document carries a content hash used as its version for optimistic
+concurrency, and site_lock() hands out a per-site asyncio.Lock that writers
+hold across read-modify-write sequences; readers never take it.
+"""
+
+import asyncio
+import atexit
+import functools
+import hashlib
+import logging
+import os
+import posixpath
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Any, List, Optional, Set, Tuple, TypeVar
+
+from .site_storage import FilesystemSiteStorage, SiteStorage, atomic_write_bytes, storage_from_env
+
+# Root directory holding one sub-directory per generated site
+SITES_DIR = Path(__file__).parent.parent / "generated_sites"
+
+# Called with (site_id, file_path, content) after every write; content is None for deletes
+WriteListener = Callable[[str, str, Optional[str]], None]
+
+DocumentKey = Tuple[str, str]
+
+T = TypeVar("T")
+
+# Number of locks serializing disk writes; a key always maps to the same lock
+_WRITE_LOCK_STRIPES = 64
+
+
+def document_key(site_id: str, file_path: str) -> DocumentKey:
+    """
+    Key of a site file: the site and the file's normalized relative path.
+
+    "index.html", "./index.html" and "css//main.css" name the same documents as
+    "index.html" and "css/main.css", so every spelling reads and writes one copy.
+
+    Raises:
+        ValueError: If file_path is empty, absolute or contains a ".." component
+    """
+    if not file_path or file_path.startswith("/") or ".." in file_path.split("/"):
+        raise ValueError(f"Invalid site file path: {file_path!r}")
+    normalized = posixpath.normpath(file_path)
+    if normalized == ".":
+        raise ValueError(f"Invalid site file path: {file_path!r}")
+    return site_id, normalized
+
+
+def atomic_write_text(path: Path, content: str) -> None:
+    """
+    Write a UTF-8 text file atomically.
+
+    The content is written to a temporary file in the same directory, which
+    then replaces path with a single rename, so concurrent readers see either
+    the old or the new file and never a partial one.
+
+    Args:
+        path: Destination file (parent directories are created)
+        content: Text to write
+    """
+    atomic_write_bytes(path, content.encode("utf-8"))
+
+
+@dataclass
+class SiteDocument:
+    """Cached content of one site file"""
+
+    site_id: str
+    file_path: str
+    content: str
+    version: int = 1
+    dirty: bool = False
+    size: int = 0
+    content_hash: str = ""
+    modified_at: float = field(default_factory=time.time)
+    write_seq: int = 0
+    last_access: float = field(default_factory=time.monotonic)
+    flush_handle: Optional[asyncio.TimerHandle] = field(default=None, repr=False)
+
+
+class SiteDocumentStore:
+    """Write-behind cache of site files, bounded by total cached bytes"""
+
+    def __init__(
+        self,
+        sites_dir: Path,
+        max_bytes: int = 64 * 1024 * 1024,
+        flush_delay: float = 2.0,
+        io_threads: int = 4,
+        storage: Optional[SiteStorage] = None,
+    ):
+        """
+        Args:
+            sites_dir: Directory of the sites (and of internal data such as _objects/ and _catalog.sqlite3)
+            storage: Backend holding the site files (default: one sub-directory of sites_dir per site)
+            max_bytes: Approximate upper bound on cached document bytes
+            flush_delay: Seconds of write inactivity before a dirty document is flushed
+            io_threads: Size of the thread pool running disk I/O for async callers
+        """
+        self.sites_dir = sites_dir
+        self.storage = storage if storage is not None else FilesystemSiteStorage(sites_dir)
+        self.max_bytes = max_bytes
+        self.flush_delay = flush_delay
+        self.io_threads = max(1, io_threads)
+        self._executor = ThreadPoolExecutor(max_workers=self.io_threads, thread_name_prefix="site-io")
+        self._documents: "OrderedDict[DocumentKey, SiteDocument]" = OrderedDict()
+        self._listeners: List[WriteListener] = []
+        # Locks live only while some writer holds or waits on them
+        self._site_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+        self._cached_bytes = 0
+        self._flush_tasks: Set[asyncio.Task] = set()
+        # Disk writes are ordered per key by write_seq: an older write never replaces a newer one
+        self._write_seq = 0
+        # Only kept for keys with disk operations in flight (counted in _pending_ops)
+        self._flushed_seq: Dict[DocumentKey, int] = {}
+        self._pending_ops: Dict[DocumentKey, int] = {}
+        self._seq_lock = threading.Lock()
+        self._write_locks = [threading.Lock() for _ in range(_WRITE_LOCK_STRIPES)]
+        self._stats_lock = threading.Lock()
+        # Bumped on every delete so a disk read racing with a delete is not cached
+        self._delete_epoch = 0
+        self.disk_reads = 0
+        self.disk_writes = 0
+
+    @classmethod
+    def from_env(cls, sites_dir: Path) -> "SiteDocumentStore":
+        """Create a store configured from SITE_DOCUMENTS_* / SITE_IO_THREADS / SITE_STORAGE* environment variables"""
+        return cls(
+            sites_dir,
+            max_bytes=int(os.getenv("SITE_DOCUMENTS_MAX_BYTES", str(64 * 1024 * 1024))),
+            flush_delay=float(os.getenv("SITE_DOCUMENTS_FLUSH_DELAY", "2.0")),
+            io_threads=int(os.getenv("SITE_IO_THREADS", "4")),
+            storage=storage_from_env(sites_dir),
+        )
+
+    def path_for(self, site_id: str, file_path: str) -> Path:
+        """Filesystem path of a site file (where the filesystem backend keeps it)"""
+        site_id, file_path = document_key(site_id, file_path)
+        return self.sites_dir / site_id / file_path
+
+    def add_write_listener(self, listener: WriteListener) -> None:
+        """Register a callback invoked after every write or delete"""
+        self._listeners.append(listener)
+
+    def site_lock(self, site_id: str) -> asyncio.Lock:
+        """
+        Return the lock serializing writers of one site.
+
+        Writers hold it across read-check-write sequences (including the
+        expected_version check) so concurrent edit sessions on one site cannot
+        interleave. Readers do not take it and never wait on writers.
+        """
+        lock = self._site_locks.get(site_id)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._site_locks[site_id] = lock
+        return lock
+
+    async def run_io(self, func: Callable[..., T], *args: Any) -> T:
+        """Run a blocking filesystem call on the store's I/O thread pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args))
+
+    def _notify(self, site_id: str, file_path: str, content: Optional[str]) -> None:
+        for listener in self._listeners:
+            try:
+                listener(site_id, file_path, content)
+            except Exception:
+                logging.exception("Site document write listener failed for %s/%s", site_id, file_path)
+
+    # -- Disk access (safe to call from I/O threads) --
+
+    def _read_disk(self, site_id: str, file_path: str) -> Optional[SiteDocument]:
+        """Load a document from disk (not inserted into the cache), or None if missing"""
+        found = self.storage.read(site_id, file_path)
+        if found is None:
+            return None
+        data, modified_at = found
+        content = data.decode("utf-8")
+        with self._stats_lock:
+            self.disk_reads += 1
+        # Size and hash here too, so async loads keep the hashing off the event loop
+        return self._measure(
+            SiteDocument(site_id=site_id, file_path=file_path, content=content, modified_at=modified_at)
+        )
+
+    @staticmethod
+    def _measure(document: SiteDocument) -> SiteDocument:
+        data = document.content.encode("utf-8")
+        document.size = len(data)
+        document.content_hash = hashlib.sha256(data).hexdigest()
+        return document
+
+    def _write_lock(self, key: DocumentKey) -> threading.Lock:
+        return self._write_locks[hash(key) % _WRITE_LOCK_STRIPES]
+
+    def _begin_disk_op(self, key: DocumentKey) -> None:
+        """Count a write or delete of key as in flight (call before handing it to a thread)"""
+        with self._seq_lock:
+            self._pending_ops[key] = self._pending_ops.get(key, 0) + 1
+
+    def _end_disk_op(self, key: DocumentKey) -> None:
+        """Called under the key's write lock when a disk operation finishes"""
+        with self._seq_lock:
+            remaining = self._pending_ops.pop(key) - 1
+            if remaining:
+                self._pending_ops[key] = remaining
+            else:
+                # Nothing older can still land, and new operations always carry a newer write_seq
+                self._flushed_seq.pop(key, None)
+
+    def _write_disk(self, document: SiteDocument) -> bool:
+        """Atomically write a document unless a newer write for its key already landed"""
+        key = (document.site_id, document.file_path)
+        with self._write_lock(key):
+            try:
+                if self._flushed_seq.get(key, 0) >= document.write_seq:
+                    return False
+                self.storage.write(document.site_id, document.file_path, document.content.encode("utf-8"))
+                self._flushed_seq[key] = document.write_seq
+            finally:
+                self._end_disk_op(key)
+        with self._stats_lock:
+            self.disk_writes += 1
+        return True
+
+    def _delete_disk(self, key: DocumentKey, delete_seq: int) -> bool:
+        with self._write_lock(key):
+            try:
+                # Any write queued before the delete must not resurrect the file
+                self._flushed_seq[key] = max(self._flushed_seq.get(key, 0), delete_seq)
+                return self.storage.delete(*key)
+            finally:
+                self._end_disk_op(key)
+
+    def _forget_site(self, site_id: str) -> None:
+        """Drop the write ordering state of a deleted site's idle keys"""
+        with self._seq_lock:
+            for key in [key for key in self._flushed_seq if key[0] == site_id and key not in self._pending_ops]:
+                del self._flushed_seq[key]
+
+    # -- In-memory cache --
+
+    def _touch(self, key: DocumentKey, document: SiteDocument) -> SiteDocument:
+        document.last_access = time.monotonic()
+        self._documents.move_to_end(key)
+        return document
+
+    def _cached(self, key: DocumentKey) -> Optional[SiteDocument]:
+        document = self._documents.get(key)
+        return self._touch(key, document) if document is not None else None
+
+    def _insert(self, key: DocumentKey, document: SiteDocument) -> None:
+        if not document.content_hash:
+            self._measure(document)
+        self._documents[key] = document
+        self._cached_bytes += document.size
+        self._evict()
+
+    def _remove(self, key: DocumentKey) -> Optional[SiteDocument]:
+        document = self._documents.pop(key, None)
+        if document is not None:
+            self._cached_bytes -= document.size
+            if document.flush_handle is not None:
+                document.flush_handle.cancel()
+                document.flush_handle = None
+        return document
+
+    def _evict(self) -> None:
+        """Drop least-recently-used clean documents until under max_bytes (never the newest)"""
+        if self._cached_bytes <= self.max_bytes:
+            return
+        # Dirty documents stay until their flush lands; eviction is retried after each flush
+        candidates = [key for key, document in self._documents.items() if not document.dirty]
+        newest = next(reversed(self._documents))
+        for key in candidates:
+            if self._cached_bytes <= self.max_bytes:
+                break
+            if key != newest:
+                self._remove(key)
+
+    def _next_write_seq(self) -> int:
+        self._write_seq += 1
+        return self._write_seq
+
+    def _replace(self, key: DocumentKey, content: str) -> SiteDocument:
+        site_id, file_path = key
+        previous = self._remove(key)
+        document = SiteDocument(
+            site_id=site_id,
+            file_path=file_path,
+            content=content,
+            version=previous.version + 1 if previous is not None else 1,
+            dirty=True,
+            write_seq=self._next_write_seq(),
+        )
+        self._insert(key, document)
+        return document
+
+    # -- Synchronous API (no event loop required) --
+
+    def _load(self, site_id: str, file_path: str) -> Optional[SiteDocument]:
+        """Return the cached document, loading it from disk on a miss"""
+        key = document_key(site_id, file_path)
+        site_id, file_path = key
+        document = self._cached(key)
+        if document is not None:
+            return document
+
+        document = self._read_disk(site_id, file_path)
+        if document is None:
+            return None
+        self._insert(key, document)
+        return document
+
+    def read(self, site_id: str, file_path: str) -> Optional[str]:
+        """Return the file's current content, or None if it does not exist"""
+        document = self._load(site_id, file_path)
+        return document.content if document is not None else None
+
+    def get(self, site_id: str, file_path: str) -> Optional[SiteDocument]:
+        """Return the cached document (content, version, ...) or None if it does not exist"""
+        return self._load(site_id, file_path)
+
+    def exists(self, site_id: str, file_path: str) -> bool:
+        key = document_key(site_id, file_path)
+        return key in self._documents or self.storage.exists(*key)
+
+    def write(self, site_id: str, file_path: str, content: str, flush: bool = False) -> SiteDocument:
+        """
+        Replace a file's content in memory and schedule it to be written to disk.
+
+        Args:
+            site_id: Site identifier
+            file_path: Path relative to the site directory
+            content: New file content
+            flush: Write to disk immediately (on the calling thread) instead of after the debounce delay
+
+        Returns:
+            The updated document
+        """
+        document = self._replace(document_key(site_id, file_path), content)
+        if flush:
+            self._flush_document(document)
+        else:
+            self._schedule_flush(document)
+
+        self._notify(document.site_id, document.file_path, content)
+        return document
+
+    def delete(self, site_id: str, file_path: str) -> bool:
+        """Delete a file from memory and disk. Returns False if it did not exist"""
+        key = document_key(site_id, file_path)
+        site_id, file_path = key
+        document = self._remove(key)
+        self._delete_epoch += 1
+        self._begin_disk_op(key)
+        existed_on_disk = self._delete_disk(key, self._next_write_seq())
+        if document is None and not existed_on_disk:
+            return False
+
+        self._notify(site_id, file_path, None)
+        return True
+
+    def _superseded(self, document: SiteDocument) -> bool:
+        """A newer write or a delete replaced the document: its content must never reach disk"""
+        return self._documents.get((document.site_id, document.file_path)) is not document
+
+    def _flush_document(self, document: SiteDocument) -> None:
+        if document.flush_handle is not None:
+            document.flush_handle.cancel()
+            document.flush_handle = None
+        if not document.dirty or self._superseded(document):
+            return
+
+        self._begin_disk_op((document.site_id, document.file_path))
+        self._write_disk(document)
+        document.dirty = False
+
+    def flush(self, site_id: Optional[str] = None) -> int:
+        """
+        Write dirty documents to disk now, on the calling thread.
+
+        Args:
+            site_id: Only flush this site's documents (default: all sites)
+
+        Returns:
+            Number of documents written
+        """
+        dirty = self._dirty_documents(site_id)
+        for document in dirty:
+            self._flush_document(document)
+        self._evict()
+        return len(dirty)
+
+    # -- Async API (disk I/O on the thread pool) --
+
+    async def aget(self, site_id: str, file_path: str) -> Optional[SiteDocument]:
+        """Like get(), but a cache miss is read from disk on the I/O thread pool"""
+        key = document_key(site_id, file_path)
+        site_id, file_path = key
+        while True:
+            document = self._cached(key)
+            if document is not None:
+                return document
+
+            epoch = self._delete_epoch
+            loaded = await self.run_io(self._read_disk, site_id, file_path)
+            # Another task may have loaded, written or deleted the file meanwhile
+            document = self._cached(key)
+            if document is not None:
+                return document
+            if loaded is None:
+                return None
+            if epoch == self._delete_epoch:
+                self._insert(key, loaded)
+                return loaded
+
+    async def aread(self, site_id: str, file_path: str) -> Optional[str]:
+        """Like read(), but a cache miss is read from disk on the I/O thread pool"""
+        document = await self.aget(site_id, file_path)
+        return document.content if document is not None else None
+
+    async def aexists(self, site_id: str, file_path: str) -> bool:
+        """Like exists(), but the filesystem check runs on the I/O thread pool"""
+        key = document_key(site_id, file_path)
+        if key in self._documents:
+            return True
+        return await self.run_io(self.storage.exists, *key)
+
+    async def awrite(self, site_id: str, file_path: str, content: str, flush: bool = False) -> SiteDocument:
+        """Like write(), but flush=True awaits the disk write on the I/O thread pool"""
+        document = self._replace(document_key(site_id, file_path), content)
+        if flush:
+            await self._flush_document_async(document)
+        else:
+            self._schedule_flush(document)
+
+        self._notify(document.site_id, document.file_path, content)
+        return document
+
+    async def adelete(self, site_id: str, file_path: str) -> bool:
+        """Like delete(), but the unlink runs on the I/O thread pool"""
+        key = document_key(site_id, file_path)
+        site_id, file_path = key
+        document = self._remove(key)
+        self._delete_epoch += 1
+        self._begin_disk_op(key)
+        existed_on_disk = await self.run_io(self._delete_disk, key, self._next_write_seq())
+        if document is None and not existed_on_disk:
+            return False
+
+        self._notify(site_id, file_path, None)
+        return True
+
+    async def alist_files(self, site_id: str) -> List[str]:
+        """Sorted paths of a site's files, including writes not yet flushed to disk"""
+        on_disk = await self.run_io(self.storage.list_files, site_id)
+        cached = [file_path for (cached_site, file_path) in self._documents if cached_site == site_id]
+        return sorted(set(on_disk) | set(cached))
+
+    async def adelete_site(self, site_id: str) -> int:
+        """
+        Delete a whole site: every file (pending writes are dropped) and its directory.
+
+        Returns:
+            Number of files deleted
+        """
+        deleted = 0
+        for file_path in await self.alist_files(site_id):
+            deleted += await self.adelete(site_id, file_path)
+        await self.run_io(self.storage.delete_site, site_id)
+        self._forget_site(site_id)
+        return deleted
+
+    async def acreate_site(self, site_id: str, exclusive: bool = False) -> None:
+        """Create an empty site in the storage backend (exclusive: FileExistsError if it exists)"""
+        await self.run_io(self.storage.create_site, site_id, exclusive)
+
+    async def aflush(self, site_id: Optional[str] = None) -> int:
+        """Like flush(), but the writes run concurrently on the I/O thread pool"""
+        dirty = self._dirty_documents(site_id)
+        await asyncio.gather(*(self._flush_document_async(document) for document in dirty))
+        return len(dirty)
+
+    def _dirty_documents(self, site_id: Optional[str]) -> List[SiteDocument]:
+        return [
+            document
+            for document in self._documents.values()
+            if document.dirty and (site_id is None or document.site_id == site_id)
+        ]
+
+    async def _flush_document_async(self, document: SiteDocument) -> None:
+        if document.flush_handle is not None:
+            document.flush_handle.cancel()
+            document.flush_handle = None
+        if not document.dirty or self._superseded(document):
+            return
+
+        self._begin_disk_op((document.site_id, document.file_path))
+        await self.run_io(self._write_disk, document)
+        document.dirty = False
+        self._evict()
+
+    def _schedule_flush(self, document: SiteDocument) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No event loop (sync callers, scripts): write through
+            self._flush_document(document)
+            return
+
+        if document.flush_handle is not None:
+            document.flush_handle.cancel()
+        document.flush_handle = loop.call_later(self.flush_delay, self._start_background_flush, document)
+
+    def _start_background_flush(self, document: SiteDocument) -> None:
+        """Debounce timer callback: hand the write to the I/O pool instead of blocking the loop"""
+        document.flush_handle = None
+        task = asyncio.get_running_loop().create_task(self._background_flush(document))
+        self._flush_tasks.add(task)
+        task.add_done_callback(self._flush_tasks.discard)
+
+    async def _background_flush(self, document: SiteDocument) -> None:
+        try:
+            await self._flush_document_async(document)
+        except Exception:
+            # Stays dirty; the next flush (or shutdown) retries it
+            logging.exception("Failed to flush %s/%s", document.site_id, document.file_path)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "documents": len(self._documents),
+            "dirty": sum(1 for document in self._documents.values() if document.dirty),
+            "cached_bytes": self._cached_bytes,
+            "max_bytes": self.max_bytes,
+            "io_threads": self.io_threads,
+            "flushes_in_flight": len(self._flush_tasks),
+            "disk_reads": self.disk_reads,
+            "disk_writes": self.disk_writes,
+            "storage": self.storage.stats(),
+        }
+
+
+# Process-wide store shared by all tools and routes
+site_documents = SiteDocumentStore.from_env(SITES_DIR)
+
+# Never lose buffered edits on interpreter shutdown
+atexit.register(site_documents.flush)
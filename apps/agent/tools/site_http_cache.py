@@ -0,0 +1,297 @@
+"""
+HTTP delivery helpers for generated sites.
+
+Text files (index.html, CSS, JS, ...) are served from the site document store
+with strong ETags derived from the content hash, Last-Modified, conditional
+request handling and pre-compressed gzip (and brotli, when the optional
+``brotli`` package is installed) variants. Compressed bodies are kept in a
+byte-bounded in-memory LRU cache that is invalidated by the document store's
+write listener, so a popular site is compressed once per edit instead of once
+per request. Binary assets are served straight from the site directory (or
+read from the storage backend when it keeps no files on disk).
+"""
+
+import gzip
+import mimetypes
+import os
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path, PurePosixPath
+from typing import Dict, Any, Iterable, Optional, Tuple
+
+from .site_documents import SiteDocument, site_documents
+
+try:
+    import brotli
+except ImportError:  # Optional: gzip only
+    brotli = None
+
+# Bodies smaller than this are not worth compressing
+MIN_COMPRESS_BYTES = 1024
+
+# Files served through the document store (and compressed); anything else is a binary asset
+TEXT_EXTENSIONS = {
+    ".html", ".htm", ".css", ".js", ".mjs", ".json", ".svg", ".txt", ".md", ".xml", ".map",
+}
+
+# Site files that are never served over HTTP
+PRIVATE_FILES = {"metadata.json"}
+
+_SITE_ID_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_\-]*$")
+
+CacheKey = Tuple[str, str]
+
+
+def safe_site_path(sites_dir: Path, site_id: str, file_path: str) -> Optional[Path]:
+    """
+    Validate a requested site file and return its path, or None if not servable.
+
+    Rejects site ids that are not plain identifiers, absolute paths, parent
+    references, hidden files (including in-flight temp files) and private
+    files such as metadata.json. Symlinks are checked separately by
+    resolves_inside(), which touches the filesystem.
+    """
+    if not _SITE_ID_PATTERN.match(site_id) or not file_path or "\\" in file_path or "\x00" in file_path:
+        return None
+    relative = PurePosixPath(file_path)
+    if relative.is_absolute() or any(part in ("", ".", "..") or part.startswith(".") for part in relative.parts):
+        return None
+    if relative.as_posix() in PRIVATE_FILES:
+        return None
+    return sites_dir / site_id / relative
+
+
+def resolves_inside(path: Path, root: Path) -> bool:
+    """Check that path, after resolving symlinks, stays inside root (blocking)"""
+    try:
+        return path.resolve().is_relative_to(root.resolve())
+    except OSError:
+        return False
+
+
+def is_text_asset(file_path: str) -> bool:
+    return PurePosixPath(file_path).suffix.lower() in TEXT_EXTENSIONS
+
+
+def media_type_for(file_path: str) -> str:
+    media_type, _ = mimetypes.guess_type(file_path)
+    media_type = media_type or "application/octet-stream"
+    if media_type.startswith("text/") or media_type in ("application/javascript", "application/json", "image/svg+xml"):
+        media_type += "; charset=utf-8"
+    return media_type
+
+
+def parse_accept_encoding(header: Optional[str]) -> Dict[str, float]:
+    """Parse an Accept-Encoding header into {coding: q}"""
+    codings: Dict[str, float] = {}
+    for item in (header or "").split(","):
+        name, _, params = item.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        match = re.search(r"q\s*=\s*([0-9.]+)", params)
+        if match:
+            try:
+                q = float(match.group(1))
+            except ValueError:
+                q = 0.0
+        codings[name] = q
+    return codings
+
+
+def choose_encoding(header: Optional[str], available: Iterable[str]) -> str:
+    """
+    Pick the best content coding the client accepts.
+
+    Args:
+        header: The request's Accept-Encoding value
+        available: Codings we have a body for besides identity, best first
+
+    Returns:
+        "br", "gzip" or "identity"
+    """
+    accepted = parse_accept_encoding(header)
+    wildcard = accepted.get("*", 0.0)
+    best, best_q = "identity", 0.0
+    for coding in available:
+        q = accepted.get(coding, wildcard)
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def etag_matches(if_none_match: str, etags: Iterable[str]) -> bool:
+    """Weak comparison of an If-None-Match header against our ETags (RFC 9110 13.1.2)"""
+    if if_none_match.strip() == "*":
+        return True
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return any(etag in candidates for etag in etags)
+
+
+def is_not_modified(
+    if_none_match: Optional[str],
+    if_modified_since: Optional[str],
+    etags: Iterable[str],
+    modified_at: float,
+) -> bool:
+    """Evaluate conditional request headers; If-None-Match takes precedence"""
+    if if_none_match:
+        return etag_matches(if_none_match, etags)
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError, IndexError, OverflowError):
+            return False
+        return int(modified_at) <= since
+    return False
+
+
+def http_date(timestamp: float) -> str:
+    return formatdate(timestamp, usegmt=True)
+
+
+def file_etag(stat_result: os.stat_result) -> str:
+    """Strong ETag for a file served from disk"""
+    return f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"'
+
+
+def stored_file_etag(size: int, modified_at: float) -> str:
+    """Strong ETag for a file served from a non-filesystem storage backend (same shape as file_etag)"""
+    return f'"{int(modified_at * 1e9):x}-{size:x}"'
+
+
+@dataclass
+class CachedAsset:
+    """A text file's response bodies (identity and compressed) plus validators"""
+
+    content_hash: str
+    media_type: str
+    modified_at: float
+    bodies: Dict[str, bytes] = field(default_factory=dict)
+
+    @property
+    def size(self) -> int:
+        return sum(len(body) for body in self.bodies.values())
+
+    @property
+    def encodings(self) -> Tuple[str, ...]:
+        """Compressed codings available, best first"""
+        return tuple(coding for coding in ("br", "gzip") if coding in self.bodies)
+
+    def etag(self, encoding: str) -> str:
+        # Each representation gets its own strong tag
+        base = self.content_hash[:32]
+        return f'"{base}"' if encoding == "identity" else f'"{base}-{encoding}"'
+
+    @property
+    def etags(self) -> Tuple[str, ...]:
+        return tuple(self.etag(encoding) for encoding in self.bodies)
+
+
+class SiteResponseCache:
+    """Byte-bounded LRU cache of compressed site file responses"""
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024, gzip_level: int = 6, brotli_quality: int = 5):
+        """
+        Args:
+            max_bytes: Upper bound on cached response bytes (all variants)
+            gzip_level: gzip compression level (1-9)
+            brotli_quality: brotli quality (0-11), used when brotli is installed
+        """
+        self.max_bytes = max_bytes
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self._entries: "OrderedDict[CacheKey, CachedAsset]" = OrderedDict()
+        self._cached_bytes = 0
+        # build() runs on the site I/O pool
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.compressions = 0
+
+    @classmethod
+    def from_env(cls) -> "SiteResponseCache":
+        """Create a cache configured from SITE_RESPONSE_* environment variables"""
+        return cls(
+            max_bytes=int(os.getenv("SITE_RESPONSE_CACHE_MAX_BYTES", str(32 * 1024 * 1024))),
+            gzip_level=int(os.getenv("SITE_RESPONSE_GZIP_LEVEL", "6")),
+            brotli_quality=int(os.getenv("SITE_RESPONSE_BROTLI_QUALITY", "5")),
+        )
+
+    def lookup(self, document: SiteDocument) -> Optional[CachedAsset]:
+        """Return the cached responses for this exact document content, or None"""
+        key = (document.site_id, document.file_path)
+        with self._lock:
+            asset = self._entries.get(key)
+            if asset is None or asset.content_hash != document.content_hash:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return asset
+
+    def build(self, document: SiteDocument) -> CachedAsset:
+        """
+        Encode and compress a document and cache the result (CPU-bound; run off the event loop).
+        """
+        body = document.content.encode("utf-8")
+        asset = CachedAsset(
+            content_hash=document.content_hash,
+            media_type=media_type_for(document.file_path),
+            modified_at=document.modified_at,
+            bodies={"identity": body},
+        )
+        if len(body) >= MIN_COMPRESS_BYTES:
+            compressed = gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+            if len(compressed) < len(body):
+                asset.bodies["gzip"] = compressed
+            if brotli is not None:
+                compressed = brotli.compress(body, quality=self.brotli_quality)
+                if len(compressed) < len(body):
+                    asset.bodies["br"] = compressed
+
+        key = (document.site_id, document.file_path)
+        with self._lock:
+            self.compressions += 1
+            self._discard(key)
+            self._entries[key] = asset
+            self._cached_bytes += asset.size
+            while self._cached_bytes > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self._cached_bytes -= evicted.size
+        return asset
+
+    def _discard(self, key: CacheKey) -> None:
+        asset = self._entries.pop(key, None)
+        if asset is not None:
+            self._cached_bytes -= asset.size
+
+    def invalidate(self, site_id: str, file_path: str) -> None:
+        with self._lock:
+            self._discard((site_id, file_path))
+
+    def on_site_write(self, site_id: str, file_path: str, content: Optional[str]) -> None:
+        """Site document write listener: drop the stale compressed responses"""
+        self.invalidate(site_id, file_path)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "cached_bytes": self._cached_bytes,
+            "max_bytes": self.max_bytes,
+            "brotli": brotli is not None,
+            "hits": self.hits,
+            "misses": self.misses,
+            "compressions": self.compressions,
+            "hit_rate": (self.hits / lookups) if lookups else 0.0,
+        }
+
+
+# Process-wide cache used by the /sites routes
+site_responses = SiteResponseCache.from_env()
+site_documents.add_write_listener(site_responses.on_site_write)
@@ -0,0 +1,62 @@
+"""
+Site ids: unique, sortable and human-readable.
+
+A site id is its creation time to the microsecond plus a random suffix:
+
+    20261016_142501_048213_9f3a1c
+
+Ids sort by creation time, and ids made by one process strictly increase even
+within a microsecond or when the clock steps back. The 24-bit random suffix
+keeps ids from other processes or hosts apart; the site itself is created
+exclusively (SiteStorage.create_site(exclusive=True)), so a collision fails
+instead of two generations sharing a site, and the caller retries with a new id.
+
+Ids from before this format (YYYYMMDD_HHMMSS) remain valid; both start with
+the creation time, so old and new sites sort together.
+"""
+
+import secrets
+import threading
+from datetime import datetime, timedelta
+from typing import Optional
+
+# Creation time prefix of every timestamp site id, and its length
+TIMESTAMP_FORMAT = "%Y%m%d_%H%M%S"
+TIMESTAMP_LENGTH = 15
+
+# Creation time with microseconds (site ids since the random suffix was added)
+PRECISE_FORMAT = "%Y%m%d_%H%M%S_%f"
+PRECISE_LENGTH = 22
+
+_lock = threading.Lock()
+_last: Optional[datetime] = None
+
+
+def new_site_id(now: Optional[datetime] = None) -> str:
+    """
+    A new site id: creation time (to the microsecond) and a random hex suffix.
+
+    Args:
+        now: Creation time (default: the current local time)
+
+    Returns:
+        Site id such as 20261016_142501_048213_9f3a1c
+    """
+    global _last
+    created = now or datetime.now()
+    with _lock:
+        # Strictly increasing within the process: the id sorts after every earlier one
+        if _last is not None and created <= _last:
+            created = _last + timedelta(microseconds=1)
+        _last = created
+    return f"{created.strftime(PRECISE_FORMAT)}_{secrets.token_hex(3)}"
+
+
+def created_at_from_id(site_id: str) -> str:
+    """ISO creation time encoded in a timestamp site id, or '' if it is not one"""
+    for fmt, length in ((PRECISE_FORMAT, PRECISE_LENGTH), (TIMESTAMP_FORMAT, TIMESTAMP_LENGTH)):
+        try:
+            return datetime.strptime(site_id[:length], fmt).isoformat()
+        except ValueError:
+            continue
+    return ""
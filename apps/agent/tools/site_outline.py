@@ -0,0 +1,414 @@
+"""
+Outline index of generated site files.
+
+An outline is a compact symbol index of a page: its ES imports, import map
+entries, React components (with the hooks they call, the components they
+render and their landmark sections), custom hooks, helper functions and
+constants, and the root render call, each with its line span. It lets the
+generation agent find its way around a large index.html in a few hundred
+tokens, then read or edit just the lines it needs.
+
+App scripts are split into top-level blocks: a block starts at every line
+indented like the first line of the script (a top-level statement in
+generated code) and each block is summarized independently. When the outline
+of an edited file is requested, the index diffs the new lines against the
+indexed ones (on the site I/O pool, never in the write path) and re-reads
+only the blocks around the changed lines; the blocks before are reused as-is
+and the blocks after are shifted. Edits outside the script bodies (the head,
+the import map, script tags) rebuild the outline, which is equally cheap for
+a page's small HTML shell.
+"""
+
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import PurePosixPath
+from typing import Dict, Any, List, Optional, Set, Tuple
+
+from .site_documents import SiteDocument, site_documents
+
+# Inline scripts holding app code
+APP_SCRIPT_TYPES = {"", "text/babel", "text/jsx", "module", "text/javascript", "application/javascript"}
+SCRIPT_EXTENSIONS = {".js", ".jsx", ".mjs"}
+
+_SCRIPT_OPEN = re.compile(r"<script\b([^>]*)>", re.I)
+_SCRIPT_CLOSE = re.compile(r"</script\s*>", re.I)
+_TYPE_ATTRIBUTE = re.compile(r"""\btype\s*=\s*["']?([\w/+.-]*)""", re.I)
+_SRC_ATTRIBUTE = re.compile(r"\bsrc\s*=", re.I)
+
+_FUNCTION_DECLARATION = re.compile(r"(?:export\s+(?:default\s+)?)?(?:async\s+)?function\s*\*?\s*([A-Za-z_$][\w$]*)")
+_CLASS_DECLARATION = re.compile(r"(?:export\s+(?:default\s+)?)?class\s+([A-Za-z_$][\w$]*)")
+_VARIABLE_DECLARATION = re.compile(r"(?:export\s+)?(?:const|let|var)\s+([A-Za-z_$][\w$]*)\s*=\s*(.*)")
+_CALLABLE_VALUE = re.compile(
+    r"(?:async\s+)?(?:\(|function\b|[A-Za-z_$][\w$]*\s*=>|(?:React\.)?(?:memo|forwardRef|lazy)\s*\()"
+)
+_IMPORT_FROM = re.compile(r"""import\s*(.*?)\s*(?:from\s*)?(["'])([^"'\n]+)\2""", re.S)
+_HOOK_CALL = re.compile(r"\b(?:React\.)?(use[A-Z][\w$]*)\s*\(")
+_COMPONENT_TAG = re.compile(r"<([A-Z][\w$]*(?:\.[\w$]+)*)[\s/>]")
+_SECTION_TAG = re.compile(r"<(section|header|footer|nav|main|aside|form)\b([^>]*)")
+_LABEL_ATTRIBUTE = re.compile(r"""\b(id|aria-label)\s*=\s*["']([^"']+)["']""")
+_RENDER_CALL = re.compile(r"\.render\(\s*<\s*([A-Za-z_$][\w$.]*)")
+
+
+@dataclass
+class _Region:
+    """Body lines [start, end) of one app script; end is the closing tag's line"""
+
+    start: int
+    end: int
+    base_line: int  # First non-blank line; its indentation marks top-level statements
+    indent: int
+
+
+@dataclass
+class _Block:
+    """One top-level statement: lines [start, end) and its summary (lines relative to start)"""
+
+    start: int
+    end: int
+    summary: Dict[str, Any]
+
+
+@dataclass
+class _Outline:
+    """Indexed state of one file"""
+
+    lines: List[str]
+    regions: List[_Region] = field(default_factory=list)
+    blocks: List[_Block] = field(default_factory=list)
+    import_map: Optional[Dict[str, Any]] = None
+
+
+def _indentation(line: str) -> int:
+    return len(line) - len(line.lstrip(" \t"))
+
+
+def _starts_statement(line: str, indent: int) -> bool:
+    """True for a top-level statement line (not a closing bracket, JSX or comment continuation)"""
+    stripped = line.strip()
+    return bool(stripped) and _indentation(line) == indent and stripped[0] not in "})]<>/*.,:?&|+-=;"
+
+
+def _summarize_block(lines: List[str]) -> Dict[str, Any]:
+    """Summarize one top-level block; line numbers are relative to its first line"""
+    first = lines[0].strip()
+    last = len(lines) - 1
+    while last > 0 and not lines[last].strip():
+        last -= 1
+    summary: Dict[str, Any] = {"last": last}
+    text = "\n".join(lines[:last + 1])
+
+    if first.startswith("import"):
+        match = _IMPORT_FROM.match(text)
+        if match:
+            summary["kind"] = "import"
+            summary["specifier"] = match.group(3)
+            names = " ".join(match.group(1).split())
+            if names:
+                summary["names"] = names
+        return summary
+
+    name = kind = None
+    match = _FUNCTION_DECLARATION.match(first) or _CLASS_DECLARATION.match(first)
+    if match:
+        name, callable_value = match.group(1), True
+    else:
+        match = _VARIABLE_DECLARATION.match(first)
+        if match:
+            name, callable_value = match.group(1), bool(_CALLABLE_VALUE.match(match.group(2)))
+    if name:
+        if callable_value and re.match(r"use[A-Z0-9]", name):
+            kind = "hook"
+        elif callable_value and name[0].isupper():
+            kind = "component"
+        elif callable_value:
+            kind = "function"
+        else:
+            kind = "constant"
+        summary["kind"] = kind
+        summary["name"] = name
+
+    render = _RENDER_CALL.search(text)
+    if render:
+        summary["render"] = render.group(1)
+
+    if kind in ("component", "hook", "function"):
+        hooks = []
+        for hook in _HOOK_CALL.findall(text):
+            if hook != name and hook not in hooks:
+                hooks.append(hook)
+        if hooks:
+            summary["hooks"] = hooks
+        uses = []
+        for component in _COMPONENT_TAG.findall(text):
+            if component != name and component not in uses:
+                uses.append(component)
+        if uses:
+            summary["uses"] = uses
+        sections = []
+        for offset, line in enumerate(lines[:last + 1]):
+            for tag, attributes in _SECTION_TAG.findall(line):
+                section: Dict[str, Any] = {"tag": tag, "line": offset}
+                for attribute, value in _LABEL_ATTRIBUTE.findall(attributes):
+                    section["id" if attribute == "id" else "label"] = value
+                sections.append(section)
+        if sections:
+            summary["sections"] = sections
+    return summary
+
+
+def _segment(lines: List[str], start: int, end: int, indent: int) -> List[_Block]:
+    """Split lines [start, end) into top-level blocks; start always begins a block"""
+    blocks = []
+    block_start = start
+    for index in range(start + 1, end):
+        if _starts_statement(lines[index], indent):
+            blocks.append(_Block(block_start, index, _summarize_block(lines[block_start:index])))
+            block_start = index
+    if block_start < end:
+        blocks.append(_Block(block_start, end, _summarize_block(lines[block_start:end])))
+    return blocks
+
+
+def _parse_import_map(source: str) -> Dict[str, Any]:
+    try:
+        data = json.loads(source)
+    except ValueError as e:
+        return {"error": f"not valid JSON ({e})"}
+    imports = data.get("imports") if isinstance(data, dict) else None
+    if not isinstance(imports, dict):
+        return {"error": 'missing "imports" object'}
+    return {"entries": imports}
+
+
+def _build(lines: List[str], is_html: bool) -> _Outline:
+    """Index a file from scratch"""
+    outline = _Outline(lines=lines)
+    if is_html:
+        spans: List[Tuple[str, int, int]] = []
+        index = 0
+        while index < len(lines):
+            opening = _SCRIPT_OPEN.search(lines[index])
+            if opening is None or _SCRIPT_CLOSE.search(lines[index], opening.end()):
+                index += 1
+                continue
+            close = index + 1
+            while close < len(lines) and not _SCRIPT_CLOSE.search(lines[close]):
+                close += 1
+            attributes = opening.group(1)
+            script_type = _TYPE_ATTRIBUTE.search(attributes)
+            script_type = script_type.group(1).lower() if script_type else ""
+            if script_type == "importmap":
+                outline.import_map = _parse_import_map("\n".join(lines[index + 1:close]))
+                outline.import_map["lines"] = [index + 1, close + 1]
+            elif script_type in APP_SCRIPT_TYPES and not _SRC_ATTRIBUTE.search(attributes):
+                spans.append((script_type, index + 1, close))
+            index = close + 1
+    else:
+        spans = [("module", 0, len(lines))]
+
+    for _, start, end in spans:
+        base_line = next((i for i in range(start, end) if lines[i].strip()), None)
+        if base_line is None:
+            continue
+        region = _Region(start, end, base_line, _indentation(lines[base_line]))
+        outline.regions.append(region)
+        outline.blocks.extend(_segment(lines, start, end, region.indent))
+    return outline
+
+
+class SiteOutlineIndex:
+    """Per-file outlines of site files, patched incrementally when requested after a write"""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._outlines: "OrderedDict[Tuple[str, str], _Outline]" = OrderedDict()
+        # outline() runs on the site I/O pool; write notifications (event loop) never take the lock
+        self._lock = threading.Lock()
+        # Files deleted since the last outline() call, whose outlines are dropped then
+        self._deleted: Set[Tuple[str, str]] = set()
+        self.builds = 0
+        self.incremental_updates = 0
+        self.blocks_reparsed = 0
+        self.blocks_reused = 0
+
+    @classmethod
+    def from_env(cls) -> "SiteOutlineIndex":
+        """Create an index configured from SITE_OUTLINE_CACHE_ENTRIES"""
+        return cls(max_entries=int(os.getenv("SITE_OUTLINE_CACHE_ENTRIES", "256")))
+
+    @staticmethod
+    def supports(file_path: str) -> bool:
+        suffix = PurePosixPath(file_path).suffix.lower()
+        return suffix in (".html", ".htm") or suffix in SCRIPT_EXTENSIONS
+
+    def _update(self, key: Tuple[str, str], content: str) -> _Outline:
+        """Bring key's outline up to date with content (caller holds the lock)"""
+        is_html = PurePosixPath(key[1]).suffix.lower() in (".html", ".htm")
+        lines = content.split("\n")
+        outline = self._outlines.get(key)
+        if outline is None:
+            outline = _build(lines, is_html)
+            self.builds += 1
+            self.blocks_reparsed += len(outline.blocks)
+        elif outline.lines != lines:
+            updated = self._patch(outline, lines)
+            if updated is None:
+                outline = _build(lines, is_html)
+                self.builds += 1
+                self.blocks_reparsed += len(outline.blocks)
+            else:
+                outline = updated
+                self.incremental_updates += 1
+
+        self._outlines[key] = outline
+        self._outlines.move_to_end(key)
+        while len(self._outlines) > self.max_entries:
+            self._outlines.popitem(last=False)
+        return outline
+
+    def _patch(self, outline: _Outline, lines: List[str]) -> Optional[_Outline]:
+        """
+        Re-read only the blocks around the lines that changed.
+
+        Returns:
+            The updated outline, or None when the change touches anything but
+            the body of one app script (the caller then rebuilds)
+        """
+        old = outline.lines
+        limit = min(len(old), len(lines))
+        prefix = 0
+        while prefix < limit and old[prefix] == lines[prefix]:
+            prefix += 1
+        suffix = 0
+        while suffix < limit - prefix and old[-1 - suffix] == lines[-1 - suffix]:
+            suffix += 1
+        changed_end = len(old) - suffix  # first unchanged line after the change (old numbering)
+        delta = len(lines) - len(old)
+
+        region_index = next(
+            (
+                i for i, region in enumerate(outline.regions)
+                if region.base_line < prefix and changed_end <= region.end
+            ),
+            None,
+        )
+        if region_index is None:
+            return None
+        region = outline.regions[region_index]
+
+        in_region = [i for i, block in enumerate(outline.blocks) if region.start <= block.start < region.end]
+        first = next(i for i in in_region if outline.blocks[i].end > prefix - 1)
+        last = max(i for i in in_region if outline.blocks[i].start <= changed_end)
+        start = outline.blocks[first].start
+        end = outline.blocks[last].end + delta
+
+        reparsed = _segment(lines, start, end, region.indent)
+        shifted = [
+            _Block(block.start + delta, block.end + delta, block.summary)
+            for block in outline.blocks[last + 1:]
+        ]
+        self.blocks_reparsed += len(reparsed)
+        self.blocks_reused += len(outline.blocks) - (last - first + 1)
+
+        regions = list(outline.regions[:region_index])
+        regions.append(_Region(region.start, region.end + delta, region.base_line, region.indent))
+        regions.extend(
+            _Region(r.start + delta, r.end + delta, r.base_line + delta, r.indent)
+            for r in outline.regions[region_index + 1:]
+        )
+        import_map = outline.import_map
+        if import_map is not None and import_map["lines"][0] > region.end:
+            import_map = dict(import_map, lines=[n + delta for n in import_map["lines"]])
+        return _Outline(
+            lines=lines,
+            regions=regions,
+            blocks=outline.blocks[:first] + reparsed + shifted,
+            import_map=import_map,
+        )
+
+    def outline(self, document: SiteDocument) -> Dict[str, Any]:
+        """
+        Return the outline of a document version (CPU-bound; run off the event loop).
+
+        Args:
+            document: The site file to outline
+
+        Returns:
+            Dict with the file's imports, import map, components, hooks, functions,
+            constants and render call, each with 1-based line numbers
+        """
+        key = (document.site_id, document.file_path)
+        with self._lock:
+            while self._deleted:
+                self._outlines.pop(self._deleted.pop(), None)
+            outline = self._update(key, document.content)
+            return self._describe(outline, document)
+
+    @staticmethod
+    def _describe(outline: _Outline, document: SiteDocument) -> Dict[str, Any]:
+        result: Dict[str, Any] = {
+            "file_path": document.file_path,
+            "version": document.content_hash,
+            "total_lines": len(outline.lines),
+            "scripts": [[region.start + 1, region.end] for region in outline.regions],
+        }
+        if outline.import_map is not None:
+            result["import_map"] = outline.import_map
+        groups: Dict[str, List[Dict[str, Any]]] = {
+            "imports": [], "components": [], "hooks": [], "functions": [], "constants": [],
+        }
+        for block in outline.blocks:
+            summary = block.summary
+            first_line = block.start + 1
+            span = [first_line, first_line + summary["last"]]
+            kind = summary.get("kind")
+            if kind == "import":
+                entry = {"specifier": summary["specifier"], "line": first_line}
+                if "names" in summary:
+                    entry["names"] = summary["names"]
+                groups["imports"].append(entry)
+            elif kind is not None:
+                entry = {"name": summary["name"], "lines": span}
+                for detail in ("hooks", "uses"):
+                    if detail in summary:
+                        entry[detail] = summary[detail]
+                if "sections" in summary:
+                    entry["sections"] = [
+                        dict(section, line=first_line + section["line"]) for section in summary["sections"]
+                    ]
+                groups[kind + "s"].append(entry)
+            if "render" in summary:
+                result["render"] = {"component": summary["render"], "line": first_line}
+        result.update({name: entries for name, entries in groups.items() if entries})
+        return result
+
+    def on_site_write(self, site_id: str, file_path: str, content: Optional[str]) -> None:
+        """
+        Site document write listener (runs on the event loop).
+
+        Edits need nothing here: outline() diffs the requested version against
+        the indexed lines, so the patch happens lazily on the I/O pool. A
+        deleted file is only queued, without waiting for the lock, and its
+        outline is dropped by the next outline() call.
+        """
+        if content is None and (site_id, file_path) in self._outlines:
+            self._deleted.add((site_id, file_path))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._outlines),
+            "max_entries": self.max_entries,
+            "builds": self.builds,
+            "incremental_updates": self.incremental_updates,
+            "blocks_reparsed": self.blocks_reparsed,
+            "blocks_reused": self.blocks_reused,
+        }
+
+
+# Process-wide index used by manage_site_files and the site://{id}/outline resource
+site_outlines = SiteOutlineIndex.from_env()
+site_documents.add_write_listener(site_outlines.on_site_write)
@@ -0,0 +1,419 @@
+"""
+Publish stage for generated sites.
+
+The editable source stays at <site>/index.html (it is what manage_site_files
+edits and what the generator verifies). Publishing runs a pipeline of steps
+over that source and writes a production build to dist/index.html plus
+dist/manifest.json, which records the source version it was built from. The
+/sites route serves the build only while that version matches the current
+source, so an edit never serves a stale build; republishing refreshes it.
+
+The first step precompiles every in-browser Babel script
+(<script type="text/babel">) into a plain ES module and drops the
+@babel/standalone loader. The JSX transpiler is pluggable: esbuild when its
+binary is available, otherwise the pure-Python transform in jsx_transform.
+The second replaces the Tailwind Play CDN script with a static stylesheet
+holding only the utilities the page uses (see tailwind_css). The third points
+the import map at the local vendor mirror (see vendor_mirror).
+"""
+
+import json
+import logging
+import os
+import re
+import shutil
+import subprocess
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, Any, List, Optional, Tuple
+
+from .jsx_transform import JsxSyntaxError, transform_jsx
+from .progress import report_progress
+from .site_documents import SiteDocument, site_documents
+from .tailwind_css import (
+    StylesheetCache,
+    compile_class,
+    extract_candidates,
+    extract_class_attribute_tokens,
+    is_supported,
+    looks_like_tailwind,
+)
+from .vendor_mirror import VendorMirror, vendor_mirror
+
+SOURCE_FILE = "index.html"
+OUTPUT_FILE = "dist/index.html"
+MANIFEST_FILE = "dist/manifest.json"
+
+_BABEL_LOADER = re.compile(
+    r"[ \t]*<script\b[^>]*\bsrc=[\"'][^\"']*babel[^\"']*[\"'][^>]*>\s*</script>[ \t]*\n?", re.I
+)
+_BABEL_SCRIPT = re.compile(
+    r"<script\b(?P<attrs>[^>]*\btype=[\"']text/(?:babel|jsx)[\"'][^>]*)>(?P<code>.*?)</script>", re.I | re.S
+)
+_MODULE_HINT = re.compile(r"\bdata-type=[\"']module[\"']", re.I)
+_IMPORTS_REACT = re.compile(r"\bimport\s+(?:\*\s+as\s+)?React\b")
+_ES_IMPORT_OR_EXPORT = re.compile(r"^\s*(?:import|export)\b", re.M)
+_TAILWIND_CDN = re.compile(
+    r"[ \t]*<script\b[^>]*\bsrc=[\"'][^\"']*cdn\.tailwindcss\.com[^\"']*[\"'][^>]*>\s*</script>", re.I
+)
+# Play CDN features a static build cannot reproduce
+_TAILWIND_RUNTIME_FEATURES = re.compile(r"\btailwind\.config\b|type=[\"']text/tailwindcss[\"']", re.I)
+
+# Unsupported classes listed in the publish report
+MAX_REPORTED_CLASSES = 20
+
+
+class PublishError(Exception):
+    """Raised when a site cannot be published"""
+
+
+class TranspileError(Exception):
+    """Raised when a transpiler backend cannot compile a script"""
+
+
+class JsxTranspiler:
+    """Compiles a JSX module to plain JavaScript (React classic runtime)"""
+
+    name = "base"
+
+    def transform(self, source: str) -> str:
+        """
+        Args:
+            source: Script content containing JSX
+
+        Returns:
+            Equivalent JavaScript using React.createElement
+
+        Raises:
+            TranspileError: If the script cannot be compiled
+        """
+        raise NotImplementedError
+
+
+class PythonJsxTranspiler(JsxTranspiler):
+    """Pure-Python fallback (tools/jsx_transform.py); no external tools required"""
+
+    name = "python"
+
+    def transform(self, source: str) -> str:
+        try:
+            return transform_jsx(source)
+        except JsxSyntaxError as e:
+            raise TranspileError(str(e)) from e
+
+
+class EsbuildTranspiler(JsxTranspiler):
+    """Runs the esbuild binary in transform mode"""
+
+    name = "esbuild"
+
+    def __init__(self, binary: str, timeout: float = 30.0):
+        self.binary = binary
+        self.timeout = timeout
+
+    @staticmethod
+    def find_binary() -> Optional[str]:
+        """Locate esbuild via ESBUILD_BINARY or PATH"""
+        return os.getenv("ESBUILD_BINARY") or shutil.which("esbuild")
+
+    def transform(self, source: str) -> str:
+        try:
+            completed = subprocess.run(
+                [
+                    self.binary,
+                    "--loader=jsx",
+                    "--jsx-factory=React.createElement",
+                    "--jsx-fragment=React.Fragment",
+                    "--charset=utf8",
+                    "--log-level=error",
+                ],
+                input=source,
+                capture_output=True,
+                text=True,
+                encoding="utf-8",
+                timeout=self.timeout,
+            )
+        except (OSError, subprocess.TimeoutExpired) as e:
+            raise TranspileError(f"esbuild failed to run: {e}") from e
+        if completed.returncode != 0:
+            raise TranspileError(completed.stderr.strip() or f"esbuild exited with {completed.returncode}")
+        return completed.stdout
+
+
+def create_transpiler(backend: str = "auto") -> JsxTranspiler:
+    """
+    Create the configured JSX transpiler.
+
+    Args:
+        backend: "esbuild", "python", or "auto" (esbuild if installed, else python)
+
+    Returns:
+        A JsxTranspiler; falls back to the Python transform if esbuild is missing
+    """
+    backend = backend.lower()
+    if backend in ("auto", "esbuild"):
+        binary = EsbuildTranspiler.find_binary()
+        if binary:
+            return EsbuildTranspiler(binary)
+        if backend == "esbuild":
+            logging.warning("esbuild not found (set ESBUILD_BINARY); using the Python JSX transform")
+    elif backend != "python":
+        logging.warning("Unknown SITE_TRANSPILER %r; using the Python JSX transform", backend)
+    return PythonJsxTranspiler()
+
+
+@dataclass
+class PublishContext:
+    """State threaded through the publish steps"""
+
+    site_id: str
+    source: SiteDocument
+    html: str
+    # Per-step details recorded in the manifest
+    steps: Dict[str, Any] = field(default_factory=dict)
+    # Additional files to write next to dist/index.html (path relative to the site)
+    files: Dict[str, str] = field(default_factory=dict)
+
+
+PublishStep = Callable[[PublishContext], Awaitable[None]]
+
+
+class SitePublisher:
+    """Runs the publish pipeline and decides which build is fresh enough to serve"""
+
+    def __init__(self, transpiler: JsxTranspiler, stylesheets: StylesheetCache, mirror: VendorMirror):
+        """
+        Args:
+            transpiler: Primary JSX backend; the Python transform is the fallback
+            stylesheets: Cache of generated Tailwind stylesheets, keyed by class set
+            mirror: Local package mirror the import map is rewritten to
+        """
+        self.transpiler = transpiler
+        self.fallback = transpiler if isinstance(transpiler, PythonJsxTranspiler) else PythonJsxTranspiler()
+        self.stylesheets = stylesheets
+        self.mirror = mirror
+        self._steps: List[Tuple[str, PublishStep]] = [
+            ("transpile_jsx", self._transpile_jsx),
+            ("tailwind_css", self._tailwind_css),
+            ("vendor_imports", self._vendor_imports),
+        ]
+        # site_id -> (manifest content hash, parsed manifest)
+        self._manifests: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+        self.published = 0
+        self.failures = 0
+
+    @classmethod
+    def from_env(cls) -> "SitePublisher":
+        """Create a publisher using the SITE_TRANSPILER backend (auto, esbuild or python)"""
+        return cls(
+            create_transpiler(os.getenv("SITE_TRANSPILER", "auto")),
+            StylesheetCache(
+                site_documents.sites_dir / "_css",
+                max_entries=int(os.getenv("TAILWIND_CSS_CACHE_ENTRIES", "256")),
+            ),
+            vendor_mirror,
+        )
+
+    def add_step(self, name: str, step: PublishStep) -> None:
+        """Append a step to the pipeline (steps run in registration order)"""
+        self._steps.append((name, step))
+
+    def _compile_script(self, code: str) -> Tuple[str, str]:
+        """Compile one script with the primary backend, falling back to the Python transform"""
+        try:
+            return self.transpiler.transform(code), self.transpiler.name
+        except TranspileError:
+            if self.fallback is self.transpiler:
+                raise
+            logging.warning("%s could not compile a script; retrying with the Python transform", self.transpiler.name)
+            return self.fallback.transform(code), self.fallback.name
+
+    def compile_html(self, html: str) -> Tuple[str, Dict[str, Any]]:
+        """
+        Replace in-browser Babel scripts with precompiled ones (CPU-bound; run off the event loop).
+
+        Returns:
+            Tuple of (new HTML, step report)
+
+        Raises:
+            TranspileError: If a script cannot be compiled by any backend
+        """
+        backends: List[str] = []
+
+        def compile_match(match: "re.Match[str]") -> str:
+            attrs, code = match.group("attrs"), match.group("code")
+            compiled, backend = self._compile_script(code)
+            backends.append(backend)
+            is_module = bool(_MODULE_HINT.search(attrs) or _ES_IMPORT_OR_EXPORT.search(code))
+            if is_module and not _IMPORTS_REACT.search(code):
+                # The classic runtime needs React in scope
+                compiled = 'import React from "react";\n' + compiled
+            opening = '<script type="module">' if is_module else "<script>"
+            return f"{opening}\n{compiled.strip(chr(10)).rstrip()}\n    </script>"
+
+        compiled_html, scripts = _BABEL_SCRIPT.subn(compile_match, html)
+        compiled_html, loaders = _BABEL_LOADER.subn("", compiled_html)
+        return compiled_html, {
+            "scripts": scripts,
+            "babel_loader_removed": bool(loaders),
+            "backends": sorted(set(backends)),
+        }
+
+    async def _transpile_jsx(self, context: PublishContext) -> None:
+        context.html, context.steps["transpile_jsx"] = await site_documents.run_io(self.compile_html, context.html)
+
+    def inline_tailwind(self, source: str, html: str) -> Tuple[str, Dict[str, Any]]:
+        """
+        Swap the Tailwind Play CDN script for a static stylesheet (CPU/disk-bound; run off the event loop).
+
+        Classes are collected from the source (class/className attributes plus
+        every class-like token, as Tailwind's scanner does). The CDN script is
+        kept if the page configures Tailwind at runtime or uses a class this
+        generator does not support, since the stylesheet would be incomplete.
+
+        Args:
+            source: The editable index.html the classes are scanned from
+            html: The page being published
+
+        Returns:
+            Tuple of (new HTML, step report)
+        """
+        if not _TAILWIND_CDN.search(html):
+            return html, {"mode": "none"}
+        if _TAILWIND_RUNTIME_FEATURES.search(source):
+            return html, {"mode": "cdn", "reason": "runtime configuration"}
+
+        attribute_tokens = extract_class_attribute_tokens(source)
+        unsupported = sorted(
+            token for token in attribute_tokens if looks_like_tailwind(token) and not is_supported(token)
+        )
+        if unsupported:
+            return html, {
+                "mode": "cdn",
+                "reason": "unsupported classes",
+                "unsupported": unsupported[:MAX_REPORTED_CLASSES],
+                "unsupported_count": len(unsupported),
+            }
+
+        classes = {
+            token for token in extract_candidates(source) | attribute_tokens
+            if token == "container" or compile_class(token) is not None
+        }
+        key, css, cached = self.stylesheets.get_or_build(classes)
+        style = f'<style data-tailwind="{key[:16]}">\n{css}</style>'
+        return _TAILWIND_CDN.sub(lambda _: "    " + style, html, count=1), {
+            "mode": "static",
+            "classes": len(classes),
+            "stylesheet": key[:16],
+            "css_bytes": len(css.encode("utf-8")),
+            "cached": cached,
+        }
+
+    async def _tailwind_css(self, context: PublishContext) -> None:
+        context.html, context.steps["tailwind_css"] = await site_documents.run_io(
+            self.inline_tailwind, context.source.content, context.html
+        )
+
+    async def _vendor_imports(self, context: PublishContext) -> None:
+        context.html, report = await site_documents.run_io(self.mirror.rewrite_import_map, context.html)
+        context.steps["vendor_imports"] = report.to_dict()
+
+    async def publish(self, site_id: str) -> Dict[str, Any]:
+        """
+        Build dist/index.html from the site's current index.html.
+
+        Args:
+            site_id: Site to publish
+
+        Returns:
+            The manifest written to dist/manifest.json
+
+        Raises:
+            PublishError: If the site has no index.html or a step fails
+        """
+        source = await site_documents.aget(site_id, SOURCE_FILE)
+        if source is None:
+            raise PublishError(f"Site '{site_id}' has no {SOURCE_FILE}")
+
+        started = time.monotonic()
+        context = PublishContext(site_id=site_id, source=source, html=source.content)
+        for name, step in self._steps:
+            try:
+                await step(context)
+            except Exception as e:
+                self.failures += 1
+                raise PublishError(f"Publish step '{name}' failed: {e}") from e
+
+        for file_path, content in context.files.items():
+            await site_documents.awrite(site_id, file_path, content)
+        output = await site_documents.awrite(site_id, OUTPUT_FILE, context.html, flush=True)
+        manifest = {
+            "source_file": SOURCE_FILE,
+            "source_version": source.content_hash,
+            "output_file": OUTPUT_FILE,
+            "output_version": output.content_hash,
+            "published_at": time.time(),
+            "duration_seconds": round(time.monotonic() - started, 3),
+            "source_bytes": source.size,
+            "output_bytes": output.size,
+            "files": sorted(context.files),
+            "steps": context.steps,
+        }
+        await site_documents.awrite(site_id, MANIFEST_FILE, json.dumps(manifest, indent=2), flush=True)
+        self.published += 1
+        report_progress(
+            "publish_site",
+            event="file_operation",
+            operation="publish",
+            file_path=OUTPUT_FILE,
+            bytes_written=output.size,
+        )
+        return manifest
+
+    async def manifest(self, site_id: str) -> Optional[Dict[str, Any]]:
+        """Return the site's parsed publish manifest, or None if it was never published"""
+        document = await site_documents.aget(site_id, MANIFEST_FILE)
+        if document is None:
+            self._manifests.pop(site_id, None)
+            return None
+        cached = self._manifests.get(site_id)
+        if cached is not None and cached[0] == document.content_hash:
+            return cached[1]
+        try:
+            manifest = json.loads(document.content)
+        except json.JSONDecodeError:
+            return None
+        self._manifests[site_id] = (document.content_hash, manifest)
+        return manifest
+
+    async def fresh_output(self, site_id: str, source: SiteDocument) -> Optional[SiteDocument]:
+        """
+        Return the published dist/index.html if it was built from exactly this source.
+
+        Args:
+            site_id: Site identifier
+            source: The site's current index.html document
+
+        Returns:
+            The build document, or None if unpublished or stale
+        """
+        manifest = await self.manifest(site_id)
+        if manifest is None or manifest.get("source_version") != source.content_hash:
+            return None
+        output = await site_documents.aget(site_id, OUTPUT_FILE)
+        if output is None or output.content_hash != manifest.get("output_version"):
+            return None
+        return output
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "transpiler": self.transpiler.name,
+            "steps": [name for name, _ in self._steps],
+            "stylesheets": self.stylesheets.stats(),
+            "published": self.published,
+            "failures": self.failures,
+        }
+
+
+# Process-wide publisher used by the generation graph, the publish_site tool and /sites
+site_publisher = SitePublisher.from_env()
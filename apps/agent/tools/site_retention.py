@@ -0,0 +1,501 @@
+"""
+Disk-quota-aware retention of generated sites.
+
+Every generation leaves a site directory behind, and nothing removed them, so
+generated_sites/ grew without bound. The retention manager keeps it within a
+quota: a background task periodically picks the least recently used sites
+from the site catalog and packs each cold site into a single compressed
+archive, generated_sites/_archive/<site_id>.tar.gz ("_" entries are never
+listed, served or cloned), then deletes the site from storage. With
+SITE_RETENTION_ACTION=evict sites are deleted instead, and
+SITE_ARCHIVE_MAX_BYTES caps the archives themselves the same way.
+
+A site is archived when the unarchived sites exceed SITE_RETENTION_MAX_BYTES
+(least recently used first) or when it has not been used for
+SITE_RETENTION_MAX_AGE_DAYS. Sites used in the last SITE_RETENTION_MIN_IDLE
+seconds, sites being generated and sites with a resumable checkpoint are
+never touched.
+
+Access tracking is cheap: the /sites route, the site:// resources and the
+site tools call touch(), which records the time in a dictionary and checks a
+set of archived site ids; no file is stat'ed. The times are written to the
+catalog in one batch per run. touch() on an archived site rehydrates it
+first (its files are written back to storage before the caller continues),
+so callers never see the difference apart from the latency of that one
+request.
+
+    python -m tools.site_retention report|run|restore <site_id>
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import logging
+import os
+import sqlite3
+import tarfile
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path, PurePosixPath
+from typing import Dict, Any, Iterator, List, Optional, Set, Tuple
+
+from .generation_checkpoints import CHECKPOINT_FILE, GenerationCheckpointStore, generation_checkpoints
+from .metrics import site_retention_operations
+from .site_catalog import SiteCatalog, site_catalog
+from .site_documents import SITES_DIR, SiteDocumentStore, site_documents
+
+ARCHIVE_DIR = "_archive"
+ARCHIVE_SUFFIX = ".tar.gz"
+
+ACTIONS = ("archive", "evict")
+
+
+def archive_path(sites_dir: Path, site_id: str) -> Path:
+    """Path of a site's archive"""
+    return sites_dir / ARCHIVE_DIR / f"{site_id}{ARCHIVE_SUFFIX}"
+
+
+def _archived_site_ids(sites_dir: Path) -> Set[str]:
+    archive_dir = sites_dir / ARCHIVE_DIR
+    if not archive_dir.is_dir():
+        return set()
+    return {
+        entry.name[: -len(ARCHIVE_SUFFIX)]
+        for entry in os.scandir(archive_dir)
+        if entry.name.endswith(ARCHIVE_SUFFIX) and not entry.name.startswith(".")
+    }
+
+
+def _safe_member_path(member: tarfile.TarInfo) -> Optional[PurePosixPath]:
+    """The relative path of a regular-file member, or None for anything that could escape the site"""
+    path = PurePosixPath(member.name)
+    if not member.isfile() or path.is_absolute() or any(part in ("", "..") for part in path.parts):
+        return None
+    return path
+
+
+def scan_archives(sites_dir: Path) -> Iterator[Tuple[str, Dict[str, Any], List[Tuple[str, int]], str]]:
+    """
+    Describe every archived site without extracting it (for rebuilding the catalog).
+
+    Yields:
+        (site_id, metadata, [(file_path, size)], ISO time of the last edit)
+    """
+    for site_id in sorted(_archived_site_ids(sites_dir)):
+        path = archive_path(sites_dir, site_id)
+        metadata: Dict[str, Any] = {}
+        files: List[Tuple[str, int]] = []
+        latest = 0
+        try:
+            with tarfile.open(path, "r:gz") as tar:
+                for member in tar:
+                    member_path = _safe_member_path(member)
+                    if member_path is None:
+                        continue
+                    files.append((member_path.as_posix(), member.size))
+                    latest = max(latest, member.mtime)
+                    if member_path.as_posix() == "metadata.json":
+                        data = json.loads(tar.extractfile(member).read().decode("utf-8"))
+                        metadata = data if isinstance(data, dict) else {}
+        except (OSError, tarfile.TarError, ValueError) as e:
+            logging.warning("Skipping unreadable site archive %s: %s", path, e)
+            continue
+        yield site_id, metadata, files, datetime.fromtimestamp(latest).isoformat() if latest else ""
+
+
+class SiteRetentionManager:
+    """Archives or evicts cold sites to keep generated_sites/ within its quota"""
+
+    def __init__(
+        self,
+        documents: SiteDocumentStore,
+        catalog: SiteCatalog,
+        checkpoints: GenerationCheckpointStore,
+        max_bytes: int = 0,
+        max_age_days: float = 0,
+        action: str = "archive",
+        archive_max_bytes: int = 0,
+        min_idle_seconds: float = 600.0,
+        interval: float = 300.0,
+    ):
+        """
+        Args:
+            documents: Document store of the sites
+            catalog: Site catalog (sizes, last use, archived flag)
+            checkpoints: Checkpoint store (running and resumable sites are kept)
+            max_bytes: Quota of the unarchived sites in bytes (0 = none)
+            max_age_days: Archive sites unused for this long (0 = never)
+            action: "archive" to pack cold sites, "evict" to delete them
+            archive_max_bytes: Quota of the archives; the least recently used are deleted (0 = none)
+            min_idle_seconds: Never archive a site used more recently than this
+            interval: Seconds between background runs
+        """
+        if action not in ACTIONS:
+            raise ValueError(f"action must be one of {', '.join(ACTIONS)}")
+        self.documents = documents
+        self.catalog = catalog
+        self.checkpoints = checkpoints
+        self.max_bytes = max_bytes
+        self.max_age_days = max_age_days
+        self.action = action
+        self.archive_max_bytes = archive_max_bytes
+        self.min_idle_seconds = min_idle_seconds
+        self.interval = interval
+        self._accessed: Dict[str, float] = {}  # Reads since the last flush to the catalog
+        self._archived: Optional[Set[str]] = None  # Loaded once from the archive directory
+        self._busy: Set[str] = set()  # Sites being archived or evicted right now
+        self._task: Optional[asyncio.Task] = None
+        self.archives = 0
+        self.rehydrations = 0
+        self.evictions = 0
+        self.last_run: Optional[Dict[str, Any]] = None
+
+    @classmethod
+    def from_env(
+        cls, documents: SiteDocumentStore, catalog: SiteCatalog, checkpoints: GenerationCheckpointStore
+    ) -> "SiteRetentionManager":
+        """Create a manager configured from the SITE_RETENTION_* / SITE_ARCHIVE_MAX_BYTES environment variables"""
+        return cls(
+            documents,
+            catalog,
+            checkpoints,
+            max_bytes=int(os.getenv("SITE_RETENTION_MAX_BYTES", "0")),
+            max_age_days=float(os.getenv("SITE_RETENTION_MAX_AGE_DAYS", "0")),
+            action=os.getenv("SITE_RETENTION_ACTION", "archive").strip().lower(),
+            archive_max_bytes=int(os.getenv("SITE_ARCHIVE_MAX_BYTES", "0")),
+            min_idle_seconds=float(os.getenv("SITE_RETENTION_MIN_IDLE", "600")),
+            interval=float(os.getenv("SITE_RETENTION_INTERVAL", "300")),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        """Whether any quota or age limit is configured"""
+        return bool(self.max_bytes or self.max_age_days or self.archive_max_bytes)
+
+    async def _archived_ids(self) -> Set[str]:
+        if self._archived is None:
+            archived = await self.documents.run_io(_archived_site_ids, self.documents.sites_dir)
+            if self._archived is None:
+                self._archived = archived
+        return self._archived
+
+    def is_archived(self, site_id: str) -> bool:
+        """Whether the site is packed in its archive (as far as this process has loaded)"""
+        return self._archived is not None and site_id in self._archived
+
+    # -- Access tracking --
+
+    async def touch(self, site_id: str) -> None:
+        """
+        Record that a site is being used, rehydrating it first if it is archived.
+
+        Costs a dictionary update and a set lookup unless the site is archived
+        or being archived right now.
+        """
+        if self.enabled and self.catalog.tracks(site_id):
+            self._accessed[site_id] = time.time()
+        if site_id in await self._archived_ids() or site_id in self._busy:
+            await self.rehydrate(site_id)
+
+    async def flush_access(self) -> int:
+        """Write the access times recorded since the last flush to the catalog"""
+        accessed, self._accessed = self._accessed, {}
+        if not accessed:
+            return 0
+        batch = {site_id: datetime.fromtimestamp(at).isoformat() for site_id, at in accessed.items()}
+        try:
+            await self.documents.run_io(self.catalog.record_access, batch)
+        except sqlite3.Error:
+            logging.exception("Could not record site access times")
+        return len(batch)
+
+    # -- Archiving and rehydrating one site --
+
+    def _pack(self, site_id: str) -> int:
+        """Write the site's files into its archive (atomically) and return the archive size"""
+        storage = self.documents.storage
+        target = archive_path(self.documents.sites_dir, site_id)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=target.parent, prefix=f".{site_id}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as raw:
+                with tarfile.open(fileobj=raw, mode="w:gz") as tar:
+                    for file_path in storage.list_files(site_id):
+                        found = storage.read(site_id, file_path)
+                        if found is None:
+                            continue
+                        data, modified_at = found
+                        member = tarfile.TarInfo(file_path)
+                        member.size = len(data)
+                        member.mtime = int(modified_at)
+                        member.mode = 0o644
+                        tar.addfile(member, io.BytesIO(data))
+                raw.flush()
+                os.fsync(raw.fileno())
+            os.replace(tmp_name, target)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+        return target.stat().st_size
+
+    def _unpack(self, site_id: str) -> int:
+        """Write the site's archived files back to storage, delete the archive and return the file count"""
+        storage = self.documents.storage
+        source = archive_path(self.documents.sites_dir, site_id)
+        # Files written while the site was archived win over the archived ones
+        existing = set(storage.list_files(site_id, hidden=True))
+        restored = 0
+        with tarfile.open(source, "r:gz") as tar:
+            for member in tar:
+                member_path = _safe_member_path(member)
+                if member_path is None:
+                    logging.warning("Skipping archive member %s of %s", member.name, site_id)
+                    continue
+                if member_path.as_posix() in existing:
+                    continue
+                with tar.extractfile(member) as src:
+                    storage.write(site_id, member_path.as_posix(), src.read(), float(member.mtime))
+                restored += 1
+        storage.create_site(site_id)
+        source.unlink()
+        return restored
+
+    def _site_size(self, site_id: str) -> int:
+        return sum(stored.size for stored in self.documents.storage.scan(site_id, hidden=True).values())
+
+    async def _protected(self, site_id: str) -> bool:
+        """Whether the site is being generated or has a resumable checkpoint"""
+        return self.checkpoints.running(site_id) or await self.documents.run_io(
+            self.documents.storage.exists, site_id, CHECKPOINT_FILE
+        )
+
+    def _recently_used(self, site_id: str) -> bool:
+        return time.time() - self._accessed.get(site_id, 0.0) < self.min_idle_seconds
+
+    async def archive(self, site_id: str) -> Optional[int]:
+        """
+        Pack a site into its archive and delete it from storage.
+
+        Returns:
+            Bytes freed (site size minus archive size), or None if the site was
+            skipped (in use, being generated, or already archived)
+        """
+        archived = await self._archived_ids()
+        async with self.documents.site_lock(site_id):
+            if site_id in archived or self._recently_used(site_id) or await self._protected(site_id):
+                return None
+            if not await self.documents.run_io(self.documents.storage.site_exists, site_id):
+                return None
+            self._busy.add(site_id)
+            try:
+                await self.documents.aflush(site_id)
+                size = await self.documents.run_io(self._site_size, site_id)
+                archive_size = await self.documents.run_io(self._pack, site_id)
+                archived.add(site_id)
+                await self.documents.adelete_site(site_id)
+            finally:
+                self._busy.discard(site_id)
+        try:
+            await self.documents.run_io(self.catalog.set_archived, site_id, True)
+        except sqlite3.Error:
+            logging.exception("Could not mark %s as archived in the site catalog", site_id)
+        self.archives += 1
+        site_retention_operations.inc(operation="archive")
+        return size - archive_size
+
+    async def rehydrate(self, site_id: str) -> bool:
+        """
+        Restore an archived site's files from its archive.
+
+        Returns:
+            True if the site was restored, False if it was not archived
+        """
+        archived = await self._archived_ids()
+        async with self.documents.site_lock(site_id):
+            if site_id not in archived:
+                return False
+            files = await self.documents.run_io(self._unpack, site_id)
+            archived.discard(site_id)
+        try:
+            await self.documents.run_io(self.catalog.set_archived, site_id, False)
+        except sqlite3.Error:
+            logging.exception("Could not mark %s as restored in the site catalog", site_id)
+        self.rehydrations += 1
+        site_retention_operations.inc(operation="rehydrate")
+        logging.info("Rehydrated archived site %s (%d files)", site_id, files)
+        return True
+
+    async def evict(self, site_id: str) -> Optional[int]:
+        """
+        Delete a site for good: from storage or its archive.
+
+        Returns:
+            Bytes freed, or None if the site was skipped (in use or being generated)
+        """
+        archived = await self._archived_ids()
+        async with self.documents.site_lock(site_id):
+            if self._recently_used(site_id) or await self._protected(site_id):
+                return None
+            self._busy.add(site_id)
+            try:
+                if site_id in archived:
+                    path = archive_path(self.documents.sites_dir, site_id)
+                    freed = await self.documents.run_io(lambda: path.stat().st_size if path.is_file() else 0)
+                    await self.documents.run_io(path.unlink, True)
+                    archived.discard(site_id)
+                else:
+                    freed = await self.documents.run_io(self._site_size, site_id)
+                    await self.documents.aflush(site_id)
+                    await self.documents.adelete_site(site_id)
+            finally:
+                self._busy.discard(site_id)
+        await self.catalog.aremove(site_id)
+        self.evictions += 1
+        site_retention_operations.inc(operation="evict")
+        return freed
+
+    # -- Quota enforcement --
+
+    def _archive_sizes(self, site_ids: List[str]) -> Dict[str, int]:
+        sizes = {}
+        for site_id in site_ids:
+            try:
+                sizes[site_id] = archive_path(self.documents.sites_dir, site_id).stat().st_size
+            except OSError:
+                continue
+        return sizes
+
+    async def run_once(self) -> Dict[str, Any]:
+        """
+        Enforce the quotas once: flush access times, archive (or evict) the
+        least recently used sites over the limits, then trim the archives.
+
+        Returns:
+            Report with the sites archived and evicted, the sites skipped and the bytes freed
+        """
+        started = time.perf_counter()
+        report: Dict[str, Any] = {"archived": [], "evicted": [], "skipped": [], "bytes_freed": 0}
+        await self.flush_access()
+
+        sites = await self.documents.run_io(self.catalog.least_recently_used, False)
+        total = sum(site["size"] for site in sites)
+        expired_before = (datetime.now() - timedelta(days=self.max_age_days)).isoformat() if self.max_age_days else ""
+        idle_before = datetime.fromtimestamp(time.time() - self.min_idle_seconds).isoformat()
+        for site in sites:
+            over_quota = bool(self.max_bytes) and total > self.max_bytes
+            expired = bool(expired_before) and site["last_used"] < expired_before
+            # Oldest first: once a site is neither over the limits nor idle, none after it is
+            if not (over_quota or expired) or site["last_used"] >= idle_before:
+                break
+            site_id = site["site_id"]
+            if self.action == "archive":
+                freed = await self.archive(site_id)
+            else:
+                freed = await self.evict(site_id)
+            if freed is None:
+                report["skipped"].append(site_id)
+                continue
+            total -= site["size"]
+            report["archived" if self.action == "archive" else "evicted"].append(site_id)
+            report["bytes_freed"] += freed
+
+        if self.archive_max_bytes:
+            archived = await self.documents.run_io(self.catalog.least_recently_used, True)
+            sizes = await self.documents.run_io(self._archive_sizes, [site["site_id"] for site in archived])
+            archive_total = sum(sizes.values())
+            for site in archived:
+                if archive_total <= self.archive_max_bytes:
+                    break
+                if site["site_id"] not in sizes:
+                    continue
+                freed = await self.evict(site["site_id"])
+                if freed is None:
+                    report["skipped"].append(site["site_id"])
+                    continue
+                archive_total -= sizes[site["site_id"]]
+                report["evicted"].append(site["site_id"])
+                report["bytes_freed"] += freed
+
+        report["duration_seconds"] = round(time.perf_counter() - started, 3)
+        self.last_run = {**report, "finished_at": datetime.now().isoformat()}
+        if report["archived"] or report["evicted"]:
+            logging.info(
+                "Site retention archived %d and evicted %d sites, freeing %d bytes",
+                len(report["archived"]),
+                len(report["evicted"]),
+                report["bytes_freed"],
+            )
+        return report
+
+    # -- Background task --
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.run_once()
+            except Exception:
+                logging.exception("Site retention run failed")
+
+    def start(self) -> None:
+        """Enforce the quotas every interval on the running loop (no-op when no limit is configured)"""
+        if self.enabled and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._run(), name="site-retention")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush_access()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "action": self.action,
+            "max_bytes": self.max_bytes,
+            "max_age_days": self.max_age_days,
+            "archive_max_bytes": self.archive_max_bytes,
+            "archived_sites": len(self._archived) if self._archived is not None else None,
+            "archives": self.archives,
+            "rehydrations": self.rehydrations,
+            "evictions": self.evictions,
+            "last_run": self.last_run,
+        }
+
+
+# Process-wide retention manager of the generated sites (started by main.py's lifespan)
+site_retention = SiteRetentionManager.from_env(site_documents, site_catalog, generation_checkpoints)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Archive or evict cold generated sites")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("report", help="Configured limits and the catalog's least recently used sites")
+    commands.add_parser("run", help="Enforce the configured limits once")
+    restore = commands.add_parser("restore", help="Rehydrate an archived site")
+    restore.add_argument("site_id")
+    args = parser.parse_args()
+
+    if args.command == "report":
+        sites = site_catalog.least_recently_used(False)
+        print(json.dumps({
+            **site_retention.stats(),
+            "archived_sites": len(_archived_site_ids(SITES_DIR)),
+            "site_bytes": sum(site["size"] for site in sites),
+            "least_recently_used": sites[:20],
+        }, indent=2))
+    elif args.command == "run":
+        print(json.dumps(asyncio.run(site_retention.run_once()), indent=2))
+    else:
+        restored = asyncio.run(site_retention.rehydrate(args.site_id))
+        print(f"Restored {args.site_id}" if restored else f"Site '{args.site_id}' is not archived")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+Section plans and fragment assembly for parallel site generation.
+
+The planning node asks the model to split a page into independent sections,
+each rendered by one top-level React component. Every section is generated
+concurrently by its own agent into an isolated fragment file
+(sections/<Component>.jsx); the assembly node then splices the fragments into
+index.html in plan order, adds an App component rendering them and mounts it
+in place of the template's SampleApp.
+"""
+
+import json
+import re
+from dataclasses import asdict, dataclass, field
+from typing import Dict, Any, List, Optional
+
+from .jsx_transform import JsxSyntaxError, transform_jsx
+from .site_verifier import PLACEHOLDER, SAMPLE_APP_NAME
+
+FRAGMENT_DIR = "sections"
+INDENT = "      "  # Indentation of the app script in template.html
+
+_COMPONENT_NAME = re.compile(r"^[A-Z][A-Za-z0-9]*$")
+_RESERVED_COMPONENTS = {"App", SAMPLE_APP_NAME, "React", "Fragment"}
+_SAMPLE_APP_DEFINITION = re.compile(
+    rf"^[ \t]*const {SAMPLE_APP_NAME} = \(\) => \{{\n.*?^[ \t]*\}};[ \t]*\n", re.M | re.S
+)
+_REACT_IMPORT_LINE = re.compile(r'^[ \t]*import\s+React\s*,\s*\{([^}]*)\}\s*from\s*"react";[ \t]*$', re.M)
+_FRAGMENT_REACT_IMPORT = re.compile(r"""^[ \t]*import\s[^;\n]*from\s*["']react["'];?[ \t]*\n?""", re.M)
+_MODULE_STATEMENT = re.compile(r"^[ \t]*(?:import|export)\b", re.M)
+_REACT_HOOKS = (
+    "useState", "useEffect", "useRef", "useMemo", "useCallback", "useReducer", "useContext",
+    "useLayoutEffect", "useId", "useTransition", "useDeferredValue",
+)
+_HOOK_USE = re.compile(r"(?<![\w$.])(" + "|".join(_REACT_HOOKS) + r")\s*\(")
+
+
+@dataclass
+class SectionSpec:
+    """One independently generated part of the page"""
+
+    component: str  # Top-level React component the fragment defines
+    name: str = ""
+    description: str = ""
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SectionSpec":
+        return cls(
+            component=str(data["component"]),
+            name=str(data.get("name") or data["component"]),
+            description=str(data.get("description") or ""),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass
+class Assembly:
+    """Result of splicing section fragments into index.html"""
+
+    html: Optional[str]  # None when index.html no longer has the template's placeholder
+    included: List[str] = field(default_factory=list)
+    problems: List[str] = field(default_factory=list)
+
+
+def fragment_path(component: str) -> str:
+    """Site-relative path of a section's fragment file"""
+    return f"{FRAGMENT_DIR}/{component}.jsx"
+
+
+def parse_section_plan(reply: str, max_sections: int) -> List[SectionSpec]:
+    """
+    Parse the planner's reply into section specs.
+
+    Args:
+        reply: Model output expected to contain a JSON array of
+            {"component", "name", "description"} objects (code fences are fine)
+        max_sections: Maximum number of sections to keep
+
+    Returns:
+        The valid, uniquely named sections in page order; empty if the reply
+        is not a usable plan (the caller then generates the page in one pass)
+    """
+    start, end = reply.find("["), reply.rfind("]")
+    if start < 0 or end <= start:
+        return []
+    try:
+        items = json.loads(reply[start:end + 1])
+    except ValueError:
+        return []
+    if not isinstance(items, list):
+        return []
+
+    sections: List[SectionSpec] = []
+    seen = set()
+    for item in items:
+        if not isinstance(item, dict) or not isinstance(item.get("component"), str):
+            continue
+        component = item["component"].strip()
+        if not _COMPONENT_NAME.match(component) or component in _RESERVED_COMPONENTS or component in seen:
+            continue
+        seen.add(component)
+        sections.append(SectionSpec.from_dict({**item, "component": component}))
+        if len(sections) >= max_sections:
+            break
+    return sections
+
+
+def _check_fragment(component: str, source: str) -> Optional[str]:
+    """Return why a fragment cannot be spliced into the page, or None if it can"""
+    if _MODULE_STATEMENT.search(source):
+        return "must not contain import/export statements"
+    if not re.search(rf"\b(?:const|let|var|function)\s+{component}\b", source):
+        return f"does not define {component}"
+    try:
+        transform_jsx(source)
+    except JsxSyntaxError as e:
+        return f"syntax error at line {e.line}: {e.message}"
+    return None
+
+
+def _indent(source: str) -> str:
+    return "\n".join(INDENT + line if line.strip() else "" for line in source.splitlines())
+
+
+def _import_hooks(html: str, code: str) -> str:
+    """Add React hooks used by the fragments to the page's react import"""
+    match = _REACT_IMPORT_LINE.search(html)
+    if match is None:
+        return html
+    imported = [name.strip() for name in match.group(1).split(",") if name.strip()]
+    missing = sorted({hook for hook in _HOOK_USE.findall(code)} - set(imported))
+    if not missing:
+        return html
+    line = match.group(0)
+    updated = line.replace(match.group(1), " " + ", ".join(imported + missing) + " ")
+    return html[:match.start()] + updated + html[match.end():]
+
+
+def assemble_page(html: str, sections: List[SectionSpec], fragments: Dict[str, str]) -> Assembly:
+    """
+    Splice section fragments into the template page (CPU-bound).
+
+    Args:
+        html: Current index.html, still holding the template placeholder and SampleApp
+        sections: The section plan, in page order
+        fragments: Fragment source by component name (missing sections are skipped)
+
+    Returns:
+        An Assembly with the new page, the components included and any problems
+    """
+    assembly = Assembly(html=None)
+    blocks = []
+    for section in sections:
+        source = fragments.get(section.component)
+        if source is None:
+            assembly.problems.append(f"section {section.component} was not generated")
+            continue
+        source = _FRAGMENT_REACT_IMPORT.sub("", source).strip()
+        problem = _check_fragment(section.component, source)
+        if problem:
+            assembly.problems.append(f"section {section.component} {problem}")
+            continue
+        blocks.append(f"// ---- {section.name} ----\n{source}")
+        assembly.included.append(section.component)
+
+    if PLACEHOLDER not in html:
+        assembly.problems.append(f"index.html no longer contains the {PLACEHOLDER} placeholder")
+        return assembly
+    if not assembly.included:
+        return assembly
+
+    rendered = "\n".join(f"    <{component} />" for component in assembly.included)
+    app = f"const App = () => (\n  <>\n{rendered}\n  </>\n);"
+    code = "\n\n".join(_indent(block) for block in blocks + [app])
+
+    page = html.replace(PLACEHOLDER, code.lstrip(), 1)
+    page = _SAMPLE_APP_DEFINITION.sub("", page, count=1)
+    page = page.replace(f"<{SAMPLE_APP_NAME} />", "<App />")
+    assembly.html = _import_hooks(page, code)
+    return assembly
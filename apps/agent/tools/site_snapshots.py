@@ -0,0 +1,487 @@
+"""
+Content-addressed, deduplicated version history of site files.
+
+Every change to a site file records a snapshot (record_site_write(), called
+by manage_site_files, section assembly, speculative promotion and cache
+clones): the written content is stored once as a blob named by its SHA-256
+hash (the document store's content_hash), and a one-line entry is appended to
+the site's version log. Blobs are shared across versions and sites. Every site starts from the
+same template.html, so all of them share its blob. An edit that restores
+earlier content adds a log line and no new blob.
+
+Layout under generated_sites/_objects/ ("_" entries are never listed, served
+or cloned):
+
+    blobs/ab/cdef...     zlib-compressed file content, named by SHA-256
+    logs/<site_id>.jsonl one snapshot per line: version, file_path, operation, blob, size
+
+A site's state at version N is, per file, its latest entry at or before N, so
+reading a file as of any version is a dictionary lookup plus one blob read.
+Rolling back a file writes that blob back, and diffs compare blob hashes
+before reading anything. gc() drops the logs of deleted sites, trims logs to
+max_versions and deletes blobs that no log references. usage_report() shows
+how much the deduplication saves.
+
+    python -m tools.site_snapshots report|gc
+"""
+
+import argparse
+import difflib
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Set
+
+from .site_documents import SiteDocumentStore, document_key, site_documents
+from .site_catalog import site_catalog
+from .site_retention import archive_path
+
+OBJECTS_DIR = "_objects"
+
+# Logs of recently used sites kept in memory
+_CACHED_LOGS = 256
+
+
+@dataclass
+class Snapshot:
+    """One recorded change of one site file"""
+
+    version: int  # Per site, increasing from 1
+    file_path: str
+    operation: str  # create_file, edit_file, apply_edits, delete_file or rollback
+    blob: Optional[str]  # Content hash; None when the file was deleted
+    size: int = 0
+    created_at: float = field(default_factory=time.time)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Snapshot":
+        return cls(**data)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def _state_at(log: List[Snapshot], version: int) -> Dict[str, Snapshot]:
+    """Latest snapshot of every file at or before version (deleted files excluded)"""
+    state: Dict[str, Snapshot] = {}
+    for snapshot in log:
+        if snapshot.version > version:
+            break
+        state[snapshot.file_path] = snapshot
+    return {path: snapshot for path, snapshot in state.items() if snapshot.blob is not None}
+
+
+class SiteSnapshotStore:
+    """Blob store and per-site version logs under generated_sites/_objects"""
+
+    def __init__(self, documents: SiteDocumentStore, enabled: bool = True, max_versions: int = 500):
+        """
+        Args:
+            documents: Document store of the sites (rollbacks write through it)
+            enabled: Record snapshots at all
+            max_versions: Versions per site kept by gc() (0 = unlimited)
+        """
+        self.documents = documents
+        self.enabled = enabled
+        self.max_versions = max(0, max_versions)
+        self._logs: "OrderedDict[Path, List[Snapshot]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.recorded = 0
+        self.blobs_written = 0
+        self.blobs_deduplicated = 0
+
+    @classmethod
+    def from_env(cls, documents: SiteDocumentStore) -> "SiteSnapshotStore":
+        """Create a store configured from SITE_SNAPSHOTS and SITE_SNAPSHOT_MAX_VERSIONS"""
+        return cls(
+            documents,
+            enabled=os.getenv("SITE_SNAPSHOTS", "1").strip().lower() not in ("0", "false", "no", "off"),
+            max_versions=int(os.getenv("SITE_SNAPSHOT_MAX_VERSIONS", "500")),
+        )
+
+    @property
+    def root(self) -> Path:
+        return self.documents.sites_dir / OBJECTS_DIR
+
+    def tracks(self, site_id: str) -> bool:
+        """Whether writes to this site are snapshotted (not scratch or internal sites)"""
+        return self.enabled and not site_id.startswith(("_", "."))
+
+    # -- Blobs and logs (blocking; run on the site I/O pool) --
+
+    def _blob_path(self, blob: str) -> Path:
+        return self.root / "blobs" / blob[:2] / blob[2:]
+
+    def _log_path(self, site_id: str) -> Path:
+        return self.root / "logs" / f"{site_id}.jsonl"
+
+    @staticmethod
+    def _replace_bytes(path: Path, data: bytes) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                handle.write(data)
+            os.replace(temp_path, path)
+        except BaseException:
+            Path(temp_path).unlink(missing_ok=True)
+            raise
+
+    def _put_blob(self, blob: str, content: str) -> None:
+        path = self._blob_path(blob)
+        if path.exists():
+            self.blobs_deduplicated += 1
+            return
+        self._replace_bytes(path, zlib.compress(content.encode("utf-8")))
+        self.blobs_written += 1
+
+    def read_blob(self, blob: str) -> str:
+        return zlib.decompress(self._blob_path(blob).read_bytes()).decode("utf-8")
+
+    def _load_log(self, site_id: str) -> List[Snapshot]:
+        path = self._log_path(site_id)
+        log = self._logs.get(path)
+        if log is not None:
+            self._logs.move_to_end(path)
+            return log
+        log = []
+        try:
+            with open(path, "r", encoding="utf-8") as handle:
+                for line in handle:
+                    try:
+                        log.append(Snapshot.from_dict(json.loads(line)))
+                    except (ValueError, TypeError):
+                        # A torn last line from a crash mid-append; the write it describes was not acknowledged
+                        logging.warning("Skipping unreadable snapshot line in %s", path)
+        except FileNotFoundError:
+            pass
+        self._logs[path] = log
+        while len(self._logs) > _CACHED_LOGS:
+            self._logs.popitem(last=False)
+        return log
+
+    def record(
+        self, site_id: str, file_path: str, operation: str, content: Optional[str], content_hash: str = ""
+    ) -> Optional[Snapshot]:
+        """
+        Record a write (content) or deletion (content None) of a site file.
+
+        Args:
+            content_hash: SHA-256 of content, when the caller already has it
+
+        Returns:
+            The new snapshot, the file's current one if the content did not
+            change, or None if the site is not tracked
+        """
+        if not self.tracks(site_id):
+            return None
+        blob = None
+        size = 0
+        if content is not None:
+            data = content.encode("utf-8")
+            blob = content_hash or hashlib.sha256(data).hexdigest()
+            size = len(data)
+
+        with self._lock:
+            log = self._load_log(site_id)
+            current = next((s for s in reversed(log) if s.file_path == file_path), None)
+            if current is not None and current.blob == blob:
+                return current
+            if current is None and blob is None:
+                return None
+            if blob is not None:
+                self._put_blob(blob, content)
+            snapshot = Snapshot(
+                version=log[-1].version + 1 if log else 1,
+                file_path=file_path,
+                operation=operation,
+                blob=blob,
+                size=size,
+            )
+            path = self._log_path(site_id)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path, "a", encoding="utf-8") as handle:
+                handle.write(json.dumps(snapshot.to_dict()) + "\n")
+            log.append(snapshot)
+            self.recorded += 1
+            return snapshot
+
+    def versions(self, site_id: str, file_path: Optional[str] = None, limit: int = 50) -> List[Snapshot]:
+        """A site's snapshots (of one file, if given), newest first"""
+        with self._lock:
+            log = list(self._load_log(site_id))
+        matching = [s for s in reversed(log) if file_path is None or s.file_path == file_path]
+        return matching[:limit] if limit > 0 else matching
+
+    def latest_version(self, site_id: str) -> int:
+        with self._lock:
+            log = self._load_log(site_id)
+            return log[-1].version if log else 0
+
+    def state_at(self, site_id: str, version: int) -> Dict[str, Snapshot]:
+        """Every file of the site as of version"""
+        with self._lock:
+            return _state_at(self._load_log(site_id), version)
+
+    def read(self, site_id: str, file_path: str, version: int) -> Optional[str]:
+        """A file's content as of version, or None if it did not exist then"""
+        snapshot = self.state_at(site_id, version).get(file_path)
+        return self.read_blob(snapshot.blob) if snapshot is not None else None
+
+    def diff(
+        self,
+        site_id: str,
+        from_version: int,
+        to_version: int,
+        file_path: Optional[str] = None,
+        context_lines: int = 3,
+    ) -> List[Dict[str, Any]]:
+        """
+        Unified diffs of the files that differ between two versions of a site.
+
+        Files whose blob did not change are skipped without being read.
+
+        Args:
+            file_path: Only diff this file
+        """
+        before = self.state_at(site_id, from_version)
+        after = self.state_at(site_id, to_version)
+        paths = [file_path] if file_path else sorted(set(before) | set(after))
+        changes = []
+        for path in paths:
+            old, new = before.get(path), after.get(path)
+            old_blob, new_blob = (old.blob if old else None), (new.blob if new else None)
+            if old_blob == new_blob:
+                continue
+            old_lines = self.read_blob(old_blob).splitlines(keepends=True) if old_blob else []
+            new_lines = self.read_blob(new_blob).splitlines(keepends=True) if new_blob else []
+            changes.append({
+                "file_path": path,
+                "status": "added" if old is None else "deleted" if new is None else "modified",
+                "from_blob": old_blob,
+                "to_blob": new_blob,
+                "diff": "".join(difflib.unified_diff(
+                    old_lines, new_lines,
+                    fromfile=f"a/{path}@{from_version}", tofile=f"b/{path}@{to_version}", n=context_lines,
+                )),
+            })
+        return changes
+
+    def rollback_plan(self, site_id: str, version: int, file_path: Optional[str] = None) -> Dict[str, Optional[str]]:
+        """
+        Content each file needs to return to its state at version.
+
+        Returns:
+            file_path -> content to write, or None to delete the file; files
+            that already match are left out
+        """
+        with self._lock:
+            log = self._load_log(site_id)
+            target = _state_at(log, version)
+            current = _state_at(log, log[-1].version if log else 0)
+        paths = [file_path] if file_path else sorted(set(target) | set(current))
+        plan: Dict[str, Optional[str]] = {}
+        for path in paths:
+            wanted, now = target.get(path), current.get(path)
+            if (wanted.blob if wanted else None) == (now.blob if now else None):
+                continue
+            plan[path] = self.read_blob(wanted.blob) if wanted is not None else None
+        return plan
+
+    # -- Maintenance --
+
+    def _trim(self, log: List[Snapshot]) -> List[Snapshot]:
+        """Keep the last max_versions snapshots, plus what the oldest kept state still needs"""
+        if not self.max_versions or len(log) <= self.max_versions:
+            return log
+        cutoff = log[-self.max_versions].version
+        base = _state_at(log, cutoff - 1)
+        kept = [s for s in log if s.version >= cutoff]
+        return sorted(list(base.values()) + kept, key=lambda s: s.version)
+
+    def gc(self) -> Dict[str, Any]:
+        """
+        Drop the logs of deleted (not archived) sites, trim logs to max_versions and delete
+        every blob no remaining log references.
+        """
+        report = {"logs_removed": 0, "versions_trimmed": 0, "blobs_removed": 0, "bytes_freed": 0}
+        logs_dir, blobs_dir = self.root / "logs", self.root / "blobs"
+        sites_dir = self.documents.sites_dir
+        with self._lock:
+            referenced: Set[str] = set()
+            for path in sorted(logs_dir.glob("*.jsonl")) if logs_dir.is_dir() else []:
+                site_id = path.stem
+                # Archived sites keep their history; it is needed again once they are restored
+                if not self.documents.storage.site_exists(site_id) and not archive_path(sites_dir, site_id).is_file():
+                    path.unlink(missing_ok=True)
+                    self._logs.pop(path, None)
+                    report["logs_removed"] += 1
+                    continue
+                log = self._load_log(site_id)
+                trimmed = self._trim(log)
+                if len(trimmed) < len(log):
+                    content = "".join(json.dumps(s.to_dict()) + "\n" for s in trimmed)
+                    self._replace_bytes(path, content.encode("utf-8"))
+                    self._logs[path] = trimmed
+                    report["versions_trimmed"] += len(log) - len(trimmed)
+                referenced.update(s.blob for s in trimmed if s.blob)
+
+            for path in blobs_dir.glob("*/*") if blobs_dir.is_dir() else []:
+                if path.name.startswith("."):
+                    continue
+                if path.parent.name + path.name not in referenced:
+                    report["bytes_freed"] += path.stat().st_size
+                    path.unlink(missing_ok=True)
+                    report["blobs_removed"] += 1
+        return report
+
+    def usage_report(self) -> Dict[str, Any]:
+        """
+        Disk usage of the version history and what deduplication saves.
+
+        logical_bytes is what storing every version of every file separately
+        would take; stored_bytes is what the blobs take on disk (compressed).
+        """
+        logs_dir = self.root / "logs"
+        sites: Dict[str, Dict[str, Any]] = {}
+        blob_sites: Dict[str, Set[str]] = {}
+        blob_sizes: Dict[str, int] = {}
+        with self._lock:
+            for path in sorted(logs_dir.glob("*.jsonl")) if logs_dir.is_dir() else []:
+                log = self._load_log(path.stem)
+                sites[path.stem] = {"versions": len(log), "logical_bytes": sum(s.size for s in log if s.blob)}
+                for snapshot in log:
+                    if snapshot.blob:
+                        blob_sites.setdefault(snapshot.blob, set()).add(path.stem)
+                        blob_sizes[snapshot.blob] = snapshot.size
+
+        stored_bytes = 0
+        for blob in blob_sites:
+            try:
+                stored_bytes += self._blob_path(blob).stat().st_size
+            except OSError:
+                continue
+        logical_bytes = sum(site["logical_bytes"] for site in sites.values())
+        unique_bytes = sum(blob_sizes.values())
+
+        return {
+            "sites": len(sites),
+            "versions": sum(site["versions"] for site in sites.values()),
+            "blobs": len(blob_sites),
+            "shared_blobs": sum(1 for owners in blob_sites.values() if len(owners) > 1),
+            "logical_bytes": logical_bytes,
+            "unique_bytes": unique_bytes,
+            "stored_bytes": stored_bytes,
+            "saved_bytes": logical_bytes - stored_bytes,
+            # Versions stored per distinct content (before compression)
+            "dedup_ratio": round(logical_bytes / unique_bytes, 2) if unique_bytes else None,
+            "per_site": sites,
+        }
+
+    # -- Async API (disk work on the site I/O pool) --
+
+    async def arecord(
+        self, site_id: str, file_path: str, operation: str, content: Optional[str], content_hash: str = ""
+    ) -> Optional[Snapshot]:
+        if not self.tracks(site_id):
+            return None
+        return await self.documents.run_io(self.record, site_id, file_path, operation, content, content_hash)
+
+    async def arollback(self, site_id: str, version: int, file_path: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Restore a site (or one file) to its state at version.
+
+        The restored content is written through the document store, like any
+        edit, and recorded as new "rollback" snapshots, so a rollback can
+        itself be rolled back.
+
+        Returns:
+            The files written and deleted and the site's version afterwards
+        """
+        written: List[str] = []
+        deleted: List[str] = []
+        async with self.documents.site_lock(site_id):
+            plan = await self.documents.run_io(self.rollback_plan, site_id, version, file_path)
+            for path, content in plan.items():
+                if content is None:
+                    await self.documents.adelete(site_id, path)
+                    await self.arecord(site_id, path, "rollback", None)
+                    deleted.append(path)
+                else:
+                    document = await self.documents.awrite(site_id, path, content)
+                    await self.arecord(site_id, path, "rollback", content, document.content_hash)
+                    written.append(path)
+        return {
+            "restored_version": version,
+            "written": written,
+            "deleted": deleted,
+            "version": await self.documents.run_io(self.latest_version, site_id),
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "recorded": self.recorded,
+            "blobs_written": self.blobs_written,
+            "blobs_deduplicated": self.blobs_deduplicated,
+            "max_versions": self.max_versions,
+        }
+
+
+# Process-wide history, stored next to the sites it describes
+site_snapshots = SiteSnapshotStore.from_env(site_documents)
+
+
+async def record_site_write(site_id: str, file_path: str, operation: str) -> Optional[Snapshot]:
+    """
+    Index a change to a site file made through the document store.
+
+    Every writer of site files calls this after its write or delete (with the
+    site lock held): manage_site_files, section assembly, speculative promotion
+    and generation cache clones. The catalog gets the file's size, and the
+    version history gets its current content, so the log always matches the
+    files and rollback_plan can trust it.
+
+    Args:
+        site_id: Site of the file
+        file_path: File written or deleted
+        operation: Operation recorded in the version log
+
+    Returns:
+        The file's snapshot, or None if the site is not tracked
+    """
+    site_id, file_path = document_key(site_id, file_path)
+    document = await site_documents.aget(site_id, file_path)
+    await site_catalog.arecord_write(site_id, file_path, document.size if document is not None else None)
+    return await site_snapshots.arecord(
+        site_id,
+        file_path,
+        operation,
+        document.content if document is not None else None,
+        document.content_hash if document is not None else "",
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Inspect and collect the site version history")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("report", help="Disk usage and deduplication savings")
+    commands.add_parser("gc", help="Drop deleted sites' history, trim old versions, delete unreferenced blobs")
+    args = parser.parse_args()
+
+    if args.command == "gc":
+        print(json.dumps(site_snapshots.gc(), indent=2))
+    else:
+        print(json.dumps(site_snapshots.usage_report(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
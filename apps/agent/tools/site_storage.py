@@ -0,0 +1,545 @@
+"""
+Storage backends for generated site files.
+
+SiteDocumentStore, the generation cache, checkpoints, the site catalog,
+retention and the /sites route reach site files only through a SiteStorage,
+so where the files live is a deployment choice (SITE_STORAGE):
+
+    filesystem  generated_sites/<site_id>/<file_path> (default); binary assets
+                are served with sendfile straight from disk
+    sqlite      every site in one SQLite file (generated_sites/_sites.sqlite3
+                by default), read through a memory map; many small sites cost
+                no inodes and no directory scans
+    memory      a dictionary, for tests and benchmarks (gone on restart)
+
+Every backend writes a file atomically: readers see the old or the new
+content, never a mix. Paths and dotfiles behave the same everywhere:
+list_files() skips files under a "." component (checkpoints, temp files)
+unless hidden=True, and list_sites() skips "_" and "." sites (scratch
+candidates and internal directories such as _objects/).
+
+Calls block; async callers run them on the site I/O pool. Sites move between
+backends with:
+
+    python -m tools.site_storage migrate --to sqlite [--delete-source]
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import shutil
+import sqlite3
+import stat
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+STORAGE_BACKENDS = ("filesystem", "sqlite", "memory")
+
+SQLITE_FILE = "_sites.sqlite3"
+
+
+@dataclass
+class StoredFile:
+    """Size and modification time of a stored site file"""
+
+    size: int
+    modified_at: float
+
+
+def atomic_write_bytes(path: Path, data: bytes, modified_at: Optional[float] = None) -> None:
+    """
+    Write a file atomically: a temporary file in the same directory replaces path with one rename.
+
+    Args:
+        path: Destination file (parent directories are created)
+        data: Content
+        modified_at: Modification time to set (default: now)
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        os.fchmod(fd, 0o644)
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(data)
+        if modified_at is not None:
+            os.utime(tmp_name, (modified_at, modified_at))
+        os.replace(tmp_name, path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(tmp_name)
+        raise
+
+
+def _hidden(file_path: str) -> bool:
+    return any(part.startswith(".") for part in file_path.split("/"))
+
+
+def _listed_site(site_id: str) -> bool:
+    return not site_id.startswith(("_", "."))
+
+
+class SiteStorage:
+    """Where site files live; subclasses implement the blocking primitives"""
+
+    name = ""
+
+    def read(self, site_id: str, file_path: str) -> Optional[Tuple[bytes, float]]:
+        """A file's content and modification time, or None if it does not exist"""
+        raise NotImplementedError
+
+    def write(self, site_id: str, file_path: str, data: bytes, modified_at: Optional[float] = None) -> None:
+        """Atomically create or replace a file (creating its site)"""
+        raise NotImplementedError
+
+    def delete(self, site_id: str, file_path: str) -> bool:
+        """Delete a file. Returns False if it did not exist"""
+        raise NotImplementedError
+
+    def stat(self, site_id: str, file_path: str) -> Optional[StoredFile]:
+        raise NotImplementedError
+
+    def exists(self, site_id: str, file_path: str) -> bool:
+        return self.stat(site_id, file_path) is not None
+
+    def scan(self, site_id: str, hidden: bool = False) -> Dict[str, StoredFile]:
+        """Every file of a site with its size and modification time"""
+        raise NotImplementedError
+
+    def list_files(self, site_id: str, hidden: bool = False) -> List[str]:
+        """Sorted paths of a site's files"""
+        return sorted(self.scan(site_id, hidden))
+
+    def create_site(self, site_id: str, exclusive: bool = False) -> None:
+        """
+        Create an empty site.
+
+        Args:
+            site_id: Site to create
+            exclusive: Raise FileExistsError if the site already exists (atomically,
+                so of two concurrent creators exactly one succeeds); otherwise an
+                existing site is left as it is
+        """
+        raise NotImplementedError
+
+    def site_exists(self, site_id: str) -> bool:
+        raise NotImplementedError
+
+    def list_sites(self) -> List[str]:
+        """Sorted ids of the stored sites, without scratch and internal ("_", ".") entries"""
+        raise NotImplementedError
+
+    def delete_site(self, site_id: str) -> int:
+        """Delete a site and all its files. Returns the number of files deleted"""
+        raise NotImplementedError
+
+    def local_path(self, site_id: str, file_path: str) -> Optional[Path]:
+        """The file's path on the local filesystem, if the backend keeps one (for sendfile)"""
+        return None
+
+    def close(self) -> None:
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.name}
+
+
+class FilesystemSiteStorage(SiteStorage):
+    """One directory per site under root"""
+
+    name = "filesystem"
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+
+    def _path(self, site_id: str, file_path: str) -> Path:
+        return self.root / site_id / file_path
+
+    def read(self, site_id: str, file_path: str) -> Optional[Tuple[bytes, float]]:
+        try:
+            with open(self._path(site_id, file_path), "rb") as handle:
+                modified_at = os.fstat(handle.fileno()).st_mtime
+                return handle.read(), modified_at
+        except (FileNotFoundError, IsADirectoryError, NotADirectoryError):
+            return None
+
+    def write(self, site_id: str, file_path: str, data: bytes, modified_at: Optional[float] = None) -> None:
+        atomic_write_bytes(self._path(site_id, file_path), data, modified_at)
+
+    def delete(self, site_id: str, file_path: str) -> bool:
+        try:
+            self._path(site_id, file_path).unlink()
+        except (FileNotFoundError, NotADirectoryError):
+            return False
+        return True
+
+    def stat(self, site_id: str, file_path: str) -> Optional[StoredFile]:
+        try:
+            result = self._path(site_id, file_path).stat()
+        except (FileNotFoundError, NotADirectoryError):
+            return None
+        if not stat.S_ISREG(result.st_mode):
+            return None
+        return StoredFile(size=result.st_size, modified_at=result.st_mtime)
+
+    def scan(self, site_id: str, hidden: bool = False) -> Dict[str, StoredFile]:
+        site_dir = self.root / site_id
+        files: Dict[str, StoredFile] = {}
+        for directory, _, names in os.walk(site_dir):
+            for name in names:
+                # In-flight temp files of atomic writes are never part of a site
+                if name.startswith(".") and name.endswith(".tmp"):
+                    continue
+                path = Path(directory) / name
+                file_path = path.relative_to(site_dir).as_posix()
+                if not hidden and _hidden(file_path):
+                    continue
+                try:
+                    result = path.stat()
+                except FileNotFoundError:
+                    continue
+                files[file_path] = StoredFile(size=result.st_size, modified_at=result.st_mtime)
+        return files
+
+    def create_site(self, site_id: str, exclusive: bool = False) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        # mkdir is atomic: it fails with FileExistsError for every creator but one
+        (self.root / site_id).mkdir(exist_ok=not exclusive)
+
+    def site_exists(self, site_id: str) -> bool:
+        return (self.root / site_id).is_dir()
+
+    def list_sites(self) -> List[str]:
+        if not self.root.is_dir():
+            return []
+        return sorted(entry.name for entry in os.scandir(self.root) if entry.is_dir() and _listed_site(entry.name))
+
+    def delete_site(self, site_id: str) -> int:
+        deleted = len(self.scan(site_id, hidden=True))
+        shutil.rmtree(self.root / site_id, ignore_errors=True)
+        return deleted
+
+    def local_path(self, site_id: str, file_path: str) -> Optional[Path]:
+        return self._path(site_id, file_path)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.name, "root": str(self.root)}
+
+
+class SQLiteSiteStorage(SiteStorage):
+    """Every site in one SQLite database, read through a memory map"""
+
+    name = "sqlite"
+
+    _SCHEMA = """
+    CREATE TABLE IF NOT EXISTS sites (
+        site_id TEXT PRIMARY KEY,
+        created_at REAL NOT NULL
+    ) WITHOUT ROWID;
+    CREATE TABLE IF NOT EXISTS files (
+        site_id TEXT NOT NULL,
+        file_path TEXT NOT NULL,
+        size INTEGER NOT NULL,
+        modified_at REAL NOT NULL,
+        content BLOB NOT NULL,
+        PRIMARY KEY (site_id, file_path)
+    );
+    """
+
+    def __init__(self, path: Path, mmap_bytes: int = 256 * 1024 * 1024):
+        """
+        Args:
+            path: Database file
+            mmap_bytes: Bytes of the database each connection memory-maps for reads (0 = none)
+        """
+        self.path = Path(path)
+        self.mmap_bytes = mmap_bytes
+        # One connection per I/O thread: WAL readers never block each other or the writer
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        # Serializes write transactions instead of letting them fail with SQLITE_BUSY
+        self._write_lock = threading.Lock()
+
+    def _db(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None, timeout=30)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(f"PRAGMA mmap_size={int(self.mmap_bytes)}")
+            connection.executescript(self._SCHEMA)
+            self._local.connection = connection
+            with self._connections_lock:
+                self._connections.append(connection)
+        return connection
+
+    def _transaction(self, work) -> Any:
+        with self._write_lock:
+            db = self._db()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                result = work(db)
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            db.execute("COMMIT")
+            return result
+
+    def read(self, site_id: str, file_path: str) -> Optional[Tuple[bytes, float]]:
+        row = self._db().execute(
+            "SELECT content, modified_at FROM files WHERE site_id = ? AND file_path = ?", (site_id, file_path)
+        ).fetchone()
+        return (bytes(row[0]), row[1]) if row is not None else None
+
+    def write(self, site_id: str, file_path: str, data: bytes, modified_at: Optional[float] = None) -> None:
+        now = time.time()
+
+        def work(db: sqlite3.Connection) -> None:
+            db.execute("INSERT OR IGNORE INTO sites (site_id, created_at) VALUES (?, ?)", (site_id, now))
+            db.execute(
+                "INSERT OR REPLACE INTO files (site_id, file_path, size, modified_at, content) VALUES (?, ?, ?, ?, ?)",
+                (site_id, file_path, len(data), modified_at if modified_at is not None else now, data),
+            )
+
+        self._transaction(work)
+
+    def delete(self, site_id: str, file_path: str) -> bool:
+        def work(db: sqlite3.Connection) -> bool:
+            cursor = db.execute("DELETE FROM files WHERE site_id = ? AND file_path = ?", (site_id, file_path))
+            return cursor.rowcount > 0
+
+        return self._transaction(work)
+
+    def stat(self, site_id: str, file_path: str) -> Optional[StoredFile]:
+        row = self._db().execute(
+            "SELECT size, modified_at FROM files WHERE site_id = ? AND file_path = ?", (site_id, file_path)
+        ).fetchone()
+        return StoredFile(size=row[0], modified_at=row[1]) if row is not None else None
+
+    def scan(self, site_id: str, hidden: bool = False) -> Dict[str, StoredFile]:
+        rows = self._db().execute(
+            "SELECT file_path, size, modified_at FROM files WHERE site_id = ?", (site_id,)
+        ).fetchall()
+        return {
+            file_path: StoredFile(size=size, modified_at=modified_at)
+            for file_path, size, modified_at in rows
+            if hidden or not _hidden(file_path)
+        }
+
+    def create_site(self, site_id: str, exclusive: bool = False) -> None:
+        insert = "INSERT INTO sites" if exclusive else "INSERT OR IGNORE INTO sites"
+        try:
+            self._transaction(
+                lambda db: db.execute(f"{insert} (site_id, created_at) VALUES (?, ?)", (site_id, time.time()))
+            )
+        except sqlite3.IntegrityError:
+            raise FileExistsError(f"Site '{site_id}' already exists") from None
+
+    def site_exists(self, site_id: str) -> bool:
+        return self._db().execute("SELECT 1 FROM sites WHERE site_id = ?", (site_id,)).fetchone() is not None
+
+    def list_sites(self) -> List[str]:
+        rows = self._db().execute("SELECT site_id FROM sites ORDER BY site_id").fetchall()
+        return [site_id for (site_id,) in rows if _listed_site(site_id)]
+
+    def delete_site(self, site_id: str) -> int:
+        def work(db: sqlite3.Connection) -> int:
+            deleted = db.execute("DELETE FROM files WHERE site_id = ?", (site_id,)).rowcount
+            db.execute("DELETE FROM sites WHERE site_id = ?", (site_id,))
+            return deleted
+
+        return self._transaction(work)
+
+    def close(self) -> None:
+        with self._connections_lock:
+            for connection in self._connections:
+                connection.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.name, "path": str(self.path), "mmap_bytes": self.mmap_bytes}
+
+
+class MemorySiteStorage(SiteStorage):
+    """Sites in a dictionary (tests and benchmarks)"""
+
+    name = "memory"
+
+    def __init__(self):
+        self._sites: Dict[str, Dict[str, Tuple[bytes, float]]] = {}
+        self._lock = threading.Lock()
+
+    def read(self, site_id: str, file_path: str) -> Optional[Tuple[bytes, float]]:
+        with self._lock:
+            return self._sites.get(site_id, {}).get(file_path)
+
+    def write(self, site_id: str, file_path: str, data: bytes, modified_at: Optional[float] = None) -> None:
+        with self._lock:
+            self._sites.setdefault(site_id, {})[file_path] = (
+                bytes(data), modified_at if modified_at is not None else time.time()
+            )
+
+    def delete(self, site_id: str, file_path: str) -> bool:
+        with self._lock:
+            return self._sites.get(site_id, {}).pop(file_path, None) is not None
+
+    def stat(self, site_id: str, file_path: str) -> Optional[StoredFile]:
+        found = self.read(site_id, file_path)
+        return StoredFile(size=len(found[0]), modified_at=found[1]) if found is not None else None
+
+    def scan(self, site_id: str, hidden: bool = False) -> Dict[str, StoredFile]:
+        with self._lock:
+            files = dict(self._sites.get(site_id, {}))
+        return {
+            file_path: StoredFile(size=len(data), modified_at=modified_at)
+            for file_path, (data, modified_at) in files.items()
+            if hidden or not _hidden(file_path)
+        }
+
+    def create_site(self, site_id: str, exclusive: bool = False) -> None:
+        with self._lock:
+            if exclusive and site_id in self._sites:
+                raise FileExistsError(f"Site '{site_id}' already exists")
+            self._sites.setdefault(site_id, {})
+
+    def site_exists(self, site_id: str) -> bool:
+        with self._lock:
+            return site_id in self._sites
+
+    def list_sites(self) -> List[str]:
+        with self._lock:
+            return sorted(site_id for site_id in self._sites if _listed_site(site_id))
+
+    def delete_site(self, site_id: str) -> int:
+        with self._lock:
+            return len(self._sites.pop(site_id, {}))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"backend": self.name, "sites": len(self._sites)}
+
+
+def open_storage(
+    backend: str, sites_dir: Path, path: Optional[Path] = None, mmap_bytes: Optional[int] = None
+) -> SiteStorage:
+    """
+    Create a storage backend.
+
+    Args:
+        backend: filesystem, sqlite or memory
+        sites_dir: The sites directory (root of the filesystem backend, default home of the SQLite file)
+        path: Filesystem root or SQLite file instead of the default
+        mmap_bytes: Memory map size of the SQLite backend
+
+    Raises:
+        ValueError: If the backend is unknown
+    """
+    if backend == "filesystem":
+        return FilesystemSiteStorage(path or sites_dir)
+    if backend == "sqlite":
+        path = path or sites_dir / SQLITE_FILE
+        return SQLiteSiteStorage(path) if mmap_bytes is None else SQLiteSiteStorage(path, mmap_bytes)
+    if backend == "memory":
+        return MemorySiteStorage()
+    raise ValueError(f"Unknown site storage backend '{backend}' (expected one of {', '.join(STORAGE_BACKENDS)})")
+
+
+def storage_from_env(sites_dir: Path) -> SiteStorage:
+    """The backend selected by SITE_STORAGE / SITE_STORAGE_PATH / SITE_STORAGE_MMAP_BYTES"""
+    path = os.getenv("SITE_STORAGE_PATH")
+    mmap_bytes = os.getenv("SITE_STORAGE_MMAP_BYTES")
+    return open_storage(
+        os.getenv("SITE_STORAGE", "filesystem").strip().lower(),
+        sites_dir,
+        Path(path) if path else None,
+        int(mmap_bytes) if mmap_bytes else None,
+    )
+
+
+def migrate(
+    source: SiteStorage,
+    target: SiteStorage,
+    site_ids: Optional[List[str]] = None,
+    delete_source: bool = False,
+) -> Dict[str, Any]:
+    """
+    Copy sites (every file, including checkpoints, with its modification time) between backends.
+
+    A site is deleted from the source only after all its files were copied
+    and their sizes checked in the target.
+
+    Args:
+        source: Backend to copy from
+        target: Backend to copy to
+        site_ids: Sites to move (default: all listed sites of the source)
+        delete_source: Delete each site from the source once it is copied
+
+    Returns:
+        Report with the sites, files and bytes copied and the sites that failed the check
+    """
+    report: Dict[str, Any] = {"sites": 0, "files": 0, "bytes": 0, "failed": []}
+    for site_id in site_ids if site_ids is not None else source.list_sites():
+        files = source.scan(site_id, hidden=True)
+        target.create_site(site_id)
+        for file_path in sorted(files):
+            found = source.read(site_id, file_path)
+            if found is None:
+                continue
+            data, modified_at = found
+            target.write(site_id, file_path, data, modified_at)
+            report["files"] += 1
+            report["bytes"] += len(data)
+        copied = target.scan(site_id, hidden=True)
+        if any(
+            file_path not in copied or copied[file_path].size != stored.size for file_path, stored in files.items()
+        ):
+            report["failed"].append(site_id)
+            continue
+        report["sites"] += 1
+        if delete_source:
+            source.delete_site(site_id)
+    return report
+
+
+def main() -> None:
+    from .site_documents import SITES_DIR
+
+    parser = argparse.ArgumentParser(description="Inspect site storage or move sites between backends")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("stats", help="The configured backend and its sites")
+    move = commands.add_parser("migrate", help="Copy every site to another backend (stop the server first)")
+    persistent = ("filesystem", "sqlite")
+    move.add_argument("--from", dest="source", default=os.getenv("SITE_STORAGE", "filesystem"), choices=persistent)
+    move.add_argument("--from-path", type=Path, help="Source directory or SQLite file (default: the backend's default)")
+    move.add_argument("--to", dest="target", required=True, choices=persistent)
+    move.add_argument("--to-path", type=Path, help="Target directory or SQLite file")
+    move.add_argument("--site", action="append", dest="sites", help="Only this site (repeatable)")
+    move.add_argument("--delete-source", action="store_true", help="Delete each site from the source once copied")
+    args = parser.parse_args()
+
+    if args.command == "stats":
+        storage = storage_from_env(SITES_DIR)
+        print(json.dumps({**storage.stats(), "sites": len(storage.list_sites())}, indent=2))
+        return
+
+    source = open_storage(args.source, SITES_DIR, args.from_path)
+    target = open_storage(args.target, SITES_DIR, args.to_path)
+    if source.stats() == target.stats():
+        parser.error("source and target are the same storage")
+    report = migrate(source, target, args.sites, args.delete_source)
+    source.close()
+    target.close()
+    print(json.dumps(report, indent=2))
+    if report["failed"]:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
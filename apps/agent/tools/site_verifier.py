@@ -0,0 +1,359 @@
+"""
+Structural verification of generated sites.
+
+A single pass over index.html collects everything the workflow checks: the
+HTML parser records the root mount element, Tailwind, the import map and the
+app scripts, and each app script is tokenized once by the JSX transform whose
+token observer picks out ES imports, the createRoot call, the template
+placeholder and the sample app. JSX syntax errors are reported with their line
+in index.html. Reports are memoized per content hash, so check_content_ready
+and verify_site share one parse of the same file version.
+"""
+
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from html.parser import HTMLParser
+from typing import Dict, Any, List, Optional, Tuple
+
+from .jsx_transform import JsxSyntaxError, transform_jsx
+from .site_documents import SiteDocument
+from .vendor_mirror import VENDOR_URL_PREFIX, parse_cdn_url, split_spec
+
+PLACEHOLDER = "// ========[APP_CONTENT_HERE]========"
+SAMPLE_APP_NAME = "SampleApp"
+SAMPLE_APP_TEXT = "This is template content"
+MIN_CONTENT_SIZE = 500  # Reasonable minimum size of a generated index.html
+
+# Inline scripts holding the app code (JSX via Babel, or plain ES modules)
+APP_SCRIPT_TYPES = {"", "text/babel", "text/jsx", "module", "text/javascript", "application/javascript"}
+
+# Anchored at an "import"/"export" keyword found by the tokenizer
+_IMPORT_STATEMENT = re.compile(
+    r"""import\s*(?:\(\s*|(?:[\w$*{}\s,]+?\s*from\s*)?)(["'])([^"'\n]+)\1"""
+    r"""|export\s+(?:\*(?:\s+as\s+[\w$]+)?|\{[^}]*\})\s*from\s*(["'])([^"'\n]+)\3"""
+)
+_NON_BARE_SPECIFIER = re.compile(r"^(?:\.{0,2}/|[a-z][a-z0-9+.-]*:)", re.I)
+_ROOT_FACTORIES = {"createRoot", "hydrateRoot"}
+
+
+@dataclass
+class ModuleImport:
+    """An ES import found in an app script"""
+
+    specifier: str
+    line: int
+
+
+@dataclass
+class ImportMapInfo:
+    """The page's <script type="importmap">, if any"""
+
+    present: bool = False
+    valid: bool = False
+    entries: Dict[str, str] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    def resolves(self, specifier: str) -> bool:
+        """True if a bare specifier is mapped (exactly or by a "prefix/" entry)"""
+        if specifier in self.entries:
+            return True
+        return any(key.endswith("/") and specifier.startswith(key) for key in self.entries)
+
+    def target(self, specifier: str) -> Optional[str]:
+        """The URL a specifier is mapped to (exact entry, else the longest "prefix/" entry), or None"""
+        if specifier in self.entries:
+            return self.entries[specifier]
+        prefixes = [key for key in self.entries if key.endswith("/") and specifier.startswith(key)]
+        if not prefixes:
+            return None
+        prefix = max(prefixes, key=len)
+        return self.entries[prefix] + specifier[len(prefix):]
+
+
+@dataclass
+class SyntaxIssue:
+    """A JSX/JavaScript syntax error in an app script"""
+
+    message: str
+    line: int
+
+
+@dataclass
+class VerificationReport:
+    """Everything the workflow checks about a generated index.html"""
+
+    size: int
+    imports: List[ModuleImport] = field(default_factory=list)
+    react_imported: bool = False
+    create_root: bool = False
+    root_element: bool = False
+    tailwind: bool = False
+    import_map: ImportMapInfo = field(default_factory=ImportMapInfo)
+    placeholder_present: bool = False
+    sample_app_present: bool = False
+    app_scripts: int = 0
+    syntax_errors: List[SyntaxIssue] = field(default_factory=list)
+    unresolved_imports: List[str] = field(default_factory=list)
+
+    @property
+    def content_ready(self) -> bool:
+        """The template has been replaced by a real, parseable React app"""
+        return (
+            not self.placeholder_present
+            and not self.sample_app_present
+            and self.react_imported
+            and self.size > MIN_CONTENT_SIZE
+            and not self.syntax_errors
+        )
+
+    @property
+    def passed(self) -> bool:
+        """The site is complete and should render"""
+        return (
+            self.content_ready
+            and self.create_root
+            and self.root_element
+            and self.tailwind
+            and self.import_map.valid
+            and not self.unresolved_imports
+        )
+
+    def problems(self) -> List[str]:
+        """Human-readable reasons the site does not pass verification"""
+        problems = []
+        if self.placeholder_present:
+            problems.append(f"the {PLACEHOLDER} placeholder is still present")
+        if self.sample_app_present:
+            problems.append(f"the {SAMPLE_APP_NAME} template component is still present")
+        if not self.react_imported:
+            problems.append('no ES import of React ("react", a CDN React URL or an import map entry for one)')
+        if self.size <= MIN_CONTENT_SIZE:
+            problems.append(f"index.html is only {self.size} characters")
+        for issue in self.syntax_errors:
+            problems.append(f"syntax error at line {issue.line}: {issue.message}")
+        if not self.create_root:
+            problems.append("the app is never mounted with createRoot")
+        if not self.root_element:
+            problems.append('no element with id="root"')
+        if not self.tailwind:
+            problems.append("TailwindCSS is not loaded")
+        if not self.import_map.present:
+            problems.append("no <script type=\"importmap\">")
+        elif not self.import_map.valid:
+            problems.append(f"invalid import map: {self.import_map.error}")
+        if self.unresolved_imports:
+            problems.append("imports missing from the import map: " + ", ".join(self.unresolved_imports))
+        return problems
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data.update(content_ready=self.content_ready, passed=self.passed, problems=self.problems())
+        return data
+
+
+class _PageScanner(HTMLParser):
+    """Collects the root element, Tailwind, the import map and inline app scripts"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.root_element = False
+        self.tailwind = False
+        self.import_maps: List[str] = []
+        # (first line of the script body, script source)
+        self.app_scripts: List[Tuple[int, str]] = []
+        self._script: Optional[Dict[str, Any]] = None
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        attributes = {name: value or "" for name, value in attrs}
+        if attributes.get("id") == "root":
+            self.root_element = True
+        if tag == "script":
+            if "tailwind" in attributes.get("src", "").lower():
+                self.tailwind = True
+            line = self.getpos()[0] + self.get_starttag_text().count("\n")
+            self._script = {"attributes": attributes, "line": line, "chunks": []}
+        elif tag == "link" and "tailwind" in attributes.get("href", "").lower():
+            self.tailwind = True
+        elif tag == "style" and "data-tailwind" in attributes:
+            # Stylesheet inlined by the publish step
+            self.tailwind = True
+
+    def handle_data(self, data: str) -> None:
+        if self._script is not None:
+            self._script["chunks"].append(data)
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag != "script" or self._script is None:
+            return
+        script, self._script = self._script, None
+        attributes = script["attributes"]
+        body = "".join(script["chunks"])
+        script_type = attributes.get("type", "").lower()
+        if script_type == "importmap":
+            self.import_maps.append(body)
+        elif script_type in APP_SCRIPT_TYPES and "src" not in attributes and body.strip():
+            self.app_scripts.append((script["line"], body))
+
+
+def _parse_import_maps(sources: List[str]) -> ImportMapInfo:
+    info = ImportMapInfo(present=bool(sources), valid=bool(sources))
+    for source in sources:
+        try:
+            data = json.loads(source)
+        except ValueError as e:
+            info.valid, info.error = False, f"not valid JSON ({e})"
+            continue
+        imports = data.get("imports", {}) if isinstance(data, dict) else None
+        if not isinstance(imports, dict) or not all(isinstance(v, str) for v in imports.values()):
+            info.valid, info.error = False, '"imports" must map specifiers to URL strings'
+            continue
+        info.entries.update(imports)
+    return info
+
+
+def _scan_script(report: VerificationReport, first_line: int, source: str) -> None:
+    """Tokenize one app script, recording imports, the root mount and template leftovers"""
+    sample_app_seen = False
+    sample_text_seen = False
+
+    def observe(kind: str, value: str, offset: int) -> None:
+        nonlocal sample_app_seen, sample_text_seen
+        if kind == "word":
+            if value in ("import", "export"):
+                match = _IMPORT_STATEMENT.match(source, offset)
+                if match:
+                    specifier = match.group(2) or match.group(4)
+                    line = first_line + source.count("\n", 0, offset)
+                    report.imports.append(ModuleImport(specifier, line))
+            elif value in _ROOT_FACTORIES:
+                report.create_root = True
+            elif value == SAMPLE_APP_NAME:
+                sample_app_seen = True
+        elif kind == "tag" and value == SAMPLE_APP_NAME:
+            sample_app_seen = True
+        elif kind == "comment" and value.strip() == PLACEHOLDER:
+            report.placeholder_present = True
+        elif kind in ("text", "string") and SAMPLE_APP_TEXT in value:
+            sample_text_seen = True
+
+    try:
+        transform_jsx(source, observer=observe)
+    except JsxSyntaxError as e:
+        report.syntax_errors.append(SyntaxIssue(e.message, first_line + e.line - 1))
+    if sample_app_seen and sample_text_seen:
+        report.sample_app_present = True
+
+
+def _package_name(url: str) -> Optional[str]:
+    """Package a CDN or /vendor/ module URL serves, or None for other URLs"""
+    if url.startswith(VENDOR_URL_PREFIX):
+        return split_spec(url[len(VENDOR_URL_PREFIX):])[0]
+    parsed = parse_cdn_url(url)
+    return parsed[0] if parsed is not None else None
+
+
+def _imports_react(specifier: str, import_map: ImportMapInfo) -> bool:
+    """
+    True if an import loads React: the bare "react" specifier, a CDN URL such as
+    https://esm.sh/react@19, or a specifier the import map resolves to one
+    """
+    if specifier == "react":
+        return True
+    target = import_map.target(specifier)
+    return _package_name(target if target is not None else specifier) == "react"
+
+
+def verify_html(content: str) -> VerificationReport:
+    """
+    Verify a generated index.html in one pass.
+
+    Args:
+        content: The page source
+
+    Returns:
+        A VerificationReport; its content_ready and passed properties drive the workflow
+    """
+    report = VerificationReport(size=len(content))
+    scanner = _PageScanner()
+    scanner.feed(content)
+    scanner.close()
+
+    report.root_element = scanner.root_element
+    report.tailwind = scanner.tailwind
+    report.import_map = _parse_import_maps(scanner.import_maps)
+    report.app_scripts = len(scanner.app_scripts)
+    for first_line, source in scanner.app_scripts:
+        _scan_script(report, first_line, source)
+
+    report.react_imported = any(_imports_react(item.specifier, report.import_map) for item in report.imports)
+    unresolved = []
+    for item in report.imports:
+        if _NON_BARE_SPECIFIER.match(item.specifier) or report.import_map.resolves(item.specifier):
+            continue
+        if item.specifier not in unresolved:
+            unresolved.append(item.specifier)
+    report.unresolved_imports = unresolved
+    return report
+
+
+class SiteVerifier:
+    """LRU memo of verification reports keyed by document content hash"""
+
+    def __init__(self, max_entries: int = 128):
+        self.max_entries = max_entries
+        self._reports: "OrderedDict[str, VerificationReport]" = OrderedDict()
+        # verify() runs on the site I/O pool
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls) -> "SiteVerifier":
+        """Create a verifier configured from SITE_VERIFIER_CACHE_ENTRIES"""
+        return cls(max_entries=int(os.getenv("SITE_VERIFIER_CACHE_ENTRIES", "128")))
+
+    def verify(self, document: Optional[SiteDocument]) -> VerificationReport:
+        """
+        Return the report for a document version, verifying it on first use (CPU-bound).
+
+        Args:
+            document: The site's index.html document, or None when it does not exist
+
+        Returns:
+            The VerificationReport for this content
+        """
+        if document is None:
+            return verify_html("")
+
+        with self._lock:
+            report = self._reports.get(document.content_hash)
+            if report is not None:
+                self._reports.move_to_end(document.content_hash)
+                self.hits += 1
+                return report
+            self.misses += 1
+
+        report = verify_html(document.content)
+        with self._lock:
+            self._reports[document.content_hash] = report
+            while len(self._reports) > self.max_entries:
+                self._reports.popitem(last=False)
+        return report
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._reports),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / lookups) if lookups else 0.0,
+        }
+
+
+# Process-wide verifier shared by the workflow nodes
+site_verifier = SiteVerifier.from_env()
@@ -0,0 +1,221 @@
+"""
+Speculative multi-candidate site generation.
+
+Instead of one generation whose bad attempts are retried serially, N
+candidates run the generation graph concurrently, each on its own pooled
+graph and in its own scratch copy of the site (a "_candidate_..." directory,
+hidden from site listings like other "_" entries). The first candidate whose
+site passes verify_site is promoted: its files are copied into the real site,
+which is then published, and the other candidates are cancelled so their
+graph slots and LLM capacity are freed right away.
+
+An optional token budget caps the tokens spent by all candidates together.
+Once it is used up, every candidate except the lowest-numbered one still
+running is cancelled, and that one finishes like a normal generation.
+"""
+
+import asyncio
+import logging
+import os
+from dataclasses import dataclass
+from typing import Dict, Any, List, Optional
+
+from .generation_pool import GenerationPool
+from .metrics import speculative_candidates, token_listener
+from .progress import progress_scope, report_progress
+from .site_documents import site_documents
+from .site_publisher import PublishError, site_publisher
+from .site_snapshots import record_site_write
+
+SCRATCH_PREFIX = "_candidate_"
+
+
+def scratch_site_id(site_id: str, candidate: int) -> str:
+    """Site id of a candidate's scratch copy"""
+    return f"{SCRATCH_PREFIX}{site_id}_{candidate}"
+
+
+@dataclass
+class _Candidate:
+    """One concurrently running generation"""
+
+    index: int
+    site_id: str
+    task: Optional[asyncio.Task] = None
+    tokens: int = 0
+    final_state: Optional[Dict[str, Any]] = None
+    error: Optional[BaseException] = None
+    outcome: str = "running"  # promoted, lost, cancelled or failed
+
+
+class SpeculativeGenerator:
+    """Runs N generation candidates at once and promotes the first verified one"""
+
+    def __init__(self, pool: GenerationPool, candidates: int = 1, token_budget: int = 0):
+        """
+        Args:
+            pool: Pool the candidates borrow their generation graphs from
+            candidates: Default number of concurrent candidates (1 disables speculation)
+            token_budget: Default total LLM tokens for all candidates of a run (0 = unlimited)
+        """
+        self.pool = pool
+        self.candidates = max(1, candidates)
+        self.token_budget = max(0, token_budget)
+        self.runs = 0
+        self.budget_exhausted = 0
+
+    @classmethod
+    def from_env(cls, pool: GenerationPool) -> "SpeculativeGenerator":
+        """Create a generator configured from GENERATION_CANDIDATES and GENERATION_CANDIDATE_TOKEN_BUDGET"""
+        return cls(
+            pool,
+            candidates=int(os.getenv("GENERATION_CANDIDATES", "1")),
+            token_budget=int(os.getenv("GENERATION_CANDIDATE_TOKEN_BUDGET", "0")),
+        )
+
+    def resolve(self, candidates: int = 0, token_budget: int = 0) -> Dict[str, int]:
+        """
+        Effective settings of a run (0 means the configured default).
+
+        More candidates than pool slots could only start once others finish,
+        so the count is capped at the pool size.
+        """
+        return {
+            "candidates": min(max(1, candidates or self.candidates), self.pool.size),
+            "token_budget": max(0, token_budget or self.token_budget),
+        }
+
+    async def run(self, initial_state: Dict[str, Any], candidates: int = 0, token_budget: int = 0) -> Dict[str, Any]:
+        """
+        Generate a site with concurrent candidates.
+
+        Args:
+            initial_state: Initial graph state of the real site
+            candidates: Number of candidates (0 = configured default)
+            token_budget: Total tokens for all candidates (0 = configured default)
+
+        Returns:
+            The promoted candidate's final graph state, with the real site_id, its
+            publish result and a "speculation" summary
+
+        Raises:
+            Exception: The first candidate's exception, if every candidate failed
+        """
+        settings = self.resolve(candidates, token_budget)
+        budget = settings["token_budget"]
+        site_id = initial_state["site_id"]
+        entries = [_Candidate(index, scratch_site_id(site_id, index)) for index in range(settings["candidates"])]
+        spent = {"tokens": 0, "exhausted": False}
+        self.runs += 1
+
+        def charge(candidate: _Candidate, tokens: int) -> None:
+            candidate.tokens += tokens
+            spent["tokens"] += tokens
+            if not budget or spent["exhausted"] or spent["tokens"] < budget:
+                return
+            spent["exhausted"] = True
+            self.budget_exhausted += 1
+            running = [entry for entry in entries if entry.task is not None and not entry.task.done()]
+            for entry in running[1:]:
+                entry.outcome = "cancelled"
+                entry.task.cancel()
+            report_progress("speculation", event="token_budget_exhausted", tokens=spent["tokens"], token_budget=budget)
+
+        async def run_candidate(candidate: _Candidate) -> Dict[str, Any]:
+            state = {
+                **initial_state,
+                "site_id": candidate.site_id,
+                "site_dir": str(site_documents.sites_dir / candidate.site_id),
+                "candidate": candidate.index,
+            }
+            with progress_scope(candidate=candidate.index), token_listener(lambda tokens: charge(candidate, tokens)):
+                async with self.pool.acquire() as slot:
+                    return await slot.invoke(state)
+
+        try:
+            for candidate in entries:
+                candidate.task = asyncio.create_task(run_candidate(candidate))
+            winner = await self._race(entries)
+            final_state = await self._promote(winner, initial_state)
+        finally:
+            for candidate in entries:
+                if candidate.task is not None and not candidate.task.done():
+                    candidate.outcome = "cancelled"
+                    candidate.task.cancel()
+            await asyncio.gather(*(c.task for c in entries if c.task is not None), return_exceptions=True)
+            for candidate in entries:
+                if candidate.outcome == "running":
+                    candidate.outcome = "lost"
+                speculative_candidates.inc(outcome=candidate.outcome)
+                await site_documents.adelete_site(candidate.site_id)
+
+        final_state["speculation"] = {
+            "candidates": len(entries),
+            "promoted": winner.index,
+            "tokens": spent["tokens"],
+            "token_budget": budget,
+            "budget_exhausted": spent["exhausted"],
+            "outcomes": {str(c.index): c.outcome for c in entries},
+            "tokens_by_candidate": {str(c.index): c.tokens for c in entries},
+        }
+        return final_state
+
+    async def _race(self, entries: List[_Candidate]) -> _Candidate:
+        """Wait for the first verified candidate; if none passes, the best finished one"""
+        pending = {candidate.task for candidate in entries}
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for candidate in entries:
+                if candidate.task not in done or candidate.task.cancelled():
+                    continue
+                if candidate.task.exception() is not None:
+                    candidate.error = candidate.task.exception()
+                    candidate.outcome = "failed"
+                    logging.warning("Generation candidate %d failed: %s", candidate.index, candidate.error)
+                    continue
+                candidate.final_state = candidate.task.result()
+                if candidate.final_state.get("verification_passed"):
+                    return candidate
+
+        finished = [candidate for candidate in entries if candidate.final_state is not None]
+        if not finished:
+            failed = next((candidate for candidate in entries if candidate.error is not None), None)
+            if failed is not None:
+                raise failed.error
+            raise RuntimeError("Every generation candidate was cancelled")
+        # Nothing verified: keep the most complete site, as a single generation would
+        return max(finished, key=lambda candidate: (bool(candidate.final_state.get("content_ready")), -candidate.index))
+
+    async def _promote(self, winner: _Candidate, initial_state: Dict[str, Any]) -> Dict[str, Any]:
+        """Copy the winner's scratch site into the real site and publish it if verified"""
+        site_id = initial_state["site_id"]
+        winner.outcome = "promoted"
+        async with site_documents.site_lock(site_id):
+            for file_path in await site_documents.alist_files(winner.site_id):
+                content = await site_documents.aread(winner.site_id, file_path)
+                if content is not None:
+                    await site_documents.awrite(site_id, file_path, content)
+                    await record_site_write(site_id, file_path, "promote")
+        report_progress("speculation", event="candidate_promoted", candidate=winner.index, site_id=site_id)
+
+        final_state = {
+            **winner.final_state,
+            "site_id": site_id,
+            "site_dir": initial_state["site_dir"],
+            "candidate": None,
+        }
+        if final_state.get("verification_passed"):
+            try:
+                await site_publisher.publish(site_id)
+                final_state.update(published=True, publish_error=None, current_step="published")
+            except PublishError as e:
+                final_state.update(published=False, publish_error=str(e), current_step="publish_failed")
+        return final_state
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "candidates": self.candidates,
+            "token_budget": self.token_budget,
+            "runs": self.runs,
+            "budget_exhausted": self.budget_exhausted,
+        }
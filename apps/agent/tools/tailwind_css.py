@@ -0,0 +1,1173 @@
+"""
+Static Tailwind CSS for published sites.
+
+Generated sites load the Tailwind Play CDN (cdn.tailwindcss.com), which
+watches the DOM and compiles CSS in every visitor's browser. This module does
+that work once at publish time: it scans a page for utility classes the way
+Tailwind's own content scanner does, compiles the ones it knows to the same
+CSS Tailwind v3 emits (preflight, theme scale and palette, variants and
+breakpoints) and produces a minimal stylesheet.
+
+Only a subset of Tailwind is implemented. Candidate classes that look like
+Tailwind utilities but are not supported (or are built dynamically, such as
+`bg-${color}-500`) are reported so the caller can keep the CDN script for that
+page instead of shipping incomplete CSS.
+"""
+
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from .site_documents import atomic_write_text
+
+# Bump when the generated CSS changes so cached stylesheets are rebuilt
+GENERATOR_VERSION = "2"
+
+SCREENS = [("sm", "640px"), ("md", "768px"), ("lg", "1024px"), ("xl", "1280px"), ("2xl", "1536px")]
+_SCREEN_INDEX = {name: index + 1 for index, (name, _) in enumerate(SCREENS)}
+
+# Pseudo-class variants in Tailwind's variant order
+_PSEUDO_VARIANTS = [
+    ("first", ":first-child"),
+    ("last", ":last-child"),
+    ("odd", ":nth-child(odd)"),
+    ("even", ":nth-child(even)"),
+    ("visited", ":visited"),
+    ("checked", ":checked"),
+    ("focus-within", ":focus-within"),
+    ("hover", ":hover"),
+    ("focus", ":focus"),
+    ("focus-visible", ":focus-visible"),
+    ("active", ":active"),
+    ("disabled", ":disabled"),
+]
+_PSEUDO = {name: (rank, pseudo) for rank, (name, pseudo) in enumerate(_PSEUDO_VARIANTS, start=1)}
+_GROUP_RANK = len(_PSEUDO_VARIANTS) + 1
+
+_PALETTE_SHADES = ("50", "100", "200", "300", "400", "500", "600", "700", "800", "900", "950")
+_PALETTE = {
+    "slate": "f8fafc f1f5f9 e2e8f0 cbd5e1 94a3b8 64748b 475569 334155 1e293b 0f172a 020617",
+    "gray": "f9fafb f3f4f6 e5e7eb d1d5db 9ca3af 6b7280 4b5563 374151 1f2937 111827 030712",
+    "zinc": "fafafa f4f4f5 e4e4e7 d4d4d8 a1a1aa 71717a 52525b 3f3f46 27272a 18181b 09090b",
+    "neutral": "fafafa f5f5f5 e5e5e5 d4d4d4 a3a3a3 737373 525252 404040 262626 171717 0a0a0a",
+    "stone": "fafaf9 f5f5f4 e7e5e4 d6d3d1 a8a29e 78716c 57534e 44403c 292524 1c1917 0c0a09",
+    "red": "fef2f2 fee2e2 fecaca fca5a5 f87171 ef4444 dc2626 b91c1c 991b1b 7f1d1d 450a0a",
+    "orange": "fff7ed ffedd5 fed7aa fdba74 fb923c f97316 ea580c c2410c 9a3412 7c2d12 431407",
+    "amber": "fffbeb fef3c7 fde68a fcd34d fbbf24 f59e0b d97706 b45309 92400e 78350f 451a03",
+    "yellow": "fefce8 fef9c3 fef08a fde047 facc15 eab308 ca8a04 a16207 854d0e 713f12 422006",
+    "lime": "f7fee7 ecfccb d9f99d bef264 a3e635 84cc16 65a30d 4d7c0f 3f6212 365314 1a2e05",
+    "green": "f0fdf4 dcfce7 bbf7d0 86efac 4ade80 22c55e 16a34a 15803d 166534 14532d 052e16",
+    "emerald": "ecfdf5 d1fae5 a7f3d0 6ee7b7 34d399 10b981 059669 047857 065f46 064e3b 022c22",
+    "teal": "f0fdfa ccfbf1 99f6e4 5eead4 2dd4bf 14b8a6 0d9488 0f766e 115e59 134e4a 042f2e",
+    "cyan": "ecfeff cffafe a5f3fc 67e8f9 22d3ee 06b6d4 0891b2 0e7490 155e75 164e63 083344",
+    "sky": "f0f9ff e0f2fe bae6fd 7dd3fc 38bdf8 0ea5e9 0284c7 0369a1 075985 0c4a6e 082f49",
+    "blue": "eff6ff dbeafe bfdbfe 93c5fd 60a5fa 3b82f6 2563eb 1d4ed8 1e40af 1e3a8a 172554",
+    "indigo": "eef2ff e0e7ff c7d2fe a5b4fc 818cf8 6366f1 4f46e5 4338ca 3730a3 312e81 1e1b4b",
+    "violet": "f5f3ff ede9fe ddd6fe c4b5fd a78bfa 8b5cf6 7c3aed 6d28d9 5b21b6 4c1d95 2e1065",
+    "purple": "faf5ff f3e8ff e9d5ff d8b4fe c084fc a855f7 9333ea 7e22ce 6b21a8 581c87 3b0764",
+    "fuchsia": "fdf4ff fae8ff f5d0fe f0abfc e879f9 d946ef c026d3 a21caf 86198f 701a75 4a044e",
+    "pink": "fdf2f8 fce7f3 fbcfe8 f9a8d4 f472b6 ec4899 db2777 be185d 9d174d 831843 500724",
+    "rose": "fff1f2 ffe4e6 fecdd3 fda4af fb7185 f43f5e e11d48 be123c 9f1239 881337 4c0519",
+}
+COLORS: Dict[str, str] = {"black": "000000", "white": "ffffff"}
+for _name, _hexes in _PALETTE.items():
+    COLORS.update({f"{_name}-{shade}": value for shade, value in zip(_PALETTE_SHADES, _hexes.split())})
+_COLOR_KEYWORDS = {"transparent": "transparent", "current": "currentColor", "inherit": "inherit"}
+
+SPACING: Dict[str, str] = {"0": "0px", "px": "1px"}
+for _step in (0.5, 1, 1.5, 2, 2.5, 3, 3.5, 4, 5, 6, 7, 8, 9, 10, 11, 12, 14, 16, 20, 24,
+              28, 32, 36, 40, 44, 48, 52, 56, 60, 64, 72, 80, 96):
+    SPACING[f"{_step:g}"] = f"{_step * 0.25:g}rem"
+
+FRACTIONS: Dict[str, str] = {
+    f"{numerator}/{denominator}": f"{numerator / denominator * 100:.6f}".rstrip("0").rstrip(".") + "%"
+    for denominator in (2, 3, 4, 5, 6, 12)
+    for numerator in range(1, denominator)
+}
+_SIZES = {"auto": "auto", "full": "100%", "min": "min-content", "max": "max-content", "fit": "fit-content"}
+
+FONT_SIZES = {
+    "xs": ("0.75rem", "1rem"), "sm": ("0.875rem", "1.25rem"), "base": ("1rem", "1.5rem"),
+    "lg": ("1.125rem", "1.75rem"), "xl": ("1.25rem", "1.75rem"), "2xl": ("1.5rem", "2rem"),
+    "3xl": ("1.875rem", "2.25rem"), "4xl": ("2.25rem", "2.5rem"), "5xl": ("3rem", "1"),
+    "6xl": ("3.75rem", "1"), "7xl": ("4.5rem", "1"), "8xl": ("6rem", "1"), "9xl": ("8rem", "1"),
+}
+FONT_WEIGHTS = {
+    "thin": "100", "extralight": "200", "light": "300", "normal": "400", "medium": "500",
+    "semibold": "600", "bold": "700", "extrabold": "800", "black": "900",
+}
+FONT_FAMILIES = {
+    "sans": 'ui-sans-serif, system-ui, sans-serif, "Apple Color Emoji", "Segoe UI Emoji", '
+            '"Segoe UI Symbol", "Noto Color Emoji"',
+    "serif": 'ui-serif, Georgia, Cambria, "Times New Roman", Times, serif',
+    "mono": 'ui-monospace, SFMono-Regular, Menlo, Monaco, Consolas, "Liberation Mono", '
+            '"Courier New", monospace',
+}
+LEADING = {
+    "none": "1", "tight": "1.25", "snug": "1.375", "normal": "1.5", "relaxed": "1.625", "loose": "2",
+    **{str(n): f"{n * 0.25:g}rem" for n in range(3, 11)},
+}
+TRACKING = {
+    "tighter": "-0.05em", "tight": "-0.025em", "normal": "0em",
+    "wide": "0.025em", "wider": "0.05em", "widest": "0.1em",
+}
+MAX_WIDTHS = {
+    "none": "none", "0": "0rem", "xs": "20rem", "sm": "24rem", "md": "28rem", "lg": "32rem",
+    "xl": "36rem", "2xl": "42rem", "3xl": "48rem", "4xl": "56rem", "5xl": "64rem", "6xl": "72rem",
+    "7xl": "80rem", "full": "100%", "min": "min-content", "max": "max-content", "fit": "fit-content",
+    "prose": "65ch", **{f"screen-{name}": width for name, width in SCREENS},
+}
+RADII = {
+    "none": "0px", "sm": "0.125rem", "": "0.25rem", "md": "0.375rem", "lg": "0.5rem",
+    "xl": "0.75rem", "2xl": "1rem", "3xl": "1.5rem", "full": "9999px",
+}
+SHADOWS = {
+    "sm": "0 1px 2px 0 rgb(0 0 0 / 0.05)",
+    "": "0 1px 3px 0 rgb(0 0 0 / 0.1), 0 1px 2px -1px rgb(0 0 0 / 0.1)",
+    "md": "0 4px 6px -1px rgb(0 0 0 / 0.1), 0 2px 4px -2px rgb(0 0 0 / 0.1)",
+    "lg": "0 10px 15px -3px rgb(0 0 0 / 0.1), 0 4px 6px -4px rgb(0 0 0 / 0.1)",
+    "xl": "0 20px 25px -5px rgb(0 0 0 / 0.1), 0 8px 10px -6px rgb(0 0 0 / 0.1)",
+    "2xl": "0 25px 50px -12px rgb(0 0 0 / 0.25)",
+    "inner": "inset 0 2px 4px 0 rgb(0 0 0 / 0.05)",
+    "none": "0 0 #0000",
+}
+BLURS = {
+    "none": "0", "sm": "4px", "": "8px", "md": "12px", "lg": "16px",
+    "xl": "24px", "2xl": "40px", "3xl": "64px",
+}
+BORDER_WIDTHS = {"0": "0px", "2": "2px", "4": "4px", "8": "8px"}
+RING_WIDTHS = {"0": "0px", "1": "1px", "2": "2px", "4": "4px", "8": "8px"}
+OPACITIES = {str(n): f"{n / 100:g}" for n in range(0, 101, 5)}
+SCALES = {n: f"{int(n) / 100:g}" for n in ("0", "50", "75", "90", "95", "100", "105", "110", "125", "150")}
+ROTATIONS = {n: f"{n}deg" for n in ("0", "1", "2", "3", "6", "12", "45", "90", "180")}
+DURATIONS = {n: f"{n}ms" for n in ("0", "75", "100", "150", "200", "300", "500", "700", "1000")}
+Z_INDEX = {"auto": "auto", **{n: n for n in ("0", "10", "20", "30", "40", "50")}}
+
+_TRANSFORM = (
+    "transform:translate(var(--tw-translate-x), var(--tw-translate-y)) rotate(var(--tw-rotate)) "
+    "skewX(var(--tw-skew-x)) skewY(var(--tw-skew-y)) scaleX(var(--tw-scale-x)) scaleY(var(--tw-scale-y))"
+)
+_SHADOW = "box-shadow:var(--tw-ring-offset-shadow, 0 0 #0000), var(--tw-ring-shadow, 0 0 #0000), var(--tw-shadow)"
+_TRANSITION_TIMING = ("transition-timing-function:cubic-bezier(0.4, 0, 0.2, 1)", "transition-duration:150ms")
+_SPACE_SUFFIX = " > :not([hidden]) ~ :not([hidden])"
+
+PREFLIGHT = """\
+*,::before,::after{box-sizing:border-box;border-width:0;border-style:solid;border-color:#e5e7eb}
+::before,::after{--tw-content:''}
+html,:host{line-height:1.5;-webkit-text-size-adjust:100%;-moz-tab-size:4;tab-size:4;font-family:ui-sans-serif, system-ui, sans-serif, "Apple Color Emoji", "Segoe UI Emoji", "Segoe UI Symbol", "Noto Color Emoji";font-feature-settings:normal;font-variation-settings:normal;-webkit-tap-highlight-color:transparent}
+body{margin:0;line-height:inherit}
+hr{height:0;color:inherit;border-top-width:1px}
+abbr:where([title]){-webkit-text-decoration:underline dotted;text-decoration:underline dotted}
+h1,h2,h3,h4,h5,h6{font-size:inherit;font-weight:inherit}
+a{color:inherit;text-decoration:inherit}
+b,strong{font-weight:bolder}
+code,kbd,samp,pre{font-family:ui-monospace, SFMono-Regular, Menlo, Monaco, Consolas, "Liberation Mono", "Courier New", monospace;font-feature-settings:normal;font-variation-settings:normal;font-size:1em}
+small{font-size:80%}
+sub,sup{font-size:75%;line-height:0;position:relative;vertical-align:baseline}
+sub{bottom:-0.25em}
+sup{top:-0.5em}
+table{text-indent:0;border-color:inherit;border-collapse:collapse}
+button,input,optgroup,select,textarea{font-family:inherit;font-feature-settings:inherit;font-variation-settings:inherit;font-size:100%;font-weight:inherit;line-height:inherit;letter-spacing:inherit;color:inherit;margin:0;padding:0}
+button,select{text-transform:none}
+button,input:where([type='button']),input:where([type='reset']),input:where([type='submit']){-webkit-appearance:button;background-color:transparent;background-image:none}
+:-moz-focusring{outline:auto}
+:-moz-ui-invalid{box-shadow:none}
+progress{vertical-align:baseline}
+::-webkit-inner-spin-button,::-webkit-outer-spin-button{height:auto}
+[type='search']{-webkit-appearance:textfield;outline-offset:-2px}
+::-webkit-search-decoration{-webkit-appearance:none}
+::-webkit-file-upload-button{-webkit-appearance:button;font:inherit}
+summary{display:list-item}
+blockquote,dl,dd,h1,h2,h3,h4,h5,h6,hr,figure,p,pre{margin:0}
+fieldset{margin:0;padding:0}
+legend{padding:0}
+ol,ul,menu{list-style:none;margin:0;padding:0}
+dialog{padding:0}
+textarea{resize:vertical}
+input::placeholder,textarea::placeholder{opacity:1;color:#9ca3af}
+button,[role="button"]{cursor:pointer}
+:disabled{cursor:default}
+img,svg,video,canvas,audio,iframe,embed,object{display:block;vertical-align:middle}
+img,video{max-width:100%;height:auto}
+[hidden]:where(:not([hidden="until-found"])){display:none}
+*,::before,::after,::backdrop{--tw-translate-x:0;--tw-translate-y:0;--tw-rotate:0;--tw-skew-x:0;--tw-skew-y:0;--tw-scale-x:1;--tw-scale-y:1;--tw-ring-inset: ;--tw-ring-offset-width:0px;--tw-ring-offset-color:#fff;--tw-ring-color:rgb(59 130 246 / 0.5);--tw-ring-offset-shadow:0 0 #0000;--tw-ring-shadow:0 0 #0000;--tw-shadow:0 0 #0000}
+"""
+
+KEYFRAMES = {
+    "spin": "@keyframes spin{to{transform:rotate(360deg)}}",
+    "ping": "@keyframes ping{75%,100%{transform:scale(2);opacity:0}}",
+    "pulse": "@keyframes pulse{50%{opacity:.5}}",
+    "bounce": (
+        "@keyframes bounce{0%,100%{transform:translateY(-25%);animation-timing-function:cubic-bezier(0.8,0,1,1)}"
+        "50%{transform:none;animation-timing-function:cubic-bezier(0,0,0.2,1)}}"
+    ),
+}
+
+# Tokens Tailwind's scanner would find: class-ish runs of characters
+_CANDIDATE = re.compile(r"[A-Za-z0-9_\-:/.\[\]#%!]+")
+_CLASS_ATTRIBUTE = re.compile(r"\bclass(?:Name)?\s*=\s*(?:\"([^\"]*)\"|'([^']*)'|(\{))")
+_STRING_LITERAL = re.compile(r"\"((?:[^\"\\\n]|\\.)*)\"|'((?:[^'\\\n]|\\.)*)'")
+_TEMPLATE_LITERAL = re.compile(r"`((?:[^`\\]|\\.)*)`", re.S)
+_INTERPOLATION = re.compile(r"\$\{[^{}]*\}")
+_CALC_OPERATOR = re.compile(r"(?<=[\d%)a-z])([+-])(?=[\d(.])")
+
+Declarations = List[str]
+Handler = Callable[[str, bool], Optional[Declarations]]
+
+
+@dataclass(frozen=True)
+class CompiledClass:
+    """One class compiled to a CSS rule"""
+
+    selector: str
+    declarations: Tuple[str, ...]
+    screen: int  # 0 = no breakpoint, else index into SCREENS (1-based)
+    dark: bool
+    sort_key: Tuple[int, int, str]
+    keyframes: Optional[str] = None
+
+
+# -- value helpers --
+
+def _arbitrary(value: str) -> Optional[str]:
+    """Return the CSS value of an arbitrary `[...]` value, or None"""
+    if len(value) < 3 or value[0] != "[" or value[-1] != "]":
+        return None
+    inner = value[1:-1].replace("_", " ")
+    # Never let a class name close the rule or the style element
+    if any(char in inner for char in ";{}<>\\") or "/*" in inner:
+        return None
+    if "calc(" in inner:
+        # calc() needs whitespace around + and -, which class names cannot contain
+        inner = _CALC_OPERATOR.sub(r" \1 ", inner)
+    return inner
+
+
+def _lookup(value: str, *scales: Dict[str, str]) -> Optional[str]:
+    for scale in scales:
+        if value in scale:
+            return scale[value]
+    return _arbitrary(value)
+
+
+def _negate(value: str) -> Optional[str]:
+    if value in ("0px", "0"):
+        return value
+    if value[0].isdigit() or value[0] == ".":
+        return "-" + value
+    if value.startswith("-"):
+        return value[1:]
+    if value[0].isalpha() and not value.startswith(("calc", "var")):
+        return None  # auto, min-content, ...
+    return f"calc({value} * -1)"
+
+
+def _hex_to_rgb(hex_value: str) -> Optional[Tuple[int, int, int]]:
+    if len(hex_value) == 3:
+        hex_value = "".join(char * 2 for char in hex_value)
+    if len(hex_value) != 6 or not re.fullmatch(r"[0-9a-fA-F]{6}", hex_value):
+        return None
+    return int(hex_value[0:2], 16), int(hex_value[2:4], 16), int(hex_value[4:6], 16)
+
+
+def _looks_like_color(value: str) -> bool:
+    return value.startswith(("#", "rgb(", "rgba(", "hsl(", "hsla("))
+
+
+def _color(value: str) -> Optional[Tuple[str, Optional[Tuple[int, int, int]], Optional[str]]]:
+    """
+    Parse a color value with an optional /opacity modifier.
+
+    Returns:
+        (css color, rgb channels if known, alpha) or None if not a color
+    """
+    color, _, modifier = value.partition("/")
+    alpha = None
+    if modifier:
+        if modifier in OPACITIES:
+            alpha = OPACITIES[modifier]
+        else:
+            alpha = _arbitrary(modifier)
+            if alpha is None:
+                return None
+    if color in COLORS:
+        rgb = _hex_to_rgb(COLORS[color])
+        return f"#{COLORS[color]}", rgb, alpha
+    if color in _COLOR_KEYWORDS:
+        return (_COLOR_KEYWORDS[color], None, None) if alpha is None else None
+    arbitrary = _arbitrary(color)
+    if arbitrary is None or not _looks_like_color(arbitrary):
+        return None
+    rgb = _hex_to_rgb(arbitrary[1:]) if arbitrary.startswith("#") else None
+    if rgb is None and alpha is not None:
+        return None
+    return arbitrary, rgb, alpha
+
+
+def _color_declarations(properties: Iterable[str], value: str, opacity_var: Optional[str] = None) -> Optional[Declarations]:
+    parsed = _color(value)
+    if parsed is None:
+        return None
+    css, rgb, alpha = parsed
+    if rgb is None:
+        return [f"{prop}:{css}" for prop in properties]
+    channels = " ".join(str(channel) for channel in rgb)
+    if alpha is not None:
+        return [f"{prop}:rgb({channels} / {alpha})" for prop in properties]
+    if opacity_var is None:
+        return [f"{prop}:rgb({channels})" for prop in properties]
+    return [f"--tw-{opacity_var}:1"] + [
+        f"{prop}:rgb({channels} / var(--tw-{opacity_var}))" for prop in properties
+    ]
+
+
+def _transparent(value: str) -> Optional[str]:
+    """The fully transparent version of a gradient stop color"""
+    parsed = _color(value)
+    if parsed is None:
+        return None
+    css, rgb, _ = parsed
+    if rgb is None:
+        return "rgb(255 255 255 / 0)" if css in ("transparent", "currentColor", "inherit") else None
+    return f"rgb({' '.join(str(channel) for channel in rgb)} / 0)"
+
+
+def _stop(value: str) -> Optional[str]:
+    parsed = _color(value)
+    if parsed is None:
+        return None
+    css, rgb, alpha = parsed
+    if rgb is not None and alpha is not None:
+        return f"rgb({' '.join(str(channel) for channel in rgb)} / {alpha})"
+    return css
+
+
+# -- handler factories --
+
+def _scaled(properties: Iterable[str], *scales: Dict[str, str], negative: bool = False, extra: Iterable[str] = ()) -> Handler:
+    """Handler mapping a theme scale (or arbitrary value) to one or more properties"""
+    properties = tuple(properties)
+    extra = tuple(extra)
+
+    def handler(value: str, is_negative: bool) -> Optional[Declarations]:
+        if is_negative and not negative:
+            return None
+        css = _lookup(value, *scales)
+        if css is None:
+            return None
+        if is_negative:
+            css = _negate(css)
+            if css is None:
+                return None
+        return [f"{prop}:{css}" for prop in properties] + list(extra)
+
+    return handler
+
+
+def _colored(properties: Iterable[str], opacity_var: Optional[str] = None) -> Handler:
+    properties = tuple(properties)
+
+    def handler(value: str, is_negative: bool) -> Optional[Declarations]:
+        return None if is_negative else _color_declarations(properties, value, opacity_var)
+
+    return handler
+
+
+def _either(*handlers: Handler) -> Handler:
+    def handler(value: str, is_negative: bool) -> Optional[Declarations]:
+        for candidate in handlers:
+            declarations = candidate(value, is_negative)
+            if declarations is not None:
+                return declarations
+        return None
+
+    return handler
+
+
+def _transform(variables: Iterable[str], *scales: Dict[str, str]) -> Handler:
+    return _scaled((f"--tw-{name}" for name in variables), *scales, negative=True, extra=(_TRANSFORM,))
+
+
+def _text(value: str, is_negative: bool) -> Optional[Declarations]:
+    if is_negative:
+        return None
+    if value in FONT_SIZES:
+        size, line_height = FONT_SIZES[value]
+        return [f"font-size:{size}", f"line-height:{line_height}"]
+    arbitrary = _arbitrary(value)
+    if arbitrary is not None and not _looks_like_color(arbitrary):
+        return [f"font-size:{arbitrary}"]
+    return _color_declarations(["color"], value, "text-opacity")
+
+
+def _background(value: str, is_negative: bool) -> Optional[Declarations]:
+    if is_negative:
+        return None
+    arbitrary = _arbitrary(value)
+    if arbitrary is not None and arbitrary.startswith("url("):
+        return [f"background-image:{arbitrary}"]
+    return _color_declarations(["background-color"], value, "bg-opacity")
+
+
+def _border(properties: Iterable[str]) -> Handler:
+    properties = tuple(properties)
+    widths = _scaled((f"{prop}-width" for prop in properties), BORDER_WIDTHS)
+    colors = _colored((f"{prop}-color" for prop in properties), "border-opacity")
+
+    def handler(value: str, is_negative: bool) -> Optional[Declarations]:
+        arbitrary = _arbitrary(value)
+        if arbitrary is not None and not _looks_like_color(arbitrary):
+            return widths(value, is_negative)
+        return widths(value, is_negative) if value in BORDER_WIDTHS else colors(value, is_negative)
+
+    return handler
+
+
+def _rounded(corners: Iterable[str]) -> Handler:
+    return _scaled((f"border-{corner}-radius" for corner in corners), RADII)
+
+
+def _shadow(value: str, is_negative: bool) -> Optional[Declarations]:
+    if is_negative or value not in SHADOWS:
+        return None
+    return [f"--tw-shadow:{SHADOWS[value]}", _SHADOW]
+
+
+def _ring_width(width: str) -> Declarations:
+    return [
+        "--tw-ring-offset-shadow:var(--tw-ring-inset) 0 0 0 var(--tw-ring-offset-width) var(--tw-ring-offset-color)",
+        f"--tw-ring-shadow:var(--tw-ring-inset) 0 0 0 calc({width} + var(--tw-ring-offset-width)) var(--tw-ring-color)",
+        "box-shadow:var(--tw-ring-offset-shadow), var(--tw-ring-shadow), var(--tw-shadow, 0 0 #0000)",
+    ]
+
+
+def _ring(value: str, is_negative: bool) -> Optional[Declarations]:
+    if is_negative:
+        return None
+    if value in RING_WIDTHS:
+        return _ring_width(RING_WIDTHS[value])
+    return _color_declarations(["--tw-ring-color"], value, "ring-opacity")
+
+
+def _ring_offset(value: str, is_negative: bool) -> Optional[Declarations]:
+    if is_negative:
+        return None
+    if value in RING_WIDTHS:
+        return [f"--tw-ring-offset-width:{RING_WIDTHS[value]}"]
+    return _color_declarations(["--tw-ring-offset-color"], value)
+
+
+def _gradient_from(value: str, is_negative: bool) -> Optional[Declarations]:
+    stop, transparent = _stop(value), _transparent(value)
+    if is_negative or stop is None or transparent is None:
+        return None
+    return [
+        f"--tw-gradient-from:{stop}",
+        f"--tw-gradient-to:{transparent}",
+        "--tw-gradient-stops:var(--tw-gradient-from), var(--tw-gradient-to)",
+    ]
+
+
+def _gradient_via(value: str, is_negative: bool) -> Optional[Declarations]:
+    stop, transparent = _stop(value), _transparent(value)
+    if is_negative or stop is None or transparent is None:
+        return None
+    return [
+        f"--tw-gradient-to:{transparent}",
+        f"--tw-gradient-stops:var(--tw-gradient-from), {stop}, var(--tw-gradient-to)",
+    ]
+
+
+def _gradient_to(value: str, is_negative: bool) -> Optional[Declarations]:
+    stop = _stop(value)
+    return None if is_negative or stop is None else [f"--tw-gradient-to:{stop}"]
+
+
+def _grid_template(prop: str) -> Handler:
+    def handler(value: str, is_negative: bool) -> Optional[Declarations]:
+        if is_negative:
+            return None
+        if value.isdigit() and 1 <= int(value) <= 12:
+            return [f"{prop}:repeat({value}, minmax(0, 1fr))"]
+        if value == "none":
+            return [f"{prop}:none"]
+        arbitrary = _arbitrary(value)
+        return None if arbitrary is None else [f"{prop}:{arbitrary}"]
+
+    return handler
+
+
+def _span(prop: str) -> Handler:
+    def handler(value: str, is_negative: bool) -> Optional[Declarations]:
+        if is_negative:
+            return None
+        if value.isdigit() and 1 <= int(value) <= 12:
+            return [f"{prop}:span {value} / span {value}"]
+        if value == "full":
+            return [f"{prop}:1 / -1"]
+        return None
+
+    return handler
+
+
+def _line(prop: str) -> Handler:
+    def handler(value: str, is_negative: bool) -> Optional[Declarations]:
+        if is_negative or not (value == "auto" or (value.isdigit() and 1 <= int(value) <= 13)):
+            return None
+        return [f"{prop}:{value}"]
+
+    return handler
+
+
+def _integer(prop: str, low: int, high: int, negative: bool = False) -> Handler:
+    def handler(value: str, is_negative: bool) -> Optional[Declarations]:
+        if (is_negative and not negative) or not value.isdigit() or not low <= int(value) <= high:
+            return None
+        return [f"{prop}:{'-' if is_negative else ''}{value}"]
+
+    return handler
+
+
+def _line_clamp(value: str, is_negative: bool) -> Optional[Declarations]:
+    if is_negative or not value.isdigit() or not 1 <= int(value) <= 6:
+        return None
+    return [
+        "overflow:hidden",
+        "display:-webkit-box",
+        "-webkit-box-orient:vertical",
+        f"-webkit-line-clamp:{value}",
+    ]
+
+
+# -- registry --
+
+# Static utilities: class name -> (family, declarations)
+_STATIC: Dict[str, Tuple[str, Declarations]] = {}
+# Functional utilities: prefix -> (family, handler)
+_FUNCTIONAL: Dict[str, Tuple[str, Handler]] = {}
+# Families whose rule targets children or a pseudo-element
+_SUFFIXES = {
+    "space": _SPACE_SUFFIX, "divide-width": _SPACE_SUFFIX, "divide": _SPACE_SUFFIX, "placeholder": "::placeholder",
+}
+_ANIMATIONS = {
+    "animate-spin": "spin", "animate-ping": "ping", "animate-pulse": "pulse", "animate-bounce": "bounce",
+}
+
+# Families in Tailwind's utility order, so later families win conflicts like `p-4 px-2`
+_FAMILY_ORDER = [
+    "container", "sr-only", "pointer-events", "visibility", "position", "inset", "inset-axis", "inset-side",
+    "isolation", "z", "order", "grid-column", "grid-column-line", "grid-row", "grid-row-line", "float", "clear",
+    "margin", "margin-axis", "margin-side", "box-sizing", "line-clamp", "display", "aspect", "size", "height",
+    "max-height", "min-height", "width", "min-width", "max-width", "flex", "flex-shrink", "flex-grow",
+    "flex-basis", "transform-origin", "translate", "rotate", "scale", "transform", "animation", "cursor",
+    "user-select", "resize", "list-style-position", "list-style-type", "appearance", "grid-template-columns",
+    "grid-template-rows", "flex-direction", "flex-wrap", "place-content", "place-items", "align-content",
+    "align-items", "justify-content", "justify-items", "gap", "gap-axis", "space", "divide-width",
+    "divide", "place-self", "align-self", "justify-self", "overflow", "overflow-axis", "scroll-behavior",
+    "text-overflow", "whitespace", "word-break", "rounded", "rounded-side", "rounded-corner", "border-width",
+    "border-side", "border-style", "border-color", "background-color", "background-image", "gradient-from",
+    "gradient-via", "gradient-to", "background-size", "background-attachment", "background-clip",
+    "background-position", "background-repeat", "fill", "stroke", "object-fit", "object-position",
+    "padding", "padding-axis", "padding-side", "text-align", "vertical-align", "font-family", "font-size",
+    "font-weight", "text-transform", "font-style", "line-height", "letter-spacing", "text-color",
+    "text-decoration", "underline-offset", "font-smoothing", "placeholder", "opacity", "shadow", "outline",
+    "ring-width", "ring-color", "ring-offset", "blur", "backdrop-blur", "transition", "delay", "duration",
+    "ease",
+]
+_FAMILY_RANK = {family: rank for rank, family in enumerate(_FAMILY_ORDER)}
+
+# First segments of Tailwind utilities this module does not implement; classes starting with
+# them are reported as unsupported rather than ignored as custom class names
+_OTHER_TAILWIND_PREFIXES = {
+    "accent", "align", "auto", "backdrop", "box", "brightness", "break", "caret", "col", "columns",
+    "contrast", "decoration", "drop", "grayscale", "hue", "hyphens", "indent", "invert", "mix", "outline",
+    "row", "saturate", "scroll", "sepia", "skew", "snap", "table", "touch", "will", "content", "end",
+    "start", "line", "grid", "from", "via", "to", "bg", "text", "font", "border", "shadow", "ring",
+}
+# Class names with a meaning to Tailwind but no CSS of their own
+_MARKERS = {"group", "peer", "dark"}
+
+
+def _static(family: str, names: Dict[str, Declarations]) -> None:
+    for name, declarations in names.items():
+        _STATIC[name] = (family, declarations)
+
+
+def _functional(family: str, prefixes: Iterable[str], handler: Handler) -> None:
+    for prefix in prefixes:
+        _FUNCTIONAL[prefix] = (family, handler)
+
+
+def _register() -> None:
+    sides = {"t": ("top",), "r": ("right",), "b": ("bottom",), "l": ("left",)}
+    axes = {"x": ("left", "right"), "y": ("top", "bottom")}
+    corners = {
+        "t": ("top-left", "top-right"), "r": ("top-right", "bottom-right"),
+        "b": ("bottom-right", "bottom-left"), "l": ("top-left", "bottom-left"),
+        "tl": ("top-left",), "tr": ("top-right",), "br": ("bottom-right",), "bl": ("bottom-left",),
+    }
+    inset = {**SPACING, **_SIZES, **FRACTIONS}
+
+    _static("sr-only", {
+        "sr-only": ["position:absolute", "width:1px", "height:1px", "padding:0", "margin:-1px", "overflow:hidden",
+                    "clip:rect(0, 0, 0, 0)", "white-space:nowrap", "border-width:0"],
+        "not-sr-only": ["position:static", "width:auto", "height:auto", "padding:0", "margin:0",
+                        "overflow:visible", "clip:auto", "white-space:normal"],
+    })
+    _static("pointer-events", {f"pointer-events-{v}": [f"pointer-events:{v}"] for v in ("none", "auto")})
+    _static("visibility", {"visible": ["visibility:visible"], "invisible": ["visibility:hidden"],
+                           "collapse": ["visibility:collapse"]})
+    _static("position", {v: [f"position:{v}"] for v in ("static", "fixed", "absolute", "relative", "sticky")})
+    _functional("inset", ["inset"], _scaled(["inset"], inset, negative=True))
+    _functional("inset-axis", ["inset-x"], _scaled(["left", "right"], inset, negative=True))
+    _functional("inset-axis", ["inset-y"], _scaled(["top", "bottom"], inset, negative=True))
+    for side in ("top", "right", "bottom", "left"):
+        _functional("inset-side", [side], _scaled([side], inset, negative=True))
+    _static("isolation", {"isolate": ["isolation:isolate"], "isolation-auto": ["isolation:auto"]})
+    _functional("z", ["z"], _scaled(["z-index"], Z_INDEX, negative=True))
+    _static("order", {"order-first": ["order:-9999"], "order-last": ["order:9999"], "order-none": ["order:0"]})
+    _functional("order", ["order"], _integer("order", 1, 12, negative=True))
+    _functional("grid-column", ["col-span"], _span("grid-column"))
+    _functional("grid-column-line", ["col-start"], _line("grid-column-start"))
+    _functional("grid-column-line", ["col-end"], _line("grid-column-end"))
+    _functional("grid-row", ["row-span"], _span("grid-row"))
+    _functional("grid-row-line", ["row-start"], _line("grid-row-start"))
+    _functional("grid-row-line", ["row-end"], _line("grid-row-end"))
+    _static("float", {f"float-{v}": [f"float:{v}"] for v in ("left", "right", "none")})
+    _static("clear", {f"clear-{v}": [f"clear:{v}"] for v in ("left", "right", "both", "none")})
+
+    margin = {**SPACING, "auto": "auto"}
+    _functional("margin", ["m"], _scaled(["margin"], margin, negative=True))
+    for axis, props in axes.items():
+        _functional("margin-axis", [f"m{axis}"], _scaled([f"margin-{p}" for p in props], margin, negative=True))
+    for side, props in sides.items():
+        _functional("margin-side", [f"m{side}"], _scaled([f"margin-{p}" for p in props], margin, negative=True))
+
+    _static("box-sizing", {"box-border": ["box-sizing:border-box"], "box-content": ["box-sizing:content-box"]})
+    _functional("line-clamp", ["line-clamp"], _line_clamp)
+    _static("line-clamp", {"line-clamp-none": ["overflow:visible", "display:block", "-webkit-box-orient:horizontal",
+                                               "-webkit-line-clamp:none"]})
+    _static("display", {
+        **{v: [f"display:{v}"] for v in ("block", "inline-block", "inline", "flex", "inline-flex", "grid",
+                                         "inline-grid", "table", "contents", "flow-root", "list-item")},
+        "table-row": ["display:table-row"], "table-cell": ["display:table-cell"], "hidden": ["display:none"],
+    })
+    _static("aspect", {"aspect-auto": ["aspect-ratio:auto"], "aspect-square": ["aspect-ratio:1 / 1"],
+                       "aspect-video": ["aspect-ratio:16 / 9"]})
+    _functional("aspect", ["aspect"], _scaled(["aspect-ratio"]))
+
+    _functional("size", ["size"], _scaled(["width", "height"], SPACING, _SIZES, FRACTIONS))
+    _functional("height", ["h"], _scaled(["height"], SPACING, _SIZES, FRACTIONS,
+                                         {"screen": "100vh", "svh": "100svh", "lvh": "100lvh", "dvh": "100dvh"}))
+    _functional("max-height", ["max-h"], _scaled(["max-height"], SPACING, _SIZES,
+                                                 {"none": "none", "screen": "100vh", "dvh": "100dvh"}))
+    _functional("min-height", ["min-h"], _scaled(["min-height"], SPACING, _SIZES,
+                                                 {"screen": "100vh", "svh": "100svh", "dvh": "100dvh"}))
+    _functional("width", ["w"], _scaled(["width"], SPACING, _SIZES, FRACTIONS,
+                                        {"screen": "100vw", "svw": "100svw", "dvw": "100dvw"}))
+    _functional("min-width", ["min-w"], _scaled(["min-width"], SPACING, _SIZES))
+    _functional("max-width", ["max-w"], _scaled(["max-width"], MAX_WIDTHS, SPACING))
+
+    _static("flex", {"flex-1": ["flex:1 1 0%"], "flex-auto": ["flex:1 1 auto"], "flex-initial": ["flex:0 1 auto"],
+                     "flex-none": ["flex:none"]})
+    _static("flex-shrink", {"shrink": ["flex-shrink:1"], "shrink-0": ["flex-shrink:0"],
+                            "flex-shrink": ["flex-shrink:1"], "flex-shrink-0": ["flex-shrink:0"]})
+    _static("flex-grow", {"grow": ["flex-grow:1"], "grow-0": ["flex-grow:0"],
+                          "flex-grow": ["flex-grow:1"], "flex-grow-0": ["flex-grow:0"]})
+    _functional("flex-basis", ["basis"], _scaled(["flex-basis"], SPACING, _SIZES, FRACTIONS))
+
+    _static("transform-origin", {
+        f"origin-{name}": [f"transform-origin:{name.replace('-', ' ')}"]
+        for name in ("center", "top", "top-right", "right", "bottom-right", "bottom", "bottom-left", "left",
+                     "top-left")
+    })
+    translate = {**SPACING, **FRACTIONS, "full": "100%"}
+    _functional("translate", ["translate-x"], _transform(["translate-x"], translate))
+    _functional("translate", ["translate-y"], _transform(["translate-y"], translate))
+    _functional("rotate", ["rotate"], _transform(["rotate"], ROTATIONS))
+    _functional("scale", ["scale"], _transform(["scale-x", "scale-y"], SCALES))
+    _functional("scale", ["scale-x"], _transform(["scale-x"], SCALES))
+    _functional("scale", ["scale-y"], _transform(["scale-y"], SCALES))
+    _static("transform", {"transform": [_TRANSFORM], "transform-gpu": [_TRANSFORM],
+                          "transform-none": ["transform:none"]})
+    _static("animation", {
+        "animate-none": ["animation:none"],
+        "animate-spin": ["animation:spin 1s linear infinite"],
+        "animate-ping": ["animation:ping 1s cubic-bezier(0, 0, 0.2, 1) infinite"],
+        "animate-pulse": ["animation:pulse 2s cubic-bezier(0.4, 0, 0.6, 1) infinite"],
+        "animate-bounce": ["animation:bounce 1s infinite"],
+    })
+    _static("cursor", {f"cursor-{v}": [f"cursor:{v}"] for v in (
+        "auto", "default", "pointer", "wait", "text", "move", "help", "not-allowed", "none", "grab",
+        "grabbing", "crosshair", "zoom-in", "zoom-out",
+    )})
+    _static("user-select", {f"select-{v}": [f"-webkit-user-select:{v}", f"user-select:{v}"]
+                            for v in ("none", "text", "all", "auto")})
+    _static("resize", {"resize": ["resize:both"], "resize-none": ["resize:none"], "resize-x": ["resize:horizontal"],
+                       "resize-y": ["resize:vertical"]})
+    _static("list-style-position", {"list-inside": ["list-style-position:inside"],
+                                    "list-outside": ["list-style-position:outside"]})
+    _static("list-style-type", {f"list-{v}": [f"list-style-type:{v}"] for v in ("none", "disc", "decimal")})
+    _static("appearance", {"appearance-none": ["-webkit-appearance:none", "-moz-appearance:none",
+                                               "appearance:none"]})
+    _functional("grid-template-columns", ["grid-cols"], _grid_template("grid-template-columns"))
+    _functional("grid-template-rows", ["grid-rows"], _grid_template("grid-template-rows"))
+    _static("flex-direction", {"flex-row": ["flex-direction:row"], "flex-row-reverse": ["flex-direction:row-reverse"],
+                               "flex-col": ["flex-direction:column"],
+                               "flex-col-reverse": ["flex-direction:column-reverse"]})
+    _static("flex-wrap", {"flex-wrap": ["flex-wrap:wrap"], "flex-wrap-reverse": ["flex-wrap:wrap-reverse"],
+                          "flex-nowrap": ["flex-wrap:nowrap"]})
+    _static("place-content", {f"place-content-{v}": [f"place-content:{v}"] for v in ("center", "start", "end",
+                                                                                     "stretch")})
+    _static("place-items", {f"place-items-{v}": [f"place-items:{v}"] for v in ("center", "start", "end", "stretch")})
+    flex_positions = {"start": "flex-start", "end": "flex-end", "center": "center", "between": "space-between",
+                      "around": "space-around", "evenly": "space-evenly"}
+    _static("align-content", {f"content-{k}": [f"align-content:{v}"] for k, v in flex_positions.items()})
+    _static("align-items", {f"items-{k}": [f"align-items:{v}"] for k, v in {
+        "start": "flex-start", "end": "flex-end", "center": "center", "baseline": "baseline", "stretch": "stretch",
+    }.items()})
+    _static("justify-content", {f"justify-{k}": [f"justify-content:{v}"] for k, v in flex_positions.items()})
+    _static("justify-items", {f"justify-items-{v}": [f"justify-items:{v}"] for v in ("start", "end", "center",
+                                                                                     "stretch")})
+    _functional("gap", ["gap"], _scaled(["gap"], SPACING))
+    _functional("gap-axis", ["gap-x"], _scaled(["column-gap"], SPACING))
+    _functional("gap-axis", ["gap-y"], _scaled(["row-gap"], SPACING))
+    _functional("space", ["space-x"], _scaled(["margin-left"], SPACING, negative=True))
+    _functional("space", ["space-y"], _scaled(["margin-top"], SPACING, negative=True))
+    _static("divide-width", {"divide-x": ["border-right-width:0px", "border-left-width:1px"],
+                             "divide-y": ["border-top-width:1px", "border-bottom-width:0px"]})
+    _functional("divide-width", ["divide-x"], _scaled(["border-left-width"], BORDER_WIDTHS,
+                                                      extra=["border-right-width:0px"]))
+    _functional("divide-width", ["divide-y"], _scaled(["border-top-width"], BORDER_WIDTHS,
+                                                      extra=["border-bottom-width:0px"]))
+    _functional("divide", ["divide"], _colored(["border-color"], "divide-opacity"))
+    _static("place-self", {f"place-self-{v}": [f"place-self:{v}"] for v in ("auto", "start", "end", "center",
+                                                                            "stretch")})
+    _static("align-self", {f"self-{k}": [f"align-self:{v}"] for k, v in {
+        "auto": "auto", "start": "flex-start", "end": "flex-end", "center": "center", "stretch": "stretch",
+        "baseline": "baseline",
+    }.items()})
+    _static("justify-self", {f"justify-self-{v}": [f"justify-self:{v}"] for v in ("auto", "start", "end", "center",
+                                                                                  "stretch")})
+    overflow = ("auto", "hidden", "clip", "visible", "scroll")
+    _static("overflow", {f"overflow-{v}": [f"overflow:{v}"] for v in overflow})
+    _static("overflow-axis", {f"overflow-{a}-{v}": [f"overflow-{a}:{v}"] for a in "xy" for v in overflow})
+    _static("scroll-behavior", {"scroll-smooth": ["scroll-behavior:smooth"], "scroll-auto": ["scroll-behavior:auto"]})
+    _static("text-overflow", {
+        "truncate": ["overflow:hidden", "text-overflow:ellipsis", "white-space:nowrap"],
+        "text-ellipsis": ["text-overflow:ellipsis"], "text-clip": ["text-overflow:clip"],
+    })
+    _static("whitespace", {f"whitespace-{v}": [f"white-space:{v}"] for v in ("normal", "nowrap", "pre", "pre-line",
+                                                                             "pre-wrap", "break-spaces")})
+    _static("word-break", {"break-normal": ["overflow-wrap:normal", "word-break:normal"],
+                           "break-words": ["overflow-wrap:break-word"], "break-all": ["word-break:break-all"],
+                           "break-keep": ["word-break:keep-all"]})
+
+    _static("rounded", {"rounded": [f"border-radius:{RADII['']}"]})
+    _functional("rounded", ["rounded"], _scaled(["border-radius"], RADII))
+    for side, names in corners.items():
+        family = "rounded-side" if len(side) == 1 else "rounded-corner"
+        _static(family, {f"rounded-{side}": [f"border-{corner}-radius:{RADII['']}" for corner in names]})
+        _functional(family, [f"rounded-{side}"], _rounded(names))
+
+    _static("border-width", {"border": ["border-width:1px"]})
+    _functional("border-width", ["border"], _border(["border"]))
+    for name, props in {**axes, **sides}.items():
+        properties = [f"border-{p}" for p in props]
+        _static("border-side", {f"border-{name}": [f"{p}-width:1px" for p in properties]})
+        _functional("border-side", [f"border-{name}"], _border(properties))
+    _static("border-style", {f"border-{v}": [f"border-style:{v}"] for v in ("solid", "dashed", "dotted", "double",
+                                                                            "hidden", "none")})
+    _functional("border-color", ["border-opacity"], _scaled(["--tw-border-opacity"], OPACITIES))
+
+    _functional("background-color", ["bg"], _background)
+    _functional("background-color", ["bg-opacity"], _scaled(["--tw-bg-opacity"], OPACITIES))
+    directions = {"t": "top", "tr": "top right", "r": "right", "br": "bottom right", "b": "bottom",
+                  "bl": "bottom left", "l": "left", "tl": "top left"}
+    _static("background-image", {
+        "bg-none": ["background-image:none"],
+        **{f"bg-gradient-to-{k}": [f"background-image:linear-gradient(to {v}, var(--tw-gradient-stops))"]
+           for k, v in directions.items()},
+    })
+    _functional("gradient-from", ["from"], _gradient_from)
+    _functional("gradient-via", ["via"], _gradient_via)
+    _functional("gradient-to", ["to"], _gradient_to)
+    _static("background-size", {f"bg-{v}": [f"background-size:{v}"] for v in ("auto", "cover", "contain")})
+    _static("background-attachment", {f"bg-{v}": [f"background-attachment:{v}"] for v in ("fixed", "local",
+                                                                                          "scroll")})
+    _static("background-clip", {
+        "bg-clip-border": ["background-clip:border-box"], "bg-clip-padding": ["background-clip:padding-box"],
+        "bg-clip-content": ["background-clip:content-box"],
+        "bg-clip-text": ["-webkit-background-clip:text", "background-clip:text"],
+    })
+    _static("background-position", {f"bg-{v}": [f"background-position:{v.replace('-', ' ')}"] for v in (
+        "bottom", "center", "left", "left-bottom", "left-top", "right", "right-bottom", "right-top", "top",
+    )})
+    _static("background-repeat", {"bg-repeat": ["background-repeat:repeat"],
+                                  "bg-no-repeat": ["background-repeat:no-repeat"],
+                                  "bg-repeat-x": ["background-repeat:repeat-x"],
+                                  "bg-repeat-y": ["background-repeat:repeat-y"]})
+    _static("fill", {"fill-none": ["fill:none"]})
+    _functional("fill", ["fill"], _colored(["fill"]))
+    _functional("stroke", ["stroke"], _colored(["stroke"]))
+    _static("object-fit", {f"object-{v}": [f"object-fit:{v}"] for v in ("contain", "cover", "fill", "none",
+                                                                         "scale-down")})
+    _static("object-position", {f"object-{v}": [f"object-position:{v.replace('-', ' ')}"] for v in (
+        "bottom", "center", "left", "right", "top",
+    )})
+
+    _functional("padding", ["p"], _scaled(["padding"], SPACING))
+    for axis, props in axes.items():
+        _functional("padding-axis", [f"p{axis}"], _scaled([f"padding-{p}" for p in props], SPACING))
+    for side, props in sides.items():
+        _functional("padding-side", [f"p{side}"], _scaled([f"padding-{p}" for p in props], SPACING))
+
+    _static("text-align", {f"text-{v}": [f"text-align:{v}"] for v in ("left", "center", "right", "justify",
+                                                                       "start", "end")})
+    _static("vertical-align", {f"align-{v}": [f"vertical-align:{v}"] for v in ("baseline", "top", "middle",
+                                                                                "bottom", "text-top",
+                                                                                "text-bottom")})
+    _static("font-family", {f"font-{k}": [f"font-family:{v}"] for k, v in FONT_FAMILIES.items()})
+    _functional("font-size", ["text"], _text)
+    _static("font-weight", {f"font-{k}": [f"font-weight:{v}"] for k, v in FONT_WEIGHTS.items()})
+    _static("text-transform", {"uppercase": ["text-transform:uppercase"], "lowercase": ["text-transform:lowercase"],
+                               "capitalize": ["text-transform:capitalize"], "normal-case": ["text-transform:none"]})
+    _static("font-style", {"italic": ["font-style:italic"], "not-italic": ["font-style:normal"]})
+    _functional("line-height", ["leading"], _scaled(["line-height"], LEADING))
+    _functional("letter-spacing", ["tracking"], _scaled(["letter-spacing"], TRACKING))
+    _functional("text-color", ["text-opacity"], _scaled(["--tw-text-opacity"], OPACITIES))
+    _static("text-decoration", {
+        "underline": ["text-decoration-line:underline"], "overline": ["text-decoration-line:overline"],
+        "line-through": ["text-decoration-line:line-through"], "no-underline": ["text-decoration-line:none"],
+    })
+    _functional("underline-offset", ["underline-offset"], _scaled(
+        ["text-underline-offset"], {"auto": "auto", **{n: f"{n}px" for n in ("0", "1", "2", "4", "8")}}
+    ))
+    _static("font-smoothing", {
+        "antialiased": ["-webkit-font-smoothing:antialiased", "-moz-osx-font-smoothing:grayscale"],
+        "subpixel-antialiased": ["-webkit-font-smoothing:auto", "-moz-osx-font-smoothing:auto"],
+    })
+    _functional("placeholder", ["placeholder"], _colored(["color"], "placeholder-opacity"))
+    _functional("opacity", ["opacity"], _scaled(["opacity"], OPACITIES))
+    _static("shadow", {"shadow": [f"--tw-shadow:{SHADOWS['']}", _SHADOW]})
+    _functional("shadow", ["shadow"], _shadow)
+    _static("outline", {"outline-none": ["outline:2px solid transparent", "outline-offset:2px"],
+                        "outline": ["outline-style:solid"]})
+    _static("ring-width", {"ring": _ring_width("3px"), "ring-inset": ["--tw-ring-inset:inset"]})
+    _functional("ring-width", ["ring"], _ring)
+    _functional("ring-color", ["ring-opacity"], _scaled(["--tw-ring-opacity"], OPACITIES))
+    _functional("ring-offset", ["ring-offset"], _ring_offset)
+    _static("blur", {"blur": [f"filter:blur({BLURS['']})"]})
+    _functional("blur", ["blur"], _scaled(["filter"], {k: f"blur({v})" for k, v in BLURS.items() if k}))
+    backdrop = {k: f"blur({v})" for k, v in BLURS.items() if k}
+    _static("backdrop-blur", {"backdrop-blur": [f"-webkit-backdrop-filter:blur({BLURS['']})",
+                                                f"backdrop-filter:blur({BLURS['']})"]})
+    _functional("backdrop-blur", ["backdrop-blur"], _scaled(["-webkit-backdrop-filter", "backdrop-filter"], backdrop))
+    transitions = {
+        "transition": "color, background-color, border-color, text-decoration-color, fill, stroke, opacity, "
+                      "box-shadow, transform, filter, backdrop-filter",
+        "transition-all": "all",
+        "transition-colors": "color, background-color, border-color, text-decoration-color, fill, stroke",
+        "transition-opacity": "opacity",
+        "transition-shadow": "box-shadow",
+        "transition-transform": "transform",
+    }
+    _static("transition", {name: [f"transition-property:{v}", *_TRANSITION_TIMING] for name, v in transitions.items()})
+    _static("transition", {"transition-none": ["transition-property:none"]})
+    _functional("delay", ["delay"], _scaled(["transition-delay"], DURATIONS))
+    _functional("duration", ["duration"], _scaled(["transition-duration"], DURATIONS))
+    _static("ease", {
+        "ease-linear": ["transition-timing-function:linear"],
+        "ease-in": ["transition-timing-function:cubic-bezier(0.4, 0, 1, 1)"],
+        "ease-out": ["transition-timing-function:cubic-bezier(0, 0, 0.2, 1)"],
+        "ease-in-out": ["transition-timing-function:cubic-bezier(0.4, 0, 0.2, 1)"],
+    })
+
+
+_register()
+# Longest prefix first, so `border-t-2` is handled by border-t rather than border
+_PREFIXES = sorted(_FUNCTIONAL, key=len, reverse=True)
+_KNOWN_FIRST_SEGMENTS = (
+    {name.split("-")[0] for name in _STATIC}
+    | {prefix.split("-")[0] for prefix in _FUNCTIONAL}
+    | _OTHER_TAILWIND_PREFIXES
+    | {"container"}
+)
+_KNOWN_FIRST_SEGMENTS.discard("")
+
+
+# -- compiler --
+
+def _resolve(utility: str) -> Optional[Tuple[str, Declarations]]:
+    """Resolve a utility (no variants) to (family, declarations)"""
+    if utility in _STATIC:
+        return _STATIC[utility]
+    negative = utility.startswith("-")
+    name = utility[1:] if negative else utility
+    for prefix in _PREFIXES:
+        if name.startswith(prefix + "-"):
+            family, handler = _FUNCTIONAL[prefix]
+            declarations = handler(name[len(prefix) + 1:], negative)
+            if declarations is not None:
+                return family, declarations
+    return None
+
+
+def _split_variants(class_name: str) -> List[str]:
+    """Split on ':' outside arbitrary-value brackets"""
+    parts, depth, start = [], 0, 0
+    for index, char in enumerate(class_name):
+        if char == "[":
+            depth += 1
+        elif char == "]":
+            depth -= 1
+        elif char == ":" and depth == 0:
+            parts.append(class_name[start:index])
+            start = index + 1
+    parts.append(class_name[start:])
+    return parts
+
+
+def escape_class(class_name: str) -> str:
+    """Escape a class name for use in a CSS selector"""
+    out = []
+    for index, char in enumerate(class_name):
+        if char.isascii() and (char.isalnum() or char in "-_"):
+            if index == 0 and char.isdigit():
+                out.append(f"\\{ord(char):x} ")
+            else:
+                out.append(char)
+        else:
+            out.append("\\" + char)
+    return "".join(out)
+
+
+@lru_cache(maxsize=16384)
+def compile_class(class_name: str) -> Optional[CompiledClass]:
+    """
+    Compile one class (with variants) to a CSS rule.
+
+    Returns:
+        The compiled rule, or None if the class is not a supported Tailwind utility
+    """
+    if not class_name or len(class_name) > 200:
+        return None
+    *variants, utility = _split_variants(class_name)
+    important = utility.startswith("!")
+    if important:
+        utility = utility[1:]
+    if utility == "container" or not utility:
+        return None  # container is emitted separately (it needs one rule per breakpoint)
+    resolved = _resolve(utility)
+    if resolved is None:
+        return None
+    family, declarations = resolved
+
+    screen, dark, rank = 0, False, 0
+    prefix, pseudo = "", ""
+    for variant in variants:
+        if variant in _SCREEN_INDEX and not screen:
+            screen = _SCREEN_INDEX[variant]
+        elif variant == "dark" and not dark:
+            dark = True
+        elif variant in _PSEUDO:
+            variant_rank, selector = _PSEUDO[variant]
+            rank = max(rank, variant_rank)
+            pseudo += selector
+        elif variant.startswith("group-") and variant[6:] in _PSEUDO and not prefix:
+            rank = max(rank, _GROUP_RANK)
+            prefix = f".group{_PSEUDO[variant[6:]][1]} "
+        else:
+            return None
+
+    if important:
+        declarations = [f"{declaration} !important" for declaration in declarations]
+    animation = _ANIMATIONS.get(utility)
+    return CompiledClass(
+        selector=f"{prefix}.{escape_class(class_name)}{pseudo}{_SUFFIXES.get(family, '')}",
+        declarations=tuple(declarations),
+        screen=screen,
+        dark=dark,
+        sort_key=(rank, _FAMILY_RANK[family], class_name),
+        keyframes=KEYFRAMES[animation] if animation else None,
+    )
+
+
+def is_supported(class_name: str) -> bool:
+    """True if the class compiles, or is a marker class such as `group` or a plain `container`"""
+    return class_name in _MARKERS or class_name == "container" or compile_class(class_name) is not None
+
+
+def looks_like_tailwind(class_name: str) -> bool:
+    """Heuristic: does a class name look like a Tailwind utility (rather than a custom class)?"""
+    if ":" in class_name or "${" in class_name:
+        return True
+    utility = class_name.lstrip("!-")
+    return utility.split("-")[0] in _KNOWN_FIRST_SEGMENTS
+
+
+def extract_candidates(content: str) -> Set[str]:
+    """All tokens that could be class names, like Tailwind's content scanner"""
+    return {token for token in _CANDIDATE.findall(content) if not token.isdigit()}
+
+
+def _expression_end(content: str, start: int) -> int:
+    """Index just past the JSX expression container starting at content[start] == '{'"""
+    depth, index, quote = 0, start, None
+    while index < len(content):
+        char = content[index]
+        if quote:
+            if char == "\\":
+                index += 1
+            elif char == quote:
+                quote = None
+        elif char in "\"'`":
+            quote = char
+        elif char == "{":
+            depth += 1
+        elif char == "}":
+            depth -= 1
+            if depth == 0:
+                return index + 1
+        index += 1
+    return len(content)
+
+
+def extract_class_attribute_tokens(content: str) -> Set[str]:
+    """
+    Tokens that appear in class / className attributes.
+
+    Static strings are split on whitespace. Inside className={...}
+    expressions every string literal counts, and a template literal
+    fragment glued to an interpolation (`bg-${color}-500`) is returned as
+    `bg-${}-500`, so a dynamically built class shows up as unsupported.
+    """
+    tokens: Set[str] = set()
+    for match in _CLASS_ATTRIBUTE.finditer(content):
+        if match.group(3) is None:
+            tokens.update((match.group(1) or match.group(2) or "").split())
+            continue
+        expression = content[match.start(3):_expression_end(content, match.start(3))]
+        literals = _TEMPLATE_LITERAL.sub(" ", expression)
+        for template in _TEMPLATE_LITERAL.findall(expression):
+            tokens.update(token for token in _INTERPOLATION.sub("${}", template).split() if token != "${}")
+            literals += " " + template
+        for literal in _STRING_LITERAL.finditer(literals):
+            tokens.update((literal.group(1) or literal.group(2) or "").split())
+    return tokens
+
+
+def generate_css(classes: Iterable[str], preflight: bool = True) -> str:
+    """
+    Build a stylesheet for the given classes (unknown classes are ignored).
+
+    Args:
+        classes: Class names used by the page
+        preflight: Include Tailwind's base styles (preflight)
+
+    Returns:
+        CSS text: preflight, then utilities in Tailwind order with media
+        queries (dark mode, then breakpoints) last
+    """
+    compiled = [rule for rule in map(compile_class, set(classes)) if rule is not None]
+    compiled.sort(key=lambda rule: (rule.screen, rule.dark, rule.sort_key))
+    classes = set(classes)
+
+    out: List[str] = [PREFLIGHT] if preflight else []
+    if "container" in classes:
+        out.append(".container{width:100%}\n")
+        out.extend(f"@media (min-width: {width}){{.container{{max-width:{width}}}}}\n" for _, width in SCREENS)
+
+    current: Optional[Tuple[int, bool]] = None
+    for rule in compiled:
+        group = (rule.screen, rule.dark)
+        if group != current:
+            if current is not None and current != (0, False):
+                out.append("}\n")
+            current = group
+            media = []
+            if rule.screen:
+                media.append(f"(min-width: {SCREENS[rule.screen - 1][1]})")
+            if rule.dark:
+                media.append("(prefers-color-scheme: dark)")
+            if media:
+                out.append(f"@media {' and '.join(media)}{{\n")
+        out.append(f"{rule.selector}{{{';'.join(rule.declarations)}}}\n")
+    if current is not None and current != (0, False):
+        out.append("}\n")
+
+    out.extend(sorted({f"{rule.keyframes}\n" for rule in compiled if rule.keyframes}))
+    return "".join(out)
+
+
+def stylesheet_key(classes: Iterable[str]) -> str:
+    """Content key of a stylesheet: hash of the (supported) class set and the generator version"""
+    digest = hashlib.sha256(GENERATOR_VERSION.encode())
+    for class_name in sorted(set(classes)):
+        digest.update(b"\0" + class_name.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class StylesheetCache:
+    """Generated stylesheets by class-set hash, in memory (LRU) and on disk"""
+
+    def __init__(self, directory: Path, max_entries: int = 256):
+        """
+        Args:
+            directory: Where stylesheets are persisted as <key>.css
+            max_entries: Stylesheets kept in memory
+        """
+        self.directory = directory
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        # Used from the site I/O pool
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_build(self, classes: Iterable[str]) -> Tuple[str, str, bool]:
+        """
+        Return the stylesheet for a class set, building it on a miss (blocking).
+
+        Returns:
+            Tuple of (key, css, cache hit)
+        """
+        classes = set(classes)
+        key = stylesheet_key(classes)
+        with self._lock:
+            css = self._entries.get(key)
+            if css is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return key, css, True
+
+        path = self.directory / f"{key}.css"
+        try:
+            css = path.read_text(encoding="utf-8")
+            hit = True
+        except OSError:
+            css = generate_css(classes)
+            hit = False
+            try:
+                self.directory.mkdir(parents=True, exist_ok=True)
+                atomic_write_text(path, css)
+            except OSError:
+                pass  # Still usable from memory
+
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+            self._entries[key] = css
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return key, css, hit
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,30 @@
+"""
+Cached reads of the static text assets shipped with the tools (system prompts,
+template.html). Entries are keyed by modification time, so edits on disk are
+still picked up without re-reading the file on every request.
+"""
+
+from functools import lru_cache
+from pathlib import Path
+
+
+@lru_cache(maxsize=32)
+def _read_text(path: str, mtime_ns: int, size: int) -> str:
+    return Path(path).read_text(encoding="utf-8")
+
+
+def read_text_cached(path: Path) -> str:
+    """
+    Read a UTF-8 text file, reusing the previous result if it has not changed.
+
+    Args:
+        path: File to read
+
+    Returns:
+        File content
+
+    Raises:
+        FileNotFoundError: If the file does not exist
+    """
+    stat = path.stat()
+    return _read_text(str(path), stat.st_mtime_ns, stat.st_size)
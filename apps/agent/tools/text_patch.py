@@ -0,0 +1,204 @@
+"""
+Pure-Python text patching used by manage_site_files' apply_edits operation.
+
+Two edit forms are supported, both applied to an in-memory string so a batch
+either succeeds as a whole or leaves the file untouched:
+
+- ordered exact-string replacements ({old_string, new_string, replace_all})
+- unified diff hunks (``@@ -a,b +c,d @@``), matched on their context lines
+  at the stated position or, failing that, the nearest matching position
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional, Tuple
+
+_HUNK_HEADER = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+
+
+class PatchError(ValueError):
+    """Raised when a unified diff cannot be parsed"""
+
+
+@dataclass
+class EditOutcome:
+    """Result of applying one replacement or diff hunk"""
+
+    index: int
+    kind: str
+    applied: bool = False
+    replacements: int = 0
+    line: Optional[int] = None
+    error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "index": self.index,
+            "kind": self.kind,
+            "applied": self.applied,
+            "replacements": self.replacements,
+            "line": self.line,
+            "error": self.error,
+        }
+
+
+@dataclass
+class Hunk:
+    """One parsed unified diff hunk"""
+
+    old_start: int
+    old_lines: List[str] = field(default_factory=list)
+    new_lines: List[str] = field(default_factory=list)
+
+
+def _line_of(content: str, index: int) -> int:
+    return content.count("\n", 0, index) + 1
+
+
+def apply_replacements(
+    content: str,
+    edits: List[Dict[str, Any]],
+    max_old_length: Optional[int] = None,
+) -> Tuple[str, List[EditOutcome]]:
+    """
+    Apply exact-string replacements in order.
+
+    Each edit sees the result of the previous ones. Without replace_all an
+    edit's old_string must match exactly once, so an ambiguous edit fails
+    instead of silently changing the wrong place. A failed edit is skipped and
+    the remaining edits are still checked, so a single call reports every
+    problem in the batch.
+
+    Args:
+        content: Current file content
+        edits: Dicts with old_string, new_string and optional replace_all
+        max_old_length: Reject old_string values longer than this
+
+    Returns:
+        Tuple of (new content, one outcome per edit)
+    """
+    outcomes = []
+    for index, edit in enumerate(edits):
+        outcome = EditOutcome(index=index, kind="replace")
+        outcomes.append(outcome)
+
+        if not isinstance(edit, dict):
+            outcome.error = "edit must be an object with old_string and new_string"
+            continue
+        old_string = edit.get("old_string")
+        new_string = edit.get("new_string")
+        if not isinstance(old_string, str) or not old_string or not isinstance(new_string, str):
+            outcome.error = "old_string (non-empty) and new_string are required"
+            continue
+        if max_old_length is not None and len(old_string) > max_old_length:
+            outcome.error = (
+                f"old_string is too long ({len(old_string)} characters, limit {max_old_length}); "
+                f"use a shorter unique anchor or a diff"
+            )
+            continue
+
+        occurrences = content.count(old_string)
+        if occurrences == 0:
+            outcome.error = "old_string not found"
+            continue
+        if occurrences > 1 and not edit.get("replace_all", False):
+            outcome.error = (
+                f"old_string matches {occurrences} times; make it unique or set replace_all"
+            )
+            continue
+
+        outcome.line = _line_of(content, content.index(old_string))
+        content = content.replace(old_string, new_string)
+        outcome.applied = True
+        outcome.replacements = occurrences
+
+    return content, outcomes
+
+
+def parse_unified_diff(diff: str) -> List[Hunk]:
+    """
+    Parse the hunks of a single-file unified diff.
+
+    File headers (---/+++ lines, "diff" lines) and "\\ No newline" markers are
+    ignored.
+
+    Raises:
+        PatchError: If the diff has no hunks or a hunk line is malformed
+    """
+    hunks: List[Hunk] = []
+    current: Optional[Hunk] = None
+    for raw_line in diff.splitlines():
+        header = _HUNK_HEADER.match(raw_line)
+        if header:
+            current = Hunk(old_start=int(header.group(1)))
+            hunks.append(current)
+            continue
+        if current is None or raw_line.startswith("\\"):
+            continue
+        if raw_line.startswith(("--- ", "+++ ")) and not current.old_lines and not current.new_lines:
+            continue
+
+        marker, text = raw_line[:1], raw_line[1:]
+        if marker == " " or raw_line == "":
+            current.old_lines.append(text)
+            current.new_lines.append(text)
+        elif marker == "-":
+            current.old_lines.append(text)
+        elif marker == "+":
+            current.new_lines.append(text)
+        else:
+            raise PatchError(f"Malformed line in hunk {len(hunks)}: {raw_line[:80]!r}")
+
+    if not hunks:
+        raise PatchError("diff contains no @@ hunks")
+    return hunks
+
+
+def _find_block(lines: List[str], block: List[str], expected: int, start: int) -> Optional[int]:
+    """Position of block in lines at or after start, preferring the one nearest expected"""
+    if not block:
+        return min(max(expected, start), len(lines))
+
+    last = len(lines) - len(block)
+    expected = min(max(expected, start), max(last, start))
+    for distance in range(0, max(last - start, 0) + 1):
+        for position in (expected - distance, expected + distance):
+            if start <= position <= last and lines[position:position + len(block)] == block:
+                return position
+    return None
+
+
+def apply_unified_diff(content: str, diff: str) -> Tuple[str, List[EditOutcome]]:
+    """
+    Apply a unified diff to content.
+
+    Hunks are applied in order; each must match after the previous one. A hunk
+    whose context does not match is skipped and reported, and the remaining
+    hunks are still checked.
+
+    Raises:
+        PatchError: If the diff cannot be parsed
+    """
+    lines = content.split("\n")
+    outcomes = []
+    offset = 0
+    search_from = 0
+    for index, hunk in enumerate(parse_unified_diff(diff)):
+        outcome = EditOutcome(index=index, kind="hunk")
+        outcomes.append(outcome)
+
+        # An insertion-only hunk's start is the line after which to insert
+        expected = (hunk.old_start if not hunk.old_lines else hunk.old_start - 1) + offset
+        position = _find_block(lines, hunk.old_lines, expected, search_from)
+        if position is None:
+            outcome.error = f"context for hunk starting at line {hunk.old_start} does not match the file"
+            continue
+
+        lines[position:position + len(hunk.old_lines)] = hunk.new_lines
+        offset += len(hunk.new_lines) - len(hunk.old_lines)
+        search_from = position + len(hunk.new_lines)
+        outcome.applied = True
+        outcome.replacements = 1
+        outcome.line = position + 1
+
+    return "\n".join(lines), outcomes
@@ -0,0 +1,133 @@
+"""
+Windowed views of site files for manage_site_files: line ranges, byte ranges
+and grep-style search with context. These let the agent fetch only the part
+of a large file it needs instead of the whole document.
+"""
+
+import re
+from typing import Dict, Any, List, Optional
+
+
+def slice_lines(content: str, start_line: Optional[int], end_line: Optional[int]) -> Dict[str, Any]:
+    """
+    Return lines start_line..end_line (1-based, inclusive) of content.
+
+    Args:
+        content: File content
+        start_line: First line to return (default: 1)
+        end_line: Last line to return (default: last line); clamped to the file
+
+    Returns:
+        Dict with content, start_line, end_line and total_lines
+    """
+    lines = content.splitlines(keepends=True)
+    total = len(lines)
+    start = max(1, start_line or 1)
+    end = min(total, end_line if end_line is not None else total)
+    return {
+        "content": "".join(lines[start - 1:end]) if start <= end else "",
+        "start_line": start,
+        "end_line": max(end, start - 1),
+        "total_lines": total,
+    }
+
+
+def slice_bytes(content: str, byte_offset: Optional[int], byte_length: Optional[int]) -> Dict[str, Any]:
+    """
+    Return a window of the UTF-8 encoded content.
+
+    Multi-byte characters cut by the window edges are dropped, so the
+    returned content may be slightly shorter than byte_length.
+
+    Args:
+        content: File content
+        byte_offset: First byte to return (default: 0)
+        byte_length: Number of bytes to return (default: to the end)
+
+    Returns:
+        Dict with content, byte_offset, byte_length and total_bytes
+    """
+    data = content.encode("utf-8")
+    start = min(max(0, byte_offset or 0), len(data))
+    end = len(data) if byte_length is None else min(len(data), start + max(0, byte_length))
+    return {
+        "content": data[start:end].decode("utf-8", errors="ignore"),
+        "byte_offset": start,
+        "byte_length": end - start,
+        "total_bytes": len(data),
+    }
+
+
+def search_text(
+    content: str,
+    pattern: str,
+    regex: bool = False,
+    ignore_case: bool = False,
+    context_lines: int = 2,
+    max_matches: int = 20,
+) -> Dict[str, Any]:
+    """
+    Find the lines matching pattern and return them with surrounding context.
+
+    Matches whose context windows touch are merged into one block. Each block
+    has a snippet with "<line>| " prefixes, and matching lines are marked with
+    ">".
+
+    Args:
+        content: File content
+        pattern: Literal substring, or a regular expression if regex is set
+        regex: Treat pattern as a regular expression
+        ignore_case: Case-insensitive matching
+        context_lines: Lines of context before and after each match
+        max_matches: Stop after this many matching lines
+
+    Returns:
+        Dict with blocks, match_count, truncated and total_lines
+
+    Raises:
+        re.error: If regex is set and pattern is not a valid expression
+    """
+    flags = re.IGNORECASE if ignore_case else 0
+    compiled = re.compile(pattern if regex else re.escape(pattern), flags)
+    lines = content.splitlines()
+    context_lines = max(0, context_lines)
+
+    match_lines: List[int] = []
+    truncated = False
+    for index, line in enumerate(lines):
+        if compiled.search(line):
+            if len(match_lines) >= max_matches:
+                truncated = True
+                break
+            match_lines.append(index)
+
+    # Merge overlapping/adjacent context windows into blocks
+    windows: List[List[int]] = []
+    for index in match_lines:
+        start, end = max(0, index - context_lines), min(len(lines) - 1, index + context_lines)
+        if windows and start <= windows[-1][1] + 1:
+            windows[-1][1] = end
+            windows[-1][2].append(index)
+        else:
+            windows.append([start, end, [index]])
+
+    width = len(str(len(lines)))
+    blocks = []
+    for start, end, indexes in windows:
+        marked = set(indexes)
+        snippet = "\n".join(
+            f"{'>' if i in marked else ' '}{i + 1:>{width}}| {lines[i]}" for i in range(start, end + 1)
+        )
+        blocks.append({
+            "start_line": start + 1,
+            "end_line": end + 1,
+            "match_lines": [i + 1 for i in indexes],
+            "snippet": snippet,
+        })
+
+    return {
+        "blocks": blocks,
+        "match_count": len(match_lines),
+        "truncated": truncated,
+        "total_lines": len(lines),
+    }
@@ -0,0 +1,691 @@
+"""
+Local ESM mirror for the packages generated sites import.
+
+Generated pages resolve `react`, `react-dom` and whatever else the model adds
+through an import map pointing at a public CDN. The mirror serves those
+packages from this server instead, under /vendor/<name>@<version>/..., so
+page loads do not depend on third-party latency and air-gapped deployments
+work.
+
+Packages come from a local tarball store (VENDOR_TARBALLS_DIR): npm-style
+.tgz files whose package.json declares an ES module entry point (`exports`
+import/browser conditions, `module`, or `"type": "module"`). Plain npm
+tarballs of CommonJS packages such as react cannot run in the browser, so
+`python -m tools.vendor_mirror seed react@19.2.0 react-dom@19.2.0/client`
+builds store tarballs from the CDN's ESM bundles on a connected machine.
+Each bundle's imports of other packages are rewritten to bare specifiers,
+so every package resolves through the page's import map and a page gets
+exactly one copy of React.
+
+Tarballs are extracted on first use into VENDOR_DIR/<name>@<version>/. A
+name@version directory never changes after that, so it is served with
+immutable cache headers. When sites pin different versions that are
+compatible (same major version by default), the rewrite maps all of them
+to the newest one in the store, so browsers and the mirror keep one copy.
+Packages released in lockstep (react and react-dom) only move to a version
+the store has for all of them; otherwise the page keeps its exact pins.
+"""
+
+import argparse
+import io
+import json
+import logging
+import os
+import re
+import shutil
+import tarfile
+import tempfile
+import threading
+import urllib.request
+from dataclasses import dataclass, field
+from pathlib import Path, PurePosixPath
+from typing import Callable, Dict, Any, Iterable, List, Optional, Set, Tuple
+
+from .site_storage import SiteStorage
+
+AGENT_DIR = Path(__file__).parent.parent
+
+# Modules resolved through the mirror
+VENDOR_URL_PREFIX = "/vendor/"
+
+_IMPORT_MAP = re.compile(r"(<script\b[^>]*\btype=[\"']importmap[\"'][^>]*>)(.*?)(</script>)", re.I | re.S)
+# CDN module URLs: jsdelivr (/npm/...[/+esm]), esm.sh, unpkg, skypack
+_CDN_URL = re.compile(
+    r"^https?://(?:cdn\.jsdelivr\.net/npm|esm\.sh|unpkg\.com|cdn\.skypack\.dev)/"
+    r"(?P<name>(?:@[\w.\-]+/)?[\w.\-]+)(?:@(?P<version>[^/?#]+))?"
+    r"(?P<subpath>(?:/(?!\+esm)[^?#]*?)?)/?(?:/?\+esm)?(?:[?#].*)?$"
+)
+# Imports inside CDN ESM bundles: "/npm/<name>@<version>[/<subpath>]/+esm"
+_BUNDLE_IMPORT = re.compile(r"([\"'])/npm/((?:@[\w.\-]+/)?[\w.\-]+)@([^/\"']+)((?:/[^\"']*?)?)/\+esm\1")
+_VERSION = re.compile(r"^(\d+)\.(\d+)\.(\d+)(?:-([0-9A-Za-z.\-]+))?$")
+_PACKAGE_NAME = re.compile(r"^(?:@[a-z0-9][\w.\-]*/)?[a-z0-9][\w.\-]*$", re.I)
+_ESM_CONDITIONS = ("browser", "import", "module", "default")
+
+# Version de-duplication policies
+DEDUPE_POLICIES = ("major", "minor", "exact")
+
+# Packages that must resolve to the same version (React rejects a react-dom from another release)
+VERSION_GROUPS = (frozenset({"react", "react-dom"}),)
+
+
+def parse_version(version: str) -> Optional[Tuple[int, int, int, Tuple[str, ...]]]:
+    """Parse a semver string; pre-releases sort before their release"""
+    match = _VERSION.match(version)
+    if match is None:
+        return None
+    major, minor, patch, pre = match.groups()
+    # A release sorts after any of its pre-releases
+    return int(major), int(minor), int(patch), tuple(pre.split(".")) if pre else ("~",)
+
+
+def version_matches(version: str, spec: Optional[str]) -> bool:
+    """
+    Check a concrete version against a CDN-style version spec.
+
+    Supports exact versions, partial versions (`19`, `19.2`), `^x.y.z`,
+    `~x.y.z`, and a missing spec / `latest` (any release).
+    """
+    parsed = parse_version(version)
+    if parsed is None:
+        return False
+    if not spec or spec in ("latest", "*", "x"):
+        return parsed[3] == ("~",)
+    if spec.startswith(("^", "~")):
+        base = parse_version(spec[1:])
+        if base is None:
+            return False
+        if parsed < base:
+            return False
+        if spec[0] == "~" or base[0] == 0:
+            return parsed[:2] == base[:2]
+        return parsed[0] == base[0]
+    if parse_version(spec) is not None:
+        return version == spec
+    parts = spec.split(".")
+    if not all(part.isdigit() for part in parts) or len(parts) > 3:
+        return False
+    return parsed[3] == ("~",) and list(parsed[:len(parts)]) == [int(part) for part in parts]
+
+
+def split_spec(spec: str) -> Tuple[str, Optional[str], str]:
+    """Split `name@version/subpath` (scoped names allowed) into its parts"""
+    scope = ""
+    if spec.startswith("@"):
+        scope, _, spec = spec.partition("/")
+        scope += "/"
+    name_version, _, subpath = spec.partition("/")
+    name, _, version = name_version.partition("@")
+    return scope + name, version or None, subpath
+
+
+def parse_cdn_url(url: str) -> Optional[Tuple[str, Optional[str], str]]:
+    """
+    Recognize a CDN module URL.
+
+    Returns:
+        (package name, version spec or None, subpath without leading slash), or None
+    """
+    match = _CDN_URL.match(url.strip())
+    if match is None:
+        return None
+    return match.group("name"), match.group("version"), match.group("subpath").strip("/")
+
+
+def _safe_relative(path: str) -> Optional[PurePosixPath]:
+    relative = PurePosixPath(path)
+    if relative.is_absolute() or any(part in ("", "..") for part in relative.parts):
+        return None
+    return relative
+
+
+@dataclass
+class MirroredPackage:
+    """A package extracted into the mirror"""
+
+    name: str
+    version: str
+    directory: Path
+    manifest: Dict[str, Any]
+
+    @property
+    def url(self) -> str:
+        return f"{VENDOR_URL_PREFIX}{self.name}@{self.version}/"
+
+    @property
+    def dependencies(self) -> Dict[str, str]:
+        return dict(self.manifest.get("dependencies") or {})
+
+    def _export_target(self, target: Any) -> Optional[Tuple[str, bool]]:
+        """Pick the ESM target of an exports entry; returns (path, declared as ESM)"""
+        if isinstance(target, str):
+            return target, target.endswith(".mjs") or self.manifest.get("type") == "module"
+        if isinstance(target, list):
+            for item in target:
+                resolved = self._export_target(item)
+                if resolved is not None:
+                    return resolved
+            return None
+        if isinstance(target, dict):
+            for condition in _ESM_CONDITIONS:
+                if condition in target:
+                    resolved = self._export_target(target[condition])
+                    if resolved is not None:
+                        path, is_esm = resolved
+                        return path, is_esm or condition in ("import", "module")
+        return None
+
+    def entry(self, subpath: str = "") -> Optional[str]:
+        """
+        Resolve the ES module file for an import of this package (or a subpath).
+
+        Args:
+            subpath: Subpath after the package name ("" for the package itself)
+
+        Returns:
+            File path relative to the package directory, or None if there is
+            no ES module entry (e.g. a CommonJS-only package)
+        """
+        key = f"./{subpath}" if subpath else "."
+        exports = self.manifest.get("exports")
+        resolved: Optional[Tuple[str, bool]] = None
+        if isinstance(exports, (str, list)) or (
+            isinstance(exports, dict) and exports and not next(iter(exports)).startswith(".")
+        ):
+            exports = {".": exports}
+        if isinstance(exports, dict) and key in exports:
+            resolved = self._export_target(exports[key])
+        elif not subpath:
+            if isinstance(self.manifest.get("module"), str):
+                resolved = self.manifest["module"], True
+            elif isinstance(self.manifest.get("browser"), str):
+                resolved = self.manifest["browser"], self.manifest.get("type") == "module"
+            else:
+                main = self.manifest.get("main") or "index.js"
+                resolved = main, main.endswith(".mjs") or self.manifest.get("type") == "module"
+        else:
+            candidate = subpath if subpath.endswith((".js", ".mjs")) else subpath + ".js"
+            resolved = candidate, candidate.endswith(".mjs") or self.manifest.get("type") == "module"
+
+        if resolved is None or not resolved[1]:
+            return None
+        relative = _safe_relative(resolved[0].removeprefix("./"))
+        if relative is None or not (self.directory / relative).is_file():
+            return None
+        return relative.as_posix()
+
+
+@dataclass
+class RewriteReport:
+    """What the import map rewrite changed for one page"""
+
+    rewritten: Dict[str, Dict[str, str]] = field(default_factory=dict)
+    added: Dict[str, str] = field(default_factory=dict)
+    kept: Dict[str, str] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"rewritten": self.rewritten, "added": self.added, "kept": self.kept}
+
+
+class VendorMirror:
+    """Local package mirror filled from a tarball store"""
+
+    def __init__(self, root: Path, tarball_dir: Path, dedupe: str = "major"):
+        """
+        Args:
+            root: Directory holding extracted packages (<name>@<version>/)
+            tarball_dir: Local store of .tgz packages
+            dedupe: Version de-duplication policy: "major" (newest version with the same
+                major), "minor" (same major.minor) or "exact" (no de-duplication)
+        """
+        if dedupe not in DEDUPE_POLICIES:
+            raise ValueError(f"Unknown dedupe policy {dedupe!r}; expected one of {DEDUPE_POLICIES}")
+        self.root = root
+        self.tarball_dir = tarball_dir
+        self.dedupe = dedupe
+        # (name, version) -> tarball path, rebuilt when the store directory changes
+        self._tarballs: Dict[Tuple[str, str], Path] = {}
+        self._tarballs_mtime: Optional[int] = None
+        self._packages: Dict[Tuple[str, str], MirroredPackage] = {}
+        # Index and extraction run on the site I/O pool
+        self._lock = threading.Lock()
+        self.extractions = 0
+
+    @classmethod
+    def from_env(cls) -> "VendorMirror":
+        """Create a mirror configured from VENDOR_DIR, VENDOR_TARBALLS_DIR and VENDOR_DEDUPE"""
+        return cls(
+            root=Path(os.getenv("VENDOR_DIR", str(AGENT_DIR / "vendor"))),
+            tarball_dir=Path(os.getenv("VENDOR_TARBALLS_DIR", str(AGENT_DIR / "vendor_tarballs"))),
+            dedupe=os.getenv("VENDOR_DEDUPE", "major"),
+        )
+
+    # -- store --
+
+    @staticmethod
+    def _read_tarball_manifest(path: Path) -> Optional[Dict[str, Any]]:
+        try:
+            with tarfile.open(path, "r:*") as archive:
+                for member in archive:
+                    if member.isfile() and PurePosixPath(member.name).parts[1:] == ("package.json",):
+                        return json.load(archive.extractfile(member))
+        except (OSError, tarfile.TarError, json.JSONDecodeError, UnicodeDecodeError):
+            logging.warning("Skipping unreadable vendor tarball %s", path)
+        return None
+
+    def _index(self) -> Dict[Tuple[str, str], Path]:
+        """(name, version) -> tarball path for every package in the store (blocking)"""
+        try:
+            mtime = self.tarball_dir.stat().st_mtime_ns
+        except OSError:
+            return {}
+        with self._lock:
+            if mtime == self._tarballs_mtime:
+                return self._tarballs
+        index: Dict[Tuple[str, str], Path] = {}
+        for path in sorted(self.tarball_dir.glob("*.tgz")):
+            manifest = self._read_tarball_manifest(path)
+            if manifest and manifest.get("name") and parse_version(str(manifest.get("version", ""))):
+                index[(manifest["name"], manifest["version"])] = path
+        with self._lock:
+            self._tarballs, self._tarballs_mtime = index, mtime
+        return index
+
+    def available(self, name: Optional[str] = None) -> Dict[str, List[str]]:
+        """Versions in the store (and already extracted), newest first, per package"""
+        versions: Dict[str, Set[str]] = {}
+        for package, version in self._index():
+            versions.setdefault(package, set()).add(version)
+        if self.root.is_dir():
+            for manifest_path in list(self.root.glob("*@*/package.json")) + list(self.root.glob("@*/*@*/package.json")):
+                package, version, _ = split_spec(manifest_path.parent.relative_to(self.root).as_posix())
+                if version and parse_version(version):
+                    versions.setdefault(package, set()).add(version)
+        if name is not None:
+            versions = {name: versions.get(name, set())}
+        return {
+            package: sorted(found, key=parse_version, reverse=True)
+            for package, found in sorted(versions.items())
+        }
+
+    def select_version(self, name: str, spec: Optional[str]) -> Optional[str]:
+        """
+        Choose the mirrored version for a requested one, applying the dedupe policy.
+
+        An exact pin is widened to its major (or major.minor) line so sites pinning
+        19.1.0 and 19.2.0 share one copy; ranges pick the newest matching version.
+        Packages in a VERSION_GROUPS group are only widened to versions every
+        package of the group has in the store (else the exact pin is kept), and
+        ranges prefer those versions, so react and react-dom never drift apart.
+        """
+        versions = self.available(name).get(name, [])
+        shared = self._shared_versions(name, versions)
+        if spec and parse_version(spec) is not None and self.dedupe != "exact":
+            parsed = parse_version(spec)
+            width = 1 if self.dedupe == "major" else 2
+            compatible = [
+                version for version in shared
+                if parse_version(version)[:width] == parsed[:width] and parse_version(version) >= parsed
+                and (parse_version(version)[3] == ("~",) or parsed[3] != ("~",))
+            ]
+            if compatible:
+                return compatible[0]
+        for version in shared + versions:
+            if version_matches(version, spec):
+                return version
+        return None
+
+    def _shared_versions(self, name: str, versions: List[str]) -> List[str]:
+        """The versions of name that every package released together with it also has in the store"""
+        for group in VERSION_GROUPS:
+            if name in group:
+                for sibling in group - {name}:
+                    sibling_versions = set(self.available(sibling).get(sibling, []))
+                    versions = [version for version in versions if version in sibling_versions]
+        return versions
+
+    def ensure(self, name: str, version: str) -> Optional[MirroredPackage]:
+        """
+        Return the extracted package, extracting it from the store if needed (blocking).
+
+        Returns:
+            The mirrored package, or None if it is neither extracted nor in the store
+        """
+        if not _PACKAGE_NAME.match(name) or parse_version(version) is None:
+            return None
+        with self._lock:
+            package = self._packages.get((name, version))
+        if package is not None:
+            return package
+
+        directory = self.root / f"{name}@{version}"
+        if not (directory / "package.json").is_file():
+            tarball = self._index().get((name, version))
+            if tarball is None:
+                return None
+            self._extract(tarball, directory)
+
+        try:
+            manifest = json.loads((directory / "package.json").read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            return None
+        package = MirroredPackage(name=name, version=version, directory=directory, manifest=manifest)
+        with self._lock:
+            self._packages[(name, version)] = package
+        return package
+
+    def _extract(self, tarball: Path, directory: Path) -> None:
+        """Extract an npm tarball (package/ prefix stripped) and move it into place atomically"""
+        directory.parent.mkdir(parents=True, exist_ok=True)
+        staging = Path(tempfile.mkdtemp(prefix=".extract-", dir=directory.parent))
+        try:
+            with tarfile.open(tarball, "r:*") as archive:
+                for member in archive:
+                    # Only regular files and directories, never outside the package directory
+                    parts = PurePosixPath(member.name).parts
+                    relative = _safe_relative("/".join(parts[1:])) if len(parts) > 1 else None
+                    if relative is None or not (member.isfile() or member.isdir()):
+                        continue
+                    target = staging / relative
+                    if member.isdir():
+                        target.mkdir(parents=True, exist_ok=True)
+                        continue
+                    target.parent.mkdir(parents=True, exist_ok=True)
+                    with archive.extractfile(member) as source, open(target, "wb") as destination:
+                        shutil.copyfileobj(source, destination)
+                    target.chmod(0o644)
+            try:
+                os.rename(staging, directory)
+                self.extractions += 1
+            except OSError:
+                # Another worker extracted it first; theirs is identical
+                if not (directory / "package.json").is_file():
+                    raise
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+    # -- import maps --
+
+    def rewrite_import_map(self, html: str) -> Tuple[str, RewriteReport]:
+        """
+        Point a page's import map at the mirror (blocking: may extract packages).
+
+        CDN entries whose package (and subpath) has an ES module build in the
+        mirror are rewritten to /vendor/ URLs; their dependencies are added as
+        bare specifiers so bundles importing them resolve too. Anything else is
+        left pointing at the CDN and listed under "kept" with the reason.
+
+        Returns:
+            Tuple of (new HTML, report)
+        """
+        report = RewriteReport()
+        match = _IMPORT_MAP.search(html)
+        if match is None:
+            return html, report
+        try:
+            import_map = json.loads(match.group(2))
+        except json.JSONDecodeError:
+            report.kept["*"] = "import map is not valid JSON"
+            return html, report
+        imports = import_map.get("imports")
+        if not isinstance(imports, dict):
+            return html, report
+
+        mirrored: Dict[str, MirroredPackage] = {}
+        for specifier, url in list(imports.items()):
+            parsed = parse_cdn_url(url) if isinstance(url, str) else None
+            if parsed is None:
+                continue
+            name, spec, subpath = parsed
+            version = self.select_version(name, spec)
+            package = self.ensure(name, version) if version else None
+            if package is None:
+                report.kept[specifier] = f"{name}@{spec or 'latest'} is not in the vendor store"
+                continue
+            entry = package.entry(subpath)
+            if entry is None:
+                report.kept[specifier] = f"{name}@{version} has no ES module entry for '{subpath or '.'}'"
+                continue
+            imports[specifier] = package.url + entry
+            report.rewritten[specifier] = {"from": url, "to": imports[specifier], "version": version}
+            mirrored[name] = package
+
+        # Bundles import their dependencies by bare name; make sure those resolve
+        pending = list(mirrored.values())
+        while pending:
+            package = pending.pop()
+            for dependency, spec in package.dependencies.items():
+                if dependency in imports:
+                    continue
+                version = self.select_version(dependency, spec)
+                dependency_package = self.ensure(dependency, version) if version else None
+                entry = dependency_package.entry() if dependency_package else None
+                if entry is None:
+                    continue
+                imports[dependency] = dependency_package.url + entry
+                report.added[dependency] = imports[dependency]
+                pending.append(dependency_package)
+
+        if not report.rewritten:
+            return html, report
+        # Keep the page's indentation: the JSON one level deeper than the <script> tag
+        indent = re.match(r"\s*", match.group(2)).group(0).lstrip("\n") or "  "
+        body = json.dumps(import_map, indent=2).replace("\n", "\n" + indent)
+        replaced = f"{match.group(1)}\n{indent}{body}\n{indent[:-2]}{match.group(3)}"
+        return html[:match.start()] + replaced + html[match.end():], report
+
+    def resolve_file(self, path: str) -> Optional[Path]:
+        """
+        Map a /vendor/ request path to a file in the mirror (blocking).
+
+        Returns:
+            The file path, or None if it is not a file inside an extracted package
+        """
+        relative = _safe_relative(path)
+        if relative is None or any(part.startswith(".") for part in relative.parts):
+            return None
+        # The first segment (two for scoped packages) must be name@version
+        package_parts = 2 if relative.parts[0].startswith("@") else 1
+        if len(relative.parts) <= package_parts or "@" not in relative.parts[package_parts - 1][1:]:
+            return None
+        name, version, _ = split_spec("/".join(relative.parts[:package_parts]))
+        if version is None or self.ensure(name, version) is None:
+            return None
+        file_path = self.root / relative
+        try:
+            if not file_path.resolve().is_relative_to(self.root.resolve()) or not file_path.is_file():
+                return None
+        except OSError:
+            return None
+        return file_path
+
+    # -- reporting --
+
+    def usage_report(self, storage: SiteStorage) -> Dict[str, Any]:
+        """
+        Which sites pin which package versions (blocking; scans every site).
+
+        For each package: the versions pinned by site sources (import map CDN
+        URLs), the mirrored versions their published builds use, the versions
+        available in the store, and the version the dedupe policy would pick
+        for each pin.
+        """
+        packages: Dict[str, Dict[str, Any]] = {}
+
+        def entry(name: str) -> Dict[str, Any]:
+            return packages.setdefault(name, {"pinned": {}, "vendored": {}, "resolves_to": {}})
+
+        sites = 0
+        for site_id in storage.list_sites():
+            sites += 1
+            try:
+                found = storage.read(site_id, "index.html")
+                source = found[0].decode("utf-8") if found is not None else None
+            except (OSError, UnicodeDecodeError):
+                source = None
+            if source is None:
+                continue
+            for name, spec in self._pins(source):
+                entry(name)["pinned"].setdefault(spec or "latest", []).append(site_id)
+            try:
+                found = storage.read(site_id, "dist/manifest.json")
+                manifest = json.loads(found[0].decode("utf-8")) if found is not None else None
+            except (OSError, ValueError):
+                manifest = None
+            if manifest is None:
+                continue
+            rewritten = manifest.get("steps", {}).get("vendor_imports", {}).get("rewritten", {})
+            for specifier, details in rewritten.items():
+                name, _, _ = split_spec(details.get("to", "").removeprefix(VENDOR_URL_PREFIX))
+                versions = entry(name)["vendored"].setdefault(details.get("version", "?"), [])
+                if site_id not in versions:
+                    versions.append(site_id)
+
+        available = self.available()
+        for name, details in packages.items():
+            details["available"] = available.get(name, [])
+            details["resolves_to"] = {
+                spec: self.select_version(name, None if spec == "latest" else spec) for spec in details["pinned"]
+            }
+            details["distinct_pins"] = len(details["pinned"])
+            details["distinct_vendored"] = len({v for v in details["resolves_to"].values() if v})
+        return {"sites": sites, "dedupe": self.dedupe, "packages": dict(sorted(packages.items()))}
+
+    @staticmethod
+    def _pins(html: str) -> List[Tuple[str, Optional[str]]]:
+        match = _IMPORT_MAP.search(html)
+        if match is None:
+            return []
+        try:
+            imports = json.loads(match.group(2)).get("imports", {})
+        except (json.JSONDecodeError, AttributeError):
+            return []
+        pins = set()
+        for url in imports.values():
+            parsed = parse_cdn_url(url) if isinstance(url, str) else None
+            if parsed is not None:
+                pins.add(parsed[:2])
+        return sorted(pins, key=lambda pin: (pin[0], pin[1] or ""))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "root": str(self.root),
+            # Cached index only: stats() runs on the event loop (/health) and must not scan the store
+            "tarballs": len(self._tarballs),
+            "extracted": len(self._packages),
+            "extractions": self.extractions,
+            "dedupe": self.dedupe,
+        }
+
+
+# -- seeding the store from a CDN (run on a connected machine) --
+
+def _fetch(url: str) -> str:
+    with urllib.request.urlopen(url, timeout=60) as response:
+        return response.read().decode("utf-8")
+
+
+def seed_store(
+    specs: Iterable[str],
+    tarball_dir: Path,
+    cdn: str = "https://cdn.jsdelivr.net",
+    fetch: Callable[[str], str] = _fetch,
+) -> List[Path]:
+    """
+    Build store tarballs from the CDN's ESM bundles (`<cdn>/npm/<name>@<version>[/<subpath>]/+esm`).
+
+    Every bundle import of another package (`/npm/x@v/+esm`) is followed and
+    rewritten to a bare specifier (`x`, `x/subpath`), and the dependency is
+    recorded in package.json, so the import map resolves it to the mirror.
+
+    Args:
+        specs: Packages as name@version or name@version/subpath (exact versions)
+        tarball_dir: Store directory to write <name>-<version>.tgz files to
+        cdn: CDN origin serving /npm/...+esm bundles
+        fetch: URL loader (for tests or proxies)
+
+    Returns:
+        Paths of the tarballs written
+    """
+    # (name, version) -> {subpath: module source}
+    modules: Dict[Tuple[str, str], Dict[str, str]] = {}
+    dependencies: Dict[Tuple[str, str], Dict[str, str]] = {}
+    queue: List[Tuple[str, str, str]] = []
+    for spec in specs:
+        name, version, subpath = split_spec(spec)
+        if not version or parse_version(version) is None:
+            raise ValueError(f"'{spec}' needs an exact version (name@x.y.z)")
+        queue.append((name, version, subpath))
+
+    while queue:
+        name, version, subpath = queue.pop()
+        if subpath in modules.get((name, version), {}):
+            continue
+        source = fetch(f"{cdn}/npm/{name}@{version}{'/' + subpath if subpath else ''}/+esm")
+
+        def bare(match: "re.Match[str]") -> str:
+            quote, dep_name, dep_version, dep_subpath = match.groups()
+            dep_subpath = dep_subpath.strip("/")
+            queue.append((dep_name, dep_version, dep_subpath))
+            if dep_name != name:
+                dependencies.setdefault((name, version), {})[dep_name] = dep_version
+            return f"{quote}{dep_name}{'/' + dep_subpath if dep_subpath else ''}{quote}"
+
+        modules.setdefault((name, version), {})[subpath] = _BUNDLE_IMPORT.sub(bare, source)
+
+    tarball_dir.mkdir(parents=True, exist_ok=True)
+    written = []
+    for (name, version), files in sorted(modules.items()):
+        exports = {("./" + subpath if subpath else "."): f"./{subpath or 'index'}.js" for subpath in sorted(files)}
+        manifest = {
+            "name": name,
+            "version": version,
+            "type": "module",
+            "exports": exports,
+            "dependencies": dependencies.get((name, version), {}),
+            "description": f"ESM build of {name}@{version} from {cdn}",
+        }
+        entries = {"package/package.json": json.dumps(manifest, indent=2)}
+        entries.update({f"package/{subpath or 'index'}.js": source for subpath, source in files.items()})
+        path = tarball_dir / f"{name.replace('/', '-').lstrip('@')}-{version}.tgz"
+        with tarfile.open(path, "w:gz") as archive:
+            for member_name, content in sorted(entries.items()):
+                data = content.encode("utf-8")
+                info = tarfile.TarInfo(member_name)
+                info.size = len(data)
+                info.mode = 0o644
+                archive.addfile(info, io.BytesIO(data))
+        written.append(path)
+    return written
+
+
+# Process-wide mirror used by the publish step and the /vendor route
+vendor_mirror = VendorMirror.from_env()
+
+
+def main() -> None:
+    from .site_documents import site_documents
+
+    parser = argparse.ArgumentParser(description="Manage the local ESM vendor mirror")
+    commands = parser.add_subparsers(dest="command", required=True)
+    seed = commands.add_parser("seed", help="Build store tarballs from CDN ESM bundles (needs network)")
+    seed.add_argument("specs", nargs="+", help="name@version or name@version/subpath")
+    seed.add_argument("--cdn", default="https://cdn.jsdelivr.net")
+    fill = commands.add_parser("fill", help="Extract store tarballs into the mirror")
+    fill.add_argument("specs", nargs="*", help="name@version (default: everything in the store)")
+    commands.add_parser("report", help="Which sites pin which versions")
+    args = parser.parse_args()
+
+    if args.command == "seed":
+        for path in seed_store(args.specs, vendor_mirror.tarball_dir, cdn=args.cdn):
+            print(path)
+    elif args.command == "fill":
+        targets = [split_spec(spec)[:2] for spec in args.specs] or list(vendor_mirror._index())
+        for name, version in targets:
+            package = vendor_mirror.ensure(name, version) if version else None
+            print(f"{name}@{version}: {package.directory if package else 'not in store'}")
+    else:
+        print(json.dumps(vendor_mirror.usage_report(site_documents.storage), indent=2))
+
+
+if __name__ == "__main__":
+    main()